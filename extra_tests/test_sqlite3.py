@@ -391,3 +391,80 @@ def test_description_delete():
         ("x", None, None, None, None, None, None),
         ("y", None, None, None, None, None, None),
     )
+
+
+def test_fetch_batches(con):
+    cur = con.cursor()
+    cur.execute("create table foo(x, y, z)")
+    rows = [(i, u"t%d" % i, float(i) / 2) for i in range(1000)]
+    cur.executemany("insert into foo values (?, ?, ?)", iter(rows))
+    assert cur.rowcount == 1000
+    cur.execute("select * from foo order by x")
+    assert cur.fetchone() == rows[0]
+    assert cur.fetchmany(300) == rows[1:301]
+    assert cur.fetchmany(0) == rows[301:]
+    assert cur.fetchmany(10) == []
+    assert cur.execute("select * from foo order by x").fetchall() == rows
+    cur.execute("select * from foo order by x")
+    assert list(cur) == rows
+
+def test_executemany_batches(con):
+    con.execute("create table foo(x unique, y)")
+    con.executemany("insert into foo values (:x, :y)",
+                    [{'x': i, 'y': buffer('\0' * i)} for i in range(600)])
+    rows = con.execute("select x, y from foo order by x").fetchall()
+    assert len(rows) == 600
+    assert str(rows[599][1]) == '\0' * 599
+    with pytest.raises(_sqlite3.IntegrityError):
+        con.executemany("insert into foo values (?, ?)",
+                        [(i, None) for i in range(1000, 1300)] + [(5, None)])
+    assert con.execute("select count(*) from foo").fetchone() == (900,)
+    with pytest.raises(_sqlite3.ProgrammingError):
+        con.executemany("insert into foo values (?, ?)", [(2000, 2), (1,)])
+    assert con.execute("select count(*) from foo").fetchone() == (901,)
+    with pytest.raises(_sqlite3.InterfaceError):
+        con.executemany("insert into foo values (?, ?)", [(2000, object())])
+
+def test_fetchall_converters_and_row_factory(con):
+    con2 = _sqlite3.connect(":memory:", detect_types=_sqlite3.PARSE_COLNAMES)
+    _sqlite3.register_converter("twice", lambda s: s * 2)
+    con2.execute("create table foo(x)")
+    con2.executemany("insert into foo values (?)", [(u"a%d" % i,)
+                                                    for i in range(300)])
+    rows = con2.execute('select x as "x [twice]", x from foo').fetchall()
+    assert rows[299] == ("a299a299", u"a299")
+    con2.row_factory = _sqlite3.Row
+    rows = con2.execute('select x from foo').fetchmany(260)
+    assert len(rows) == 260
+    assert rows[259]['x'] == u"a259"
+    con2.close()
+
+def test_executemany_bad_row_after_batched_rows(con):
+    con.execute("create table foo(x)")
+    with pytest.raises(_sqlite3.InterfaceError):
+        con.executemany("insert into foo values (?)",
+                        [(i,) for i in range(10)] + [(object(),)])
+    assert con.execute("select count(*) from foo").fetchone() == (10,)
+    def gen():
+        for i in range(5):
+            yield (object() if i == 2 else i,)
+    params = gen()
+    with pytest.raises(_sqlite3.InterfaceError):
+        con.executemany("insert into foo values (?)", params)
+    assert next(params) == (3,)
+    assert con.execute("select count(*) from foo").fetchone() == (12,)
+
+def test_fetch_batches_converter_error(con):
+    con2 = _sqlite3.connect(":memory:", detect_types=_sqlite3.PARSE_COLNAMES)
+    def convert(s):
+        if s == b"5":
+            raise ValueError
+        return int(s)
+    _sqlite3.register_converter("strict", convert)
+    con2.execute("create table foo(x)")
+    con2.executemany("insert into foo values (?)", [(i,) for i in range(10)])
+    cur = con2.execute('select x as "x [strict]" from foo order by x')
+    with pytest.raises(ValueError):
+        cur.fetchall()
+    assert cur.fetchall() == [(i,) for i in range(6, 10)]
+    con2.close()
@@ -309,6 +309,11 @@ if _reversed_dict is None:
     for _key, _value in _compat_with_unordered_dicts().items():
         setattr(OrderedDict, _key, _value)
     del _key, _value
+else:
+    try:
+        from _collections import OrderedDict
+    except ImportError:
+        pass
 
 ################################################################################
 ### namedtuple
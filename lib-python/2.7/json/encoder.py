@@ -206,6 +206,15 @@ class JSONEncoder(object):
         '{"foo": ["bar", "baz"]}'
 
         """
+        if (_pypyjson_encode is not None and self.ensure_ascii and
+                self.encoding == 'utf-8' and
+                type(self.item_separator) is str and
+                type(self.key_separator) is str and
+                (self.indent is None or type(self.indent) is int)):
+            return _pypyjson_encode(o, self.skipkeys, self.check_circular,
+                                    self.allow_nan, self.sort_keys,
+                                    self.indent, self.item_separator,
+                                    self.key_separator, self.default)
         if self.check_circular:
             markers = {}
         else:
@@ -536,3 +545,7 @@ try:
     from _pypyjson import raw_encode_basestring_ascii
 except ImportError:
     pass
+try:
+    from _pypyjson import encode as _pypyjson_encode
+except ImportError:
+    _pypyjson_encode = None
@@ -107,6 +107,9 @@ _STMT_TYPE_OTHER = 4
 _STMT_TYPE_SELECT = 5
 _STMT_TYPE_INVALID = 6
 
+# number of rows bound or decoded by a single call to the C helpers
+_BATCH_SIZE = 256
+
 
 class Error(StandardError):
     pass
@@ -682,9 +685,26 @@ class Connection(object):
                 raise OperationalError("Error enabling load extension")
 
 
+class _RawRows(object):
+    """The rows read by one call to _pypy_sqlite3_fetch_rows(), which
+    Cursor decodes one at a time.  'finished' tells if the statement was
+    done after these rows, and 'error' is the exception to raise once they
+    are all returned."""
+
+    def __init__(self, cells, data, num_cols, num_rows):
+        self.cells = cells
+        self.data = data
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.index = 0
+        self.finished = False
+        self.error = None
+
+
 class Cursor(object):
     __initialized = False
     __statement = None
+    __raw_rows = None
 
     def __init__(self, con):
         if not isinstance(con, Connection):
@@ -770,6 +790,9 @@ class Cursor(object):
 
             self.__row_cast_map.append(converter)
 
+        self.__raw_columns = bytes(bytearray(
+            [converter is not None for converter in self.__row_cast_map]))
+
     def __fetch_one_row(self):
         num_cols = _lib.sqlite3_data_count(self.__statement._statement)
         row = newlist_hint(num_cols)
@@ -808,6 +831,90 @@ class Cursor(object):
             row.append(val)
         return tuple(row)
 
+    def __fetch_rows(self, max_rows):
+        # step up to 'max_rows' times through the statement with a single
+        # call to the C helper.  The rows are kept undecoded in
+        # self.__raw_rows and decoded one at a time by __decode_raw_row(),
+        # so that a converter raising does not lose the rows after it.
+        statement = self.__statement._statement
+        num_cols = _lib.sqlite3_column_count(statement)
+        if self.__connection._detect_types:
+            raw_columns = self.__raw_columns
+        else:
+            raw_columns = _ffi.NULL
+        cells = _ffi.new('_pypy_sqlite3_cell[]', max(num_cols, 1) * max_rows)
+        p_data = _ffi.new('char **')
+        p_num_rows = _ffi.new('int *')
+        ret = _lib._pypy_sqlite3_fetch_rows(statement, num_cols, max_rows,
+                                            raw_columns, cells, p_data,
+                                            p_num_rows)
+        data = _ffi.gc(p_data[0], _lib._pypy_sqlite3_free)
+        raw = _RawRows(cells, data, num_cols, p_num_rows[0])
+        if ret != _lib.SQLITE_ROW:
+            raw.finished = True
+            self.__statement._reset()
+            if ret != _lib.SQLITE_DONE:
+                raw.error = self.__connection._get_exception(ret)
+        self.__raw_rows = raw
+
+    def __decode_raw_row(self, raw):
+        # the row is consumed before it is decoded, like a row stepped
+        # through before __fetch_one_row() is called
+        k = raw.index * raw.num_cols
+        raw.index += 1
+        cells = raw.cells
+        data = raw.data
+        text_factory = self.__connection.text_factory
+        row = newlist_hint(raw.num_cols)
+        for i in xrange(raw.num_cols):
+            cell = cells[k]
+            k += 1
+            typ = cell.type
+            if typ == _lib.SQLITE_INTEGER:
+                val = int(cell.ival)
+            elif typ == _lib.SQLITE_FLOAT:
+                val = cell.dval
+            elif typ == _lib.SQLITE_TEXT:
+                val = _ffi.buffer(data + cell.offset, cell.size)[:]
+                val = text_factory(val)
+            elif typ == _lib.SQLITE_BLOB:
+                val = _ffi.buffer(data + cell.offset, cell.size)[:]
+                val = _BLOB_TYPE(val)
+            elif typ == _lib._PYPY_SQLITE3_RAW:
+                val = _ffi.buffer(data + cell.offset, cell.size)[:]
+                val = self.__row_cast_map[i](val)
+            else:
+                val = None
+            row.append(val)
+        return tuple(row)
+
+    def __read_next_row(self, max_rows):
+        # set __next_row to the row following the one just returned.  If
+        # no row is left from the last batch, step up to 'max_rows' times
+        # through the statement.
+        while True:
+            raw = self.__raw_rows
+            if raw is None:
+                if max_rows == 1:
+                    ret = _lib.sqlite3_step(self.__statement._statement)
+                    if ret == _lib.SQLITE_ROW:
+                        self.__next_row = self.__fetch_one_row()
+                    else:
+                        self.__statement._reset()
+                        if ret != _lib.SQLITE_DONE:
+                            raise self.__connection._get_exception(ret)
+                    return
+                self.__fetch_rows(max_rows)
+                raw = self.__raw_rows
+            if raw.index < raw.num_rows:
+                self.__next_row = self.__decode_raw_row(raw)
+                return
+            self.__raw_rows = None
+            if raw.finished:
+                if raw.error is not None:
+                    raise raw.error
+                return
+
     def __execute(self, multiple, sql, many_params):
         self.__locked = True
         self._reset = False
@@ -815,6 +922,7 @@ class Cursor(object):
             del self.__next_row
         except AttributeError:
             pass
+        self.__raw_rows = None
         try:
             if not isinstance(sql, basestring):
                 raise ValueError("operation parameter must be str or unicode")
@@ -842,6 +950,10 @@ class Cursor(object):
                         raise ProgrammingError("You cannot execute SELECT "
                                                "statements in executemany().")
 
+            if multiple:
+                self.__execute_many(many_params)
+                return self
+
             for params in many_params:
                 self.__statement._set_params(params)
 
@@ -859,13 +971,10 @@ class Cursor(object):
                     ret = _lib.sqlite3_step(self.__statement._statement)
 
                 if ret == _lib.SQLITE_ROW:
-                    if multiple:
-                        raise ProgrammingError("executemany() can only execute DML statements.")
                     self.__build_row_cast_map()
                     self.__next_row = self.__fetch_one_row()
                 elif ret == _lib.SQLITE_DONE:
-                    if not multiple:
-                        self.__statement._reset()
+                    self.__statement._reset()
                 else:
                     self.__statement._reset()
                     raise self.__connection._get_exception(ret)
@@ -880,19 +989,98 @@ class Cursor(object):
                         self.__rowcount = 0
                     self.__rowcount += _lib.sqlite3_changes(self.__connection._db)
 
-                if not multiple and self.__statement._type == _STMT_TYPE_INSERT:
+                if self.__statement._type == _STMT_TYPE_INSERT:
                     self.__lastrowid = _lib.sqlite3_last_insert_rowid(self.__connection._db)
                 else:
                     self.__lastrowid = None
-
-                if multiple:
-                    self.__statement._reset()
         finally:
             self.__connection._in_transaction = \
                 not _lib.sqlite3_get_autocommit(self.__connection._db)
             self.__locked = False
         return self
 
+    def __execute_many(self, many_params):
+        # bind and execute the rows of parameters by batches, with a
+        # single call to the C helper per batch.  Only lists and tuples
+        # are batched: other iterables are read one row at a time, because
+        # reading them ahead could have side-effects.
+        statement = self.__statement
+        num_params = _lib.sqlite3_bind_parameter_count(statement._statement)
+        self.__lastrowid = None
+        if isinstance(many_params, (list, tuple)):
+            batch_size = _BATCH_SIZE
+        else:
+            batch_size = 1
+        many_params = iter(many_params)
+        while True:
+            cells = _ffi.new('_pypy_sqlite3_cell[]',
+                             max(num_params, 1) * batch_size)
+            chunks = []
+            offset = 0
+            num_rows = 0
+            error = None
+            try:
+                for params in many_params:
+                    offset = statement._params_to_cells(
+                        params, cells + num_rows * num_params, chunks, offset)
+                    num_rows += 1
+                    if num_rows == batch_size:
+                        break
+            except Exception as e:
+                # execute the rows before the one that failed, then raise
+                error = e
+            if num_rows > 0:
+                self.__execute_rows(num_params, num_rows, cells,
+                                    b''.join(chunks))
+            if error is not None:
+                raise error
+            if num_rows < batch_size:
+                break
+
+    def __execute_rows(self, num_params, num_rows, cells, data):
+        statement = self.__statement
+        is_dml = statement._type in (
+            _STMT_TYPE_UPDATE,
+            _STMT_TYPE_DELETE,
+            _STMT_TYPE_INSERT,
+            _STMT_TYPE_REPLACE
+        )
+        if is_dml and self.__rowcount == -1:
+            self.__rowcount = 0
+        p_done = _ffi.new('int *')
+        p_changes = _ffi.new('int64_t *')
+        statement._in_use = True
+        row = 0
+        while row < num_rows:
+            ret = _lib._pypy_sqlite3_execute_rows(
+                statement._statement, num_params, num_rows - row,
+                cells + row * num_params, data, p_done, p_changes)
+            row += p_done[0]
+            if is_dml:
+                self.__rowcount += p_changes[0]
+            if ret == _lib.SQLITE_DONE:
+                break
+
+            # PyPy: see the comment about SQLITE_LOCKED in __execute()
+            if ret == _lib.SQLITE_LOCKED:
+                self.__connection._reset_already_committed_statements()
+                ret = _lib.sqlite3_step(statement._statement)
+                if ret == _lib.SQLITE_DONE:
+                    if is_dml:
+                        self.__rowcount += _lib.sqlite3_changes(
+                            self.__connection._db)
+                    _lib.sqlite3_reset(statement._statement)
+                    row += 1
+                    continue
+
+            statement._reset()
+            if ret == _lib.SQLITE_ROW:
+                raise ProgrammingError("executemany() can only execute DML statements.")
+            if ret < 0:
+                raise statement._binding_error(-1 - ret)
+            raise self.__connection._get_exception(ret)
+        statement._in_use = False
+
     @__check_cursor_wrap
     def execute(self, sql, params=[]):
         return self.__execute(False, sql, [params])
@@ -951,22 +1139,21 @@ class Cursor(object):
         if not self.__statement:
             raise StopIteration
 
-        try:
-            next_row = self.__next_row
-        except AttributeError:
-            raise StopIteration
+        while True:
+            try:
+                next_row = self.__next_row
+                break
+            except AttributeError:
+                if self.__raw_rows is None:
+                    raise StopIteration
+                # a converter raised: go on with the rows after that one
+                self.__read_next_row(1)
         del self.__next_row
 
         if self.row_factory is not None:
             next_row = self.row_factory(self, next_row)
 
-        ret = _lib.sqlite3_step(self.__statement._statement)
-        if ret == _lib.SQLITE_ROW:
-            self.__next_row = self.__fetch_one_row()
-        else:
-            self.__statement._reset()
-            if ret != _lib.SQLITE_DONE:
-                raise self.__connection._get_exception(ret)
+        self.__read_next_row(1)
         return next_row
 
     if sys.version_info[0] < 3:
@@ -979,15 +1166,38 @@ class Cursor(object):
     def fetchmany(self, size=None):
         if size is None:
             size = self.arraysize
-        lst = []
-        for row in self:
-            lst.append(row)
-            if len(lst) == size:
-                break
-        return lst
+        if size <= 0:
+            size = sys.maxsize
+        return self.__fetch_many(size)
 
     def fetchall(self):
-        return list(self)
+        return self.__fetch_many(sys.maxsize)
+
+    def __fetch_many(self, size):
+        # like calling next() up to 'size' times, but the rows are read
+        # from the statement by batches
+        self.__check_cursor()
+        self.__check_reset()
+        lst = []
+        if not self.__statement:
+            return lst
+        while len(lst) < size:
+            try:
+                next_row = self.__next_row
+            except AttributeError:
+                if self.__raw_rows is None:
+                    break
+                # a converter raised: go on with the rows after that one
+                self.__read_next_row(min(size - len(lst), _BATCH_SIZE))
+                continue
+            del self.__next_row
+            if self.row_factory is not None:
+                next_row = self.row_factory(self, next_row)
+            lst.append(next_row)
+
+            # read the remaining rows, plus one to be the next __next_row
+            self.__read_next_row(min(size - len(lst) + 1, _BATCH_SIZE))
+        return lst
 
     def __get_connection(self):
         self.__check_cursor()
@@ -1122,40 +1332,9 @@ class Statement(object):
                             "It is highly recommended that you instead "
                             "just switch your application to Unicode strings.")
 
-    def __set_param(self, idx, param):
-        try:
-            param = adapt(param)
-        except:
-            pass  # And use previous value
-
-        if param is None:
-            rc = _lib.sqlite3_bind_null(self._statement, idx)
-        elif isinstance(param, (bool, int, long)):
-            if -2147483648 <= param <= 2147483647:
-                rc = _lib.sqlite3_bind_int(self._statement, idx, param)
-            else:
-                rc = _lib.sqlite3_bind_int64(self._statement, idx, param)
-        elif isinstance(param, float):
-            rc = _lib.sqlite3_bind_double(self._statement, idx, param)
-        elif isinstance(param, unicode):
-            param = param.encode("utf-8")
-            rc = _lib.sqlite3_bind_text(self._statement, idx, param,
-                                        len(param), _SQLITE_TRANSIENT)
-        elif isinstance(param, str):
-            self.__check_decodable(param)
-            rc = _lib.sqlite3_bind_text(self._statement, idx, param,
-                                        len(param), _SQLITE_TRANSIENT)
-        elif isinstance(param, (buffer, bytes)):
-            param = bytes(param)
-            rc = _lib.sqlite3_bind_blob(self._statement, idx, param,
-                                        len(param), _SQLITE_TRANSIENT)
-        else:
-            rc = -1
-        return rc
-
-    def _set_params(self, params):
-        self._in_use = True
-
+    def __get_params(self, params):
+        # returns the list of the parameters in binding order, and whether
+        # they are named
         num_params_needed = _lib.sqlite3_bind_parameter_count(self._statement)
         if isinstance(params, (tuple, list)) or \
                 not isinstance(params, dict) and \
@@ -1169,32 +1348,93 @@ class Statement(object):
                                        "The current statement uses %d, and "
                                        "there are %d supplied." %
                                        (num_params_needed, num_params))
-            for i in range(num_params):
-                rc = self.__set_param(i + 1, params[i])
-                if rc != _lib.SQLITE_OK:
-                    raise InterfaceError("Error binding parameter %d - "
-                                         "probably unsupported type." % i)
+            return [params[i] for i in range(num_params)], False
         elif isinstance(params, dict):
+            values = []
             for i in range(1, num_params_needed + 1):
-                param_name = _lib.sqlite3_bind_parameter_name(self._statement, i)
-                if not param_name:
+                param_name = self.__get_param_name(i)
+                if param_name is None:
                     raise ProgrammingError("Binding %d has no name, but you "
                                            "supplied a dictionary (which has "
                                            "only names)." % i)
-                param_name = _ffi.string(param_name).decode('utf-8')[1:]
                 try:
                     param = params[param_name]
                 except KeyError:
                     raise ProgrammingError("You did not supply a value for "
                                            "binding %d." % i)
-                rc = self.__set_param(i, param)
-                if rc != _lib.SQLITE_OK:
-                    raise InterfaceError("Error binding parameter :%s - "
-                                         "probably unsupported type." %
-                                         param_name)
+                values.append(param)
+            return values, True
         else:
             raise ValueError("parameters are of unsupported type")
 
+    def __get_param_name(self, idx):
+        param_name = _lib.sqlite3_bind_parameter_name(self._statement, idx)
+        if not param_name:
+            return None
+        return _ffi.string(param_name).decode('utf-8')[1:]
+
+    def _binding_error(self, i, named=None):
+        if named is None:
+            named = self.__get_param_name(i + 1) is not None
+        if named:
+            return InterfaceError("Error binding parameter :%s - "
+                                  "probably unsupported type." %
+                                  self.__get_param_name(i + 1))
+        return InterfaceError("Error binding parameter %d - "
+                              "probably unsupported type." % i)
+
+    def _params_to_cells(self, params, cells, chunks, offset=0):
+        """Store the parameters into the _pypy_sqlite3_cell array 'cells'.
+        The texts and blobs are added to the list 'chunks', and the cells
+        refer to them by their offset in b''.join(chunks); 'offset' is the
+        total length of the chunks so far, and the new one is returned."""
+        values, named = self.__get_params(params)
+        for i, param in enumerate(values):
+            try:
+                param = adapt(param)
+            except:
+                pass  # And use previous value
+
+            cell = cells[i]
+            if param is None:
+                cell.type = _lib.SQLITE_NULL
+                continue
+            elif isinstance(param, (bool, int, long)):
+                cell.type = _lib.SQLITE_INTEGER
+                cell.ival = param
+                continue
+            elif isinstance(param, float):
+                cell.type = _lib.SQLITE_FLOAT
+                cell.dval = param
+                continue
+            elif isinstance(param, unicode):
+                param = param.encode("utf-8")
+                cell.type = _lib.SQLITE_TEXT
+            elif isinstance(param, str):
+                self.__check_decodable(param)
+                cell.type = _lib.SQLITE_TEXT
+            elif isinstance(param, (buffer, bytes)):
+                param = bytes(param)
+                cell.type = _lib.SQLITE_BLOB
+            else:
+                raise self._binding_error(i, named)
+            cell.offset = offset
+            cell.size = len(param)
+            offset += len(param)
+            chunks.append(param)
+        return offset
+
+    def _set_params(self, params):
+        self._in_use = True
+
+        num_params = _lib.sqlite3_bind_parameter_count(self._statement)
+        cells = _ffi.new('_pypy_sqlite3_cell[]', max(num_params, 1))
+        chunks = []
+        self._params_to_cells(params, cells, chunks)
+        i = _lib._pypy_sqlite3_bind_row(self._statement, num_params, cells,
+                                        b''.join(chunks))
+        if i >= 0:
+            raise self._binding_error(i)
 
 
 class Row(object):
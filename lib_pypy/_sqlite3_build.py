@@ -225,8 +225,192 @@ const void *sqlite3_value_text16le(sqlite3_value*);
 const void *sqlite3_value_text16be(sqlite3_value*);
 int sqlite3_value_type(sqlite3_value*);
 int sqlite3_value_numeric_type(sqlite3_value*);
+
+/* PyPy helpers, see below */
+#define _PYPY_SQLITE3_RAW ...
+typedef struct {
+    int type;
+    int size;
+    sqlite3_int64 ival;
+    double dval;
+    size_t offset;
+} _pypy_sqlite3_cell;
+
+int _pypy_sqlite3_bind_row(sqlite3_stmt *stmt, int nparams,
+                           _pypy_sqlite3_cell *cells, const char *data);
+int _pypy_sqlite3_execute_rows(sqlite3_stmt *stmt, int nparams, int nrows,
+                               _pypy_sqlite3_cell *cells, const char *data,
+                               int *pndone, int64_t *pchanges);
+int _pypy_sqlite3_fetch_rows(sqlite3_stmt *stmt, int ncols, int maxrows,
+                             const char *raw_columns,
+                             _pypy_sqlite3_cell *cells, char **pdata,
+                             int *pnrows);
+void _pypy_sqlite3_free(char *data);
 """)
 
+# Helpers to bind the parameters and decode the results of many rows with
+# a single call, instead of calling the sqlite3_bind_xxx() and
+# sqlite3_column_xxx() functions one by one from Python.  A
+# _pypy_sqlite3_cell holds one value; texts and blobs are stored in a
+# separate buffer, at the given offset.
+_helpers_source = """
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define _PYPY_SQLITE3_RAW 0   /* the bytes of a column with a converter */
+
+typedef struct {
+    int type;
+    int size;
+    sqlite3_int64 ival;
+    double dval;
+    size_t offset;
+} _pypy_sqlite3_cell;
+
+/* Returns -1, or the index of the parameter that could not be bound */
+static int _pypy_sqlite3_bind_row(sqlite3_stmt *stmt, int nparams,
+                                  _pypy_sqlite3_cell *cells, const char *data)
+{
+    int i, rc;
+    for (i = 0; i < nparams; i++) {
+        _pypy_sqlite3_cell *cell = &cells[i];
+        switch (cell->type) {
+        case SQLITE_INTEGER:
+            rc = sqlite3_bind_int64(stmt, i + 1, cell->ival);
+            break;
+        case SQLITE_FLOAT:
+            rc = sqlite3_bind_double(stmt, i + 1, cell->dval);
+            break;
+        case SQLITE_TEXT:
+            rc = sqlite3_bind_text(stmt, i + 1, data + cell->offset,
+                                   cell->size, SQLITE_TRANSIENT);
+            break;
+        case SQLITE_BLOB:
+            rc = sqlite3_bind_blob(stmt, i + 1, data + cell->offset,
+                                   cell->size, SQLITE_TRANSIENT);
+            break;
+        default:
+            rc = sqlite3_bind_null(stmt, i + 1);
+            break;
+        }
+        if (rc != SQLITE_OK)
+            return i;
+    }
+    return -1;
+}
+
+/* Binds and executes the statement for each of the 'nrows' rows of
+   parameters.  Stops at the first row that doesn't give SQLITE_DONE,
+   without resetting the statement, and returns the result code; a negative
+   result -1-i means that the parameter i could not be bound.  '*pndone'
+   is the number of rows executed successfully, and '*pchanges' the sum of
+   the rows they changed. */
+static int _pypy_sqlite3_execute_rows(sqlite3_stmt *stmt, int nparams,
+                                      int nrows, _pypy_sqlite3_cell *cells,
+                                      const char *data, int *pndone,
+                                      int64_t *pchanges)
+{
+    sqlite3 *db = sqlite3_db_handle(stmt);
+    int row, rc;
+    *pchanges = 0;
+    for (row = 0; row < nrows; row++) {
+        *pndone = row;
+        rc = _pypy_sqlite3_bind_row(stmt, nparams, cells, data);
+        if (rc >= 0)
+            return -1 - rc;
+        rc = sqlite3_step(stmt);
+        if (rc != SQLITE_DONE)
+            return rc;
+        *pchanges += sqlite3_changes(db);
+        sqlite3_reset(stmt);
+        cells += nparams;
+    }
+    *pndone = nrows;
+    return SQLITE_DONE;
+}
+
+static int _pypy_sqlite3_store(char **pdata, size_t *plength,
+                               size_t *pcapacity, const void *p, int size,
+                               _pypy_sqlite3_cell *cell)
+{
+    if (*plength + size > *pcapacity) {
+        size_t capacity = 2 * *pcapacity + size + 64;
+        char *data = realloc(*pdata, capacity);
+        if (data == NULL)
+            return SQLITE_NOMEM;
+        *pdata = data;
+        *pcapacity = capacity;
+    }
+    if (size > 0)
+        memcpy(*pdata + *plength, p, size);
+    cell->offset = *plength;
+    cell->size = size;
+    *plength += size;
+    return SQLITE_OK;
+}
+
+/* Steps the statement up to 'maxrows' times, and decodes the 'ncols'
+   columns of each row into 'cells'.  Returns the result code of the last
+   step, which is SQLITE_ROW if all the 'maxrows' were read.  The texts and
+   blobs are copied into '*pdata', which must be freed with
+   _pypy_sqlite3_free().  If 'raw_columns' is not NULL, the columns i with
+   a non-zero raw_columns[i] are read as bytes, for the converters. */
+static int _pypy_sqlite3_fetch_rows(sqlite3_stmt *stmt, int ncols,
+                                    int maxrows, const char *raw_columns,
+                                    _pypy_sqlite3_cell *cells, char **pdata,
+                                    int *pnrows)
+{
+    size_t length = 0, capacity = 0;
+    int row, i, rc = SQLITE_ROW;
+    const void *p = NULL;
+    *pdata = NULL;
+    for (row = 0; row < maxrows; row++) {
+        rc = sqlite3_step(stmt);
+        if (rc != SQLITE_ROW)
+            break;
+        for (i = 0; i < ncols; i++) {
+            _pypy_sqlite3_cell *cell = cells++;
+            int type = sqlite3_column_type(stmt, i);
+            if (raw_columns != NULL && raw_columns[i]) {
+                p = sqlite3_column_blob(stmt, i);
+                type = (p == NULL) ? SQLITE_NULL : _PYPY_SQLITE3_RAW;
+            }
+            cell->type = type;
+            switch (type) {
+            case SQLITE_INTEGER:
+                cell->ival = sqlite3_column_int64(stmt, i);
+                break;
+            case SQLITE_FLOAT:
+                cell->dval = sqlite3_column_double(stmt, i);
+                break;
+            case SQLITE_TEXT:
+            case SQLITE_BLOB:
+            case _PYPY_SQLITE3_RAW:
+                if (type == SQLITE_TEXT)
+                    p = sqlite3_column_text(stmt, i);
+                else if (type == SQLITE_BLOB)
+                    p = sqlite3_column_blob(stmt, i);
+                if (_pypy_sqlite3_store(pdata, &length, &capacity, p,
+                                        sqlite3_column_bytes(stmt, i),
+                                        cell) != SQLITE_OK) {
+                    *pnrows = row;
+                    return SQLITE_NOMEM;
+                }
+                break;
+            }
+        }
+    }
+    *pnrows = row;
+    return rc;
+}
+
+static void _pypy_sqlite3_free(char *data)
+{
+    free(data);
+}
+"""
+
 def _has_load_extension():
     """Only available since 3.3.6"""
     unverified_ffi = _FFI()
@@ -259,7 +443,8 @@ else:
         libraries=libraries,
     )
 
-_ffi.set_source("_sqlite3_cffi", "#include <sqlite3.h>", **extra_args)
+_ffi.set_source("_sqlite3_cffi", "#include <sqlite3.h>\n" + _helpers_source,
+                **extra_args)
 
 
 if __name__ == "__main__":
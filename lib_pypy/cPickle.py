@@ -12,6 +12,9 @@ import marshal, struct, sys
 try: from __pypy__ import builtinify
 except ImportError: builtinify = lambda f: f
 
+try: import _pickle
+except ImportError: _pickle = None
+
 # These are purely informational; no code uses these.
 format_version = "2.0"                  # File format version we write
 compatible_formats = ["1.0",            # Original protocol 0
@@ -114,6 +117,14 @@ class Pickler(PythonPickler):
     def getvalue(self):
         return self.__f and self.__f.getvalue()
 
+def _dump(obj, file, protocol):
+    Pickler(file, protocol).dump(obj)
+
+def _dumps(obj, protocol):
+    file = StringIO()
+    Pickler(file, protocol).dump(obj)
+    return file.getvalue()
+
 @builtinify
 def dump(obj, file, protocol=None):
     if protocol > HIGHEST_PROTOCOL:
@@ -121,7 +132,11 @@ def dump(obj, file, protocol=None):
         raise ValueError("pickle protocol %d asked for; "
                      "the highest available protocol is %d" % (
                      protocol, HIGHEST_PROTOCOL))
-    Pickler(file, protocol).dump(obj)
+    if _pickle is not None:
+        # the builtin types are pickled at interp-level
+        _pickle.dump(obj, file, protocol, _dump)
+    else:
+        _dump(obj, file, protocol)
 
 @builtinify
 def dumps(obj, protocol=None):
@@ -130,9 +145,9 @@ def dumps(obj, protocol=None):
         raise ValueError("pickle protocol %d asked for; "
                      "the highest available protocol is %d" % (
                      protocol, HIGHEST_PROTOCOL))
-    file = StringIO()
-    Pickler(file, protocol).dump(obj)
-    return file.getvalue()
+    if _pickle is not None:
+        return _pickle.dumps(obj, protocol, _dumps)
+    return _dumps(obj, protocol)
 
 # Why use struct.pack() for pickling but marshal.loads() for
 # unpickling?  struct.pack() is 40% faster than marshal.dumps(), but
@@ -622,6 +637,11 @@ except ImportError:
 def load(f):
     return Unpickler(f).load()
 
-def loads(str):
+def _loads(str):
     f = StringIO(str)
     return Unpickler(f).load()
+
+def loads(str):
+    if _pickle is not None and type(str) is StringType:
+        return _pickle.loads(str, _loads)
+    return _loads(str)
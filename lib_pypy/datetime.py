@@ -21,8 +21,10 @@ import time as _timemodule
 import math as _math
 import struct as _struct
 
-# for cpyext, use these as base classes
+# for cpyext, use these as base classes.  They store the fields, and
+# check them when given arguments.
 from __pypy__._pypydatetime import dateinterop, deltainterop, timeinterop
+from __pypy__._pypydatetime import timestamp_fields as _timestamp_fields
 
 _SENTINEL = object()
 
@@ -184,13 +186,6 @@ def _build_struct_time(y, m, d, hh, mm, ss, dstflag):
     dnum = _days_before_month(y, m) + d
     return _timemodule.struct_time((y, m, d, hh, mm, ss, wday, dnum, dstflag))
 
-def _format_time(hh, mm, ss, us):
-    # Skip trailing microseconds when us==0.
-    result = "%02d:%02d:%02d" % (hh, mm, ss)
-    if us:
-        result += ".%06d" % us
-    return result
-
 # Correctly substitute for %z and %Z escapes in strftime formats.
 def _wrap_strftime(object, format, timetuple):
     year = timetuple[0]
@@ -285,51 +280,6 @@ def _check_utc_offset(name, offset):
         raise ValueError("%s()=%d, must be in -1439..1439" % (name, offset))
     return offset
 
-def _check_int_field(value):
-    if isinstance(value, int):
-        return int(value)
-    if not isinstance(value, float):
-        try:
-            value = value.__int__()
-        except AttributeError:
-            pass
-        else:
-            if isinstance(value, int):
-                return int(value)
-            elif isinstance(value, long):
-                return int(long(value))
-            raise TypeError('__int__ method should return an integer')
-        raise TypeError('an integer is required')
-    raise TypeError('integer argument expected, got float')
-
-def _check_date_fields(year, month, day):
-    year = _check_int_field(year)
-    month = _check_int_field(month)
-    day = _check_int_field(day)
-    if not MINYEAR <= year <= MAXYEAR:
-        raise ValueError('year must be in %d..%d' % (MINYEAR, MAXYEAR), year)
-    if not 1 <= month <= 12:
-        raise ValueError('month must be in 1..12', month)
-    dim = _days_in_month(year, month)
-    if not 1 <= day <= dim:
-        raise ValueError('day must be in 1..%d' % dim, day)
-    return year, month, day
-
-def _check_time_fields(hour, minute, second, microsecond):
-    hour = _check_int_field(hour)
-    minute = _check_int_field(minute)
-    second = _check_int_field(second)
-    microsecond = _check_int_field(microsecond)
-    if not 0 <= hour <= 23:
-        raise ValueError('hour must be in 0..23', hour)
-    if not 0 <= minute <= 59:
-        raise ValueError('minute must be in 0..59', minute)
-    if not 0 <= second <= 59:
-        raise ValueError('second must be in 0..59', second)
-    if not 0 <= microsecond <= 999999:
-        raise ValueError('microsecond must be in 0..999999', microsecond)
-    return hour, minute, second, microsecond
-
 def _check_tzinfo_arg(tz):
     if tz is not None and not isinstance(tz, tzinfo):
         raise TypeError("tzinfo argument must be None or of a tzinfo subclass")
@@ -453,7 +403,7 @@ class timedelta(deltainterop):
     Representation: (days, seconds, microseconds).  Why?  Because I
     felt like it.
     """
-    __slots__ = '_days', '_seconds', '_microseconds', '_hashcode'
+    __slots__ = ()
 
     def __new__(cls, days=_SENTINEL, seconds=_SENTINEL, microseconds=_SENTINEL,
                 milliseconds=_SENTINEL, minutes=_SENTINEL, hours=_SENTINEL, weeks=_SENTINEL):
@@ -499,7 +449,6 @@ class timedelta(deltainterop):
         self._days = d
         self._seconds = s
         self._microseconds = us
-        self._hashcode = -1
         return self
 
     def _to_microseconds(self):
@@ -701,7 +650,7 @@ class date(dateinterop):
     Properties (readonly):
     year, month, day
     """
-    __slots__ = '_year', '_month', '_day', '_hashcode'
+    __slots__ = ()
 
     def __new__(cls, year, month=None, day=None):
         """Constructor.
@@ -715,15 +664,8 @@ class date(dateinterop):
             # Pickle support
             self = dateinterop.__new__(cls)
             self.__setstate(year)
-            self._hashcode = -1
             return self
-        year, month, day = _check_date_fields(year, month, day)
-        self = dateinterop.__new__(cls)
-        self._year = year
-        self._month = month
-        self._day = day
-        self._hashcode = -1
-        return self
+        return dateinterop.__new__(cls, year, month, day)
 
     # Additional constructors
 
@@ -802,7 +744,7 @@ class date(dateinterop):
         - http://www.w3.org/TR/NOTE-datetime
         - http://www.cl.cam.ac.uk/~mgk25/iso-time.html
         """
-        return "%04d-%02d-%02d" % (self._year, self._month, self._day)
+        return self._format_date()
 
     __str__ = isoformat
 
@@ -1090,7 +1032,7 @@ class time(timeinterop):
     Properties (readonly):
     hour, minute, second, microsecond, tzinfo
     """
-    __slots__ = '_hour', '_minute', '_second', '_microsecond', '_tzinfo', '_hashcode'
+    __slots__ = ()
 
     def __new__(cls, hour=0, minute=0, second=0, microsecond=0, tzinfo=None):
         """Constructor.
@@ -1105,19 +1047,10 @@ class time(timeinterop):
             # Pickle support
             self = timeinterop.__new__(cls)
             self.__setstate(hour, minute or None)
-            self._hashcode = -1
             return self
-        hour, minute, second, microsecond = _check_time_fields(
-            hour, minute, second, microsecond)
         _check_tzinfo_arg(tzinfo)
-        self = timeinterop.__new__(cls)
-        self._hour = hour
-        self._minute = minute
-        self._second = second
-        self._microsecond = microsecond
-        self._tzinfo = tzinfo
-        self._hashcode = -1
-        return self
+        return timeinterop.__new__(cls, hour, minute, second, microsecond,
+                                   tzinfo)
 
     # Read-only field accessors
     @property
@@ -1262,8 +1195,7 @@ class time(timeinterop):
         This is 'HH:MM:SS.mmmmmm+zz:zz', or 'HH:MM:SS+zz:zz' if
         self.microsecond == 0.
         """
-        s = _format_time(self._hour, self._minute, self._second,
-                         self._microsecond)
+        s = self._format_time()
         tz = self._tzstr()
         if tz:
             s += tz
@@ -1407,7 +1339,7 @@ class datetime(date):
     The year, month and day arguments are required. tzinfo may be None, or an
     instance of a tzinfo subclass. The remaining arguments may be ints or longs.
     """
-    __slots__ = date.__slots__ + time.__slots__
+    __slots__ = ()
 
     def __new__(cls, year, month=None, day=None, hour=0, minute=0, second=0,
                 microsecond=0, tzinfo=None):
@@ -1416,28 +1348,14 @@ class datetime(date):
             # Pickle support
             self = dateinterop.__new__(cls)
             self.__setstate(year, month)
-            self._hashcode = -1
             return self
         elif isinstance(year, tuple) and len(year) == 7:
             # Used by internal functions where the arguments are guaranteed to
             # be valid.
             year, month, day, hour, minute, second, microsecond = year
-        else:
-            year, month, day = _check_date_fields(year, month, day)
-            hour, minute, second, microsecond = _check_time_fields(
-                hour, minute, second, microsecond)
         _check_tzinfo_arg(tzinfo)
-        self = dateinterop.__new__(cls)
-        self._year = year
-        self._month = month
-        self._day = day
-        self._hour = hour
-        self._minute = minute
-        self._second = second
-        self._microsecond = microsecond
-        self._tzinfo = tzinfo
-        self._hashcode = -1
-        return self
+        return dateinterop.__new__(cls, year, month, day, hour, minute,
+                                   second, microsecond, tzinfo)
 
     # Read-only field accessors
     @property
@@ -1472,8 +1390,7 @@ class datetime(date):
         A timezone info object may be passed in as well.
         """
         _check_tzinfo_arg(tz)
-        converter = _timemodule.localtime if tz is None else _timemodule.gmtime
-        self = cls._from_timestamp(converter, timestamp, tz)
+        self = cls._from_timestamp(tz is not None, timestamp, tz)
         if tz is not None:
             self = tz.fromutc(self)
         return self
@@ -1481,25 +1398,11 @@ class datetime(date):
     @classmethod
     def utcfromtimestamp(cls, t):
         "Construct a UTC datetime from a POSIX timestamp (like time.time())."
-        return cls._from_timestamp(_timemodule.gmtime, t, None)
+        return cls._from_timestamp(True, t, None)
 
     @classmethod
-    def _from_timestamp(cls, converter, timestamp, tzinfo):
-        t_full = timestamp
-        timestamp = int(_math.floor(timestamp))
-        frac = t_full - timestamp
-        us = _round(frac * 1e6)
-
-        # If timestamp is less than one microsecond smaller than a
-        # full second, us can be rounded up to 1000000.  In this case,
-        # roll over to seconds, otherwise, ValueError is raised
-        # by the constructor.
-        if us == 1000000:
-            timestamp += 1
-            us = 0
-        y, m, d, hh, mm, ss, weekday, jday, dst = converter(timestamp)
-        ss = min(ss, 59)    # clamp out leap seconds if the platform has them
-        return cls((y, m, d, hh, mm, ss, us), tzinfo=tzinfo)
+    def _from_timestamp(cls, utc, timestamp, tzinfo):
+        return cls(_timestamp_fields(timestamp, utc), tzinfo=tzinfo)
 
     @classmethod
     def now(cls, tz=None):
@@ -1626,9 +1529,7 @@ class datetime(date):
         Optional argument sep specifies the separator between date and
         time, default 'T'.
         """
-        s = ("%04d-%02d-%02d%c" % (self._year, self._month, self._day, sep) +
-             _format_time(self._hour, self._minute, self._second,
-                          self._microsecond))
+        s = "%s%c%s" % (self._format_date(), sep, self._format_time())
         off = self._utcoffset()
         if off is not None:
             if off < 0:
@@ -32,11 +32,12 @@ working_modules = default_modules.copy()
 working_modules.update([
     "_socket", "unicodedata", "mmap", "fcntl", "_locale", "pwd",
     "select", "zipimport", "_lsprof", "signal", "_rawffi", "termios",
-    "zlib", "bz2", "struct", "_md5", "_sha", "_minimal_curses",
+    "zlib", "bz2", "struct", "_md5", "_sha", "_sha256", "_sha512",
+    "_minimal_curses",
     "cStringIO", "thread", "itertools", "pyexpat", "cpyext", "array",
     "binascii", "_multiprocessing", '_warnings', "_collections",
     "_multibytecodec", "micronumpy", "_continuation", "_cffi_backend",
-    "_csv", "_cppyy", "_pypyjson", "_jitlog",
+    "_csv", "_cppyy", "_pypyjson", "_jitlog", "_pickle", "_elementtree",
     # "_hashlib", "crypt"
 ])
 
@@ -106,6 +107,7 @@ module_dependencies = {
     'cpyext': [('objspace.usemodules.array', True)],
     '_cppyy': [('objspace.usemodules.cpyext', True)],
     'faulthandler': [('objspace.usemodules._vmprof', True)],
+    '_elementtree': [('objspace.usemodules.pyexpat', True)],
     }
 module_suggests = {
     # the reason you want _rawffi is for ctypes, which
@@ -153,6 +155,11 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
     BoolOption("lonepycfiles", "Import pyc files with no matching py file",
                default=False),
 
+    BoolOption("lazycodeobjects",
+               "Unmarshal the code objects nested in pyc files when they "
+               "are first run",
+               default=True),
+
     StrOption("soabi",
               "Tag to differentiate extension modules built for different Python interpreters",
               cmdline="--soabi",
@@ -202,6 +209,10 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
         BoolOption("withliststrategies",
                    "enable optimized ways to store lists of primitives ",
                    default=True),
+        IntOption("compactintlistlength",
+                  "store the lists of integers that grow past this length "
+                  "with 1, 2 or 4 bytes per item when possible (0 disables)",
+                  default=1024),
 
         BoolOption("withmethodcachecounter",
                    "try to cache methods and provide a counter in __pypy__. "
@@ -47,6 +47,9 @@ PYPY_IRC_TOPIC: if set to a non-empty value, print a random #pypy IRC
                topic at startup of interactive mode.
 PYPYLOG: If set to a non-empty value, enable logging.
 PYPY_DISABLE_JIT: if set to a non-empty value, disable JIT.
+PYPY_WARMUP_PROFILE: file where the JIT stores the loops it compiled at
+               exit, and from which it reads them at startup to compile
+               them sooner.
 """
 
 try:
@@ -560,6 +563,10 @@ def parse_command_line(argv):
         parse_env('PYTHONOPTIMIZE', "optimize", options)
         if getenv('PYPY_DISABLE_JIT'):
             set_jit_option(options, 'off')
+        warmup_profile = getenv('PYPY_WARMUP_PROFILE')
+        if warmup_profile and 'pypyjit' in sys.builtin_module_names:
+            import pypyjit
+            pypyjit.enable_warmup_profile(warmup_profile)
     if (options["interactive"] or
         (not options["ignore_environment"] and getenv('PYTHONINSPECT'))):
         options["inspect"] = 1
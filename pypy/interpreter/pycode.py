@@ -52,22 +52,28 @@ def make_signature(code):
 class CodeHookCache(object):
     def __init__(self, space):
         self._code_hook = None
+        # set by pypyjit.enable_warmup_profile()
+        self._warmup_profile = None
 
 class PyCode(eval.Code):
     "CPython-style code objects."
+    # co_code, co_consts_w, co_names_w and co_lnotab are quasi-immutable
+    # because they are only set by _load_body() for lazily loaded code
     _immutable_fields_ = ["_signature", "co_argcount", "co_cellvars[*]",
-                          "co_code", "co_consts_w[*]", "co_filename",
+                          "co_code?", "co_consts_w?[*]", "co_filename",
                           "co_firstlineno", "co_flags", "co_freevars[*]",
-                          "co_lnotab", "co_names_w[*]", "co_nlocals",
+                          "co_lnotab?", "co_names_w?[*]", "co_nlocals",
                           "co_stacksize", "co_varnames[*]",
                           "_args_as_cellvars[*]",
                           "w_globals?",
-                          "cell_families[*]"]
+                          "cell_families[*]",
+                          "_lazy_body?", "_warmup_pending?"]
 
     def __init__(self, space,  argcount, nlocals, stacksize, flags,
                      code, consts, names, varnames, filename,
                      name, firstlineno, lnotab, freevars, cellvars,
-                     hidden_applevel=False, magic=default_magic):
+                     hidden_applevel=False, magic=default_magic,
+                     lazy_body=None):
         """Initialize a new code object from parameters given by
         the pypy compiler"""
         self.space = space
@@ -93,6 +99,10 @@ class PyCode(eval.Code):
         self.w_globals = None
         self.hidden_applevel = hidden_applevel
         self.magic = magic
+        # if not None, co_code, co_consts_w, co_names_w and co_lnotab are
+        # not unmarshalled yet: see ensure_loaded()
+        self._lazy_body = lazy_body
+        self._warmup_pending = False
         self._signature = make_signature(self)
         self._initialize()
         self._init_ready()
@@ -107,7 +117,12 @@ class PyCode(eval.Code):
         return True
 
     def new_code_hook(self):
-        code_hook = self.space.fromcache(CodeHookCache)._code_hook
+        cache = self.space.fromcache(CodeHookCache)
+        if cache._warmup_profile is not None:
+            # looked up when the first frame is created: co_filename is
+            # not final yet for the code objects loaded from a .pyc file
+            self._warmup_pending = True
+        code_hook = cache._code_hook
         if code_hook is not None:
             try:
                 self.space.call_function(code_hook, self)
@@ -115,7 +130,6 @@ class PyCode(eval.Code):
                 e.write_unraisable(self.space, "new_code_hook()")
 
     def _initialize(self):
-        from pypy.objspace.std.mapdict import init_mapdict_cache
         from pypy.interpreter.nestedscope import CellFamily
         if self.co_cellvars:
             argcount = self.co_argcount
@@ -135,12 +149,68 @@ class PyCode(eval.Code):
 
         self._compute_flatcall()
 
+        if self._lazy_body is None:
+            self._init_names_caches()
+
+    def _init_names_caches(self):
+        from pypy.objspace.std.mapdict import init_mapdict_cache
         init_mapdict_cache(self)
         self._globals_caches = [None] * len(self.co_names_w)
 
     def _init_ready(self):
         "This is a hook for the vmprof module, which overrides this method."
 
+    def ensure_loaded(self):
+        """Code objects nested in a .pyc file are unmarshalled lazily:
+        at import time, only the fields needed to make a function out of
+        them are read.  This reads co_code, co_consts_w, co_names_w and
+        co_lnotab; it must be called before these fields are used, which
+        is done when a frame is created.
+        """
+        if self._lazy_body is not None:
+            self._load_body()
+
+    def check_warmup_profile(self):
+        """Mark the loops of this code object that are listed in the
+        warm-up profile, the first time a frame is created for it."""
+        if self._warmup_pending:
+            self._lookup_warmup_profile()
+
+    @jit.dont_look_inside
+    def _lookup_warmup_profile(self):
+        self._warmup_pending = False
+        profile = self.space.fromcache(CodeHookCache)._warmup_profile
+        if profile is not None:
+            profile.new_code(self)
+
+    @jit.dont_look_inside
+    def _load_body(self):
+        lazy_body = self._lazy_body
+        lazy_body.load(self)
+        self._lazy_body = None
+        self._init_names_caches()
+        if lazy_body.remove_docstrings:
+            self.remove_docstrings(self.space)
+        if lazy_body.old_filename is not None:
+            for w_co in self.co_consts_w:
+                if isinstance(w_co, PyCode):
+                    w_co.update_filenames(lazy_body.old_filename,
+                                          self.co_filename)
+
+    def update_filenames(self, oldname, newname):
+        """Replace the co_filename 'oldname' with 'newname' in this
+        code object and in the code objects nested in it."""
+        if self.co_filename != oldname:
+            return
+        self.co_filename = newname
+        if self._lazy_body is not None:
+            # the nested code objects are updated when they are loaded
+            self._lazy_body.old_filename = oldname
+            return
+        for w_co in self.co_consts_w:
+            if isinstance(w_co, PyCode):
+                w_co.update_filenames(oldname, newname)
+
     def _cleanup_(self):
         if (self.magic == cpython_magic and
             '__pypy__' not in sys.builtin_module_names):
@@ -238,6 +308,7 @@ class PyCode(eval.Code):
         return self.co_varnames
 
     def getdocstring(self, space):
+        self.ensure_loaded()
         if self.co_consts_w:   # it is probably never empty
             w_first = self.co_consts_w[0]
             if space.isinstance_w(w_first, space.w_basestring):
@@ -245,6 +316,10 @@ class PyCode(eval.Code):
         return space.w_None
 
     def remove_docstrings(self, space):
+        if self._lazy_body is not None:
+            # done when the body is loaded
+            self._lazy_body.remove_docstrings = True
+            return
         if self.co_flags & CO_KILL_DOCSTRING:
             self.co_consts_w[0] = space.w_None
         for w_co in self.co_consts_w:
@@ -253,6 +328,7 @@ class PyCode(eval.Code):
 
     def _to_code(self):
         """For debugging only."""
+        self.ensure_loaded()
         consts = [None] * len(self.co_consts_w)
         num = 0
         for w in self.co_consts_w:
@@ -288,12 +364,22 @@ class PyCode(eval.Code):
         co = self._to_code()
         dis.dis(co)
 
+    def fget_co_code(self, space):
+        self.ensure_loaded()
+        return space.newbytes(self.co_code)
+
     def fget_co_consts(self, space):
+        self.ensure_loaded()
         return space.newtuple(self.co_consts_w)
 
     def fget_co_names(self, space):
+        self.ensure_loaded()
         return space.newtuple(self.co_names_w)
 
+    def fget_co_lnotab(self, space):
+        self.ensure_loaded()
+        return space.newbytes(self.co_lnotab)
+
     def fget_co_varnames(self, space):
         return space.newtuple([space.newtext(name) for name in self.co_varnames])
 
@@ -307,6 +393,8 @@ class PyCode(eval.Code):
         space = self.space
         if not isinstance(w_other, PyCode):
             return space.w_NotImplemented
+        self.ensure_loaded()
+        w_other.ensure_loaded()
         areEqual = (self.co_name == w_other.co_name and
                     self.co_argcount == w_other.co_argcount and
                     self.co_nlocals == w_other.co_nlocals and
@@ -339,6 +427,7 @@ class PyCode(eval.Code):
 
     def descr_code__hash__(self):
         space = self.space
+        self.ensure_loaded()
         result =  compute_hash(self.co_name)
         result ^= self.co_argcount
         result ^= self.co_nlocals
@@ -399,6 +488,7 @@ class PyCode(eval.Code):
         w_mod    = space.getbuiltinmodule('_pickle_support')
         mod      = space.interp_w(MixedModule, w_mod)
         new_inst = mod.get('code_new')
+        self.ensure_loaded()
         tup      = [
             space.newint(self.co_argcount),
             space.newint(self.co_nlocals),
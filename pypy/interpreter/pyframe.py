@@ -94,6 +94,8 @@ class PyFrame(W_Root):
                 "use space.FrameClass(), not directly PyFrame()")
         self = hint(self, access_directly=True, fresh_virtualizable=True)
         assert isinstance(code, pycode.PyCode)
+        code.ensure_loaded()
+        code.check_warmup_profile()
         self.space = space
         self.pycode = code
         if code.frame_stores_global(w_globals):
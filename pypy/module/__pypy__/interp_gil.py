@@ -0,0 +1,40 @@
+from rpython.rlib import rgil
+
+
+def gil_stats(space):
+    """ gil_stats() -> {thread_ident: stats}
+
+    Return the statistics about the GIL of all the threads that are still
+    alive.  The stats of each thread is a dict with these keys:
+
+      acquisitions        how many times the thread acquired the GIL
+      waits               how many of these acquisitions had to wait for
+                          another thread to release it
+      wait_time           the total time spent waiting, in seconds
+      max_wait            the longest single wait, in seconds
+      voluntary_releases  how many times the thread released the GIL
+                          around blocking calls, like I/O or time.sleep()
+      periodic_releases   how many times the thread released the GIL
+                          every sys.getcheckinterval() bytecodes, and
+                          another thread took it
+
+    The releases and acquisitions done by the JIT-compiled code around
+    external calls are only counted when they have to wait.  A log of
+    all the waits and thread switches can be written by running with
+    PYPYLOG=gil-wait,gil-yield:filename.
+    """
+    w_result = space.newdict()
+    for stats in rgil.get_thread_stats():
+        if stats.thread_ident == 0:
+            continue       # thread still starting
+        w_stats = space.newdict()
+        for name, w_value in [
+                ('acquisitions', space.newint(stats.acquisitions)),
+                ('waits', space.newint(stats.waits)),
+                ('wait_time', space.newfloat(stats.wait_time)),
+                ('max_wait', space.newfloat(stats.max_wait)),
+                ('voluntary_releases', space.newint(stats.releases)),
+                ('periodic_releases', space.newint(stats.yields))]:
+            space.setitem_str(w_stats, name, w_value)
+        space.setitem(w_result, space.newint(stats.thread_ident), w_stats)
+    return w_result
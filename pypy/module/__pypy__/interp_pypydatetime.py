@@ -1,24 +1,347 @@
-from pypy.interpreter.baseobjspace import W_Root
-from pypy.interpreter.typedef import TypeDef
-from pypy.interpreter.gateway import interp2app
+import math
+
+from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rstring import StringBuilder
+from rpython.rtyper.lltypesystem import lltype, rffi
 from rpython.tool.sourcetools import func_with_new_name
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+
+MINYEAR = 1
+MAXYEAR = 9999
+
+_DAYS_IN_MONTH = [-1, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+def is_leap(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+def days_in_month(year, month):
+    if month == 2 and is_leap(year):
+        return 29
+    return _DAYS_IN_MONTH[month]
+
+# ____________________________________________________________
+# Checking the arguments of the constructors of lib_pypy/datetime.py
+
+def check_int_field(space, w_value):
+    """Returns the value as a wrapped int or long"""
+    if (space.isinstance_w(w_value, space.w_int) or
+            space.isinstance_w(w_value, space.w_long)):
+        return space.int(w_value)
+    if space.isinstance_w(w_value, space.w_float):
+        raise oefmt(space.w_TypeError, "integer argument expected, got float")
+    w_method = space.lookup(w_value, '__int__')
+    if w_method is None:
+        raise oefmt(space.w_TypeError, "an integer is required")
+    w_res = space.get_and_call_function(w_method, w_value)
+    if not (space.isinstance_w(w_res, space.w_int) or
+            space.isinstance_w(w_res, space.w_long)):
+        raise oefmt(space.w_TypeError,
+                    "__int__ method should return an integer")
+    return space.int(w_res)
+
+def check_field(space, w_value, name, lo, hi):
+    if w_value is None:      # optional argument not given
+        return 0
+    w_value = check_int_field(space, w_value)
+    try:
+        value = space.int_w(w_value)
+    except OperationError as e:
+        if not e.match(space, space.w_OverflowError):
+            raise
+        value = lo - 1
+    if not lo <= value <= hi:
+        msg = "%s must be in %d..%d" % (name, lo, hi)
+        raise OperationError(space.w_ValueError,
+                             space.newtuple([space.newtext(msg), w_value]))
+    return value
+
+def check_day_field(space, w_value, year, month):
+    return check_field(space, w_value, "day", 1, days_in_month(year, month))
+
+@specialize.argtype(0)
+def check_and_set_time(w_obj, space, w_hour, w_minute, w_second,
+                       w_microsecond):
+    # 'w_obj' is either a W_DateTime_Time or a W_DateTime_Date
+    hour = check_field(space, w_hour, "hour", 0, 23)
+    minute = check_field(space, w_minute, "minute", 0, 59)
+    second = check_field(space, w_second, "second", 0, 59)
+    microsecond = check_field(space, w_microsecond, "microsecond", 0, 999999)
+    w_obj.set_time(hour, minute, second, microsecond)
+
+# ____________________________________________________________
+# Formatting
+
+def append_padded(builder, value, width):
+    digits = str(value)
+    for i in range(width - len(digits)):
+        builder.append('0')
+    builder.append(digits)
+
+def format_time(hour, minute, second, microsecond):
+    builder = StringBuilder(15)
+    append_padded(builder, hour, 2)
+    builder.append(':')
+    append_padded(builder, minute, 2)
+    builder.append(':')
+    append_padded(builder, second, 2)
+    if microsecond:
+        builder.append('.')
+        append_padded(builder, microsecond, 6)
+    return builder.build()
+
+# ____________________________________________________________
+# The fields are packed into a few machine words: the date as
+# year << 12 | month << 8 | day, the time as hour << 16 | minute << 8 | second
+
+def _packed_field(cls, packed, name, shift, mask):
+    def fget(self, space):
+        return space.newint((getattr(self, packed) >> shift) & mask)
+    def fset(self, space, w_value):
+        value = space.int_w(w_value)
+        if not 0 <= value <= mask:
+            raise oefmt(space.w_ValueError, "%s out of range: %d",
+                        name, value)
+        word = getattr(self, packed) & ~(mask << shift)
+        setattr(self, packed, word | (value << shift))
+    fget = func_with_new_name(fget, 'fget_%s_%s' % (cls.__name__, name))
+    fset = func_with_new_name(fset, 'fset_%s_%s' % (cls.__name__, name))
+    return GetSetProperty(fget, fset, cls=cls)
+
+def _int_field(cls, name):
+    attr = name.lstrip('_')
+    def fget(self, space):
+        return space.newint(getattr(self, attr))
+    def fset(self, space, w_value):
+        setattr(self, attr, space.int_w(w_value))
+    fget = func_with_new_name(fget, 'fget_%s_%s' % (cls.__name__, attr))
+    fset = func_with_new_name(fset, 'fset_%s_%s' % (cls.__name__, attr))
+    return GetSetProperty(fget, fset, cls=cls)
+
+def _tzinfo_field(cls):
+    def fget(self, space):
+        if self.w_tzinfo is None:
+            return space.w_None
+        return self.w_tzinfo
+    def fset(self, space, w_value):
+        if space.is_none(w_value):
+            w_value = None
+        self.w_tzinfo = w_value
+    fget = func_with_new_name(fget, 'fget_%s_tzinfo' % (cls.__name__,))
+    fset = func_with_new_name(fset, 'fset_%s_tzinfo' % (cls.__name__,))
+    return GetSetProperty(fget, fset, cls=cls)
+
+
+class W_DateTime_Date(W_Root):
+    'builtin base class for datetime.date and datetime.datetime'
+
+    def __init__(self):
+        self.ymd = 0
+        self.hms = 0
+        self.microsecond = 0
+        self.w_tzinfo = None
+        self.hashcode = -1
+
+    def get_year(self):
+        return self.ymd >> 12
+
+    def get_month(self):
+        return (self.ymd >> 8) & 0xf
+
+    def get_day(self):
+        return self.ymd & 0xff
+
+    def get_hour(self):
+        return self.hms >> 16
+
+    def get_minute(self):
+        return (self.hms >> 8) & 0xff
+
+    def get_second(self):
+        return self.hms & 0xff
+
+    def set_date(self, year, month, day):
+        self.ymd = (year << 12) | (month << 8) | day
+
+    def set_time(self, hour, minute, second, microsecond):
+        self.hms = (hour << 16) | (minute << 8) | second
+        self.microsecond = microsecond
+
+    def descr_format_date(self, space):
+        builder = StringBuilder(10)
+        append_padded(builder, self.get_year(), 4)
+        builder.append('-')
+        append_padded(builder, self.get_month(), 2)
+        builder.append('-')
+        append_padded(builder, self.get_day(), 2)
+        return space.newtext(builder.build())
+
+    def descr_format_time(self, space):
+        return space.newtext(format_time(self.get_hour(), self.get_minute(),
+                                         self.get_second(), self.microsecond))
+
+    @staticmethod
+    def descr_new(space, w_type, w_year=None, w_month=None, w_day=None,
+                  w_hour=None, w_minute=None, w_second=None,
+                  w_microsecond=None, w_tzinfo=None):
+        """Without arguments, makes an uninitialized object.  Otherwise,
+        checks and stores the fields like the datetime.datetime constructor.
+        The tzinfo argument must already have been checked."""
+        self = space.allocate_instance(W_DateTime_Date, w_type)
+        W_DateTime_Date.__init__(self)
+        if w_year is not None:
+            year = check_field(space, w_year, "year", MINYEAR, MAXYEAR)
+            if w_month is None or w_day is None:
+                raise oefmt(space.w_TypeError, "an integer is required")
+            month = check_field(space, w_month, "month", 1, 12)
+            day = check_day_field(space, w_day, year, month)
+            self.set_date(year, month, day)
+        if w_hour is not None:
+            check_and_set_time(self, space, w_hour, w_minute, w_second,
+                               w_microsecond)
+        if w_tzinfo is not None and not space.is_none(w_tzinfo):
+            self.w_tzinfo = w_tzinfo
+        return self
+
+W_DateTime_Date.typedef = TypeDef('pypydatetime_date',
+    __new__ = interp2app(W_DateTime_Date.descr_new),
+    _year = _packed_field(W_DateTime_Date, 'ymd', 'year', 12, 0xffff),
+    _month = _packed_field(W_DateTime_Date, 'ymd', 'month', 8, 0xf),
+    _day = _packed_field(W_DateTime_Date, 'ymd', 'day', 0, 0xff),
+    _hour = _packed_field(W_DateTime_Date, 'hms', 'hour', 16, 0xff),
+    _minute = _packed_field(W_DateTime_Date, 'hms', 'minute', 8, 0xff),
+    _second = _packed_field(W_DateTime_Date, 'hms', 'second', 0, 0xff),
+    _microsecond = _int_field(W_DateTime_Date, '_microsecond'),
+    _tzinfo = _tzinfo_field(W_DateTime_Date),
+    _hashcode = _int_field(W_DateTime_Date, '_hashcode'),
+    _format_date = interp2app(W_DateTime_Date.descr_format_date),
+    _format_time = interp2app(W_DateTime_Date.descr_format_time),
+    )
+W_DateTime_Date.typedef.acceptable_as_base_class = True
+
+
+class W_DateTime_Time(W_Root):
+    'builtin base class for datetime.time'
+
+    def __init__(self):
+        self.hms = 0
+        self.microsecond = 0
+        self.w_tzinfo = None
+        self.hashcode = -1
+
+    def get_hour(self):
+        return self.hms >> 16
+
+    def get_minute(self):
+        return (self.hms >> 8) & 0xff
+
+    def get_second(self):
+        return self.hms & 0xff
+
+    def set_time(self, hour, minute, second, microsecond):
+        self.hms = (hour << 16) | (minute << 8) | second
+        self.microsecond = microsecond
+
+    def descr_format_time(self, space):
+        return space.newtext(format_time(self.get_hour(), self.get_minute(),
+                                         self.get_second(), self.microsecond))
+
+    @staticmethod
+    def descr_new(space, w_type, w_hour=None, w_minute=None, w_second=None,
+                  w_microsecond=None, w_tzinfo=None):
+        """Without arguments, makes an uninitialized object.  Otherwise,
+        checks and stores the fields like the datetime.time constructor.
+        The tzinfo argument must already have been checked."""
+        self = space.allocate_instance(W_DateTime_Time, w_type)
+        W_DateTime_Time.__init__(self)
+        if w_hour is not None:
+            check_and_set_time(self, space, w_hour, w_minute, w_second,
+                               w_microsecond)
+        if w_tzinfo is not None and not space.is_none(w_tzinfo):
+            self.w_tzinfo = w_tzinfo
+        return self
+
+W_DateTime_Time.typedef = TypeDef('pypydatetime_time',
+    __new__ = interp2app(W_DateTime_Time.descr_new),
+    _hour = _packed_field(W_DateTime_Time, 'hms', 'hour', 16, 0xff),
+    _minute = _packed_field(W_DateTime_Time, 'hms', 'minute', 8, 0xff),
+    _second = _packed_field(W_DateTime_Time, 'hms', 'second', 0, 0xff),
+    _microsecond = _int_field(W_DateTime_Time, '_microsecond'),
+    _tzinfo = _tzinfo_field(W_DateTime_Time),
+    _hashcode = _int_field(W_DateTime_Time, '_hashcode'),
+    _format_time = interp2app(W_DateTime_Time.descr_format_time),
+    )
+W_DateTime_Time.typedef.acceptable_as_base_class = True
+
+
+class W_DateTime_Delta(W_Root):
+    'builtin base class for datetime.timedelta'
+
+    def __init__(self):
+        self.days = 0
+        self.seconds = 0
+        self.microseconds = 0
+        self.hashcode = -1
 
-def create_class(name):
-    class W_Class(W_Root):
-        'builtin base clasee for datetime.%s to allow interop with cpyext' % name
-        def descr_new__(space, w_type):
-            return space.allocate_instance(W_Class, w_type)
+    @staticmethod
+    def descr_new(space, w_type):
+        self = space.allocate_instance(W_DateTime_Delta, w_type)
+        W_DateTime_Delta.__init__(self)
+        return self
 
-    W_Class.typedef = TypeDef(name,
-        __new__ = interp2app(func_with_new_name(
-                                    W_Class.descr_new__.im_func,
-                                    '%s_new' % (name,))),
-        )
-    W_Class.typedef.acceptable_as_base_class = True
-    return W_Class
+W_DateTime_Delta.typedef = TypeDef('pypydatetime_delta',
+    __new__ = interp2app(W_DateTime_Delta.descr_new),
+    _days = _int_field(W_DateTime_Delta, '_days'),
+    _seconds = _int_field(W_DateTime_Delta, '_seconds'),
+    _microseconds = _int_field(W_DateTime_Delta, '_microseconds'),
+    _hashcode = _int_field(W_DateTime_Delta, '_hashcode'),
+    )
+W_DateTime_Delta.typedef.acceptable_as_base_class = True
 
-W_DateTime_Time = create_class('pypydatetime_time')
-W_DateTime_Date = create_class('pypydatetime_date')
-W_DateTime_Delta = create_class('pypydatetime_delta')
+# ____________________________________________________________
 
+def round_half_away(x):
+    if x >= 0.0:
+        return int(math.floor(x + 0.5))
+    return int(math.ceil(x - 0.5))
 
+@unwrap_spec(timestamp=float, utc=bool)
+def timestamp_fields(space, timestamp, utc=False):
+    """Convert a POSIX timestamp to a tuple (year, month, day, hour, minute,
+    second, microsecond) in local time or in UTC, like
+    datetime.datetime.fromtimestamp() and utcfromtimestamp() need."""
+    from pypy.module.time.interp_time import (c_localtime, c_gmtime,
+        _get_error_msg)
+    seconds = math.floor(timestamp)
+    microsecond = round_half_away((timestamp - seconds) * 1e6)
+    # If timestamp is less than one microsecond smaller than a full
+    # second, the microseconds can be rounded up to 1000000: in this
+    # case, roll over to seconds
+    if microsecond == 1000000:
+        seconds += 1.0
+        microsecond = 0
+    t = rffi.cast(rffi.TIME_T, seconds)
+    if rffi.cast(lltype.Float, t) != seconds:
+        raise oefmt(space.w_ValueError,
+                    "timestamp out of range for platform time_t")
+    with lltype.scoped_alloc(rffi.TIME_TP.TO, 1) as t_ref:
+        t_ref[0] = t
+        if utc:
+            p = c_gmtime(t_ref)
+        else:
+            p = c_localtime(t_ref)
+    if not p:
+        raise OperationError(space.w_ValueError,
+                             space.newtext(_get_error_msg()))
+    # clamp out leap seconds if the platform has them
+    second = min(rffi.getintfield(p, 'c_tm_sec'), 59)
+    return space.newtuple([
+        space.newint(rffi.getintfield(p, 'c_tm_year') + 1900),
+        space.newint(rffi.getintfield(p, 'c_tm_mon') + 1),
+        space.newint(rffi.getintfield(p, 'c_tm_mday')),
+        space.newint(rffi.getintfield(p, 'c_tm_hour')),
+        space.newint(rffi.getintfield(p, 'c_tm_min')),
+        space.newint(second),
+        space.newint(microsecond)])
@@ -33,6 +33,7 @@ class ThreadModule(MixedModule):
         '_signals_enter':  'interp_signal.signals_enter',
         '_signals_exit':   'interp_signal.signals_exit',
         '_raise_in_thread': 'interp_signal._raise_in_thread',
+        'gil_stats':        'interp_gil.gil_stats',
     }
 
 
@@ -66,6 +67,7 @@ class PyPyDateTime(MixedModule):
         'dateinterop'  : 'interp_pypydatetime.W_DateTime_Date',
         'timeinterop'  : 'interp_pypydatetime.W_DateTime_Time',
         'deltainterop' : 'interp_pypydatetime.W_DateTime_Delta',
+        'timestamp_fields': 'interp_pypydatetime.timestamp_fields',
     }
 
 class PyPyBufferable(MixedModule):
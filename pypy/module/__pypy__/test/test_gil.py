@@ -0,0 +1,32 @@
+from pypy.module.thread.test.support import GenericTestThread
+
+
+class AppTestGilStats(GenericTestThread):
+    spaceconfig = dict(usemodules=['__pypy__', 'thread', 'signal', 'time'])
+
+    def test_gil_stats(self):
+        import __pypy__, thread, time
+
+        def subthread():
+            try:
+                time.sleep(0.01)     # releases the GIL
+                stats.append(__pypy__.thread.gil_stats())
+            finally:
+                done.append(thread.get_ident())
+
+        stats = []
+        done = []
+        thread.start_new_thread(subthread, ())
+        self.waitfor(lambda: done)
+        assert len(stats) == 1
+        all_stats = stats[0]
+        mine = all_stats[done[0]]
+        assert sorted(mine) == ['acquisitions', 'max_wait',
+                                'periodic_releases', 'voluntary_releases',
+                                'wait_time', 'waits']
+        assert mine['acquisitions'] >= 1
+        assert mine['voluntary_releases'] >= 1
+        assert mine['wait_time'] >= mine['max_wait'] >= 0.0
+        assert mine['waits'] <= mine['acquisitions']
+        # the main thread released the GIL while waiting for us
+        assert all_stats[thread.get_ident()]['voluntary_releases'] >= 1
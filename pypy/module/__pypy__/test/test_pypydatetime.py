@@ -0,0 +1,91 @@
+
+class AppTestPyPyDateTime(object):
+    spaceconfig = dict(usemodules=['__pypy__', 'time', 'struct'])
+
+    def test_date_fields(self):
+        from __pypy__._pypydatetime import dateinterop
+        d = dateinterop.__new__(dateinterop, 2017, 2, 28, 13, 5, 59, 12)
+        assert (d._year, d._month, d._day) == (2017, 2, 28)
+        assert (d._hour, d._minute, d._second) == (13, 5, 59)
+        assert d._microsecond == 12
+        assert d._tzinfo is None
+        assert d._hashcode == -1
+        assert d._format_date() == "2017-02-28"
+        assert d._format_time() == "13:05:59.000012"
+        d._day = 3
+        assert (d._year, d._month, d._day) == (2017, 2, 3)
+        d._microsecond = 0
+        assert d._format_time() == "13:05:59"
+        raises(ValueError, setattr, d, '_month', 16)
+        #
+        d = dateinterop.__new__(dateinterop)
+        assert (d._year, d._month, d._day) == (0, 0, 0)
+
+    def test_date_check(self):
+        from __pypy__._pypydatetime import dateinterop
+        new = dateinterop.__new__
+        e = raises(ValueError, new, dateinterop, 2017, 2, 29)
+        assert e.value.args == ('day must be in 1..28', 29)
+        e = raises(ValueError, new, dateinterop, 2016, 2, 30)
+        assert e.value.args == ('day must be in 1..29', 30)
+        e = raises(ValueError, new, dateinterop, 10000, 1, 1)
+        assert e.value.args == ('year must be in 1..9999', 10000)
+        e = raises(ValueError, new, dateinterop, 2000, 1, 1, 24)
+        assert e.value.args == ('hour must be in 0..23', 24)
+        e = raises(ValueError, new, dateinterop, 2000, 1, 1, 0, 0, 0, -1)
+        assert e.value.args == ('microsecond must be in 0..999999', -1)
+        e = raises(ValueError, new, dateinterop, 2000, 13, 1)
+        assert e.value.args == ('month must be in 1..12', 13)
+        e = raises(ValueError, new, dateinterop, 2 ** 100, 1, 1)
+        assert e.value.args == ('year must be in 1..9999', 2 ** 100)
+        #
+        e = raises(TypeError, new, dateinterop, 2000.0, 1, 1)
+        assert str(e.value) == 'integer argument expected, got float'
+        e = raises(TypeError, new, dateinterop, 2000)
+        assert str(e.value) == 'an integer is required'
+        class A(object):
+            def __int__(self):
+                return 5L
+        d = new(dateinterop, 2000, A(), True)
+        assert (d._year, d._month, d._day) == (2000, 5, 1)
+
+    def test_time(self):
+        from __pypy__._pypydatetime import timeinterop
+        t = timeinterop.__new__(timeinterop, 1, 2, tzinfo=42)
+        assert (t._hour, t._minute, t._second, t._microsecond) == (1, 2, 0, 0)
+        assert t._tzinfo == 42
+        assert t._format_time() == "01:02:00"
+        raises(ValueError, timeinterop.__new__, timeinterop, 1, 60)
+
+    def test_timestamp_fields(self):
+        import time
+        from __pypy__._pypydatetime import timestamp_fields
+        assert timestamp_fields(0, True) == (1970, 1, 1, 0, 0, 0, 0)
+        assert timestamp_fields(86400.25, True) == (1970, 1, 2, 0, 0, 0,
+                                                    250000)
+        assert timestamp_fields(59.9999996, True) == (1970, 1, 1, 0, 1, 0, 0)
+        assert timestamp_fields(-0.5, True) == (1969, 12, 31, 23, 59, 59,
+                                                500000)
+        t = 1234567890
+        assert timestamp_fields(t) == time.localtime(t)[:6] + (0,)
+        raises(ValueError, timestamp_fields, 1e200)
+
+    def test_datetime_module(self):
+        import sys
+        sys.modules.pop('datetime', None)
+        import datetime
+        d = datetime.datetime(2010, 1, 2, 3, 4, 5, 6)
+        assert d.isoformat() == '2010-01-02T03:04:05.000006'
+        assert str(d.date()) == '2010-01-02'
+        assert d.time().isoformat() == '03:04:05.000006'
+        assert repr(d) == 'datetime.datetime(2010, 1, 2, 3, 4, 5, 6)'
+        assert d + datetime.timedelta(days=30) == datetime.datetime(
+            2010, 2, 1, 3, 4, 5, 6)
+        assert hash(d) == hash(datetime.datetime(2010, 1, 2, 3, 4, 5, 6))
+        assert not hasattr(d.date(), 'hour')
+        d2 = datetime.datetime.utcfromtimestamp(1262401445.000006)
+        assert d2 == d
+        d3 = datetime.datetime(*d.__reduce__()[1])
+        assert d3 == d
+        raises(ValueError, datetime.date, 2010, 2, 29)
+        raises(TypeError, datetime.time, 1, 2, 3, 4, tzinfo=5)
@@ -0,0 +1,144 @@
+from pypy.interpreter import gateway
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import (TypeDef, GetSetProperty,
+    descr_get_dict, descr_set_dict, make_weakref_descr)
+from pypy.objspace.std.dictmultiobject import (W_DictMultiObject,
+    W_DictObject, EmptyDictStrategy)
+
+
+# Dicts are always ordered in PyPy, so an OrderedDict is just a dict
+# with a few methods that differ: there is no linked list to maintain.
+# Like instances of the pure Python version, OrderedDicts have a
+# __dict__, which is only allocated if needed.
+
+class W_OrderedDict(W_DictObject):
+
+    def __init__(self, space, strategy, storage):
+        W_DictObject.__init__(self, space, strategy, storage)
+        self.w_inst_dict = None
+
+    def getdict(self, space):
+        if self.w_inst_dict is None:
+            self.w_inst_dict = space.newdict(instance=True)
+        return self.w_inst_dict
+
+    def setdict(self, space, w_dict):
+        if not space.isinstance_w(w_dict, space.w_dict):
+            raise oefmt(space.w_TypeError,
+                        "setting OrderedDict's dictionary to a non-dict")
+        self.w_inst_dict = w_dict
+
+    def descr_reversed(self, space):
+        """od.__reversed__() <==> reversed(od)"""
+        return self.nondescr_reversed_dict(space)
+
+    @unwrap_spec(last=bool)
+    def descr_popitem(self, space, last=True):
+        """od.popitem() -> (k, v), return and remove a (key, value) pair.
+        Pairs are returned in LIFO order if last is true or FIFO order if
+        false."""
+        if last:
+            return W_DictMultiObject.descr_popitem(self, space)
+        return self.nondescr_popitem_first(space)
+
+    def descr_repr(self, space):
+        return odictrepr(space, space.get_objects_in_repr(), self)
+
+    def descr_reduce(self, space):
+        """Return state information for pickling"""
+        items_w = [space.newlist([w_key, w_value])
+                   for w_key, w_value in self.items_pairs()]
+        w_args = space.newtuple([space.newlist(items_w)])
+        w_type = space.type(self)
+        w_inst_dict = self.w_inst_dict
+        if w_inst_dict is not None and space.len_w(w_inst_dict) > 0:
+            w_state = space.call_method(w_inst_dict, 'copy')
+            return space.newtuple([w_type, w_args, w_state])
+        return space.newtuple2(w_type, w_args)
+
+    def descr_copy(self, space):
+        """od.copy() -> a shallow copy of od"""
+        return space.call_function(space.type(self), self)
+
+    def descr_eq(self, space, w_other):
+        """od.__eq__(y) <==> od==y.  Comparison to another OD is
+        order-sensitive while comparison to a regular mapping is
+        order-insensitive."""
+        w_res = W_DictMultiObject.descr_eq(self, space, w_other)
+        if not isinstance(w_other, W_OrderedDict):
+            return w_res
+        if not space.is_w(w_res, space.w_True):
+            return w_res
+        # same items, now compare the order of the keys
+        iter1 = self.iterkeys()
+        iter2 = w_other.iterkeys()
+        while True:
+            w_key1 = iter1.next_key()
+            w_key2 = iter2.next_key()
+            if w_key1 is None or w_key2 is None:
+                break
+            if not space.eq_w(w_key1, w_key2):
+                return space.w_False
+        return space.w_True
+
+    def descr_ne(self, space, w_other):
+        """od.__ne__(y) <==> od!=y"""
+        return space.not_(space.eq(self, w_other))
+
+    def items_pairs(self):
+        result = []
+        iterator = self.iteritems()
+        while True:
+            w_key, w_value = iterator.next_item()
+            if w_key is None:
+                break
+            result.append((w_key, w_value))
+        return result
+
+
+app = gateway.applevel('''
+    def odictrepr(currently_in_repr, od):
+        name = od.__class__.__name__
+        if not od:
+            return '%s()' % (name,)
+        if od in currently_in_repr:
+            return '...'
+        currently_in_repr[od] = 1
+        try:
+            return '%s(%r)' % (name, od.items())
+        finally:
+            try:
+                del currently_in_repr[od]
+            except:
+                pass
+''', filename=__file__)
+
+odictrepr = app.interphook("odictrepr")
+
+
+def descr__new__(space, w_subtype, __args__):
+    strategy = space.fromcache(EmptyDictStrategy)
+    w_self = space.allocate_instance(W_OrderedDict, w_subtype)
+    W_OrderedDict.__init__(w_self, space, strategy,
+                           strategy.get_empty_storage())
+    return w_self
+
+W_OrderedDict.typedef = TypeDef("collections.OrderedDict",
+    W_DictMultiObject.typedef,
+    __doc__ = """Dictionary that remembers insertion order.
+
+In PyPy all dicts are ordered anyway.  This is mostly useful as a
+placeholder to mean "this dict must be ordered even on CPython".""",
+    __new__ = interp2app(descr__new__),
+    __reversed__ = interp2app(W_OrderedDict.descr_reversed),
+    __repr__ = interp2app(W_OrderedDict.descr_repr),
+    __reduce__ = interp2app(W_OrderedDict.descr_reduce),
+    __eq__ = interp2app(W_OrderedDict.descr_eq),
+    __ne__ = interp2app(W_OrderedDict.descr_ne),
+    popitem = interp2app(W_OrderedDict.descr_popitem),
+    copy = interp2app(W_OrderedDict.descr_copy),
+    __dict__ = GetSetProperty(descr_get_dict, descr_set_dict,
+                              cls=W_OrderedDict),
+    __weakref__ = make_weakref_descr(W_OrderedDict),
+)
@@ -4,6 +4,7 @@ class Module(MixedModule):
     """High performance data structures.
 - deque:        ordered collection accessible from endpoints only
 - defaultdict:  dict subclass with a default value factory
+- OrderedDict:  dict subclass that remembers the order entries were added
 """
 
     appleveldefs = {
@@ -13,6 +14,7 @@ class Module(MixedModule):
     interpleveldefs = {
         'deque' : 'interp_deque.W_Deque',
         '__missing__': 'interp_defaultdict.missing',
+        'OrderedDict': 'interp_ordereddict.W_OrderedDict',
         }
 
     def setup_after_space_initialization(self):
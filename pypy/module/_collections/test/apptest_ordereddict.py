@@ -0,0 +1,90 @@
+# spaceconfig = {"usemodules" : ["_collections"]}
+
+from _collections import OrderedDict
+from pytest import raises
+
+def test_basics():
+    assert OrderedDict.__module__ == 'collections'
+    assert issubclass(OrderedDict, dict)
+    od = OrderedDict([('c', 1), ('b', 2), ('a', 3)])
+    od['d'] = 4
+    assert sorted(od.keys()) == ['a', 'b', 'c', 'd']
+    assert list(reversed(od)) == od.keys()[::-1]
+    assert len(od) == 4
+
+def test_popitem():
+    od = OrderedDict([('c', 1), ('b', 2), ('a', 3)])
+    items = od.items()
+    assert od.popitem(last=False) == items[0]
+    assert od.popitem(False) == items[1]
+    assert od.popitem() == items[2]
+    raises(KeyError, od.popitem)
+    raises(KeyError, od.popitem, last=False)
+
+def test_repr():
+    od = OrderedDict([('c', 1)])
+    assert repr(od) == "OrderedDict([('c', 1)])"
+    assert repr(OrderedDict()) == "OrderedDict()"
+    od = OrderedDict()
+    od['x'] = od
+    assert repr(od) == "OrderedDict([('x', ...)])"
+
+def test_reduce():
+    od = OrderedDict([('c', 1), ('b', 2)])
+    items = [list(item) for item in od.items()]
+    assert od.__reduce__() == (OrderedDict, (items,))
+    od.x = 10
+    assert od.__dict__ == {'x': 10}
+    assert od.__reduce__() == (OrderedDict, (items,), {'x': 10})
+    cls, args, state = od.__reduce__()
+    od2 = cls(*args)
+    od2.__dict__.update(state)
+    assert od2.items() == od.items()
+    assert od2.x == 10
+
+def test_eq():
+    od1 = OrderedDict([('a', 1), ('b', 2)])
+    od2 = OrderedDict()
+    od2.update(reversed(od1.items()))
+    if od1.keys() != od2.keys():
+        assert od1 != od2
+        assert not (od1 == od2)
+    assert od1 == od1.copy()
+    assert not (od1 != od1.copy())
+    # comparison to a regular dict is order-insensitive
+    assert od1 == dict(od2)
+    assert dict(od2) == od1
+    assert od1 != OrderedDict([('a', 1)])
+
+def test_copy():
+    od = OrderedDict([('c', 1), ('b', 2)])
+    od2 = od.copy()
+    assert type(od2) is OrderedDict
+    assert od2 == od
+    od2['z'] = 3
+    assert 'z' not in od
+
+def test_subclass():
+    class Missing(OrderedDict):
+        def __missing__(self, key):
+            return 0
+    m = Missing()
+    assert m['a'] == 0
+    assert 'a' not in m
+    m.attr = 42
+    assert m.attr == 42
+    m2 = m.copy()
+    assert type(m2) is Missing
+    assert repr(Missing([(1, 2)])) == "Missing([(1, 2)])"
+
+def test_weakref():
+    import weakref
+    od = OrderedDict()
+    assert weakref.ref(od)() is od
+
+def test_set_dict():
+    od = OrderedDict()
+    od.__dict__ = {'a': 5}
+    assert od.a == 5
+    with raises(TypeError):
+        od.__dict__ = 42
@@ -1,5 +1,7 @@
 from rpython.rlib.rstring import StringBuilder
 from rpython.rlib import objectmodel
+from rpython.rlib.buffer import StringBuffer, ALLOW_UNALIGNED_ACCESS
+from rpython.rtyper.lltypesystem import lltype
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.gateway import unwrap_spec
@@ -9,11 +11,43 @@ from pypy.module._csv.interp_csv import _build_dialect
 from pypy.module._csv.interp_csv import (QUOTE_MINIMAL, QUOTE_ALL,
                                          QUOTE_NONNUMERIC, QUOTE_NONE)
 from pypy.objspace.std.util import wrap_parsestringerror
+from pypy.module._pypyjson.simd import (USE_SIMD, WORD_SIZE,
+    char_repeated_word_width, any_char_in_words_zero, index_nonzero)
 
 (START_RECORD, START_FIELD, ESCAPED_CHAR, IN_FIELD,
  IN_QUOTED_FIELD, ESCAPE_IN_QUOTED_FIELD, QUOTE_IN_QUOTED_FIELD,
  EAT_CRNL) = range(8)
 
+# the types of the columns given to readrows()
+COLUMN_STR, COLUMN_INT, COLUMN_FLOAT = range(3)
+
+
+def find_special_char(buf, start, end, c1, c2):
+    """Returns the index of the first character in line[start:end] which is
+    c1, c2, '\n', '\r' or '\0', or 'end' if there is none, where 'buf' is
+    a StringBuffer on the line.  On x86-64, the line is scanned a word at a
+    time."""
+    line = buf.value
+    i = start
+    if USE_SIMD and ALLOW_UNALIGNED_ACCESS:
+        mask1 = char_repeated_word_width(c1)
+        mask2 = char_repeated_word_width(c2)
+        masknl = char_repeated_word_width('\n')
+        maskcr = char_repeated_word_width('\r')
+        while i + WORD_SIZE <= end:
+            word = buf.typed_read(lltype.Unsigned, i)
+            cond = any_char_in_words_zero(word ^ mask1, word ^ mask2,
+                                          word ^ masknl, word ^ maskcr, word)
+            if cond:
+                return i + index_nonzero(cond)
+            i += WORD_SIZE
+    while i < end:
+        c = line[i]
+        if c == c1 or c == c2 or c == '\n' or c == '\r' or c == '\0':
+            break
+        i += 1
+    return i
+
 
 class W_Reader(W_Root):
 
@@ -22,6 +56,10 @@ class W_Reader(W_Root):
         self.dialect = dialect
         self.w_iter = w_iter
         self.line_num = 0
+        self.column_types = None    # a list of COLUMN_*, during readrows()
+        # the rows parsed by a readrows() that raised, returned next;
+        # in reverse order, so that they can be taken with pop()
+        self.pending_rows_w = None
 
     def iter_w(self):
         return self
@@ -39,10 +77,37 @@ class W_Reader(W_Root):
             raise self.error("field larger than field limit")
         field_builder.append(c)
 
+    def add_chars(self, field_builder, buf, start, end, c1, c2):
+        # add line[start] and all the following characters up to the
+        # next special one, which is returned
+        assert field_builder is not None
+        stop = find_special_char(buf, start + 1, end, c1, c2)
+        if field_builder.getlength() + (stop - start) > field_limit.limit:
+            raise self.error("field larger than field limit")
+        field_builder.append_slice(buf.value, start, stop)
+        return stop
+
     def save_field(self, field_builder):
         space = self.space
         field = field_builder.build()
-        if self.numeric_field:
+        column_type = COLUMN_STR
+        if self.column_types is not None:
+            column = len(self.fields_w)
+            if column < len(self.column_types):
+                column_type = self.column_types[column]
+        if column_type == COLUMN_INT:
+            from rpython.rlib.rarithmetic import string_to_int
+            from rpython.rlib.rstring import (ParseStringError,
+                ParseStringOverflowError)
+            self.numeric_field = False
+            try:
+                w_obj = space.newint(string_to_int(field))
+            except ParseStringError as e:
+                raise wrap_parsestringerror(space, e, space.newtext(field))
+            except ParseStringOverflowError:
+                w_obj = space.call_function(space.w_long,
+                                            space.newtext(field))
+        elif self.numeric_field or column_type == COLUMN_FLOAT:
             from rpython.rlib.rstring import ParseStringError
             from rpython.rlib.rfloat import string_to_float
             self.numeric_field = False
@@ -56,6 +121,12 @@ class W_Reader(W_Root):
         self.fields_w.append(w_obj)
 
     def next_w(self):
+        pending_rows_w = self.pending_rows_w
+        if pending_rows_w is not None:
+            w_row = pending_rows_w.pop()
+            if not pending_rows_w:
+                self.pending_rows_w = None
+            return w_row
         space = self.space
         dialect = self.dialect
         self.fields_w = []
@@ -80,7 +151,13 @@ class W_Reader(W_Root):
                 raise
             self.line_num += 1
             line = space.text_w(w_line)
-            for c in line:
+            # shared by all the add_chars() on this line
+            buf = StringBuffer(line)
+            end = len(line)
+            i = 0
+            while i < end:
+                c = line[i]
+                i += 1
                 if c == '\0':
                     raise self.error("line contains NULL byte")
 
@@ -116,7 +193,9 @@ class W_Reader(W_Root):
                         # begin new unquoted field
                         if dialect.quoting == QUOTE_NONNUMERIC:
                             self.numeric_field = True
-                        self.add_char(field_builder, c)
+                        i = self.add_chars(field_builder, buf, i - 1, end,
+                                           dialect.delimiter,
+                                           dialect.escapechar)
                         state = IN_FIELD
 
                 elif state == ESCAPED_CHAR:
@@ -138,7 +217,9 @@ class W_Reader(W_Root):
                         state = START_FIELD
                     else:
                         # normal character - save in field
-                        self.add_char(field_builder, c)
+                        i = self.add_chars(field_builder, buf, i - 1, end,
+                                           dialect.delimiter,
+                                           dialect.escapechar)
 
                 elif state == IN_QUOTED_FIELD:
                     # in quoted field
@@ -155,7 +236,9 @@ class W_Reader(W_Root):
                             state = IN_FIELD
                     else:
                         # normal character - save in field
-                        self.add_char(field_builder, c)
+                        i = self.add_chars(field_builder, buf, i - 1, end,
+                                           dialect.quotechar,
+                                           dialect.escapechar)
 
                 elif state == ESCAPE_IN_QUOTED_FIELD:
                     self.add_char(field_builder, c)
@@ -213,6 +296,59 @@ class W_Reader(W_Root):
         self.fields_w = None
         return w_result
 
+    @unwrap_spec(size=int)
+    def readrows_w(self, size, w_types=None):
+        """readrows(size[, types]) -> list of rows
+
+        Read at most 'size' rows at once.  Returns an empty list at the end
+        of the input.  If a row cannot be parsed, the exception is raised
+        and the rows before it are returned by the next call.
+
+        If given, 'types' is a sequence with, for each column, either int,
+        float or str/None.  The int and float columns are converted
+        directly, and a row with only int or only float values is stored as
+        a list of unboxed numbers."""
+        space = self.space
+        if size < 0:
+            raise oefmt(space.w_ValueError, "size must be non-negative")
+        self.column_types = self.unwrap_column_types(w_types)
+        rows_w = []
+        try:
+            while len(rows_w) < size:
+                try:
+                    w_row = self.next_w()
+                except OperationError as e:
+                    if not e.match(space, space.w_StopIteration):
+                        # keep the rows parsed so far for the next call
+                        if rows_w:
+                            rows_w.reverse()
+                            self.pending_rows_w = rows_w
+                        raise
+                    break
+                rows_w.append(w_row)
+        finally:
+            self.column_types = None
+        return space.newlist(rows_w)
+
+    def unwrap_column_types(self, w_types):
+        space = self.space
+        if space.is_none(w_types):
+            return None
+        column_types = []
+        for w_type in space.listview(w_types):
+            if (space.is_w(w_type, space.w_int) or
+                    space.is_w(w_type, space.w_long)):
+                column_types.append(COLUMN_INT)
+            elif space.is_w(w_type, space.w_float):
+                column_types.append(COLUMN_FLOAT)
+            elif space.is_none(w_type) or space.is_w(w_type, space.w_bytes):
+                column_types.append(COLUMN_STR)
+            else:
+                raise oefmt(space.w_TypeError,
+                            "column types must be int, float, str or None, "
+                            "not %R", w_type)
+        return column_types
+
 
 def csv_reader(space, w_iterator, w_dialect=None,
                   w_delimiter        = None,
@@ -251,6 +387,7 @@ W_Reader.typedef = TypeDef(
             wrapfn="newint"),
         __iter__ = interp2app(W_Reader.iter_w),
         next = interp2app(W_Reader.next_w),
+        readrows = interp2app(W_Reader.readrows_w),
         __doc__ = """CSV reader
 
 Reader objects are responsible for reading and parsing tabular data
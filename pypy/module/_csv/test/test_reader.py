@@ -104,3 +104,71 @@ class AppTestReader(object):
         self._read_test(['a,"'], 'Error', strict=True)
         self._read_test(['"a'], 'Error', strict=True)
         self._read_test(['^'], 'Error', escapechar='^', strict=True)
+
+    def test_read_long_fields(self):
+        # exercises the word-at-a-time scanning of fields
+        line = 'abcdefghijklmnop,"qrstuvwxyz,0123456789""ABC",' + 'x' * 29
+        self._read_test([line + '\r\n'], [['abcdefghijklmnop',
+                                           'qrstuvwxyz,0123456789"ABC',
+                                           'x' * 29]])
+        self._read_test(['abcdefghijklmnopqrstuvwxyz\0'], 'Error')
+        self._read_test(['abcdefghij\\,klmnopqrstuvwxyz'],
+                        [['abcdefghij,klmnopqrstuvwxyz']], escapechar='\\')
+        self._read_test(['"abcdefghij\nklmnopqrstuvwxyz"'],
+                        [['abcdefghij\nklmnopqrstuvwxyz']])
+
+    def test_readrows(self):
+        import _csv as csv
+        r = csv.reader(['a,1', 'b,2', 'c,3'])
+        assert r.readrows(2) == [['a', '1'], ['b', '2']]
+        assert r.readrows(2) == [['c', '3']]
+        assert r.readrows(2) == []
+        assert r.line_num == 3
+        assert r.readrows(0) == []
+        exc = raises(ValueError, r.readrows, -1)
+        assert str(exc.value) == "size must be non-negative"
+
+    def test_readrows_error_keeps_rows(self):
+        import _csv as csv
+        r = csv.reader(['1,2', '3,4', '5,x', '7,8', '9,10'])
+        raises(ValueError, r.readrows, 10, [int, int])
+        # the rows parsed before the error are not lost
+        assert r.readrows(1, [int, int]) == [[1, 2]]
+        assert r.readrows(10, [int, int]) == [[3, 4], [7, 8], [9, 10]]
+        r = csv.reader(['a', 'b', 'c\0', 'd'])
+        raises(csv.Error, r.readrows, 10)
+        assert r.next() == ['a']
+        assert r.next() == ['b']
+        assert r.next() == ['d']
+
+    def test_readrows_types(self):
+        import _csv as csv
+        lines = ['x,1,2.5,-7', 'y, 12 ,1e3,"99999999999999999999999"']
+        r = csv.reader(lines)
+        rows = r.readrows(10, [None, int, float, long])
+        assert rows == [['x', 1, 2.5, -7],
+                        ['y', 12, 1000.0, 99999999999999999999999]]
+        assert type(rows[1][3]) is long
+        # columns without a type are kept as strings
+        r = csv.reader(lines)
+        assert r.readrows(10, [str, int]) == [['x', 1, '2.5', '-7'],
+                                              ['y', 12, '1e3',
+                                               '99999999999999999999999']]
+        # the types are only used by readrows()
+        r = csv.reader(lines)
+        r.readrows(1, [str, int])
+        assert r.next()[1] == ' 12 '
+        raises(ValueError, csv.reader(['1,a']).readrows, 1, [int, int])
+        raises(TypeError, csv.reader(lines).readrows, 1, [list])
+
+    def test_readrows_strategy(self):
+        import _csv as csv
+        try:
+            from __pypy__ import strategy
+        except ImportError:
+            skip("need __pypy__.strategy")
+        rows = csv.reader(['1,2,3', '4,5,6']).readrows(2, [int] * 3)
+        assert rows == [[1, 2, 3], [4, 5, 6]]
+        assert strategy(rows[0]) == "IntegerListStrategy"
+        rows = csv.reader(['1,2.5']).readrows(1, [float, float])
+        assert strategy(rows[0]) == "FloatListStrategy"
@@ -0,0 +1,81 @@
+import _elementtree
+from xml.etree import ElementTree as ET
+
+# the parts that don't need to be fast are taken from ElementTree
+dump = ET.dump
+iselement = ET.iselement
+tostring = ET.tostring
+tostringlist = ET.tostringlist
+register_namespace = ET.register_namespace
+QName = ET.QName
+ParseError = ET.ParseError
+VERSION = ET.VERSION
+
+
+def Comment(text=None):
+    # the serializer recognizes comments by their tag
+    element = _elementtree.Element(ET.Comment)
+    element.text = text
+    return element
+
+def ProcessingInstruction(target, text=None):
+    element = _elementtree.Element(ET.ProcessingInstruction)
+    element.text = target
+    if text:
+        element.text = element.text + " " + text
+    return element
+
+PI = ProcessingInstruction
+
+
+class ElementTree(ET.ElementTree):
+    __module__ = 'xml.etree.cElementTree'
+
+    def parse(self, source, parser=None):
+        close_source = False
+        if not hasattr(source, "read"):
+            source = open(source, "rb")
+            close_source = True
+        try:
+            if parser is None:
+                parser = _elementtree.XMLParser()
+            while 1:
+                data = source.read(65536)
+                if not data:
+                    break
+                parser.feed(data)
+            self._root = parser.close()
+            return self._root
+        finally:
+            if close_source:
+                source.close()
+
+
+def parse(source, parser=None):
+    tree = ElementTree()
+    tree.parse(source, parser)
+    return tree
+
+def XML(text, parser=None):
+    if not parser:
+        parser = _elementtree.XMLParser()
+    parser.feed(text)
+    return parser.close()
+
+fromstring = XML
+
+def XMLID(text, parser=None):
+    tree = XML(text, parser)
+    ids = {}
+    for elem in tree.iter():
+        id = elem.get("id")
+        if id:
+            ids[id] = elem
+    return tree, ids
+
+def fromstringlist(sequence, parser=None):
+    if not parser:
+        parser = _elementtree.XMLParser()
+    for text in sequence:
+        parser.feed(text)
+    return parser.close()
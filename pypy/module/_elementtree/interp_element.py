@@ -0,0 +1,512 @@
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+
+
+def import_app_module(space, name):
+    w_builtin = space.getbuiltinmodule('__builtin__')
+    w_import = space.getattr(w_builtin, space.newtext("__import__"))
+    return space.call_function(w_import, space.newtext(name),
+                               space.w_None, space.w_None,
+                               space.newlist([space.newtext('*')]))
+
+
+class W_Element(W_Root):
+    """ An element of the tree.
+
+    The storage is kept small because the trees can be huge: a missing
+    attribute dictionary or list of children is stored as None, so that leaf
+    elements without attributes only need the object itself.  The dictionary
+    is created on demand when the 'attrib' attribute is read. """
+
+    def __init__(self, w_tag, w_attrib=None):
+        self.w_tag = w_tag
+        self.w_attrib = w_attrib
+        self.w_text = None
+        self.w_tail = None
+        self.children_w = None
+
+    def num_children(self):
+        if self.children_w is None:
+            return 0
+        return len(self.children_w)
+
+    def append_child(self, w_child):
+        if self.children_w is None:
+            self.children_w = [w_child]
+        else:
+            self.children_w.append(w_child)
+
+    def remove_child(self, w_child):
+        """Remove 'w_child', compared by identity.  Returns False if it is
+        not a child of this element."""
+        children_w = self.children_w
+        if children_w is not None:
+            for i in range(len(children_w)):
+                if children_w[i] is w_child:
+                    del children_w[i]
+                    if not children_w:
+                        self.children_w = None
+                    return True
+        return False
+
+    def get_children_copy(self):
+        if self.children_w is None:
+            return []
+        return self.children_w[:]
+
+    def set_children(self, space, w_iterable):
+        children_w = []
+        for w_child in space.listview(w_iterable):
+            children_w.append(check_element(space, w_child))
+        if children_w:
+            self.children_w = children_w
+        else:
+            self.children_w = None
+
+    def get_attrib(self, space):
+        if self.w_attrib is None:
+            self.w_attrib = space.newdict()
+        return self.w_attrib
+
+    def clear(self):
+        self.w_attrib = None
+        self.w_text = None
+        self.w_tail = None
+        self.children_w = None
+
+    def _wrap_child_list(self, space):
+        return space.newlist(self.get_children_copy())
+
+    # ____________________________________________________________
+    # attributes
+
+    def descr_get_tag(self, space):
+        return self.w_tag
+
+    def descr_set_tag(self, space, w_tag):
+        self.w_tag = w_tag
+
+    def descr_get_attrib(self, space):
+        return self.get_attrib(space)
+
+    def descr_set_attrib(self, space, w_attrib):
+        self.w_attrib = w_attrib
+
+    def descr_get_text(self, space):
+        if self.w_text is None:
+            return space.w_None
+        return self.w_text
+
+    def descr_set_text(self, space, w_text):
+        self.w_text = w_text
+
+    def descr_get_tail(self, space):
+        if self.w_tail is None:
+            return space.w_None
+        return self.w_tail
+
+    def descr_set_tail(self, space, w_tail):
+        self.w_tail = w_tail
+
+    def descr_repr(self, space):
+        return space.newtext("<Element %s at 0x%s>" % (
+            space.text_w(space.repr(self.w_tag)), self.getaddrstring(space)))
+
+    # ____________________________________________________________
+    # sequence of children
+
+    def descr_len(self, space):
+        return space.newint(self.num_children())
+
+    def descr_getitem(self, space, w_index):
+        if space.isinstance_w(w_index, space.w_slice):
+            return space.getitem(self._wrap_child_list(space), w_index)
+        index = space.getindex_w(w_index, space.w_IndexError)
+        length = self.num_children()
+        if index < 0:
+            index += length
+        if not (0 <= index < length):
+            raise oefmt(space.w_IndexError, "child index out of range")
+        return self.children_w[index]
+
+    def descr_setitem(self, space, w_index, w_item):
+        if space.isinstance_w(w_index, space.w_slice):
+            w_list = self._wrap_child_list(space)
+            space.setitem(w_list, w_index, w_item)
+            self.set_children(space, w_list)
+            return
+        w_child = check_element(space, w_item)
+        index = space.getindex_w(w_index, space.w_IndexError)
+        length = self.num_children()
+        if index < 0:
+            index += length
+        if not (0 <= index < length):
+            raise oefmt(space.w_IndexError,
+                        "child assignment index out of range")
+        self.children_w[index] = w_child
+
+    def descr_delitem(self, space, w_index):
+        if space.isinstance_w(w_index, space.w_slice):
+            w_list = self._wrap_child_list(space)
+            space.delitem(w_list, w_index)
+            self.set_children(space, w_list)
+            return
+        index = space.getindex_w(w_index, space.w_IndexError)
+        length = self.num_children()
+        if index < 0:
+            index += length
+        if not (0 <= index < length):
+            raise oefmt(space.w_IndexError,
+                        "child assignment index out of range")
+        del self.children_w[index]
+        if not self.children_w:
+            self.children_w = None
+
+    def descr_getslice(self, space, w_start, w_stop):
+        return self.descr_getitem(space,
+                    space.newslice(w_start, w_stop, space.w_None))
+
+    def descr_setslice(self, space, w_start, w_stop, w_item):
+        self.descr_setitem(space,
+                    space.newslice(w_start, w_stop, space.w_None), w_item)
+
+    def descr_delslice(self, space, w_start, w_stop):
+        self.descr_delitem(space,
+                    space.newslice(w_start, w_stop, space.w_None))
+
+    def descr_iter(self, space):
+        return space.newseqiter(self)
+
+    def descr_append(self, space, w_element):
+        self.append_child(check_element(space, w_element))
+
+    def descr_extend(self, space, w_elements):
+        for w_element in space.listview(w_elements):
+            self.append_child(check_element(space, w_element))
+
+    @unwrap_spec(index=int)
+    def descr_insert(self, space, index, w_element):
+        w_child = check_element(space, w_element)
+        if self.children_w is None:
+            self.children_w = [w_child]
+            return
+        length = len(self.children_w)
+        if index < 0:
+            index += length
+            if index < 0:
+                index = 0
+        elif index > length:
+            index = length
+        self.children_w.insert(index, w_child)
+
+    def descr_remove(self, space, w_element):
+        if not self.remove_child(w_element):
+            raise oefmt(space.w_ValueError, "list.remove(x): x not in list")
+
+    def descr_getchildren(self, space):
+        return self._wrap_child_list(space)
+
+    # ____________________________________________________________
+    # attribute dictionary
+
+    def descr_get(self, space, w_key, w_default=None):
+        if w_default is None:
+            w_default = space.w_None
+        if self.w_attrib is None:
+            return w_default
+        return space.call_method(self.w_attrib, "get", w_key, w_default)
+
+    def descr_set(self, space, w_key, w_value):
+        space.setitem(self.get_attrib(space), w_key, w_value)
+
+    def descr_keys(self, space):
+        if self.w_attrib is None:
+            return space.newlist([])
+        return space.call_method(self.w_attrib, "keys")
+
+    def descr_items(self, space):
+        if self.w_attrib is None:
+            return space.newlist([])
+        return space.call_method(self.w_attrib, "items")
+
+    # ____________________________________________________________
+
+    def descr_clear(self, space):
+        self.clear()
+
+    def descr_makeelement(self, space, w_tag, w_attrib):
+        return W_Element(w_tag, space.call_method(w_attrib, "copy"))
+
+    def copy(self, space):
+        w_attrib = self.w_attrib
+        if w_attrib is not None:
+            w_attrib = space.call_method(w_attrib, "copy")
+        w_elem = W_Element(self.w_tag, w_attrib)
+        w_elem.w_text = self.w_text
+        w_elem.w_tail = self.w_tail
+        if self.children_w is not None:
+            w_elem.children_w = self.children_w[:]
+        return w_elem
+
+    def descr_copy(self, space):
+        return self.copy(space)
+
+    def descr_deepcopy(self, space, w_memo):
+        w_deepcopy = space.getattr(import_app_module(space, "copy"),
+                                   space.newtext("deepcopy"))
+        w_elem = W_Element(deepcopy(space, w_deepcopy, self.w_tag, w_memo),
+                           deepcopy(space, w_deepcopy, self.w_attrib, w_memo))
+        w_elem.w_text = deepcopy(space, w_deepcopy, self.w_text, w_memo)
+        w_elem.w_tail = deepcopy(space, w_deepcopy, self.w_tail, w_memo)
+        if self.children_w is not None:
+            w_elem.children_w = [
+                check_element(space, deepcopy(space, w_deepcopy, w_child,
+                                              w_memo))
+                for w_child in self.children_w]
+        return w_elem
+
+    # ____________________________________________________________
+    # searching
+
+    def descr_find(self, space, w_path, w_namespaces=None):
+        if w_namespaces is None and is_simple_path(space, w_path):
+            if self.children_w is not None:
+                for w_child in self.children_w:
+                    assert isinstance(w_child, W_Element)
+                    if space.eq_w(w_child.w_tag, w_path):
+                        return w_child
+            return space.w_None
+        return self._call_elementpath(space, "find", w_path, w_namespaces)
+
+    def descr_findtext(self, space, w_path, w_default=None,
+                       w_namespaces=None):
+        if w_default is None:
+            w_default = space.w_None
+        if w_namespaces is None and is_simple_path(space, w_path):
+            if self.children_w is not None:
+                for w_child in self.children_w:
+                    assert isinstance(w_child, W_Element)
+                    if space.eq_w(w_child.w_tag, w_path):
+                        if w_child.w_text is None:
+                            return space.newtext("")
+                        return w_child.w_text
+            return w_default
+        return self._call_elementpath(space, "findtext", w_path,
+                                      w_namespaces, w_default)
+
+    def descr_findall(self, space, w_path, w_namespaces=None):
+        if w_namespaces is None and is_simple_path(space, w_path):
+            result_w = []
+            if self.children_w is not None:
+                for w_child in self.children_w:
+                    assert isinstance(w_child, W_Element)
+                    if space.eq_w(w_child.w_tag, w_path):
+                        result_w.append(w_child)
+            return space.newlist(result_w)
+        return self._call_elementpath(space, "findall", w_path, w_namespaces)
+
+    def descr_iterfind(self, space, w_path, w_namespaces=None):
+        return self._call_elementpath(space, "iterfind", w_path, w_namespaces)
+
+    def _call_elementpath(self, space, name, w_path, w_namespaces,
+                          w_default=None):
+        if w_namespaces is None:
+            w_namespaces = space.w_None
+        w_elementpath = import_app_module(space, "xml.etree.ElementPath")
+        if w_default is not None:
+            return space.call_method(w_elementpath, name, self, w_path,
+                                     w_default, w_namespaces)
+        return space.call_method(w_elementpath, name, self, w_path,
+                                 w_namespaces)
+
+    def descr_iter_elements(self, space, w_tag=None):
+        if w_tag is not None and (space.is_w(w_tag, space.w_None) or
+                                  space.eq_w(w_tag, space.newtext("*"))):
+            w_tag = None
+        return W_ElementIter(self, w_tag, False)
+
+    def descr_getiterator(self, space, w_tag=None):
+        return space.newlist(space.listview(
+            self.descr_iter_elements(space, w_tag)))
+
+    def descr_itertext(self, space):
+        return W_ElementIter(self, None, True)
+
+
+def check_element(space, w_obj):
+    if not isinstance(w_obj, W_Element):
+        raise oefmt(space.w_TypeError,
+                    "expected an Element, not \"%T\"", w_obj)
+    return w_obj
+
+def deepcopy(space, w_deepcopy, w_obj, w_memo):
+    if w_obj is None:
+        return None
+    return space.call_function(w_deepcopy, w_obj, w_memo)
+
+def is_simple_path(space, w_path):
+    """Is 'w_path' just a tag name (possibly with a '{uri}' prefix), which
+    can be looked up directly without going through ElementPath?"""
+    if not space.isinstance_w(w_path, space.w_bytes):
+        return False
+    path = space.bytes_w(w_path)
+    if not path:
+        return False
+    in_uri = False
+    for c in path:
+        if c == '{':
+            in_uri = True
+        elif c == '}':
+            in_uri = False
+        elif not in_uri and (c == '/' or c == '*' or c == '[' or c == '@' or
+                             c == '.'):
+            return False
+    return True
+
+def has_text_tag(space, w_element):
+    w_tag = w_element.w_tag
+    return (space.is_w(w_tag, space.w_None) or
+            space.isinstance_w(w_tag, space.w_basestring))
+
+
+class W_ElementIter(W_Root):
+    """ Iterates over a tree in document order, yielding either the elements
+    (optionally only the ones with a given tag) or all the inner text. """
+
+    def __init__(self, w_root, w_tag, text):
+        self.w_tag = w_tag
+        self.text = text
+        # the elements that are being walked, and for each of them the index
+        # of the next child to visit; -1 means that it was just entered
+        self.stack_w = [w_root]
+        self.indices = [-1]
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        stack_w = self.stack_w
+        indices = self.indices
+        while stack_w:
+            w_elem = stack_w[-1]
+            assert isinstance(w_elem, W_Element)
+            index = indices[-1]
+            if index < 0:
+                indices[-1] = 0
+                if self.text:
+                    if not has_text_tag(space, w_elem):
+                        # neither text nor children, but the tail is still
+                        # reported by the parent
+                        indices[-1] = w_elem.num_children()
+                    elif (w_elem.w_text is not None and
+                              space.is_true(w_elem.w_text)):
+                        return w_elem.w_text
+                elif (self.w_tag is None or
+                          space.eq_w(w_elem.w_tag, self.w_tag)):
+                    return w_elem
+                continue
+            if index < w_elem.num_children():
+                indices[-1] = index + 1
+                w_child = w_elem.children_w[index]
+                stack_w.append(w_child)
+                indices.append(-1)
+                continue
+            stack_w.pop()
+            indices.pop()
+            if (self.text and stack_w and w_elem.w_tail is not None and
+                    space.is_true(w_elem.w_tail)):
+                return w_elem.w_tail
+        raise OperationError(space.w_StopIteration, space.w_None)
+
+W_ElementIter.typedef = TypeDef("_elementtree._element_iterator",
+    __iter__ = interp2app(W_ElementIter.descr_iter),
+    next = interp2app(W_ElementIter.descr_next),
+)
+W_ElementIter.typedef.acceptable_as_base_class = False
+
+
+def descr_new_element(space, w_subtype, w_tag, __args__):
+    args_w, kwds_w = __args__.unpack()
+    w_attrib = kwds_w.pop('attrib', None)
+    if args_w:
+        if len(args_w) > 1 or w_attrib is not None:
+            raise oefmt(space.w_TypeError,
+                        "Element() takes at most 2 positional arguments")
+        w_attrib = args_w[0]
+    w_elem = W_Element(w_tag, make_attrib(space, w_attrib, kwds_w))
+    return w_elem
+
+def make_attrib(space, w_attrib, kwds_w):
+    if w_attrib is not None:
+        if not space.isinstance_w(w_attrib, space.w_dict):
+            raise oefmt(space.w_TypeError,
+                        "attrib must be dict, not %T", w_attrib)
+        if not space.is_true(w_attrib):
+            w_attrib = None
+        else:
+            w_attrib = space.call_method(w_attrib, "copy")
+    if kwds_w:
+        if w_attrib is None:
+            w_attrib = space.newdict()
+        for key, w_value in kwds_w.iteritems():
+            space.setitem(w_attrib, space.newtext(key), w_value)
+    return w_attrib
+
+def SubElement(space, w_parent, w_tag, __args__):
+    """SubElement(parent, tag, attrib={}, **extra) -> Element
+
+Create an element and append it to 'parent'."""
+    parent = check_element(space, w_parent)
+    args_w, kwds_w = __args__.unpack()
+    w_attrib = kwds_w.pop('attrib', None)
+    if args_w:
+        if len(args_w) > 1 or w_attrib is not None:
+            raise oefmt(space.w_TypeError,
+                        "SubElement() takes at most 3 positional arguments")
+        w_attrib = args_w[0]
+    w_elem = W_Element(w_tag, make_attrib(space, w_attrib, kwds_w))
+    parent.append_child(w_elem)
+    return w_elem
+
+
+W_Element.typedef = TypeDef("_elementtree.Element",
+    __new__ = interp2app(descr_new_element),
+    __repr__ = interp2app(W_Element.descr_repr),
+    __len__ = interp2app(W_Element.descr_len),
+    __getitem__ = interp2app(W_Element.descr_getitem),
+    __setitem__ = interp2app(W_Element.descr_setitem),
+    __delitem__ = interp2app(W_Element.descr_delitem),
+    __getslice__ = interp2app(W_Element.descr_getslice),
+    __setslice__ = interp2app(W_Element.descr_setslice),
+    __delslice__ = interp2app(W_Element.descr_delslice),
+    __iter__ = interp2app(W_Element.descr_iter),
+    __copy__ = interp2app(W_Element.descr_copy),
+    __deepcopy__ = interp2app(W_Element.descr_deepcopy),
+    tag = GetSetProperty(W_Element.descr_get_tag, W_Element.descr_set_tag),
+    attrib = GetSetProperty(W_Element.descr_get_attrib,
+                            W_Element.descr_set_attrib),
+    text = GetSetProperty(W_Element.descr_get_text, W_Element.descr_set_text),
+    tail = GetSetProperty(W_Element.descr_get_tail, W_Element.descr_set_tail),
+    append = interp2app(W_Element.descr_append),
+    extend = interp2app(W_Element.descr_extend),
+    insert = interp2app(W_Element.descr_insert),
+    remove = interp2app(W_Element.descr_remove),
+    getchildren = interp2app(W_Element.descr_getchildren),
+    get = interp2app(W_Element.descr_get),
+    set = interp2app(W_Element.descr_set),
+    keys = interp2app(W_Element.descr_keys),
+    items = interp2app(W_Element.descr_items),
+    clear = interp2app(W_Element.descr_clear),
+    makeelement = interp2app(W_Element.descr_makeelement),
+    copy = interp2app(W_Element.descr_copy),
+    find = interp2app(W_Element.descr_find),
+    findtext = interp2app(W_Element.descr_findtext),
+    findall = interp2app(W_Element.descr_findall),
+    iterfind = interp2app(W_Element.descr_iterfind),
+    iter = interp2app(W_Element.descr_iter_elements),
+    getiterator = interp2app(W_Element.descr_getiterator),
+    itertext = interp2app(W_Element.descr_itertext),
+)
+W_Element.typedef.acceptable_as_base_class = False
@@ -0,0 +1,538 @@
+from rpython.rlib import rutf8
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module._elementtree.interp_element import (
+    W_Element, import_app_module)
+from pypy.module.pyexpat import interp_pyexpat
+
+
+class W_TreeBuilder(W_Root):
+    """ Builds a tree out of start(), data() and end() calls.  When it is
+    the target of an XMLParser, the parser calls the handle_*() methods
+    directly. """
+
+    def __init__(self, space, w_factory):
+        self.w_factory = w_factory
+        self.stack_w = []       # the elements that are still open
+        self.data_w = []        # text collected since the last start or end
+        self.w_last = None
+        self.w_root = None
+        self.tail = False       # is the text the tail of 'w_last'?
+
+    def flush(self, space):
+        data_w = self.data_w
+        if not data_w:
+            return
+        if len(data_w) == 1:
+            w_text = data_w[0]
+        else:
+            w_text = space.call_method(space.newtext(""), "join",
+                                       space.newlist(data_w))
+        self.data_w = []
+        w_last = self.w_last
+        if w_last is None:
+            return
+        if isinstance(w_last, W_Element):
+            if self.tail:
+                w_last.w_tail = w_text
+            else:
+                w_last.w_text = w_text
+        elif self.tail:
+            space.setattr(w_last, space.newtext("tail"), w_text)
+        else:
+            space.setattr(w_last, space.newtext("text"), w_text)
+
+    def handle_start(self, space, w_tag, w_attrib):
+        """'w_attrib' is a new dictionary, or None if there are no
+        attributes."""
+        self.flush(space)
+        if self.w_factory is None:
+            w_elem = W_Element(w_tag, w_attrib)
+        else:
+            if w_attrib is None:
+                w_attrib = space.newdict()
+            w_elem = space.call_function(self.w_factory, w_tag, w_attrib)
+        if self.stack_w:
+            w_parent = self.stack_w[-1]
+            if isinstance(w_parent, W_Element) and isinstance(w_elem,
+                                                              W_Element):
+                w_parent.append_child(w_elem)
+            else:
+                space.call_method(w_parent, "append", w_elem)
+        elif self.w_root is None:
+            self.w_root = w_elem
+        self.stack_w.append(w_elem)
+        self.w_last = w_elem
+        self.tail = False
+        return w_elem
+
+    def handle_end(self, space):
+        self.flush(space)
+        if not self.stack_w:
+            raise oefmt(space.w_IndexError, "pop from empty stack")
+        self.w_last = self.stack_w.pop()
+        self.tail = True
+        return self.w_last
+
+    def get_parent(self):
+        if self.stack_w:
+            return self.stack_w[-1]
+        return None
+
+    def descr_start(self, space, w_tag, w_attrib):
+        if space.is_true(w_attrib):
+            w_attrib = space.call_method(w_attrib, "copy")
+        else:
+            w_attrib = None
+        return self.handle_start(space, w_tag, w_attrib)
+
+    def descr_data(self, space, w_data):
+        self.data_w.append(w_data)
+
+    def descr_end(self, space, w_tag):
+        return self.handle_end(space)
+
+    def descr_close(self, space):
+        self.flush(space)
+        if self.w_root is None:
+            return space.w_None
+        return self.w_root
+
+
+def descr_new_treebuilder(space, w_subtype, w_element_factory=None):
+    if w_element_factory is not None and space.is_w(w_element_factory,
+                                                    space.w_None):
+        w_element_factory = None
+    w_builder = space.allocate_instance(W_TreeBuilder, w_subtype)
+    W_TreeBuilder.__init__(w_builder, space, w_element_factory)
+    return w_builder
+
+W_TreeBuilder.typedef = TypeDef("_elementtree.TreeBuilder",
+    __new__ = interp2app(descr_new_treebuilder),
+    start = interp2app(W_TreeBuilder.descr_start),
+    data = interp2app(W_TreeBuilder.descr_data),
+    end = interp2app(W_TreeBuilder.descr_end),
+    close = interp2app(W_TreeBuilder.descr_close),
+)
+W_TreeBuilder.typedef.acceptable_as_base_class = False
+
+
+def w_convert_text(space, s):
+    """Text is returned as a str if it is pure ascii, and as a unicode
+    otherwise, like ElementTree does."""
+    try:
+        length = rutf8.check_utf8(s, True)
+    except rutf8.CheckError:
+        from pypy.interpreter import unicodehelper
+        # get the correct error msg
+        unicodehelper.str_decode_utf8(s, 'string', True,
+            unicodehelper.decode_error_handler(space))
+        assert False, "always raises"
+    if length == len(s):
+        return space.newtext(s)
+    return space.newutf8(s, length)
+
+# the kinds of events reported to iterparse()
+EV_START = 0
+EV_END = 1
+EV_START_NS = 2
+EV_END_NS = 3
+EVENT_NAMES = ["start", "end", "start-ns", "end-ns"]
+
+
+class ParserTarget(interp_pyexpat.TreeTarget):
+    """ Receives the events of the expat parser and forwards them to the
+    target of the XMLParser: directly to the TreeBuilder if it is one, or
+    by calling the app-level methods otherwise. """
+
+    def __init__(self, space, w_target):
+        self.w_target = w_target
+        if type(w_target) is W_TreeBuilder:
+            self.builder = w_target
+        else:
+            self.builder = None
+        self.names_w = {}       # maps the expat names to tags
+        self.pending_data = []  # utf-8 text that was not flushed yet
+        self.w_entity = space.newdict()
+        self.expat_parser = None
+        # filled with events when used by iterparse()
+        self.events = None
+        self.events_w = None
+        self.event_parents_w = None
+        self.report = [False] * len(EVENT_NAMES)
+
+    def start_events(self, space, w_events):
+        self.clear_events()
+        if w_events is None:
+            self.report[EV_END] = True
+            return
+        for w_event in space.listview(w_events):
+            event = space.text_w(w_event)
+            for i in range(len(EVENT_NAMES)):
+                if event == EVENT_NAMES[i]:
+                    self.report[i] = True
+                    break
+            else:
+                raise oefmt(space.w_ValueError, "unknown event '%s'", event)
+
+    def clear_events(self):
+        self.events = []
+        self.events_w = []
+        self.event_parents_w = []
+
+    def add_event(self, kind, w_obj, w_parent=None):
+        if self.events is not None and self.report[kind]:
+            self.events.append(kind)
+            self.events_w.append(w_obj)
+            self.event_parents_w.append(w_parent)
+
+    def fixname(self, space, name):
+        # expand qnames: expat reports "uri}local" for "{uri}local"
+        try:
+            return self.names_w[name]
+        except KeyError:
+            pass
+        if '}' in name:
+            w_name = w_convert_text(space, '{' + name)
+        else:
+            w_name = w_convert_text(space, name)
+        self.names_w[name] = w_name
+        return w_name
+
+    def flush_data(self, space):
+        if not self.pending_data:
+            return
+        if len(self.pending_data) == 1:
+            data = self.pending_data[0]
+        else:
+            data = ''.join(self.pending_data)
+        self.pending_data = []
+        self.send_data(space, w_convert_text(space, data))
+
+    def send_data(self, space, w_data):
+        if self.builder is not None:
+            self.builder.data_w.append(w_data)
+        else:
+            space.call_method(self.w_target, "data", w_data)
+
+    def start(self, space, name, attrs):
+        self.flush_data(space)
+        w_tag = self.fixname(space, name)
+        if attrs:
+            w_attrib = space.newdict()
+            for i in range(0, len(attrs), 2):
+                space.setitem(w_attrib, self.fixname(space, attrs[i]),
+                              w_convert_text(space, attrs[i + 1]))
+        else:
+            w_attrib = None
+        if self.builder is not None:
+            w_elem = self.builder.handle_start(space, w_tag, w_attrib)
+        else:
+            if w_attrib is None:
+                w_attrib = space.newdict()
+            w_elem = space.call_method(self.w_target, "start", w_tag, w_attrib)
+        self.add_event(EV_START, w_elem)
+
+    def end(self, space, name):
+        self.flush_data(space)
+        if self.builder is not None:
+            w_elem = self.builder.handle_end(space)
+            w_parent = self.builder.get_parent()
+        else:
+            w_elem = space.call_method(self.w_target, "end",
+                                       self.fixname(space, name))
+            w_parent = None
+        self.add_event(EV_END, w_elem, w_parent)
+
+    def data(self, space, data):
+        self.pending_data.append(data)
+
+    def comment(self, space, data):
+        if self.builder is not None:
+            return
+        self.flush_data(space)
+        w_method = space.findattr(self.w_target, space.newtext("comment"))
+        if w_method is not None:
+            space.call_function(w_method, w_convert_text(space, data))
+
+    def pi(self, space, target, data):
+        if self.builder is not None:
+            return
+        self.flush_data(space)
+        w_method = space.findattr(self.w_target, space.newtext("pi"))
+        if w_method is not None:
+            space.call_function(w_method, w_convert_text(space, target),
+                                w_convert_text(space, data))
+
+    def start_ns(self, space, prefix, uri):
+        if self.events is None or not self.report[EV_START_NS]:
+            return
+        if prefix is None:
+            prefix = ""
+        if uri is None:
+            uri = ""
+        self.add_event(EV_START_NS, space.newtuple([
+            w_convert_text(space, prefix), w_convert_text(space, uri)]))
+
+    def end_ns(self, space, prefix):
+        self.add_event(EV_END_NS, space.w_None)
+
+    def default(self, space, data):
+        if not data.startswith("&"):
+            return
+        # undefined entity: look it up in the 'entity' dictionary
+        end = len(data) - 1
+        assert end >= 1
+        w_value = space.finditem(self.w_entity,
+                                 w_convert_text(space, data[1:end]))
+        if w_value is None:
+            raise undefined_entity_error(space, self.expat_parser, data)
+        self.flush_data(space)
+        self.send_data(space, w_value)
+
+
+class W_XMLParser(W_Root):
+    """ An expat parser that sends its events to a target object, which is a
+    TreeBuilder by default. """
+
+    def __init__(self, space, w_target, encoding):
+        self.target = ParserTarget(space, w_target)
+        if encoding is None:
+            w_encoding = space.w_None
+        else:
+            w_encoding = space.newtext(encoding)
+        w_parser = interp_pyexpat.ParserCreate(space, w_encoding,
+                                               space.newtext("}"),
+                                               space.w_None)
+        assert isinstance(w_parser, interp_pyexpat.W_XMLParserType)
+        w_parser.set_tree_target(self.target)
+        self.target.expat_parser = w_parser
+        self.w_parser = w_parser
+
+    def _check_open(self, space):
+        if self.w_parser is None:
+            raise oefmt(space.w_ValueError, "the parser was already closed")
+        return self.w_parser
+
+    def parse(self, space, data, isfinal):
+        w_parser = self._check_open(space)
+        try:
+            w_parser.Parse(space, data, isfinal)
+        except OperationError as e:
+            w_error_class = space.fromcache(interp_pyexpat.Cache).w_error
+            if not e.match(space, w_error_class):
+                raise
+            raise parse_error(space, e.get_w_value(space))
+        if isfinal:
+            self.target.flush_data(space)
+
+    @unwrap_spec(data='text')
+    def descr_feed(self, space, data):
+        """feed(data)
+
+        Feed encoded data to the parser."""
+        self.parse(space, data, False)
+
+    def descr_close(self, space):
+        """close() -> root element
+
+        Finish feeding data to the parser and return the result of the
+        target's close() method."""
+        self.parse(space, "", True)
+        self.w_parser = None
+        target = self.target
+        if target.builder is not None:
+            return target.builder.descr_close(space)
+        return space.call_method(target.w_target, "close")
+
+    def descr_get_target(self, space):
+        return self.target.w_target
+
+    def descr_get_entity(self, space):
+        return self.target.w_entity
+
+    def descr_get_version(self, space):
+        return space.newtext("Expat %d.%d.%d" % (
+            interp_pyexpat.XML_MAJOR_VERSION,
+            interp_pyexpat.XML_MINOR_VERSION,
+            interp_pyexpat.XML_MICRO_VERSION))
+
+
+def descr_new_xmlparser(space, w_subtype, w_html=None, w_target=None,
+                        w_encoding=None):
+    if w_target is None or space.is_w(w_target, space.w_None):
+        w_target = W_TreeBuilder(space, None)
+    if w_encoding is None or space.is_w(w_encoding, space.w_None):
+        encoding = None
+    else:
+        encoding = space.text_w(w_encoding)
+    w_parser = space.allocate_instance(W_XMLParser, w_subtype)
+    W_XMLParser.__init__(w_parser, space, w_target, encoding)
+    return w_parser
+
+W_XMLParser.typedef = TypeDef("_elementtree.XMLParser",
+    __new__ = interp2app(descr_new_xmlparser),
+    feed = interp2app(W_XMLParser.descr_feed),
+    close = interp2app(W_XMLParser.descr_close),
+    target = GetSetProperty(W_XMLParser.descr_get_target),
+    entity = GetSetProperty(W_XMLParser.descr_get_entity),
+    version = GetSetProperty(W_XMLParser.descr_get_version),
+)
+W_XMLParser.typedef.acceptable_as_base_class = False
+
+
+def parse_error(space, w_expat_error):
+    w_etree = import_app_module(space, "xml.etree.ElementTree")
+    w_error = space.call_method(w_etree, "ParseError",
+                                space.str(w_expat_error))
+    space.setattr(w_error, space.newtext("code"),
+                  space.getattr(w_expat_error, space.newtext("code")))
+    space.setattr(w_error, space.newtext("position"), space.newtuple([
+        space.getattr(w_expat_error, space.newtext("lineno")),
+        space.getattr(w_expat_error, space.newtext("offset"))]))
+    return OperationError(space.type(w_error), w_error)
+
+def undefined_entity_error(space, expat_parser, entity):
+    # raised from inside the parser, and turned into a ParseError by
+    # W_XMLParser.parse()
+    lineno = interp_pyexpat.XML_GetCurrentLineNumber(expat_parser.itself)
+    colno = interp_pyexpat.XML_GetCurrentColumnNumber(expat_parser.itself)
+    w_error_class = space.fromcache(interp_pyexpat.Cache).w_error
+    w_error = space.call_function(w_error_class, space.newtext(
+        "undefined entity %s: line %d, column %d" % (entity, lineno, colno)))
+    space.setattr(w_error, space.newtext("code"),
+                  space.newint(interp_pyexpat.XML_ERROR_UNDEFINED_ENTITY))
+    space.setattr(w_error, space.newtext("lineno"), space.newint(lineno))
+    space.setattr(w_error, space.newtext("offset"), space.newint(colno))
+    return OperationError(w_error_class, w_error)
+
+
+class W_IterParseIterator(W_Root):
+    """ Reads the source in chunks, feeds them to the parser and returns the
+    events produced so far. """
+
+    def __init__(self, space, w_source, parser, close_source, clear):
+        self.w_source = w_source
+        self.parser = parser
+        self.target = parser.target
+        self.close_source = close_source
+        self.clear = clear
+        self.index = 0
+        self.error = None
+        self.w_root = None
+        # the element of the last "end" event returned, with its parent
+        self.w_consumed = None
+        self.w_consumed_parent = None
+
+    def clear_consumed(self):
+        w_elem = self.w_consumed
+        if w_elem is None:
+            return
+        w_parent = self.w_consumed_parent
+        self.w_consumed = None
+        self.w_consumed_parent = None
+        if isinstance(w_elem, W_Element):
+            w_elem.clear()
+            if isinstance(w_parent, W_Element):
+                w_parent.remove_child(w_elem)
+
+    def _close_source(self, space):
+        if self.close_source:
+            self.close_source = False
+            space.call_method(self.w_source, "close")
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        if self.clear:
+            self.clear_consumed()
+        target = self.target
+        try:
+            while True:
+                index = self.index
+                if index < len(target.events):
+                    self.index = index + 1
+                    kind = target.events[index]
+                    w_obj = target.events_w[index]
+                    # don't keep the elements alive longer than necessary
+                    target.events_w[index] = None
+                    if kind == EV_END and self.clear:
+                        self.w_consumed = w_obj
+                        self.w_consumed_parent = (
+                            target.event_parents_w[index])
+                    target.event_parents_w[index] = None
+                    return space.newtuple([space.newtext(EVENT_NAMES[kind]),
+                                           w_obj])
+                if self.error is not None:
+                    e = self.error
+                    self.error = None
+                    raise e
+                if self.parser is None:
+                    break
+                # load the event buffer
+                target.clear_events()
+                self.index = 0
+                w_data = space.call_method(self.w_source, "read",
+                                           space.newint(16384))
+                data = space.text_w(w_data)
+                if data:
+                    try:
+                        self.parser.parse(space, data, False)
+                    except OperationError as e:
+                        if not e.match(space, space.w_SyntaxError):
+                            raise
+                        self.error = e
+                else:
+                    self.w_root = self.parser.descr_close(space)
+                    self.parser = None
+        except OperationError:
+            self._close_source(space)
+            raise
+        self._close_source(space)
+        raise OperationError(space.w_StopIteration, space.w_None)
+
+    def descr_get_root(self, space):
+        if self.w_root is None:
+            return space.w_None
+        return self.w_root
+
+W_IterParseIterator.typedef = TypeDef("_elementtree._IterParseIterator",
+    __iter__ = interp2app(W_IterParseIterator.descr_iter),
+    next = interp2app(W_IterParseIterator.descr_next),
+    root = GetSetProperty(W_IterParseIterator.descr_get_root),
+)
+W_IterParseIterator.typedef.acceptable_as_base_class = False
+
+
+@unwrap_spec(clear=bool)
+def iterparse(space, w_source, w_events=None, w_parser=None, clear=False):
+    """iterparse(source, events=None, parser=None, clear=False)
+
+Parse 'source', a filename or file object, incrementally, and iterate over
+the (event, element) pairs.  The 'events' are "end" by default.  With
+'clear=True', every element is cleared and removed from its parent as soon
+as the iteration moves past its "end" event, so that feeds of any size can
+be processed in constant memory."""
+    if w_parser is None or space.is_w(w_parser, space.w_None):
+        parser = W_XMLParser(space, W_TreeBuilder(space, None), None)
+    elif isinstance(w_parser, W_XMLParser):
+        parser = w_parser
+    else:
+        raise oefmt(space.w_TypeError,
+                    "iterparse() needs an _elementtree.XMLParser, not %T",
+                    w_parser)
+    if w_events is not None and space.is_w(w_events, space.w_None):
+        w_events = None
+    parser.target.start_events(space, w_events)
+    close_source = False
+    if space.findattr(w_source, space.newtext("read")) is None:
+        w_builtin = space.getbuiltinmodule('__builtin__')
+        w_source = space.call_function(
+            space.getattr(w_builtin, space.newtext("open")),
+            w_source, space.newtext("rb"))
+        close_source = True
+    return W_IterParseIterator(space, w_source, parser, close_source, clear)
@@ -0,0 +1,38 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """Fast implementation of the ElementTree API.
+
+The elements, the tree builder and the parser are written at interp-level;
+the parser is driven directly by the callbacks of the pyexpat module.  The
+serialization is taken from xml.etree.ElementTree."""
+
+    appleveldefs = {
+        'Comment':                'app_elementtree.Comment',
+        'PI':                     'app_elementtree.PI',
+        'ProcessingInstruction':  'app_elementtree.ProcessingInstruction',
+        'ElementTree':            'app_elementtree.ElementTree',
+        'parse':                  'app_elementtree.parse',
+        'XML':                    'app_elementtree.XML',
+        'fromstring':             'app_elementtree.fromstring',
+        'fromstringlist':         'app_elementtree.fromstringlist',
+        'XMLID':                  'app_elementtree.XMLID',
+        'dump':                   'app_elementtree.dump',
+        'iselement':              'app_elementtree.iselement',
+        'tostring':               'app_elementtree.tostring',
+        'tostringlist':           'app_elementtree.tostringlist',
+        'register_namespace':     'app_elementtree.register_namespace',
+        'QName':                  'app_elementtree.QName',
+        'ParseError':             'app_elementtree.ParseError',
+        'VERSION':                'app_elementtree.VERSION',
+        }
+
+    interpleveldefs = {
+        'Element':        'interp_element.W_Element',
+        'SubElement':     'interp_element.SubElement',
+        'TreeBuilder':    'interp_parser.W_TreeBuilder',
+        'XMLParser':      'interp_parser.W_XMLParser',
+        'XMLTreeBuilder': 'interp_parser.W_XMLParser',
+        'iterparse':      'interp_parser.iterparse',
+        }
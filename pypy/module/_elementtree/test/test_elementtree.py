@@ -0,0 +1,167 @@
+from pypy.module.pyexpat.interp_pyexpat import global_storage
+
+
+class AppTestElementTree:
+    spaceconfig = dict(usemodules=['_elementtree', 'pyexpat', 'binascii'])
+
+    def teardown_class(cls):
+        global_storage.clear()
+
+    def test_element(self):
+        import _elementtree as ET
+        e = ET.Element("a", {"x": "1"}, y="2")
+        assert e.tag == "a"
+        assert e.attrib == {"x": "1", "y": "2"}
+        assert e.text is None and e.tail is None
+        assert len(e) == 0
+        assert e.get("x") == "1"
+        assert e.get("z", 5) == 5
+        e.set("z", "3")
+        assert sorted(e.keys()) == ["x", "y", "z"]
+        b = ET.SubElement(e, "b")
+        c = e.makeelement("c", {})
+        e.append(c)
+        e.insert(0, ET.Element("d"))
+        assert [x.tag for x in e] == ["d", "b", "c"]
+        assert e[-1] is c
+        assert [x.tag for x in e[1:]] == ["b", "c"]
+        e[0] = ET.Element("f")
+        del e[1]
+        assert [x.tag for x in e] == ["f", "c"]
+        e.remove(c)
+        raises(ValueError, e.remove, c)
+        raises(TypeError, e.append, "not an element")
+        raises(IndexError, "e[5]")
+        e[:] = [b, c]
+        assert list(e) == [b, c]
+        e.clear()
+        assert len(e) == 0 and e.attrib == {}
+        assert repr(e).startswith("<Element 'a' at 0x")
+
+    def test_copy(self):
+        import _elementtree as ET
+        import copy
+        e = ET.Element("a", x="1")
+        e.text = "t"
+        sub = ET.SubElement(e, "b")
+        e2 = copy.copy(e)
+        assert e2[0] is sub and e2.attrib == e.attrib
+        e3 = copy.deepcopy(e)
+        assert e3[0] is not sub and e3[0].tag == "b" and e3.text == "t"
+
+    def test_find_and_iter(self):
+        import _elementtree as ET
+        root = ET.XML("<r>a<b>1<c>2</c>3</b>x<b>4</b>y<d/></r>")
+        assert root.find("b").text == "1"
+        assert root.find("c") is None
+        assert root.find(".//c").text == "2"
+        assert root.findtext("d") == ""
+        assert root.findtext("e", "no") == "no"
+        assert len(root.findall("b")) == 2
+        assert [e.tag for e in root.iter()] == ["r", "b", "c", "b", "d"]
+        assert len(list(root.iter("b"))) == 2
+        assert "".join(root.itertext()) == "a123x4y"
+        assert [e.tag for e in root.iterfind("b/c")] == ["c"]
+
+    def test_parse_and_serialize(self):
+        import _elementtree as ET
+        root = ET.fromstring('<a xmlns:p="urn:x" k="v">'
+                             '<p:b p:at="1">\xc3\xa9</p:b>tail</a>')
+        assert root.attrib == {"k": "v"}
+        b = root[0]
+        assert b.tag == "{urn:x}b"
+        assert b.attrib == {"{urn:x}at": "1"}
+        assert b.text == u"\xe9"
+        assert type(b.tail) is str
+        assert ET.tostring(ET.XML("<a x='1'>t<b/></a>")) == (
+            '<a x="1">t<b /></a>')
+        exc = raises(ET.ParseError, ET.XML, "<a><b></a>")
+        assert exc.value.position == (1, 8)
+
+    def test_treebuilder_target(self):
+        import _elementtree as ET
+        class Target(object):
+            def __init__(self):
+                self.events = []
+            def start(self, tag, attrib):
+                self.events.append(("start", tag, attrib))
+            def end(self, tag):
+                self.events.append(("end", tag))
+            def data(self, data):
+                self.events.append(("data", data))
+            def comment(self, data):
+                self.events.append(("comment", data))
+            def close(self):
+                return "done"
+        target = Target()
+        parser = ET.XMLParser(target=target)
+        parser.feed("<a x='1'>text<!--c--></a>")
+        assert parser.close() == "done"
+        assert target.events == [("start", "a", {"x": "1"}),
+                                 ("data", "text"), ("comment", "c"),
+                                 ("end", "a")]
+        builder = ET.TreeBuilder()
+        builder.start("a", {})
+        builder.data("x")
+        builder.start("b", {"y": "1"})
+        builder.end("b")
+        builder.data("tail")
+        root = builder.end("a")
+        assert builder.close() is root
+        assert root.text == "x" and root[0].tail == "tail"
+
+    def test_entity(self):
+        import _elementtree as ET
+        parser = ET.XMLParser()
+        parser.entity["foo"] = "bar"
+        parser.feed('<!DOCTYPE a SYSTEM "a.dtd"><a>&foo;</a>')
+        assert parser.close().text == "bar"
+        parser = ET.XMLParser()
+        exc = raises(ET.ParseError, parser.feed,
+                     '<!DOCTYPE a SYSTEM "a.dtd"><a>&bar;</a>')
+        assert exc.value.code == 11
+        assert exc.value.position == (1, 30)
+
+    def test_iterparse(self):
+        import _elementtree as ET
+        from StringIO import StringIO
+        data = "<r xmlns:p='urn:x'><i>1</i><i>2</i><p:i>3</p:i></r>"
+        events = [(ev, getattr(e, "tag", e)) for ev, e in
+                  ET.iterparse(StringIO(data),
+                               ["start", "end", "start-ns", "end-ns"])]
+        assert events == [("start-ns", ("p", "urn:x")), ("start", "r"),
+                          ("start", "i"), ("end", "i"),
+                          ("start", "i"), ("end", "i"),
+                          ("start", "{urn:x}i"), ("end", "{urn:x}i"),
+                          ("end", "r"), ("end-ns", None)]
+        it = ET.iterparse(StringIO(data))
+        assert [e.text for ev, e in it] == ["1", "2", "3", None]
+        assert len(it.root) == 3
+        raises(ValueError, ET.iterparse, StringIO(data), ["bogus"])
+        it = ET.iterparse(StringIO("<r><i></r>"))
+        raises(ET.ParseError, list, it)
+
+    def test_iterparse_clear(self):
+        import _elementtree as ET
+        from StringIO import StringIO
+        data = "<r>" + "<i a='x'><j>1</j></i>" * 50 + "</r>"
+        it = ET.iterparse(StringIO(data), clear=True)
+        seen = []
+        for event, elem in it:
+            seen.append((elem.tag, len(elem), elem.get("a")))
+        # the <j> was already removed when the <i> ends
+        assert seen[:2] == [("j", 0, None), ("i", 0, "x")]
+        assert len(seen) == 101
+        root = it.root
+        assert root.tag == "r" and len(root) == 0
+
+    def test_cElementTree(self):
+        from xml.etree import cElementTree
+        import _elementtree
+        assert cElementTree.Element is _elementtree.Element
+        tree = cElementTree.ElementTree(cElementTree.XML("<a><b/></a>"))
+        assert tree.find("b").tag == "b"
+        c = cElementTree.Comment("hi")
+        tree.getroot().append(c)
+        assert cElementTree.tostring(tree.getroot()) == (
+            "<a><b /><!--hi--></a>")
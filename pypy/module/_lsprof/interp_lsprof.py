@@ -2,6 +2,7 @@ import py
 
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.executioncontext import PeriodicAsyncAction
 from pypy.interpreter.function import Method, Function
 from pypy.interpreter.gateway import interp2app, unwrap_spec
 from pypy.interpreter.typedef import (TypeDef, GetSetProperty,
@@ -121,6 +122,7 @@ class ProfilerSubEntry(object):
         self.callcount = 0
         self.recursivecallcount = 0
         self.recursionLevel = 0
+        self.last_sample = 0
 
     def stats(self, space, parent, factor):
         w_sse = W_StatsSubEntry(space, self.frame,
@@ -292,10 +294,33 @@ def lsprof_call(space, w_self, frame, event, w_arg):
         pass
 
 
+class SampleAction(PeriodicAsyncAction):
+    """The periodic action that lets a W_Profiler in sampling mode look
+    at the stack of frames.  It is called whenever the ticker goes below
+    zero, i.e. every sys.checkinterval, so running Python code is not
+    slowed down by the profiler at all between two samples.
+    """
+
+    def __init__(self, space):
+        PeriodicAsyncAction.__init__(self, space)
+        self.profiler = None
+
+    def perform(self, ec, frame):
+        profiler = self.profiler
+        if profiler is not None and profiler.sample_ec is ec:
+            profiler._maybe_sample(ec)
+
+
 class W_Profiler(W_Root):
-    def __init__(self, space, w_callable, time_unit, subcalls, builtins):
+    def __init__(self, space, w_callable, time_unit, subcalls, builtins,
+                 sample_interval=0.0):
         self.subcalls = subcalls
         self.builtins = builtins
+        self.sample_interval = sample_interval
+        self.sample_ec = None
+        self.sample_number = 0
+        self.next_sample_time = 0.0
+        self.ll_last_sample = timer_size_int(0)
         self.current_context = None
         self.w_callable = w_callable
         self.time_unit = time_unit
@@ -331,12 +356,26 @@ class W_Profiler(W_Root):
         # We want total_real_time and total_timestamp to end up containing
         # (endtime - starttime).  Now we are at the start, so we first
         # have to subtract the current time.
+        action = space.fromcache(SampleAction)
+        if self.sample_interval > 0.0:
+            if not space.actionflag.has_bytecode_counter:
+                raise oefmt(space.w_RuntimeError,
+                            "sampling needs a PyPy with thread support")
+            if action.profiler is not None:
+                raise oefmt(space.w_RuntimeError,
+                            "another sampling profiler is already enabled")
         self.is_enabled = True
         self.total_real_time -= time.time()
         self.total_timestamp -= read_timestamp()
         # set profiler hook
         c_setup_profiling()
-        space.getexecutioncontext().setllprofile(lsprof_call, self)
+        if self.sample_interval > 0.0:
+            self.sample_ec = space.getexecutioncontext()
+            self.next_sample_time = time.time() + self.sample_interval
+            self.ll_last_sample = read_timestamp()
+            action.profiler = self
+        else:
+            space.getexecutioncontext().setllprofile(lsprof_call, self)
 
     @jit.elidable
     def _get_or_make_entry(self, f_code, make=True):
@@ -407,6 +446,47 @@ class W_Profiler(W_Root):
             context = context.previous
         self.current_context = None
 
+    def _maybe_sample(self, ec):
+        now = time.time()
+        if now >= self.next_sample_time:
+            self.next_sample_time = now + self.sample_interval
+            self._take_sample(ec)
+
+    @jit.dont_look_inside
+    def _take_sample(self, ec):
+        # All the time since the previous sample is attributed to the
+        # frames that are on the stack now: the top one gets it as inline
+        # time, and each function found on the stack gets it once as total
+        # time.  In this mode 'callcount' is the number of samples in
+        # which the function was seen.
+        now = read_timestamp()
+        tt = now - self.ll_last_sample
+        self.ll_last_sample = now
+        self.sample_number += 1
+        sample_number = self.sample_number
+        callee = None
+        depth = 0
+        frame = ec.gettopframe_nohidden()
+        while frame is not None:
+            entry = self._get_or_make_entry(frame.getcode())
+            if entry.last_sample != sample_number:
+                entry.last_sample = sample_number
+                entry.ll_tt += tt
+                entry.callcount += 1
+            if depth == 0:
+                entry.ll_it += tt
+            elif self.subcalls:
+                subentry = entry._get_or_make_subentry(callee)
+                if subentry.last_sample != sample_number:
+                    subentry.last_sample = sample_number
+                    subentry.ll_tt += tt
+                    subentry.callcount += 1
+                    if depth == 1:
+                        subentry.ll_it += tt
+            callee = entry
+            depth += 1
+            frame = ec.getnextframe_nohidden(frame)
+
     def disable(self, space):
         if not self.is_enabled:
             return      # ignored
@@ -417,7 +497,11 @@ class W_Profiler(W_Root):
         self.total_timestamp += read_timestamp()
         self.total_real_time += time.time()
         # unset profiler hook
-        space.getexecutioncontext().setllprofile(None, None)
+        if self.sample_ec is not None:
+            space.fromcache(SampleAction).profiler = None
+            self.sample_ec = None
+        else:
+            space.getexecutioncontext().setllprofile(None, None)
         c_teardown_profiling()
         self._flush_unmatched()
 
@@ -438,11 +522,18 @@ class W_Profiler(W_Root):
         return stats(space, self.data.values() + self.builtin_data.values(),
                      factor)
 
-@unwrap_spec(time_unit=float, subcalls=bool, builtins=bool)
+@unwrap_spec(time_unit=float, subcalls=bool, builtins=bool,
+             sample_interval=float)
 def descr_new_profile(space, w_type, w_callable=None, time_unit=0.0,
-                      subcalls=True, builtins=True):
+                      subcalls=True, builtins=True, sample_interval=0.0):
+    if sample_interval < 0.0:
+        raise oefmt(space.w_ValueError, "sample_interval must be positive")
+    if sample_interval > 0.0 and w_callable is not None:
+        raise oefmt(space.w_ValueError,
+                    "a sampling profiler cannot use a custom timer")
     p = space.allocate_instance(W_Profiler, w_type)
-    p.__init__(space, w_callable, time_unit, subcalls, builtins)
+    p.__init__(space, w_callable, time_unit, subcalls, builtins,
+               sample_interval)
     return p
 
 W_Profiler.typedef = TypeDef(
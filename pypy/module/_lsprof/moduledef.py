@@ -1,4 +1,3 @@
-
 """ _lsprof module
 """
 
@@ -8,3 +7,14 @@ class Module(MixedModule):
     interpleveldefs = {'Profiler':'interp_lsprof.W_Profiler'}
 
     appleveldefs = {}
+
+    def __init__(self, space, *args):
+        "NOT_RPYTHON"
+        from pypy.module._lsprof.interp_lsprof import SampleAction
+        MixedModule.__init__(self, space, *args)
+        # the action dispatcher is built at translation time, so the
+        # action cannot be registered only when sampling is enabled.  It
+        # does not force the bytecode counter either: sampling only works
+        # if another module, like 'thread', needs it anyway.
+        space.actionflag.register_periodic_action(
+            space.fromcache(SampleAction), use_bytecode_counter=False)
@@ -166,3 +166,83 @@ class AppTestCProfile(object):
         prof.disable()
         stats = prof.getstats()
         assert len(stats) == 2
+
+    def test_sampling_needs_bytecode_counter(self):
+        import _lsprof
+        # this space has no 'thread' module, so nothing decrements the
+        # bytecode counter that the sampling relies on
+        prof = _lsprof.Profiler(sample_interval=0.01)
+        raises(RuntimeError, prof.enable)
+
+
+class AppTestSampling(object):
+    spaceconfig = {
+        "usemodules": ['_lsprof', 'time', 'thread'],
+    }
+
+    def test_sampling(self):
+        import _lsprof, sys, time
+        prof = _lsprof.Profiler(sample_interval=0.001)
+        def foo():
+            t = time.time()
+            while abs(t - time.time()) < 0.5:
+                pass      # busy-wait for half a second
+        def bar():
+            foo()
+        old_interval = sys.getcheckinterval()
+        sys.setcheckinterval(10)
+        try:
+            prof.enable()
+            bar()
+            prof.disable()
+        finally:
+            sys.setcheckinterval(old_interval)
+        entries = {}
+        for entry in prof.getstats():
+            entries[entry.code] = entry
+        efoo = entries[foo.__code__]
+        ebar = entries[bar.__code__]
+        assert efoo.callcount > 0
+        assert efoo.reccallcount == 0
+        assert ebar.callcount >= efoo.callcount
+        assert 0.2 < efoo.totaltime < 2.0
+        assert 0.2 < efoo.inlinetime <= efoo.totaltime
+        assert ebar.inlinetime < 0.1
+        assert efoo.totaltime <= ebar.totaltime
+        bar2foo, = ebar.calls
+        assert bar2foo.code is foo.__code__
+        assert bar2foo.callcount == efoo.callcount
+        assert bar2foo.totaltime == efoo.totaltime
+        assert bar2foo.inlinetime == efoo.inlinetime
+
+    def test_sampling_errors(self):
+        import _lsprof
+        raises(ValueError, _lsprof.Profiler, sample_interval=-1.0)
+        raises(ValueError, _lsprof.Profiler, lambda: 42,
+               sample_interval=1.0)
+        prof1 = _lsprof.Profiler(sample_interval=0.01)
+        prof2 = _lsprof.Profiler(sample_interval=0.01)
+        prof1.enable()
+        try:
+            raises(RuntimeError, prof2.enable)
+        finally:
+            prof1.disable()
+        prof2.enable()
+        prof2.disable()
+
+    def test_sampling_pstats(self):
+        import cProfile, pstats, StringIO, sys, time
+        prof = cProfile.Profile(sample_interval=0.001)
+        def foo():
+            t = time.time()
+            while abs(t - time.time()) < 0.2:
+                pass
+        old_interval = sys.getcheckinterval()
+        sys.setcheckinterval(10)
+        try:
+            prof.runcall(foo)
+        finally:
+            sys.setcheckinterval(old_interval)
+        out = StringIO.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats('cumulative').print_stats()
+        assert 'foo' in out.getvalue()
@@ -2,6 +2,8 @@ import sys
 from errno import EINTR
 
 from rpython.rlib import rpoll, rsocket
+from rpython.rlib.buffer import StringBuffer
+from rpython.rlib.objectmodel import keepalive_until_here
 from rpython.rlib.rarithmetic import intmask, r_uint
 from rpython.rtyper.lltypesystem import lltype, rffi
 
@@ -68,6 +70,17 @@ class W_BaseConnection(W_Root):
     def do_poll(self, space, timeout):
         raise NotImplementedError
 
+    def do_recv_into(self, space, rwbuffer, offset):
+        """Receive a message directly into the buffer 'rwbuffer', starting
+        at 'offset'.  Return (length, newbuf); if the message does not fit,
+        it is returned in the malloced 'newbuf' instead."""
+        res, newbuf = self.do_recv_string(
+            space, min(self.BUFFER_SIZE, rwbuffer.getlength() - offset),
+            PY_SSIZE_T_MAX)
+        if not newbuf:
+            rwbuffer.setslice(offset, rffi.charpsize2str(self.buffer, res))
+        return res, newbuf
+
     def close(self):
         self.do_close()
 
@@ -95,8 +108,8 @@ class W_BaseConnection(W_Root):
 
     @unwrap_spec(offset='index', size='index')
     def send_bytes(self, space, w_buf, offset=0, size=PY_SSIZE_T_MIN):
-        buf = space.getarg_w('s*', w_buf).as_str()
-        length = len(buf)
+        buf = space.getarg_w('s*', w_buf)
+        length = buf.getlength()
         self._check_writable(space)
         if offset < 0:
             raise oefmt(space.w_ValueError, "offset is negative")
@@ -133,14 +146,17 @@ class W_BaseConnection(W_Root):
     def recv_bytes_into(self, space, w_buffer, offset=0):
         rwbuffer = space.writebuf_w(w_buffer)
         length = rwbuffer.getlength()
+        self._check_readable(space)
+        if offset < 0:
+            raise oefmt(space.w_ValueError, "negative offset")
+        if offset > length:
+            raise oefmt(space.w_ValueError, "offset out of bound")
 
-        res, newbuf = self.do_recv_string(
-            space, length - offset, PY_SSIZE_T_MAX)
+        res, newbuf = self.do_recv_into(space, rwbuffer, offset)
         try:
             if newbuf:
                 raise BufferTooShort(space, space.newbytes(
                     rffi.charpsize2str(newbuf, res)))
-            rwbuffer.setslice(offset, rffi.charpsize2str(self.buffer, res))
         finally:
             if newbuf:
                 rffi.free_charp(newbuf)
@@ -157,7 +173,7 @@ class W_BaseConnection(W_Root):
             w_picklemodule, "dumps", w_obj, w_protocol)
 
         buf = space.bytes_w(w_pickled)
-        self.do_send_string(space, buf, 0, len(buf))
+        self.do_send_string(space, StringBuffer(buf), 0, len(buf))
 
     def recv(self, space):
         self._check_readable(space)
@@ -211,30 +227,33 @@ class W_FileConnection(W_BaseConnection):
     INVALID_HANDLE_VALUE = -1
     fd = INVALID_HANDLE_VALUE
 
+    # WRITE() and READ() work directly on raw memory, to avoid copying
+    # the data through intermediate strings
     if sys.platform == 'win32':
-        def WRITE(self, data):
+        def WRITE(self, data, size):
             from rpython.rlib._rsocket_rffi import send, geterrno
-            length = send(self.fd, data, len(data), 0)
+            length = send(self.fd, data, size, 0)
             if length < 0:
                 raise WindowsError(geterrno(), "send")
-            return length
-        def READ(self, size):
+            return intmask(length)
+        def READ(self, buf, size):
             from rpython.rlib._rsocket_rffi import socketrecv, geterrno
-            with rffi.scoped_alloc_buffer(size) as buf:
-                length = socketrecv(self.fd, buf.raw, buf.size, 0)
-                if length < 0:
-                    raise WindowsError(geterrno(), "recv")
-                return buf.str(length)
+            length = socketrecv(self.fd, buf, size, 0)
+            if length < 0:
+                raise WindowsError(geterrno(), "recv")
+            return intmask(length)
         def CLOSE(self):
             from rpython.rlib._rsocket_rffi import socketclose
             socketclose(self.fd)
     else:
-        def WRITE(self, data):
-            import os
-            return os.write(self.fd, data)
-        def READ(self, length):
-            import os
-            return os.read(self.fd, length)
+        def WRITE(self, data, size):
+            from rpython.rlib import rposix
+            return intmask(rposix.handle_posix_error('write',
+                rposix.c_write(self.fd, rffi.cast(rffi.VOIDP, data), size)))
+        def READ(self, buf, size):
+            from rpython.rlib import rposix
+            return intmask(rposix.handle_posix_error('read',
+                rposix.c_read(self.fd, rffi.cast(rffi.VOIDP, buf), size)))
         def CLOSE(self):
             import os
             try:
@@ -271,22 +290,42 @@ class W_FileConnection(W_BaseConnection):
             self.fd = self.INVALID_HANDLE_VALUE
 
     def do_send_string(self, space, buf, offset, size):
-        # Since str2charp copies the buf anyway, always combine the
-        # "header" and the "body" of the message and send them at once.
-        message = lltype.malloc(rffi.CCHARP.TO, size + 4, flavor='raw')
+        if size <= self.BUFFER_SIZE:
+            # Small message: combine the "header" and the "body" of the
+            # message and send them at once.
+            message = lltype.malloc(rffi.CCHARP.TO, size + 4, flavor='raw')
+            try:
+                self._write_length(message, size)
+                data = buf.getslice(offset, 1, size)
+                for i in range(size):
+                    message[4 + i] = data[i]
+                self._sendall(space, message, size + 4)
+            finally:
+                lltype.free(message, flavor='raw')
+            return
+        # Large message: send the body straight from the memory of the
+        # buffer, if it has a raw address.
+        with lltype.scoped_alloc(rffi.CCHARP.TO, 4) as header:
+            self._write_length(header, size)
+            self._sendall(space, header, 4)
         try:
-            length = rffi.r_uint(rsocket.htonl(
-                    rffi.cast(lltype.Unsigned, size)))
-            rffi.cast(rffi.UINTP, message)[0] = length
-            i = size - 1
-            while i >= 0:
-                message[4 + i] = buf[offset + i]
-                i -= 1
-            self._sendall(space, message, size + 4)
-        finally:
-            lltype.free(message, flavor='raw')
+            raw = buf.get_raw_address()
+        except ValueError:
+            raw = lltype.nullptr(rffi.CCHARP.TO)
+        if raw:
+            self._sendall(space, rffi.ptradd(raw, offset), size)
+            keepalive_until_here(buf)
+        else:
+            data = buf.getslice(offset, 1, size)
+            with rffi.scoped_nonmovingbuffer(data) as dataptr:
+                self._sendall(space, dataptr, size)
 
-    def do_recv_string(self, space, buflength, maxlength):
+    def _write_length(self, message, size):
+        length = rffi.r_uint(rsocket.htonl(
+                rffi.cast(lltype.Unsigned, size)))
+        rffi.cast(rffi.UINTP, message)[0] = length
+
+    def _recv_length(self, space, maxlength):
         with lltype.scoped_alloc(rffi.CArrayPtr(rffi.UINT).TO, 1) as length_ptr:
             self._recvall(space, rffi.cast(rffi.CCHARP, length_ptr), 4)
             length = intmask(rsocket.ntohl(
@@ -296,7 +335,29 @@ class W_FileConnection(W_BaseConnection):
             if self.flags == 0:
                 self.close()
             raise oefmt(space.w_IOError, "bad message length")
+        return length
 
+    def do_recv_into(self, space, rwbuffer, offset):
+        length = self._recv_length(space, PY_SSIZE_T_MAX)
+        if length > rwbuffer.getlength() - offset:
+            newbuf = lltype.malloc(rffi.CCHARP.TO, length, flavor='raw')
+            self._recvall(space, newbuf, length)
+            return length, newbuf
+        try:
+            raw = rwbuffer.get_raw_address()
+        except ValueError:
+            raw = lltype.nullptr(rffi.CCHARP.TO)
+        if raw:
+            self._recvall(space, rffi.ptradd(raw, offset), length)
+            keepalive_until_here(rwbuffer)
+        else:
+            with rffi.scoped_alloc_buffer(length) as buf:
+                self._recvall(space, buf.raw, length)
+                rwbuffer.setslice(offset, buf.str(length))
+        return length, lltype.nullptr(rffi.CCHARP.TO)
+
+    def do_recv_string(self, space, buflength, maxlength):
+        length = self._recv_length(space, maxlength)
         if length <= buflength:
             self._recvall(space, self.buffer, length)
             return length, lltype.nullptr(rffi.CCHARP.TO)
@@ -307,10 +368,8 @@ class W_FileConnection(W_BaseConnection):
 
     def _sendall(self, space, message, size):
         while size > 0:
-            # XXX inefficient
-            data = rffi.charpsize2str(message, size)
             try:
-                count = self.WRITE(data)
+                count = self.WRITE(message, size)
             except OSError as e:
                 if e.errno == EINTR:
                     space.getexecutioncontext().checksignals()
@@ -324,22 +383,18 @@ class W_FileConnection(W_BaseConnection):
         remaining = length
         while remaining > 0:
             try:
-                data = self.READ(remaining)
+                count = self.READ(buf, remaining)
             except OSError as e:
                 if e.errno == EINTR:
                     space.getexecutioncontext().checksignals()
                     continue
                 raise wrap_oserror(space, e)
-            count = len(data)
             if count == 0:
                 if remaining == length:
                     raise OperationError(space.w_EOFError, space.w_None)
                 else:
                     raise oefmt(space.w_IOError,
                                 "got end of file during message")
-            # XXX inefficient
-            for i in range(count):
-                buf[i] = data[i]
             remaining -= count
             buf = rffi.ptradd(buf, count)
 
@@ -401,13 +456,13 @@ class W_PipeConnection(W_BaseConnection):
             _WriteFile, ERROR_NO_SYSTEM_RESOURCES)
         from rpython.rlib import rwin32
 
-        with rffi.scoped_view_charp(buf) as charp:
+        data = buf.getslice(offset, 1, size)
+        with rffi.scoped_view_charp(data) as charp:
             written_ptr = lltype.malloc(rffi.CArrayPtr(rwin32.DWORD).TO, 1,
                                         flavor='raw')
             try:
                 result = _WriteFile(
-                    self.handle, rffi.ptradd(charp, offset),
-                    size, written_ptr, rffi.NULL)
+                    self.handle, charp, size, written_ptr, rffi.NULL)
 
                 if (result == 0 and
                     rwin32.GetLastError_saved() == ERROR_NO_SYSTEM_RESOURCES):
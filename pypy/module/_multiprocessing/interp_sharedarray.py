@@ -0,0 +1,241 @@
+"""
+Arrays of numbers stored in anonymous shared memory.  The memory is
+inherited by the child processes created with fork(), so that they can
+all read and write the same table without pickling anything.  Reading and
+writing items are plain raw loads and stores, which the JIT compiles
+directly.
+"""
+
+from rpython.rlib import rmmap
+from rpython.rlib.buffer import RawBuffer
+from rpython.rlib.objectmodel import keepalive_until_here
+from rpython.rlib.rarithmetic import ovfcheck
+from rpython.rlib.rmmap import RMMapError
+from rpython.rlib.unroll import unrolling_iterable
+from rpython.rtyper.annlowlevel import llstr
+from rpython.rtyper.lltypesystem import lltype, rffi
+from rpython.rtyper.lltypesystem.rstr import copy_string_to_raw
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt, wrap_oserror
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.array.interp_array import types as array_types
+
+
+# only the typecodes whose items fit in a Signed or a Float
+types = {}
+for _tc, _mytype in array_types.items():
+    if _mytype.unwrap in ('int_w', 'float_w'):
+        types[_tc] = _mytype
+unroll_typecodes = unrolling_iterable(sorted(types.keys()))
+TYPECODES = ", ".join(sorted(types.keys()))
+shared_array_classes = {}
+
+
+class SharedArrayBuffer(RawBuffer):
+    _immutable_ = True
+
+    def __init__(self, mmap, size, readonly):
+        # keeps the rmmap.MMap alive, which owns the memory
+        self.mmap = mmap
+        self.size = size
+        self.readonly = readonly
+
+    def getlength(self):
+        return self.size
+
+    def getitem(self, index):
+        return self.mmap.data[index]
+
+    def setitem(self, index, char):
+        self.mmap.data[index] = char
+
+    def getslice(self, start, step, size):
+        if step == 1:
+            return rffi.charpsize2str(rffi.ptradd(self.mmap.data, start), size)
+        return RawBuffer.getslice(self, start, step, size)
+
+    def setslice(self, start, string):
+        raw_cdata = rffi.ptradd(self.mmap.data, start)
+        copy_string_to_raw(llstr(string), raw_cdata, 0, len(string))
+
+    def get_raw_address(self):
+        return self.mmap.data
+
+
+class W_SharedArray(W_Root):
+    _immutable_fields_ = ['mmap', 'length']
+    typecode = '?'
+    itemsize = 0
+
+    def __init__(self, mmap, length):
+        self.mmap = mmap
+        self.length = length
+
+    def readbuf_w(self, space):
+        return SharedArrayBuffer(self.mmap, self.length * self.itemsize, True)
+
+    def writebuf_w(self, space):
+        return SharedArrayBuffer(self.mmap, self.length * self.itemsize, False)
+
+    def w_getitem(self, space, index):
+        raise NotImplementedError
+
+    def setitem_w(self, space, index, w_item):
+        raise NotImplementedError
+
+    def descr_len(self, space):
+        return space.newint(self.length)
+
+    def descr_getitem(self, space, w_idx):
+        start, stop, step, size = space.decode_index4(w_idx, self)
+        if step == 0:
+            return self.w_getitem(space, start)
+        items_w = [None] * size
+        for i in range(size):
+            items_w[i] = self.w_getitem(space, start + i * step)
+        return space.newlist(items_w)
+
+    def descr_setitem(self, space, w_idx, w_item):
+        start, stop, step, size = space.decode_index4(w_idx, self)
+        if step == 0:
+            self.setitem_w(space, start, w_item)
+            return
+        items_w = space.fixedview(w_item)
+        if len(items_w) != size:
+            raise oefmt(space.w_ValueError,
+                        "can only assign a sequence of length %d to this "
+                        "slice, not %d", size, len(items_w))
+        for i in range(size):
+            self.setitem_w(space, start + i * step, items_w[i])
+
+    def descr_getslice(self, space, w_i, w_j):
+        return self.descr_getitem(space,
+                                  space.newslice(w_i, w_j, space.w_None))
+
+    def descr_setslice(self, space, w_i, w_j, w_item):
+        self.descr_setitem(space, space.newslice(w_i, w_j, space.w_None),
+                           w_item)
+
+    def descr_tolist(self, space):
+        items_w = [None] * self.length
+        for i in range(self.length):
+            items_w[i] = self.w_getitem(space, i)
+        return space.newlist(items_w)
+
+    def descr_repr(self, space):
+        w_list = self.descr_tolist(space)
+        return space.newtext("SharedArray('%s', %s)" % (
+            self.typecode, space.text_w(space.repr(w_list))))
+
+    def descr_reduce(self, space):
+        raise oefmt(space.w_TypeError,
+                    "SharedArray objects are shared with child processes "
+                    "by fork(), they cannot be pickled")
+
+    def descr_typecode(self, space):
+        return space.newtext(self.typecode)
+
+    def descr_itemsize(self, space):
+        return space.newint(self.itemsize)
+
+
+def make_shared_array(mytype):
+    class W_SharedArrayOf(W_SharedArray):
+        typecode = mytype.typecode
+        itemsize = mytype.bytes
+
+        def get_buffer(self):
+            return rffi.cast(mytype.arrayptrtype, self.mmap.data)
+
+        def w_getitem(self, space, index):
+            item = self.get_buffer()[index]
+            keepalive_until_here(self)
+            if mytype.unwrap == 'float_w':
+                return space.newfloat(float(item))
+            return space.newint(rffi.cast(lltype.Signed, item))
+
+        def setitem_w(self, space, index, w_item):
+            if mytype.unwrap == 'float_w':
+                item = rffi.cast(mytype.itemtype, space.float_w(w_item))
+            else:
+                value = space.int_w(w_item)
+                item = rffi.cast(mytype.itemtype, value)
+                if rffi.cast(lltype.Signed, item) != value:
+                    raise oefmt(space.w_OverflowError,
+                                "value out of range for typecode '%s'",
+                                mytype.typecode)
+            self.get_buffer()[index] = item
+            keepalive_until_here(self)
+
+    W_SharedArrayOf.__name__ = 'W_SharedArray_' + mytype.typecode
+    shared_array_classes[mytype.typecode] = W_SharedArrayOf
+
+for _mytype in types.values():
+    make_shared_array(_mytype)
+del _mytype, _tc
+
+
+@unwrap_spec(typecode='text')
+def descr_new_sharedarray(space, w_subtype, typecode, w_size_or_init):
+    """SharedArray(typecode, size_or_initializer)
+
+    Create an array of 'size' zeroes, or with the items of the sequence
+    'initializer', in shared memory."""
+    if (space.isinstance_w(w_size_or_init, space.w_int) or
+            space.isinstance_w(w_size_or_init, space.w_long)):
+        length = space.int_w(w_size_or_init)
+        items_w = None
+        if length < 0:
+            raise oefmt(space.w_ValueError, "negative size")
+    else:
+        items_w = space.listview(w_size_or_init)
+        length = len(items_w)
+    for tc in unroll_typecodes:
+        if typecode == tc:
+            cls = shared_array_classes[tc]
+            try:
+                size = ovfcheck(length * cls.itemsize)
+            except OverflowError:
+                raise oefmt(space.w_OverflowError, "array too large")
+            try:
+                # the memory is zero-filled; use at least one byte because
+                # empty mappings are not allowed
+                mmap = rmmap.mmap(-1, max(size, 1))
+            except OSError as e:
+                raise wrap_oserror(space, e)
+            except RMMapError as e:
+                raise OperationError(space.w_ValueError,
+                                     space.newtext(e.message))
+            w_array = space.allocate_instance(cls, w_subtype)
+            cls.__init__(w_array, mmap, length)
+            break
+    else:
+        raise oefmt(space.w_ValueError,
+                    "bad typecode (must be " + TYPECODES + ")")
+    if items_w is not None:
+        for i in range(length):
+            w_array.setitem_w(space, i, items_w[i])
+    return w_array
+
+
+W_SharedArray.typedef = TypeDef(
+    '_multiprocessing.SharedArray',
+    __doc__ = """SharedArray(typecode, size_or_initializer)
+
+An array of numbers in anonymous shared memory, which is inherited by
+the child processes created with fork().  The typecodes are the ones of
+the array module for integers and floats.""",
+    __new__ = interp2app(descr_new_sharedarray),
+    __len__ = interp2app(W_SharedArray.descr_len),
+    __getitem__ = interp2app(W_SharedArray.descr_getitem),
+    __setitem__ = interp2app(W_SharedArray.descr_setitem),
+    __getslice__ = interp2app(W_SharedArray.descr_getslice),
+    __setslice__ = interp2app(W_SharedArray.descr_setslice),
+    __repr__ = interp2app(W_SharedArray.descr_repr),
+    __reduce__ = interp2app(W_SharedArray.descr_reduce),
+    tolist = interp2app(W_SharedArray.descr_tolist),
+    typecode = GetSetProperty(W_SharedArray.descr_typecode),
+    itemsize = GetSetProperty(W_SharedArray.descr_itemsize),
+)
@@ -6,6 +6,7 @@ class Module(MixedModule):
     interpleveldefs = {
         'Connection'      : 'interp_connection.W_FileConnection',
         'SemLock'         : 'interp_semaphore.W_SemLock',
+        'SharedArray'     : 'interp_sharedarray.W_SharedArray',
 
         'address_of_buffer' : 'interp_memory.address_of_buffer',
     }
@@ -91,6 +91,47 @@ class BaseConnectionTest(object):
         raises(multiprocessing.BufferTooShort, rhandle.recv_bytes_into, buffer)
         assert rhandle.readable
 
+    def test_send_bytes_buffers(self):
+        import array
+        import sys
+        # if not translated, for win32
+        if not hasattr(sys, 'executable'):
+            sys.executable = 'from test_connection.py'
+        rhandle, whandle = self.make_pair()
+
+        whandle.send_bytes(memoryview("abcdef"), 2)
+        assert rhandle.recv_bytes() == "cdef"
+        whandle.send_bytes(bytearray("abcdef"), 1, 3)
+        assert rhandle.recv_bytes() == "bcd"
+        big = array.array('i', range(1000))
+        whandle.send_bytes(big)
+        assert rhandle.recv_bytes() == big.tostring()
+        whandle.send_bytes(buffer("x" * 5000), 3)
+        assert rhandle.recv_bytes() == "x" * 4997
+        raises(ValueError, whandle.send_bytes, "abc", 4)
+        raises(ValueError, whandle.send_bytes, "abc", 1, 3)
+
+    def test_recv_bytes_into_large(self):
+        import array, multiprocessing
+        import sys
+        # if not translated, for win32
+        if not hasattr(sys, 'executable'):
+            sys.executable = 'from test_connection.py'
+        rhandle, whandle = self.make_pair()
+
+        data = "".join([chr(i & 0xff) for i in range(3000)])
+        whandle.send_bytes(data)
+        buf = bytearray(3010)
+        assert rhandle.recv_bytes_into(buf, 10) == 3000
+        assert buf[10:] == data
+        whandle.send_bytes(data)
+        arr = array.array('b', [0] * 2999)
+        e = raises(multiprocessing.BufferTooShort, rhandle.recv_bytes_into,
+                   arr)
+        assert e.value.args == (data,)
+        raises(ValueError, rhandle.recv_bytes_into, buf, -1)
+        raises(ValueError, rhandle.recv_bytes_into, buf, 4000)
+
 class AppTestWinpipeConnection(BaseConnectionTest):
     spaceconfig = {
         "usemodules": [
@@ -125,7 +166,7 @@ class AppTestSocketConnection(BaseConnectionTest):
     spaceconfig = {
         "usemodules": [
             '_multiprocessing', 'thread', 'signal', 'struct', 'array',
-            'itertools', '_socket', 'binascii', 'select' ]
+            'itertools', '_socket', 'binascii', 'select', 'mmap' ]
     }
     if sys.platform == 'win32':
         spaceconfig['usemodules'].append('_rawffi')
@@ -209,6 +250,18 @@ class AppTestSocketConnection(BaseConnectionTest):
         data2 = sock.recv(8)
         assert data2 == '\x00\x00\x00\x04defg'
 
+    def test_recv_bytes_into_mmap(self):
+        import mmap
+        rhandle, whandle = self.make_pair()
+        m = mmap.mmap(-1, 8192)
+        whandle.send_bytes(memoryview("y" * 5000))
+        assert rhandle.recv_bytes_into(m, 100) == 5000
+        assert m[:100] == "\x00" * 100
+        assert m[100:5100] == "y" * 5000
+        whandle.send_bytes(m, 100, 4000)
+        assert rhandle.recv_bytes() == "y" * 4000
+        m.close()
+
     def test_repr(self):
         import _multiprocessing, os
         fd = os.dup(1)     # closed by Connection.__del__
@@ -0,0 +1,86 @@
+import os
+import sys
+
+
+class AppTestSharedArray:
+    spaceconfig = dict(usemodules=('_multiprocessing', 'mmap', 'array',
+                                   'struct', 'signal', 'select', 'binascii',
+                                   '_io'))
+    if sys.platform == 'win32':
+        spaceconfig['usemodules'] += ('_cffi_backend',)
+    else:
+        spaceconfig['usemodules'] += ('fcntl',)
+
+    def setup_class(cls):
+        cls.w_can_fork = cls.space.wrap(hasattr(os, 'fork'))
+
+    def test_basic(self):
+        from _multiprocessing import SharedArray
+        a = SharedArray('i', 5)
+        assert len(a) == 5
+        assert a.typecode == 'i'
+        assert a.itemsize == 4
+        assert a.tolist() == [0] * 5
+        a[1] = 42
+        a[-1] = -7
+        assert a[1] == 42
+        assert a[4] == -7
+        assert list(a) == [0, 42, 0, 0, -7]
+        raises(IndexError, "a[5]")
+        raises(IndexError, "a[-6] = 1")
+        raises(OverflowError, "a[0] = 2 ** 40")
+        raises(TypeError, "a[0] = 'x'")
+        assert repr(a) == "SharedArray('i', [0, 42, 0, 0, -7])"
+
+    def test_initializer(self):
+        from _multiprocessing import SharedArray
+        a = SharedArray('d', [1.5, 2, -3.25])
+        assert a.tolist() == [1.5, 2.0, -3.25]
+        b = SharedArray('B', xrange(250, 256))
+        assert b.tolist() == range(250, 256)
+        raises(OverflowError, SharedArray, 'B', [256])
+        assert len(SharedArray('l', 0)) == 0
+        assert SharedArray('l', []).tolist() == []
+        raises(ValueError, SharedArray, 'l', -1)
+        raises(ValueError, SharedArray, 'c', 3)
+        raises(ValueError, SharedArray, 'L', 3)
+
+    def test_slices(self):
+        from _multiprocessing import SharedArray
+        a = SharedArray('h', range(10))
+        assert a[2:5] == [2, 3, 4]
+        assert a[::3] == [0, 3, 6, 9]
+        a[1:4] = [10, 20, 30]
+        a[::-4] = (-1, -2, -3)
+        assert a.tolist() == [0, -3, 20, 30, 4, -2, 6, 7, 8, -1]
+        raises(ValueError, "a[1:3] = [1]")
+
+    def test_buffer(self):
+        import struct, _io
+        from _multiprocessing import SharedArray
+        a = SharedArray('i', [1, 2, 3])
+        assert str(buffer(a)) == struct.pack('3i', 1, 2, 3)
+        f = _io.BytesIO(struct.pack('2i', 99, -5))
+        assert f.readinto(a) == 8
+        assert a.tolist() == [99, -5, 3]
+
+    def test_not_picklable(self):
+        import pickle
+        from _multiprocessing import SharedArray
+        raises(TypeError, pickle.dumps, SharedArray('i', 1), 2)
+
+    def test_fork(self):
+        import os
+        from _multiprocessing import SharedArray
+        if not self.can_fork:
+            skip("needs fork()")
+        a = SharedArray('d', 100)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                for i in range(100):
+                    a[i] = i * 0.5
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        assert a.tolist() == [i * 0.5 for i in range(100)]
@@ -0,0 +1,926 @@
+"""
+Interp-level pickling and unpickling of the builtin types.
+
+The Pickler below writes exactly the same opcodes as the pure Python
+cPickle.Pickler of lib_pypy for objects made only of None, bools, ints,
+longs, floats, strs, unicodes, tuples, lists and dicts (exact types, not
+subclasses).  As soon as it meets anything else it gives up and the
+app-level fallback is called instead.  The Unpickler understands all the
+opcodes of the protocols 0 to 2 except the few that need hooks from the
+app-level Unpickler (persistent ids, the extension registry and the
+classic-class INST/OBJ opcodes); pickles containing them are detected by a
+quick scan before anything is executed and handed to the fallback as well.
+"""
+
+from rpython.rlib.rarithmetic import intmask, string_to_int
+from rpython.rlib.rbigint import rbigint
+from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rstruct import ieee
+from rpython.rlib import rstring
+
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.objspace.std.floatobject import float_repr
+
+
+HIGHEST_PROTOCOL = 2
+BATCHSIZE = 1000
+
+MARK            = '('
+STOP            = '.'
+POP             = '0'
+POP_MARK        = '1'
+DUP             = '2'
+FLOAT           = 'F'
+INT             = 'I'
+BININT          = 'J'
+BININT1         = 'K'
+LONG            = 'L'
+BININT2         = 'M'
+NONE            = 'N'
+PERSID          = 'P'
+BINPERSID       = 'Q'
+REDUCE          = 'R'
+STRING          = 'S'
+BINSTRING       = 'T'
+SHORT_BINSTRING = 'U'
+UNICODE         = 'V'
+BINUNICODE      = 'X'
+APPEND          = 'a'
+BUILD           = 'b'
+GLOBAL          = 'c'
+DICT            = 'd'
+EMPTY_DICT      = '}'
+APPENDS         = 'e'
+GET             = 'g'
+BINGET          = 'h'
+INST            = 'i'
+LONG_BINGET     = 'j'
+LIST            = 'l'
+EMPTY_LIST      = ']'
+OBJ             = 'o'
+PUT             = 'p'
+BINPUT          = 'q'
+LONG_BINPUT     = 'r'
+SETITEM         = 's'
+TUPLE           = 't'
+EMPTY_TUPLE     = ')'
+SETITEMS        = 'u'
+BINFLOAT        = 'G'
+
+PROTO           = '\x80'
+NEWOBJ          = '\x81'
+EXT1            = '\x82'
+EXT2            = '\x83'
+EXT4            = '\x84'
+TUPLE1          = '\x85'
+TUPLE2          = '\x86'
+TUPLE3          = '\x87'
+NEWTRUE         = '\x88'
+NEWFALSE        = '\x89'
+LONG1           = '\x8a'
+LONG4           = '\x8b'
+
+TUPLESIZE2CODE = [EMPTY_TUPLE, TUPLE1, TUPLE2, TUPLE3]
+
+
+class Unsupported(Exception):
+    """Raised when the interp-level code cannot handle a pickle or an
+    object; the app-level fallback is used instead."""
+
+
+def _get_pickle_error(space, name):
+    w_builtin = space.getbuiltinmodule('__builtin__')
+    w_import = space.getattr(w_builtin, space.newtext("__import__"))
+    w_pickle = space.call_function(w_import, space.newtext("pickle"))
+    return space.getattr(w_pickle, space.newtext(name))
+
+def unpickling_error(space, msg):
+    w_exc = _get_pickle_error(space, "UnpicklingError")
+    return OperationError(w_exc, space.newtext(msg))
+
+
+def encode_long(bigint):
+    """Two's complement little-endian representation of 'bigint', with the
+    smallest number of bytes.  Zero is the empty string."""
+    if not bigint.tobool():
+        return ''
+    if bigint.get_sign() < 0:
+        nbits = bigint.invert().bit_length()
+    else:
+        nbits = bigint.bit_length()
+    nbytes = nbits // 8 + 1
+    return bigint.tobytes(nbytes, 'little', True)
+
+
+# ____________________________________________________________
+# Pickling
+
+class Pickler(object):
+
+    def __init__(self, space, proto):
+        self.space = space
+        self.proto = proto
+        self.bin = proto >= 1
+        self.builder = StringBuilder()
+        # identity dict {w_obj: memo index}; like lib_pypy's cPickle the
+        # indices start at 1
+        self.memo = {}
+
+    def dump(self, w_obj):
+        if self.proto >= 2:
+            self.builder.append(PROTO)
+            self.builder.append(chr(self.proto))
+        self.save(w_obj)
+        self.builder.append(STOP)
+        return self.builder.build()
+
+    def write_int32(self, i):
+        b = self.builder
+        b.append(chr(i & 0xff))
+        b.append(chr((i >> 8) & 0xff))
+        b.append(chr((i >> 16) & 0xff))
+        b.append(chr((i >> 24) & 0xff))
+
+    def memoize(self, w_obj):
+        index = len(self.memo) + 1
+        self.put(index)
+        self.memo[w_obj] = index
+
+    def put(self, i):
+        if self.bin:
+            if i < 256:
+                self.builder.append(BINPUT)
+                self.builder.append(chr(i))
+            else:
+                self.builder.append(LONG_BINPUT)
+                self.write_int32(i)
+        else:
+            self.builder.append(PUT)
+            self.builder.append(str(i))
+            self.builder.append('\n')
+
+    def get(self, i):
+        if self.bin:
+            if i < 256:
+                self.builder.append(BINGET)
+                self.builder.append(chr(i))
+            else:
+                self.builder.append(LONG_BINGET)
+                self.write_int32(i)
+        else:
+            self.builder.append(GET)
+            self.builder.append(str(i))
+            self.builder.append('\n')
+
+    def save(self, w_obj):
+        space = self.space
+        index = self.memo.get(w_obj, 0)
+        if index > 0:
+            self.get(index)
+            return
+        w_type = space.type(w_obj)
+        if space.is_w(w_obj, space.w_None):
+            self.builder.append(NONE)
+        elif w_type is space.w_bool:
+            self.save_bool(space.is_true(w_obj))
+        elif w_type is space.w_int:
+            self.save_int(space.int_w(w_obj))
+        elif w_type is space.w_long:
+            self.save_long(space.bigint_w(w_obj))
+        elif w_type is space.w_float:
+            self.save_float(space.float_w(w_obj))
+        elif w_type is space.w_bytes:
+            self.save_bytes(w_obj)
+        elif w_type is space.w_unicode:
+            self.save_unicode(w_obj)
+        elif w_type is space.w_tuple:
+            self.save_tuple(w_obj)
+        elif w_type is space.w_list:
+            self.save_list(w_obj)
+        elif w_type is space.w_dict:
+            self.save_dict(w_obj)
+        else:
+            raise Unsupported
+
+    def save_bool(self, value):
+        if self.proto >= 2:
+            self.builder.append(NEWTRUE if value else NEWFALSE)
+        else:
+            self.builder.append('I01\n' if value else 'I00\n')
+
+    def save_int(self, value):
+        b = self.builder
+        if self.bin:
+            if value >= 0:
+                if value <= 0xff:
+                    b.append(BININT1)
+                    b.append(chr(value))
+                    return
+                if value <= 0xffff:
+                    b.append(BININT2)
+                    b.append(chr(value & 0xff))
+                    b.append(chr(value >> 8))
+                    return
+            high_bits = value >> 31
+            if high_bits == 0 or high_bits == -1:
+                b.append(BININT)
+                self.write_int32(value)
+                return
+        b.append(INT)
+        b.append(str(value))
+        b.append('\n')
+
+    def save_long(self, bigint):
+        b = self.builder
+        if self.proto >= 2:
+            data = encode_long(bigint)
+            n = len(data)
+            if n < 256:
+                b.append(LONG1)
+                b.append(chr(n))
+            else:
+                b.append(LONG4)
+                self.write_int32(n)
+            b.append(data)
+            return
+        b.append(LONG)
+        b.append(bigint.repr())
+        b.append('\n')
+
+    def save_float(self, value):
+        b = self.builder
+        if self.bin:
+            b.append(BINFLOAT)
+            q = ieee.float_pack(value, 8)
+            for i in range(7, -1, -1):
+                b.append(chr(intmask(q >> (i * 8)) & 0xff))
+        else:
+            b.append(FLOAT)
+            b.append(float_repr(value))
+            b.append('\n')
+
+    def save_bytes(self, w_obj):
+        space = self.space
+        b = self.builder
+        if self.bin:
+            s = space.bytes_w(w_obj)
+            n = len(s)
+            if n < 256:
+                b.append(SHORT_BINSTRING)
+                b.append(chr(n))
+            else:
+                b.append(BINSTRING)
+                self.write_int32(n)
+            b.append(s)
+        else:
+            b.append(STRING)
+            b.append(space.bytes_w(space.repr(w_obj)))
+            b.append('\n')
+        self.memoize(w_obj)
+
+    def save_unicode(self, w_obj):
+        space = self.space
+        b = self.builder
+        if self.bin:
+            s = space.utf8_w(w_obj)
+            b.append(BINUNICODE)
+            self.write_int32(len(s))
+            b.append(s)
+        else:
+            w_u = space.call_method(w_obj, "replace", space.newtext("\\"),
+                                    space.newtext("\\u005c"))
+            w_u = space.call_method(w_u, "replace", space.newtext("\n"),
+                                    space.newtext("\\u000a"))
+            w_s = space.call_method(w_u, "encode",
+                                    space.newtext("raw-unicode-escape"))
+            b.append(UNICODE)
+            b.append(space.bytes_w(w_s))
+            b.append('\n')
+        self.memoize(w_obj)
+
+    def save_tuple(self, w_obj):
+        items_w = self.space.fixedview(w_obj)
+        n = len(items_w)
+        b = self.builder
+        if n == 0:
+            if self.proto:
+                b.append(EMPTY_TUPLE)
+            else:
+                b.append(MARK)
+                b.append(TUPLE)
+            return
+        if n <= 3 and self.proto >= 2:
+            for w_item in items_w:
+                self.save(w_item)
+            index = self.memo.get(w_obj, 0)
+            if index > 0:
+                # recursive tuple, see pickle.py
+                for i in range(n):
+                    b.append(POP)
+                self.get(index)
+            else:
+                b.append(TUPLESIZE2CODE[n])
+                self.memoize(w_obj)
+            return
+        b.append(MARK)
+        for w_item in items_w:
+            self.save(w_item)
+        index = self.memo.get(w_obj, 0)
+        if index > 0:
+            if self.proto:
+                b.append(POP_MARK)
+            else:
+                for i in range(n + 1):
+                    b.append(POP)
+            self.get(index)
+            return
+        b.append(TUPLE)
+        self.memoize(w_obj)
+
+    def save_list(self, w_obj):
+        space = self.space
+        b = self.builder
+        if self.bin:
+            b.append(EMPTY_LIST)
+        else:
+            b.append(MARK)
+            b.append(LIST)
+        self.memoize(w_obj)
+        # unwrapped strategies, for the common homogeneous lists
+        intlist = space.listview_int(w_obj)
+        if intlist is not None:
+            self._batch_appends_int(intlist)
+            return
+        floatlist = space.listview_float(w_obj)
+        if floatlist is not None:
+            self._batch_appends_float(floatlist)
+            return
+        items_w = space.listview(w_obj)
+        self._batch_appends(items_w)
+
+    def _batch_start(self, start, n):
+        # returns the end of the current batch, and writes the MARK if needed
+        end = min(start + BATCHSIZE, n)
+        if end - start > 1:
+            self.builder.append(MARK)
+        return end
+
+    def _batch_end(self, start, end):
+        if end - start > 1:
+            self.builder.append(APPENDS)
+        else:
+            self.builder.append(APPEND)
+
+    def _batch_appends_int(self, intlist):
+        n = len(intlist)
+        if not self.bin:
+            for i in range(n):
+                self.save_int(intlist[i])
+                self.builder.append(APPEND)
+            return
+        start = 0
+        while start < n:
+            end = self._batch_start(start, n)
+            for i in range(start, end):
+                self.save_int(intlist[i])
+            self._batch_end(start, end)
+            start = end
+
+    def _batch_appends_float(self, floatlist):
+        n = len(floatlist)
+        if not self.bin:
+            for i in range(n):
+                self.save_float(floatlist[i])
+                self.builder.append(APPEND)
+            return
+        start = 0
+        while start < n:
+            end = self._batch_start(start, n)
+            for i in range(start, end):
+                self.save_float(floatlist[i])
+            self._batch_end(start, end)
+            start = end
+
+    def _batch_appends(self, items_w):
+        n = len(items_w)
+        if not self.bin:
+            for i in range(n):
+                self.save(items_w[i])
+                self.builder.append(APPEND)
+            return
+        start = 0
+        while start < n:
+            end = self._batch_start(start, n)
+            for i in range(start, end):
+                self.save(items_w[i])
+            self._batch_end(start, end)
+            start = end
+
+    def save_dict(self, w_obj):
+        from pypy.objspace.std.dictmultiobject import W_DictObject
+        space = self.space
+        if not isinstance(w_obj, W_DictObject):
+            # e.g. module dictionaries, which pickle.py saves specially
+            raise Unsupported
+        b = self.builder
+        if self.bin:
+            b.append(EMPTY_DICT)
+        else:
+            b.append(MARK)
+            b.append(DICT)
+        self.memoize(w_obj)
+        keys_w = []
+        values_w = []
+        iteritems = w_obj.iteritems()
+        while True:
+            w_key, w_value = iteritems.next_item()
+            if w_key is None:
+                break
+            keys_w.append(w_key)
+            values_w.append(w_value)
+        n = len(keys_w)
+        if not self.bin:
+            for i in range(n):
+                self.save(keys_w[i])
+                self.save(values_w[i])
+                b.append(SETITEM)
+            return
+        start = 0
+        while start < n:
+            end = min(start + BATCHSIZE, n)
+            if end - start > 1:
+                b.append(MARK)
+            for i in range(start, end):
+                self.save(keys_w[i])
+                self.save(values_w[i])
+            if end - start > 1:
+                b.append(SETITEMS)
+            else:
+                b.append(SETITEM)
+            start = end
+
+
+def check_protocol(space, w_protocol):
+    if space.is_none(w_protocol):
+        return 0
+    proto = space.int_w(w_protocol)
+    if proto < 0:
+        return HIGHEST_PROTOCOL
+    if proto > HIGHEST_PROTOCOL:
+        raise oefmt(space.w_ValueError,
+                    "pickle protocol %d asked for; the highest available "
+                    "protocol is %d", proto, HIGHEST_PROTOCOL)
+    return proto
+
+def dumps(space, w_obj, w_protocol=None, w_fallback=None):
+    """dumps(obj, protocol=None, fallback=None) -> str
+
+    Pickle 'obj' at interp-level.  If it contains objects that are not of
+    one of the builtin types supported here, return fallback(obj, protocol)
+    instead."""
+    proto = check_protocol(space, w_protocol)
+    pickler = Pickler(space, proto)
+    try:
+        data = pickler.dump(w_obj)
+    except Unsupported:
+        if w_fallback is None or space.is_none(w_fallback):
+            w_exc = _get_pickle_error(space, "PicklingError")
+            raise OperationError(w_exc, space.newtext(
+                "object not supported by _pickle.dumps()"))
+        return space.call_function(w_fallback, w_obj, w_protocol)
+    return space.newbytes(data)
+
+def dump(space, w_obj, w_file, w_protocol=None, w_fallback=None):
+    """dump(obj, file, protocol=None, fallback=None)
+
+    Like dumps(), but write the pickle to 'file' with a single call to its
+    write() method.  If the object is not supported, fallback(obj, file,
+    protocol) is called instead."""
+    proto = check_protocol(space, w_protocol)
+    pickler = Pickler(space, proto)
+    try:
+        data = pickler.dump(w_obj)
+    except Unsupported:
+        if w_fallback is None or space.is_none(w_fallback):
+            w_exc = _get_pickle_error(space, "PicklingError")
+            raise OperationError(w_exc, space.newtext(
+                "object not supported by _pickle.dump()"))
+        space.call_function(w_fallback, w_obj, w_file, w_protocol)
+        return
+    space.call_method(w_file, "write", space.newbytes(data))
+
+
+# ____________________________________________________________
+# Unpickling
+
+def _skip_line(data, i):
+    end = data.find('\n', i)
+    if end < 0:
+        return len(data)
+    return end + 1
+
+def _read_int32_raw(data, i):
+    return (ord(data[i]) | (ord(data[i + 1]) << 8) |
+            (ord(data[i + 2]) << 16) | (ord(data[i + 3]) << 24))
+
+def _sign32(x):
+    x &= 0xffffffff
+    if x & 0x80000000:
+        x -= 0x100000000
+    return intmask(x)
+
+def is_supported(data, pos):
+    """Scan the opcodes of the pickle starting at 'pos', without executing
+    them.  Returns False if they contain an opcode that is only handled by
+    the app-level Unpickler (or an invalid one, to get its error message).
+    A truncated pickle counts as supported: the error is reported by the
+    Unpickler itself."""
+    n = len(data)
+    i = pos
+    while i < n:
+        op = data[i]
+        i += 1
+        if op == STOP:
+            return True
+        elif (op == MARK or op == POP or op == POP_MARK or op == DUP or
+              op == NONE or op == REDUCE or op == APPEND or op == BUILD or
+              op == DICT or op == EMPTY_DICT or op == APPENDS or
+              op == LIST or op == EMPTY_LIST or op == SETITEM or
+              op == TUPLE or op == EMPTY_TUPLE or op == SETITEMS or
+              op == NEWOBJ or op == TUPLE1 or op == TUPLE2 or
+              op == TUPLE3 or op == NEWTRUE or op == NEWFALSE):
+            pass
+        elif (op == FLOAT or op == INT or op == LONG or op == STRING or
+              op == UNICODE or op == GET or op == PUT):
+            i = _skip_line(data, i)
+        elif op == GLOBAL:
+            i = _skip_line(data, i)
+            i = _skip_line(data, i)
+        elif op == BININT1 or op == BINGET or op == BINPUT or op == PROTO:
+            i += 1
+        elif op == BININT2:
+            i += 2
+        elif op == BININT or op == LONG_BINGET or op == LONG_BINPUT:
+            i += 4
+        elif op == BINFLOAT:
+            i += 8
+        elif op == SHORT_BINSTRING or op == LONG1:
+            if i >= n:
+                return True
+            i += 1 + ord(data[i])
+        elif op == BINSTRING or op == BINUNICODE or op == LONG4:
+            if i + 4 > n:
+                return True
+            length = _sign32(_read_int32_raw(data, i))
+            if length < 0:
+                return False
+            i += 4 + length
+        else:
+            # PERSID, BINPERSID, INST, OBJ, EXT1, EXT2, EXT4, invalid
+            return False
+    return True
+
+
+class Unpickler(object):
+
+    def __init__(self, space, data, pos):
+        self.space = space
+        self.data = data
+        self.pos = pos
+        self.stack_w = []
+        self.marks = []
+        self.memo = {}
+
+    # ---------- reading ----------
+
+    def eof(self):
+        return OperationError(self.space.w_EOFError, self.space.w_None)
+
+    def read(self, n):
+        start = self.pos
+        end = start + n
+        if n < 0 or end > len(self.data):
+            raise self.eof()
+        self.pos = end
+        return self.data[start:end]
+
+    def readchar(self):
+        i = self.pos
+        if i >= len(self.data):
+            raise self.eof()
+        self.pos = i + 1
+        return self.data[i]
+
+    def readline(self):
+        # returns the line without the final '\n'
+        start = self.pos
+        end = self.data.find('\n', start)
+        if end < 0:
+            raise self.eof()
+        self.pos = end + 1
+        return self.data[start:end]
+
+    def read_int32(self):
+        s = self.read(4)
+        return _sign32(_read_int32_raw(s, 0))
+
+    # ---------- stack ----------
+
+    def push(self, w_obj):
+        self.stack_w.append(w_obj)
+
+    def pop(self):
+        if len(self.stack_w) <= self.stack_floor():
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w.pop()
+
+    def top(self):
+        if len(self.stack_w) <= self.stack_floor():
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w[-1]
+
+    def stack_floor(self):
+        if self.marks:
+            return self.marks[-1]
+        return 0
+
+    def pop_mark(self):
+        if not self.marks:
+            raise unpickling_error(self.space, "could not find MARK")
+        k = self.marks.pop()
+        items_w = self.stack_w[k:]
+        del self.stack_w[k:]
+        return items_w
+
+    # ---------- main loop ----------
+
+    def load(self):
+        space = self.space
+        while True:
+            op = self.readchar()
+            if op == STOP:
+                break
+            elif op == MARK:
+                self.marks.append(len(self.stack_w))
+            elif op == POP:
+                if len(self.stack_w) > self.stack_floor():
+                    self.stack_w.pop()
+                elif self.marks:
+                    self.marks.pop()
+                else:
+                    raise unpickling_error(space,
+                                           "unpickling stack underflow")
+            elif op == POP_MARK:
+                self.pop_mark()
+            elif op == DUP:
+                self.push(self.top())
+            elif op == NONE:
+                self.push(space.w_None)
+            elif op == NEWTRUE:
+                self.push(space.w_True)
+            elif op == NEWFALSE:
+                self.push(space.w_False)
+            elif op == PROTO:
+                proto = ord(self.readchar())
+                if proto > HIGHEST_PROTOCOL:
+                    raise oefmt(space.w_ValueError,
+                                "unsupported pickle protocol: %d", proto)
+            elif op == INT:
+                self.load_int()
+            elif op == BININT:
+                self.push(space.newint(self.read_int32()))
+            elif op == BININT1:
+                self.push(space.newint(ord(self.readchar())))
+            elif op == BININT2:
+                s = self.read(2)
+                self.push(space.newint(ord(s[0]) | (ord(s[1]) << 8)))
+            elif op == LONG:
+                self.load_long()
+            elif op == LONG1:
+                n = ord(self.readchar())
+                self.push_long(self.read(n))
+            elif op == LONG4:
+                n = self.read_int32()
+                if n < 0:
+                    raise unpickling_error(space,
+                                           "LONG pickle has negative byte count")
+                self.push_long(self.read(n))
+            elif op == FLOAT:
+                line = self.readline()
+                self.push(space.call_function(space.w_float,
+                                              space.newbytes(line)))
+            elif op == BINFLOAT:
+                self.push(space.newfloat(ieee.unpack_float(self.read(8),
+                                                           True)))
+            elif op == STRING:
+                self.load_string()
+            elif op == BINSTRING:
+                n = self.read_int32()
+                if n < 0:
+                    raise unpickling_error(space,
+                                   "BINSTRING pickle has negative byte count")
+                self.push(space.newbytes(self.read(n)))
+            elif op == SHORT_BINSTRING:
+                n = ord(self.readchar())
+                self.push(space.newbytes(self.read(n)))
+            elif op == UNICODE:
+                w_line = space.newbytes(self.readline())
+                self.push(space.call_method(w_line, "decode",
+                                      space.newtext("raw-unicode-escape")))
+            elif op == BINUNICODE:
+                n = self.read_int32()
+                if n < 0:
+                    raise unpickling_error(space,
+                                   "BINUNICODE pickle has negative byte count")
+                w_s = space.newbytes(self.read(n))
+                self.push(space.call_method(w_s, "decode",
+                                            space.newtext("utf-8")))
+            elif op == EMPTY_TUPLE:
+                self.push(space.newtuple([]))
+            elif op == TUPLE:
+                # copy: newtuple() needs a list that is never resized
+                self.push(space.newtuple(self.pop_mark()[:]))
+            elif op == TUPLE1:
+                w_a = self.pop()
+                self.push(space.newtuple([w_a]))
+            elif op == TUPLE2:
+                w_b = self.pop()
+                w_a = self.pop()
+                self.push(space.newtuple([w_a, w_b]))
+            elif op == TUPLE3:
+                w_c = self.pop()
+                w_b = self.pop()
+                w_a = self.pop()
+                self.push(space.newtuple([w_a, w_b, w_c]))
+            elif op == EMPTY_LIST:
+                self.push(space.newlist([]))
+            elif op == LIST:
+                self.push(space.newlist(self.pop_mark()))
+            elif op == APPEND:
+                w_value = self.pop()
+                space.call_method(self.top(), "append", w_value)
+            elif op == APPENDS:
+                items_w = self.pop_mark()
+                w_list = self.top()
+                space.call_method(w_list, "extend", space.newlist(items_w))
+            elif op == EMPTY_DICT:
+                self.push(space.newdict())
+            elif op == DICT:
+                items_w = self.pop_mark()
+                w_dict = space.newdict()
+                self.setitems(w_dict, items_w)
+                self.push(w_dict)
+            elif op == SETITEM:
+                w_value = self.pop()
+                w_key = self.pop()
+                space.setitem(self.top(), w_key, w_value)
+            elif op == SETITEMS:
+                items_w = self.pop_mark()
+                self.setitems(self.top(), items_w)
+            elif op == GET:
+                self.load_get(self.parse_int_line())
+            elif op == BINGET:
+                self.load_get(ord(self.readchar()))
+            elif op == LONG_BINGET:
+                self.load_get(self.read_int32())
+            elif op == PUT:
+                self.memo[self.parse_int_line()] = self.top()
+            elif op == BINPUT:
+                self.memo[ord(self.readchar())] = self.top()
+            elif op == LONG_BINPUT:
+                self.memo[self.read_int32()] = self.top()
+            elif op == GLOBAL:
+                module = self.readline()
+                name = self.readline()
+                self.push(self.find_class(module, name))
+            elif op == REDUCE:
+                w_args = self.pop()
+                w_callable = self.pop()
+                self.push(space.call(w_callable, w_args))
+            elif op == NEWOBJ:
+                w_args = self.pop()
+                w_cls = self.pop()
+                w_new = space.getattr(w_cls, space.newtext("__new__"))
+                args_w = [w_cls] + space.fixedview(w_args)
+                self.push(space.call(w_new, space.newtuple(args_w)))
+            elif op == BUILD:
+                w_state = self.pop()
+                self.load_build(self.top(), w_state)
+            else:
+                raise unpickling_error(space, "invalid load key, '%s'." % (op,))
+        return self.pop()
+
+    def setitems(self, w_dict, items_w):
+        space = self.space
+        for i in range(0, len(items_w) - 1, 2):
+            space.setitem(w_dict, items_w[i], items_w[i + 1])
+
+    def parse_int_line(self):
+        line = self.readline()
+        try:
+            return string_to_int(line.strip())
+        except (rstring.ParseStringError, rstring.ParseStringOverflowError):
+            raise oefmt(self.space.w_ValueError,
+                        "invalid literal for int() with base 10: '%s'", line)
+
+    def load_get(self, index):
+        try:
+            w_obj = self.memo[index]
+        except KeyError:
+            raise OperationError(self.space.w_KeyError,
+                                 self.space.newint(index))
+        self.push(w_obj)
+
+    def load_int(self):
+        space = self.space
+        line = self.readline()
+        if line == '00':
+            self.push(space.w_False)
+        elif line == '01':
+            self.push(space.w_True)
+        else:
+            self.push(space.call_function(space.w_int, space.newbytes(line)))
+
+    def load_long(self):
+        space = self.space
+        line = self.readline()
+        self.push(space.call_function(space.w_long, space.newbytes(line),
+                                      space.newint(0)))
+
+    def push_long(self, data):
+        if not data:
+            self.push(self.space.newlong(0))
+            return
+        bigint = rbigint.frombytes(data, 'little', True)
+        self.push(self.space.newlong_from_rbigint(bigint))
+
+    def load_string(self):
+        space = self.space
+        rep = self.readline()
+        n = len(rep)
+        if n < 2 or rep[0] != rep[n - 1] or (rep[0] != "'" and rep[0] != '"'):
+            raise oefmt(space.w_ValueError, "insecure string pickle")
+        end = n - 1
+        assert end >= 1
+        w_rep = space.newbytes(rep[1:end])
+        self.push(space.call_method(w_rep, "decode",
+                                    space.newtext("string-escape")))
+
+    def find_class(self, module, name):
+        space = self.space
+        w_builtin = space.getbuiltinmodule('__builtin__')
+        w_import = space.getattr(w_builtin, space.newtext("__import__"))
+        space.call_function(w_import, space.newtext(module))
+        w_modules = space.sys.get('modules')
+        w_mod = space.getitem(w_modules, space.newtext(module))
+        return space.getattr(w_mod, space.newtext(name))
+
+    def load_build(self, w_inst, w_state):
+        # like pickle.Unpickler.load_build()
+        space = self.space
+        w_setstate = space.findattr(w_inst, space.newtext("__setstate__"))
+        if w_setstate is not None:
+            space.call_function(w_setstate, w_state)
+            return
+        w_slotstate = None
+        if (space.isinstance_w(w_state, space.w_tuple) and
+                space.len_w(w_state) == 2):
+            w_state, w_slotstate = space.fixedview(w_state, 2)
+        if space.is_true(w_state):
+            w_dict = space.getattr(w_inst, space.newtext("__dict__"))
+            w_iter = space.iter(space.call_method(w_state, "iteritems"))
+            while True:
+                try:
+                    w_item = space.next(w_iter)
+                except OperationError as e:
+                    if not e.match(space, space.w_StopIteration):
+                        raise
+                    break
+                w_key, w_value = space.fixedview(w_item, 2)
+                space.setitem(w_dict, w_key, w_value)
+        if w_slotstate is not None and space.is_true(w_slotstate):
+            w_iter = space.iter(space.call_method(w_slotstate, "items"))
+            while True:
+                try:
+                    w_item = space.next(w_iter)
+                except OperationError as e:
+                    if not e.match(space, space.w_StopIteration):
+                        raise
+                    break
+                w_key, w_value = space.fixedview(w_item, 2)
+                space.setattr(w_inst, w_key, w_value)
+
+
+@unwrap_spec(data='bytes')
+def loads(space, data, w_fallback=None):
+    """loads(data, fallback=None) -> object
+
+    Unpickle 'data' at interp-level.  If the pickle uses opcodes that need
+    the hooks of the app-level Unpickler, return fallback(data) instead."""
+    if not is_supported(data, 0):
+        if w_fallback is None or space.is_none(w_fallback):
+            raise unpickling_error(space,
+                                   "pickle not supported by _pickle.loads()")
+        return space.call_function(w_fallback, space.newbytes(data))
+    return Unpickler(space, data, 0).load()
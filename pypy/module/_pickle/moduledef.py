@@ -0,0 +1,22 @@
+"""
+Mixed-module definition for the interp-level part of cPickle.
+lib_pypy/cPickle.py uses it for the module-level dump(), dumps() and
+loads() functions, and falls back to its pure Python Pickler and
+Unpickler for what is not supported here.
+"""
+
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """Fast interp-level pickling of the builtin types."""
+
+    interpleveldefs = {
+        'dump': 'interp_pickle.dump',
+        'dumps': 'interp_pickle.dumps',
+        'loads': 'interp_pickle.loads',
+        'HIGHEST_PROTOCOL': 'space.newint(2)',
+        }
+
+    appleveldefs = {
+        }
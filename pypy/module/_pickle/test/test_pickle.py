@@ -0,0 +1,196 @@
+"""
+Tests for the interp-level part of cPickle in pypy/module/_pickle.
+"""
+from pypy.module._pickle.interp_pickle import encode_long, is_supported
+from rpython.rlib.rbigint import rbigint
+
+
+def test_encode_long():
+    # compare with pickle.encode_long()
+    import pickle
+    for x in [0, 1, -1, 127, 128, 255, 256, -128, -129, -256, -32768,
+              2 ** 64, -2 ** 64, 3 ** 100, -(7 ** 90)]:
+        assert encode_long(rbigint.fromlong(x)) == pickle.encode_long(x)
+
+def test_is_supported():
+    import pickle
+    assert is_supported(pickle.dumps([1, 2.5, "a", (u"b",)], 2), 0)
+    assert is_supported(pickle.dumps({1: None}, 0), 0)
+    assert is_supported(pickle.dumps(Exception("x"), 2), 0)
+    assert is_supported("K", 0)     # truncated, error reported later
+    assert not is_supported("(i__main__\nC\np0\n(dp1\nb.", 0)
+    assert not is_supported("\x80\x02\x82\x05.", 0)
+    assert not is_supported("Z.", 0)
+
+
+class AppTestPickle(object):
+    spaceconfig = {
+        'usemodules': ['_pickle', 'struct', 'binascii'],
+    }
+
+    def test_dumps_simple(self):
+        import _pickle
+        assert _pickle.dumps(None) == 'N.'
+        assert _pickle.dumps(True, 2) == '\x80\x02\x88.'
+        assert _pickle.dumps(False) == 'I00\n.'
+        assert _pickle.dumps(5, 1) == 'K\x05.'
+        assert _pickle.dumps(0x1234, 1) == 'M4\x12.'
+        assert _pickle.dumps(-1, 1) == 'J\xff\xff\xff\xff.'
+        assert _pickle.dumps(-1) == 'I-1\n.'
+        assert _pickle.dumps(2 ** 40, 1) == 'I1099511627776\n.'
+        assert _pickle.dumps(255L, 2) == '\x80\x02\x8a\x02\xff\x00.'
+        assert _pickle.dumps(12L) == 'L12L\n.'
+        assert _pickle.dumps(1.5) == 'F1.5\n.'
+        assert _pickle.dumps(1.5, 1) == 'G?\xf8\x00\x00\x00\x00\x00\x00.'
+        assert _pickle.dumps("ab", 1) == 'U\x02abq\x01.'
+        assert _pickle.dumps("a'b") == 'S"a\'b"\np1\n.'
+        assert _pickle.dumps(u"\xe9", 2) == '\x80\x02X\x02\x00\x00\x00\xc3\xa9q\x01.'
+        assert _pickle.dumps(u"a\nb\\") == 'Va\\u000ab\\u005c\np1\n.'
+        assert _pickle.dumps((), 1) == ').'
+        assert _pickle.dumps((1, 2), 2) == '\x80\x02K\x01K\x02\x86q\x01.'
+        assert _pickle.dumps([1, 2], 1) == ']q\x01(K\x01K\x02e.'
+        assert _pickle.dumps([1.0], 1) == ']q\x01G?\xf0\x00\x00\x00\x00\x00\x00a.'
+        assert _pickle.dumps({}, 0) == '(dp1\n.'
+        assert _pickle.dumps({"a": 1}, 1) == '}q\x01U\x01aq\x02K\x01s.'
+        raises(ValueError, _pickle.dumps, 1, 3)
+        assert _pickle.dumps(1, -1) == '\x80\x02K\x01.'
+
+    def test_dumps_shared_and_recursive(self):
+        import _pickle
+        l = [1]
+        assert _pickle.dumps([l, l], 1) == ']q\x01(]q\x02K\x01ah\x02e.'
+        rec = []
+        rec.append(rec)
+        assert _pickle.dumps(rec, 2) == '\x80\x02]q\x01h\x01a.'
+        t = ([],)
+        t[0].append(t)
+        assert _pickle.dumps(t, 2) == '\x80\x02]q\x01h\x01\x85q\x02a0h\x02.'
+
+    def test_dumps_same_as_cpickle_python(self):
+        import _pickle, pickle
+        from StringIO import StringIO
+        class PythonPickler(pickle.Pickler):
+            # the dark magic of lib_pypy/cPickle.py
+            def memoize(self, obj):
+                self.memo[id(None)] = None
+                return pickle.Pickler.memoize(self, obj)
+        def python_dumps(obj, proto):
+            f = StringIO()
+            PythonPickler(f, proto).dump(obj)
+            return f.getvalue()
+        objs = [[1, -5, 2 ** 31, 2 ** 70, -2 ** 70, 0L, 3.25, -0.0],
+                {"x": [u"abc", "a\x00b", ("t",) * 5], 7: {}},
+                ["s" * 300, u"\u1234" * 3, (1,), (1, 2, 3), ((),)]]
+        for obj in objs:
+            for proto in range(3):
+                assert _pickle.dumps(obj, proto) == python_dumps(obj, proto)
+
+    def test_dumps_batches(self):
+        import _pickle
+        res = _pickle.dumps(range(1001), 1)
+        assert res.startswith(']q\x01(K\x00K\x01')
+        assert res.endswith('M\xe7\x03eM\xe8\x03a.')
+        res = _pickle.dumps([0.0] * 1001, 1)
+        assert res.endswith('\x00eG\x00\x00\x00\x00\x00\x00\x00\x00a.')
+        res = _pickle.dumps(range(1001), 0)
+        assert res.endswith('I999\naI1000\na.')
+        res = _pickle.dumps(dict.fromkeys(range(1001)), 2)
+        assert res.startswith('\x80\x02}q\x01(K\x00N')
+        assert res.endswith('NuM\xe8\x03Ns.')
+
+    def test_dumps_fallback(self):
+        import _pickle, pickle
+        class A(object):
+            pass
+        seen = []
+        def fallback(obj, proto):
+            seen.append((obj, proto))
+            return "fallback"
+        a = A()
+        assert _pickle.dumps([1, a], 2, fallback) == "fallback"
+        assert seen == [([1, a], 2)]
+        class L(list):
+            pass
+        assert _pickle.dumps(L(), None, fallback) == "fallback"
+        assert seen[-1][1] is None
+        raises(pickle.PicklingError, _pickle.dumps, a)
+
+    def test_dump_to_file(self):
+        import _pickle
+        from StringIO import StringIO
+        f = StringIO()
+        _pickle.dump([1, 2], f, 2)
+        assert f.getvalue() == '\x80\x02]q\x01(K\x01K\x02e.'
+        calls = []
+        _pickle.dump(object, f, 2, lambda *args: calls.append(args))
+        assert calls == [(object, f, 2)]
+
+    def test_loads_roundtrip(self):
+        import _pickle, pickle
+        big = range(1001)
+        for obj in [big, [x * 1.5 for x in big], dict.fromkeys(big)]:
+            for proto in range(3):
+                assert _pickle.loads(_pickle.dumps(obj, proto)) == obj
+        objs = [None, True, False, 0, 1, -1, 255, 256, 65535, 65536,
+                2 ** 31 - 1, -2 ** 31, 2 ** 31, 2 ** 100, -2 ** 100, 0L,
+                1.5, -0.0, 1e300, "", "abc", "a\x00'\"\n", u"", u"\u1234\n\\",
+                (), (1,), (1, 2), (1, 2, 3), (1, 2, 3, 4), [], [1, [2]],
+                {}, {"a": [1, 2.5], (1, 2): None}]
+        for obj in objs:
+            for proto in range(3):
+                for data in [pickle.dumps(obj, proto),
+                             _pickle.dumps(obj, proto)]:
+                    res = _pickle.loads(data)
+                    assert res == obj
+                    assert type(res) is type(obj)
+
+    def test_loads_shared_and_recursive(self):
+        import _pickle
+        l = [1]
+        res = _pickle.loads(_pickle.dumps([l, l], 2))
+        assert res[0] is res[1]
+        rec = []
+        rec.append(rec)
+        res = _pickle.loads(_pickle.dumps(rec, 1))
+        assert res[0] is res
+        t = ([],)
+        t[0].append(t)
+        res = _pickle.loads(_pickle.dumps(t, 2))
+        assert res[0][0] is res
+
+    def test_loads_objects(self):
+        import _pickle, pickle
+        import collections
+        class_ = collections.OrderedDict
+        obj = class_([("a", 1), ("b", [2])])
+        for proto in range(3):
+            res = _pickle.loads(pickle.dumps(obj, proto))
+            assert type(res) is class_
+            assert res == obj
+        exc = _pickle.loads(pickle.dumps(ValueError("x", 2), 2))
+        assert type(exc) is ValueError
+        assert exc.args == ("x", 2)
+        s = _pickle.loads(pickle.dumps(set([1, 2]), 2))
+        assert s == set([1, 2])
+
+    def test_loads_fallback(self):
+        import _pickle, pickle
+        class Old:
+            pass
+        data = pickle.dumps(Old(), 0)
+        assert _pickle.loads(data, lambda s: ("fallback", s)) == (
+            "fallback", data)
+        raises(pickle.UnpicklingError, _pickle.loads, data)
+        raises(pickle.UnpicklingError, _pickle.loads, "Z.")
+
+    def test_loads_errors(self):
+        import _pickle, pickle
+        raises(EOFError, _pickle.loads, "")
+        raises(EOFError, _pickle.loads, "K")
+        raises(EOFError, _pickle.loads, "U\x05ab")
+        raises(pickle.UnpicklingError, _pickle.loads, ".")
+        raises(pickle.UnpicklingError, _pickle.loads, "t.")
+        raises(KeyError, _pickle.loads, "h\x05.")
+        raises(ValueError, _pickle.loads, "S'abc\n.")
+        raises(ValueError, _pickle.loads, "\x80\x05N.")
+        assert _pickle.loads("N.garbage") is None
@@ -77,15 +77,10 @@ class JSONDecoder(W_Root):
         self.space = space
         self.w_empty_string = space.newutf8("", 0)
 
-        self.s = s
-
-        # we put our string in a raw buffer so:
-        # 1) we automatically get the '\0' sentinel at the end of the string,
-        #    which means that we never have to check for the "end of string"
-        # 2) we can pass the buffer directly to strtod
-        self.ll_chars, self.llobj, self.flag = rffi.get_nonmovingbuffer_ll_final_null(self.s)
-        self.end_ptr = lltype.malloc(rffi.CCHARPP.TO, 1, flavor='raw')
-        self.pos = 0
+        # total size of all the strings decoded by this decoder so far, see
+        # reset()
+        self.size_seen = 0
+        self._init_buffer(s)
         self.intcache = space.fromcache(IntCache)
 
         # two caches, one for keys, one for general strings. they both have the
@@ -113,6 +108,25 @@ class JSONDecoder(W_Root):
         self.scratch = [[None] * self.DEFAULT_SIZE_SCRATCH]
 
 
+    def _init_buffer(self, s):
+        self.s = s
+        self.size_seen += len(s)
+
+        # we put our string in a raw buffer so:
+        # 1) we automatically get the '\0' sentinel at the end of the string,
+        #    which means that we never have to check for the "end of string"
+        # 2) we can pass the buffer directly to strtod
+        self.ll_chars, self.llobj, self.flag = rffi.get_nonmovingbuffer_ll_final_null(self.s)
+        self.end_ptr = lltype.malloc(rffi.CCHARPP.TO, 1, flavor='raw')
+        self.pos = 0
+
+    def reset(self, s):
+        """ Start decoding the new string s with a decoder that was closed
+        before. The key cache and the string cache are kept, so that a
+        sequence of similar documents (e.g. the records of a newline-delimited
+        JSON file) doesn't have to warm them up again for every document. """
+        self._init_buffer(s)
+
     def close(self):
         rffi.free_nonmovingbuffer_ll(self.ll_chars, self.llobj, self.flag)
         lltype.free(self.end_ptr, flavor='raw')
@@ -121,6 +135,7 @@ class JSONDecoder(W_Root):
             jsonmap = self._get_jsonmap_from_dict(w_obj)
             if jsonmap.is_state_blocked():
                 self._devolve_jsonmap_dict(w_obj)
+        self.unclear_objects = []
 
     def getslice(self, start, end):
         assert start >= 0
@@ -569,7 +584,7 @@ class JSONDecoder(W_Root):
             contextmap.decoded_strings += 1
             if not contextmap.should_cache_strings():
                 cache = False
-        if len(self.s) < self.MIN_SIZE_FOR_STRING_CACHE:
+        if self.size_seen < self.MIN_SIZE_FOR_STRING_CACHE:
             cache = False
 
         if not cache:
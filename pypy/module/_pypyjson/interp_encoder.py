@@ -1,6 +1,10 @@
+import math
 from rpython.rlib.rstring import StringBuilder
-from rpython.rlib import rutf8
+from rpython.rlib import rutf8, rfloat
 from pypy.interpreter import unicodehelper
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.objspace.std.floatobject import float_repr
 
 
 HEX = '0123456789abcdef'
@@ -16,35 +20,9 @@ ESCAPE_BEFORE_SPACE = [ESCAPE_DICT.get(chr(_i), '\\u%04x' % _i)
                        for _i in range(32)]
 
 
-def raw_encode_basestring_ascii(space, w_string):
-    if space.isinstance_w(w_string, space.w_bytes):
-        s = space.bytes_w(w_string)
-        for i in range(len(s)):
-            c = s[i]
-            if c >= ' ' and c <= '~' and c != '"' and c != '\\':
-                pass
-            else:
-                first = i
-                break
-        else:
-            # the input is a string with only non-special ascii chars
-            return w_string
-
-        unicodehelper.check_utf8_or_raise(space, s)
-        sb = StringBuilder(len(s))
-        sb.append_slice(s, 0, first)
-    else:
-        # We used to check if 'u' contains only safe characters, and return
-        # 'w_string' directly.  But this requires an extra pass over all
-        # characters, and the expected use case of this function, from
-        # json.encoder, will anyway re-encode a unicode result back to
-        # a string (with the ascii encoding).  This requires two passes
-        # over the characters.  So we may as well directly turn it into a
-        # string here --- only one pass.
-        s = space.utf8_w(w_string)
-        sb = StringBuilder(len(s))
-        first = 0
-
+def escape_utf8_into(sb, s, first):
+    """Append the ascii-only JSON escaping of the utf-8 string 's' to 'sb',
+    starting at the codepoint index 'first'."""
     it = rutf8.Utf8StringIterator(s)
     for i in range(first):
         it.next()
@@ -77,5 +55,324 @@ def raw_encode_basestring_ascii(space, w_string):
                 sb.append(HEX[(s2 >> 4) & 0x0f])
                 sb.append(HEX[s2 & 0x0f])
 
+def _first_special_char(s):
+    """Return the index of the first character of the byte string 's' that
+    needs escaping, or -1 if there is none."""
+    for i in range(len(s)):
+        c = s[i]
+        if c >= ' ' and c <= '~' and c != '"' and c != '\\':
+            pass
+        else:
+            return i
+    return -1
+
+
+def raw_encode_basestring_ascii(space, w_string):
+    if space.isinstance_w(w_string, space.w_bytes):
+        s = space.bytes_w(w_string)
+        first = _first_special_char(s)
+        if first < 0:
+            # the input is a string with only non-special ascii chars
+            return w_string
+
+        unicodehelper.check_utf8_or_raise(space, s)
+        sb = StringBuilder(len(s))
+        sb.append_slice(s, 0, first)
+    else:
+        # We used to check if 'u' contains only safe characters, and return
+        # 'w_string' directly.  But this requires an extra pass over all
+        # characters, and the expected use case of this function, from
+        # json.encoder, will anyway re-encode a unicode result back to
+        # a string (with the ascii encoding).  This requires two passes
+        # over the characters.  So we may as well directly turn it into a
+        # string here --- only one pass.
+        s = space.utf8_w(w_string)
+        sb = StringBuilder(len(s))
+        first = 0
+
+    escape_utf8_into(sb, s, first)
     res = sb.build()
     return space.newtext(res)
+
+
+class JSONEncoder(object):
+    """ Interp-level version of the one-shot path of json.JSONEncoder.encode,
+    for the common case of ensure_ascii=True and the utf-8 encoding.  The
+    whole output is written into a single StringBuilder; app-level code is
+    only called for the 'default' hook and for objects that are not of one
+    of the builtin JSON types. """
+
+    def __init__(self, space, skipkeys, check_circular, allow_nan, sort_keys,
+                 indent, item_separator, key_separator, w_default):
+        self.space = space
+        self.skipkeys = skipkeys
+        self.check_circular = check_circular
+        self.allow_nan = allow_nan
+        self.sort_keys = sort_keys
+        self.indent = indent            # -1 means None
+        self.item_separator = item_separator
+        self.key_separator = key_separator
+        self.w_default = w_default
+        self.markers = {}
+        self.builder = StringBuilder()
+
+    def build(self):
+        return self.builder.build()
+
+    # ____________________________________________________________
+    # leaves
+
+    def append_bytes(self, s):
+        # 's' is an unwrapped, not yet validated utf-8 byte string
+        sb = self.builder
+        sb.append('"')
+        first = _first_special_char(s)
+        if first < 0:
+            sb.append(s)
+        else:
+            unicodehelper.check_utf8_or_raise(self.space, s)
+            sb.append_slice(s, 0, first)
+            escape_utf8_into(sb, s, first)
+        sb.append('"')
+
+    def append_utf8(self, s):
+        # 's' is the (valid) utf-8 representation of a unicode object
+        sb = self.builder
+        sb.append('"')
+        escape_utf8_into(sb, s, 0)
+        sb.append('"')
+
+    def append_string(self, w_string):
+        space = self.space
+        if space.isinstance_w(w_string, space.w_bytes):
+            self.append_bytes(space.bytes_w(w_string))
+        else:
+            self.append_utf8(space.utf8_w(w_string))
+
+    def floatstr(self, x):
+        if rfloat.isfinite(x):
+            return float_repr(x)
+        if not self.allow_nan:
+            raise oefmt(self.space.w_ValueError,
+                "Out of range float values are not JSON compliant: %s",
+                float_repr(x))
+        if math.isnan(x):
+            return 'NaN'
+        elif x > 0.0:
+            return 'Infinity'
+        else:
+            return '-Infinity'
+
+    def intstr(self, w_obj):
+        space = self.space
+        if space.is_w(space.type(w_obj), space.w_int):
+            return str(space.int_w(w_obj))
+        return space.text_w(space.str(w_obj))
+
+    # ____________________________________________________________
+    # containers
+
+    def mark(self, w_obj):
+        if self.check_circular:
+            if w_obj in self.markers:
+                raise oefmt(self.space.w_ValueError,
+                            "Circular reference detected")
+            self.markers[w_obj] = None
+
+    def unmark(self, w_obj):
+        if self.check_circular:
+            del self.markers[w_obj]
+
+    def emit_indent(self, level):
+        if self.indent >= 0:
+            newline_indent = '\n' + ' ' * (self.indent * level)
+            self.builder.append(newline_indent)
+            return self.item_separator + newline_indent
+        return self.item_separator
+
+    def emit_unindent(self, level):
+        if self.indent >= 0:
+            self.builder.append('\n')
+            self.builder.append(' ' * (self.indent * (level - 1)))
+
+    def encode_list(self, w_list, level):
+        space = self.space
+        if space.len_w(w_list) == 0:
+            self.builder.append('[]')
+            return
+        self.mark(w_list)
+        self.builder.append('[')
+        level += 1
+        separator = self.emit_indent(level)
+        # fast paths for the unwrapped list strategies
+        intlist = space.listview_int(w_list)
+        if intlist is not None:
+            for i in range(len(intlist)):
+                if i > 0:
+                    self.builder.append(separator)
+                self.builder.append(str(intlist[i]))
+        else:
+            floatlist = space.listview_float(w_list)
+            if floatlist is not None:
+                for i in range(len(floatlist)):
+                    if i > 0:
+                        self.builder.append(separator)
+                    self.builder.append(self.floatstr(floatlist[i]))
+            else:
+                byteslist = space.listview_bytes(w_list)
+                if byteslist is not None:
+                    for i in range(len(byteslist)):
+                        if i > 0:
+                            self.builder.append(separator)
+                        self.append_bytes(byteslist[i])
+                else:
+                    asciilist = space.listview_ascii(w_list)
+                    if asciilist is not None:
+                        for i in range(len(asciilist)):
+                            if i > 0:
+                                self.builder.append(separator)
+                            self.append_utf8(asciilist[i])
+                    else:
+                        items_w = space.listview(w_list)
+                        for i in range(len(items_w)):
+                            if i > 0:
+                                self.builder.append(separator)
+                            self.encode(items_w[i], level)
+        self.emit_unindent(level)
+        self.builder.append(']')
+        self.unmark(w_list)
+
+    def encode_tuple(self, w_tuple, level):
+        items_w = self.space.fixedview(w_tuple)
+        if not items_w:
+            self.builder.append('[]')
+            return
+        self.mark(w_tuple)
+        self.builder.append('[')
+        level += 1
+        separator = self.emit_indent(level)
+        for i in range(len(items_w)):
+            if i > 0:
+                self.builder.append(separator)
+            self.encode(items_w[i], level)
+        self.emit_unindent(level)
+        self.builder.append(']')
+        self.unmark(w_tuple)
+
+    def encode_dict(self, w_dict, level):
+        from pypy.objspace.std.dictmultiobject import W_DictObject
+        space = self.space
+        if space.len_w(w_dict) == 0:
+            self.builder.append('{}')
+            return
+        self.mark(w_dict)
+        self.builder.append('{')
+        level += 1
+        separator = self.emit_indent(level)
+        first = True
+        if self.sort_keys:
+            w_keys = space.call_method(w_dict, "keys")
+            space.call_method(w_keys, "sort")
+            for w_key in space.listview(w_keys):
+                w_value = space.getitem(w_dict, w_key)
+                if self.encode_item(w_key, w_value, first, separator, level):
+                    first = False
+        elif type(w_dict) is W_DictObject:
+            iteritems = w_dict.iteritems()
+            while True:
+                w_key, w_value = iteritems.next_item()
+                if w_key is None:
+                    break
+                if self.encode_item(w_key, w_value, first, separator, level):
+                    first = False
+        else:
+            w_items = space.call_method(w_dict, "iteritems")
+            for w_item in space.unpackiterable(w_items):
+                w_key, w_value = space.fixedview(w_item, 2)
+                if self.encode_item(w_key, w_value, first, separator, level):
+                    first = False
+        self.emit_unindent(level)
+        self.builder.append('}')
+        self.unmark(w_dict)
+
+    def encode_item(self, w_key, w_value, first, separator, level):
+        """Write one 'key: value' pair.  Returns False if the key was
+        skipped because of 'skipkeys'."""
+        space = self.space
+        key = None
+        if space.isinstance_w(w_key, space.w_basestring):
+            pass
+        elif space.isinstance_w(w_key, space.w_float):
+            key = self.floatstr(space.float_w(w_key))
+        elif space.is_w(w_key, space.w_True):
+            key = 'true'
+        elif space.is_w(w_key, space.w_False):
+            key = 'false'
+        elif space.is_w(w_key, space.w_None):
+            key = 'null'
+        elif (space.isinstance_w(w_key, space.w_int) or
+              space.isinstance_w(w_key, space.w_long)):
+            key = self.intstr(w_key)
+        elif self.skipkeys:
+            return False
+        else:
+            raise oefmt(space.w_TypeError, "key %R is not a string", w_key)
+        if not first:
+            self.builder.append(separator)
+        if key is None:
+            self.append_string(w_key)
+        else:
+            self.append_bytes(key)
+        self.builder.append(self.key_separator)
+        self.encode(w_value, level)
+        return True
+
+    # ____________________________________________________________
+
+    def encode(self, w_obj, level):
+        space = self.space
+        if space.isinstance_w(w_obj, space.w_basestring):
+            self.append_string(w_obj)
+        elif space.is_w(w_obj, space.w_None):
+            self.builder.append('null')
+        elif space.is_w(w_obj, space.w_True):
+            self.builder.append('true')
+        elif space.is_w(w_obj, space.w_False):
+            self.builder.append('false')
+        elif (space.isinstance_w(w_obj, space.w_int) or
+              space.isinstance_w(w_obj, space.w_long)):
+            self.builder.append(self.intstr(w_obj))
+        elif space.isinstance_w(w_obj, space.w_float):
+            self.builder.append(self.floatstr(space.float_w(w_obj)))
+        elif space.isinstance_w(w_obj, space.w_list):
+            self.encode_list(w_obj, level)
+        elif space.isinstance_w(w_obj, space.w_tuple):
+            self.encode_tuple(w_obj, level)
+        elif space.isinstance_w(w_obj, space.w_dict):
+            self.encode_dict(w_obj, level)
+        else:
+            self.mark(w_obj)
+            w_res = space.call_function(self.w_default, w_obj)
+            self.encode(w_res, level)
+            self.unmark(w_obj)
+
+
+@unwrap_spec(skipkeys=bool, check_circular=bool, allow_nan=bool,
+             sort_keys=bool, item_separator='text', key_separator='text')
+def encode(space, w_obj, skipkeys, check_circular, allow_nan, sort_keys,
+           w_indent, item_separator, key_separator, w_default):
+    """encode(obj, skipkeys, check_circular, allow_nan, sort_keys, indent,
+              item_separator, key_separator, default) -> str
+
+    Fast path for json.JSONEncoder.encode() with ensure_ascii=True."""
+    if space.is_none(w_indent):
+        indent = -1
+    else:
+        indent = space.int_w(w_indent)
+        if indent < 0:
+            indent = 0
+    encoder = JSONEncoder(space, skipkeys, check_circular, allow_nan,
+                          sort_keys, indent, item_separator, key_separator,
+                          w_default)
+    encoder.encode(w_obj, 0)
+    return space.newtext(encoder.build())
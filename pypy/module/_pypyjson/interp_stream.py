@@ -0,0 +1,138 @@
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef
+from pypy.module._pypyjson.interp_decoder import JSONDecoder
+
+
+class W_NDJSONDecoder(W_Root):
+    """ Incremental decoder for newline-delimited JSON.
+
+    Data is either pushed with feed() or pulled from a file-like 'stream'.
+    Every complete block of lines is decoded in one go, by a single
+    JSONDecoder that is reused for the whole lifetime of this object, so the
+    key and string caches stay warm from one record to the next. """
+
+    def __init__(self, space, w_stream, chunksize):
+        self.space = space
+        self.w_stream = w_stream
+        self.chunksize = chunksize
+        self.decoder = None
+        # pieces of the last, still incomplete line
+        self.pending = []
+        # decoded records that were not returned yet
+        self.records_w = []
+        self.index = 0
+        self.finished = False
+
+    def _decode_block(self, s):
+        space = self.space
+        if self.index == len(self.records_w):
+            self.records_w = []
+            self.index = 0
+        decoder = self.decoder
+        if decoder is None:
+            decoder = self.decoder = JSONDecoder(space, s)
+        else:
+            decoder.reset(s)
+        try:
+            i = decoder.skip_whitespace(0)
+            while i < len(s):
+                w_res = decoder.decode_any(i)
+                self.records_w.append(w_res)
+                i = decoder.skip_whitespace(decoder.pos)
+        finally:
+            decoder.close()
+
+    def _feed(self, data):
+        end = data.rfind('\n')
+        if end < 0:
+            if data:
+                self.pending.append(data)
+            return
+        end += 1
+        if self.pending:
+            self.pending.append(data[:end])
+            block = ''.join(self.pending)
+            self.pending = []
+        else:
+            block = data[:end]
+        if end < len(data):
+            self.pending.append(data[end:])
+        self._decode_block(block)
+
+    def _finish(self):
+        self.finished = True
+        if self.pending:
+            block = ''.join(self.pending)
+            self.pending = []
+            self._decode_block(block)
+
+    def _check_not_finished(self):
+        if self.finished:
+            raise oefmt(self.space.w_ValueError, "decoder is closed")
+
+    @unwrap_spec(data='bytes')
+    def descr_feed(self, space, data):
+        """feed(data)
+
+        Add a chunk of data.  All the records whose line is complete are
+        decoded immediately and can then be fetched by iterating."""
+        self._check_not_finished()
+        self._feed(data)
+
+    def descr_close(self, space):
+        """close()
+
+        Signal the end of the input.  A last line that is not terminated by a
+        newline is decoded as the final record."""
+        if not self.finished:
+            self._finish()
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        while self.index == len(self.records_w):
+            if self.w_stream is None or self.finished:
+                raise OperationError(space.w_StopIteration, space.w_None)
+            w_data = space.call_method(self.w_stream, "read",
+                                       space.newint(self.chunksize))
+            data = space.bytes_w(w_data)
+            if data:
+                self._feed(data)
+            else:
+                self._finish()
+        w_res = self.records_w[self.index]
+        # don't keep the records alive longer than necessary
+        self.records_w[self.index] = None
+        self.index += 1
+        return w_res
+
+
+@unwrap_spec(chunksize=int)
+def descr_new_ndjsondecoder(space, w_subtype, w_stream=None,
+                            chunksize=65536):
+    """NDJSONDecoder(stream=None, chunksize=65536)
+
+    Iterate over the records of newline-delimited JSON data.  If 'stream' is
+    given, data is read from it with stream.read(chunksize) as needed.
+    Otherwise it must be passed in with feed(); iterating then stops as soon
+    as all the complete records fed so far have been returned, and can be
+    resumed after more data has been fed."""
+    if space.is_none(w_stream):
+        w_stream = None
+    if chunksize <= 0:
+        raise oefmt(space.w_ValueError, "chunksize must be positive")
+    w_res = space.allocate_instance(W_NDJSONDecoder, w_subtype)
+    W_NDJSONDecoder.__init__(w_res, space, w_stream, chunksize)
+    return w_res
+
+W_NDJSONDecoder.typedef = TypeDef("_pypyjson.NDJSONDecoder",
+    __new__ = interp2app(descr_new_ndjsondecoder),
+    __iter__ = interp2app(W_NDJSONDecoder.descr_iter),
+    next = interp2app(W_NDJSONDecoder.descr_next),
+    feed = interp2app(W_NDJSONDecoder.descr_feed),
+    close = interp2app(W_NDJSONDecoder.descr_close),
+)
+W_NDJSONDecoder.typedef.acceptable_as_base_class = False
@@ -7,6 +7,8 @@ class Module(MixedModule):
 
     interpleveldefs = {
         'loads' : 'interp_decoder.loads',
+        'encode' : 'interp_encoder.encode',
+        'NDJSONDecoder' : 'interp_stream.W_NDJSONDecoder',
         'raw_encode_basestring_ascii':
             'interp_encoder.raw_encode_basestring_ascii',
         }
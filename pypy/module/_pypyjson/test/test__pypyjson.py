@@ -120,6 +120,19 @@ class TestJson(object):
             assert w_z is w_y
             dec.close()
 
+    def test_reset_keeps_string_cache(self):
+        dec = JSONDecoder(self.space, '"abc" "abc"')
+        dec.MIN_SIZE_FOR_STRING_CACHE = 0
+        dec.decode_string(1)
+        w_x = dec.decode_string(dec.skip_whitespace(dec.pos) + 1)
+        dec.close()
+        dec.reset('"abc"')
+        assert dec.pos == 0
+        assert dec.size_seen == 16
+        w_y = dec.decode_string(1)
+        assert w_y is w_x
+        dec.close()
+
     def _make_some_maps(self):
         # base -> m1 -> m2 -> m3
         #                \-> m4
@@ -541,3 +554,140 @@ class AppTest(object):
         a = '{"abc": "4", "k": 1, "k": 1.5, "c": null, "k": 2}'
         d = _pypyjson.loads(a)
         assert d == {u"abc": u"4", u"c": None, u"k": 2}
+
+    def test_encode_basic(self):
+        import _pypyjson
+        def enc(obj, skipkeys=False, check_circular=True, allow_nan=True,
+                sort_keys=False, indent=None, item_sep=', ', key_sep=': ',
+                default=None):
+            def fail(o):
+                raise TypeError(repr(o) + " is not JSON serializable")
+            return _pypyjson.encode(obj, skipkeys, check_circular, allow_nan,
+                                    sort_keys, indent, item_sep, key_sep,
+                                    default or fail)
+        assert enc(None) == 'null'
+        assert enc(True) == 'true'
+        assert enc(False) == 'false'
+        assert enc(42) == '42'
+        assert enc(2 ** 70) == str(2 ** 70)
+        assert enc(1.5) == '1.5'
+        assert enc(0.1) == '0.1'
+        assert enc(float('inf')) == 'Infinity'
+        assert enc(float('-inf')) == '-Infinity'
+        assert enc(float('nan')) == 'NaN'
+        raises(ValueError, enc, float('nan'), allow_nan=False)
+        assert enc("a\"b\n") == '"a\\"b\\n"'
+        assert enc(u"\u1234") == '"\\u1234"'
+        raises(UnicodeDecodeError, enc, "\xc0")
+        assert enc([]) == '[]'
+        assert enc(()) == '[]'
+        assert enc({}) == '{}'
+        assert enc([1, 2, 3]) == '[1, 2, 3]'
+        assert enc([1.5, 2.0]) == '[1.5, 2.0]'
+        assert enc(["a", "b\t"]) == '["a", "b\\t"]'
+        assert enc([u"a", u"b"]) == '["a", "b"]'
+        assert enc((1, "x", None)) == '[1, "x", null]'
+        assert enc([1, [2, {"a": [3]}]]) == '[1, [2, {"a": [3]}]]'
+        res = enc([1, 2], item_sep=',')
+        assert type(res) is str
+        assert res == '[1,2]'
+
+    def test_encode_dict(self):
+        import _pypyjson
+        def enc(obj, skipkeys=False, sort_keys=False, indent=None,
+                item_sep=', ', key_sep=': '):
+            def fail(o):
+                raise TypeError(repr(o) + " is not JSON serializable")
+            return _pypyjson.encode(obj, skipkeys, True, True, sort_keys,
+                                    indent, item_sep, key_sep, fail)
+        assert enc({"a": 1}) == '{"a": 1}'
+        assert enc({u"\xe9": 1}) == '{"\\u00e9": 1}'
+        d = {"b": 1, "a": 2, "c": [1]}
+        assert enc(d, sort_keys=True) == '{"a": 2, "b": 1, "c": [1]}'
+        assert enc({1: 2}) == '{"1": 2}'
+        assert enc({1.5: 2}) == '{"1.5": 2}'
+        assert enc({True: 1}) == '{"true": 1}'
+        assert enc({None: 1}) == '{"null": 1}'
+        raises(TypeError, enc, {(1,): 2})
+        assert enc({(1,): 2, "a": 1}, skipkeys=True) == '{"a": 1}'
+        assert enc({"a": 1}, key_sep=':') == '{"a":1}'
+        class D(dict):
+            def iteritems(self):
+                return iter([("x", 1)])
+        assert enc(D(a=5)) == '{"x": 1}'
+        assert enc({"a": [1, 2]}, sort_keys=True, indent=2) == (
+            '{\n  "a": [\n    1, \n    2\n  ]\n}')
+
+    def test_encode_default_and_circular(self):
+        import _pypyjson
+        class Point(object):
+            def __init__(self, x, y):
+                self.x, self.y = x, y
+        def default(o):
+            if isinstance(o, Point):
+                return [o.x, o.y]
+            raise TypeError("nope")
+        res = _pypyjson.encode({"p": Point(1, 2)}, False, True, True, False,
+                               None, ', ', ': ', default)
+        assert res == '{"p": [1, 2]}'
+        raises(TypeError, _pypyjson.encode, object(), False, True, True,
+               False, None, ', ', ': ', default)
+        l = []
+        l.append(l)
+        exc = raises(ValueError, _pypyjson.encode, l, False, True, True,
+                     False, None, ', ', ': ', default)
+        assert str(exc.value) == "Circular reference detected"
+        d = {}
+        d["x"] = [d]
+        raises(ValueError, _pypyjson.encode, d, False, True, True,
+               False, None, ', ', ': ', default)
+        def selfref(o):
+            return o
+        raises((ValueError, RuntimeError), _pypyjson.encode, Point(1, 2),
+               False, True, True, False, None, ', ', ': ', selfref)
+        shared = [1]
+        res = _pypyjson.encode([shared, shared], False, True, True, False,
+                               None, ', ', ': ', default)
+        assert res == '[[1], [1]]'
+
+    def test_ndjson_feed(self):
+        import _pypyjson
+        dec = _pypyjson.NDJSONDecoder()
+        dec.feed('{"a": 1, "b": [1, 2]}\n{"a": 2,')
+        assert list(dec) == [{u"a": 1, u"b": [1, 2]}]
+        assert list(dec) == []
+        dec.feed(' "b": null}\n\n')
+        dec.feed('  "x')
+        dec.feed('yz"')
+        assert list(dec) == [{u"a": 2, u"b": None}]
+        dec.close()
+        assert list(dec) == [u"xyz"]
+        raises(ValueError, dec.feed, "1\n")
+
+    def test_ndjson_error(self):
+        import _pypyjson
+        dec = _pypyjson.NDJSONDecoder()
+        raises(ValueError, dec.feed, '[1, 2\n')
+        dec.feed('[3]\n')
+        assert list(dec) == [[3]]
+        raises(ValueError, _pypyjson.NDJSONDecoder, None, 0)
+
+    def test_ndjson_stream(self):
+        import _pypyjson
+        class Stream(object):
+            def __init__(self, data):
+                self.data = data
+                self.reads = 0
+            def read(self, n):
+                self.reads += 1
+                res = self.data[:n]
+                self.data = self.data[n:]
+                return res
+        lines = ['{"id": %d, "name": "n%d"}' % (i, i % 3) for i in range(20)]
+        stream = Stream('\n'.join(lines))
+        dec = _pypyjson.NDJSONDecoder(stream, 7)
+        res = list(dec)
+        assert res == [{u"id": i, u"name": u"n%d" % (i % 3)}
+                       for i in range(20)]
+        assert stream.reads > 20
+        assert list(dec) == []
@@ -0,0 +1,102 @@
+from rpython.rlib import rsha2
+from rpython.rlib.objectmodel import import_from_mixin
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.typedef import TypeDef
+from pypy.interpreter.gateway import interp2app
+
+
+class W_SHA256(W_Root):
+    """
+    A subclass of RSHA256 that can be exposed to app-level.
+    """
+    import_from_mixin(rsha2.RSHA256)
+
+    def __init__(self, space):
+        self.space = space
+        self._init()
+
+    def update_w(self, w_string):
+        space = self.space
+        if (space.isinstance_w(w_string, space.w_bytes) or
+                space.isinstance_w(w_string, space.w_unicode)):
+            self.update(space.bufferstr_w(w_string))
+        else:
+            # hash the content of bytearrays, arrays, memoryviews...
+            # in place, without copying it into a string
+            self.update(space.readbuf_w(w_string))
+
+    def digest_w(self):
+        return self.space.newbytes(self.digest())
+
+    def hexdigest_w(self):
+        return self.space.newtext(self.hexdigest())
+
+    def copy_w(self):
+        clone = W_SHA256(self.space)
+        clone._copyfrom(self)
+        return clone
+
+
+class W_SHA224(W_SHA256):
+    """
+    SHA-224 is SHA-256 with other initial values and a shorter digest.
+    """
+    digest_size = rsha2.RSHA224.digest_size
+    _initial_state = rsha2.RSHA224._initial_state
+
+    def copy_w(self):
+        clone = W_SHA224(self.space)
+        clone._copyfrom(self)
+        return clone
+
+
+def W_SHA256___new__(space, w_subtype, w_string=None):
+    """
+    Create a new sha256 object and call its initializer.
+    """
+    w_sha = space.allocate_instance(W_SHA256, w_subtype)
+    sha = space.interp_w(W_SHA256, w_sha)
+    W_SHA256.__init__(sha, space)
+    if w_string is not None:
+        sha.update_w(w_string)
+    return w_sha
+
+def W_SHA224___new__(space, w_subtype, w_string=None):
+    """
+    Create a new sha224 object and call its initializer.
+    """
+    w_sha = space.allocate_instance(W_SHA224, w_subtype)
+    sha = space.interp_w(W_SHA224, w_sha)
+    W_SHA224.__init__(sha, space)
+    if w_string is not None:
+        sha.update_w(w_string)
+    return w_sha
+
+
+W_SHA256.typedef = TypeDef(
+    '_sha256.sha256',
+    __new__   = interp2app(W_SHA256___new__),
+    update    = interp2app(W_SHA256.update_w),
+    digest    = interp2app(W_SHA256.digest_w),
+    hexdigest = interp2app(W_SHA256.hexdigest_w),
+    copy      = interp2app(W_SHA256.copy_w),
+    digest_size = 32,
+    digestsize = 32,
+    block_size = 64,
+    __doc__   = """sha256([string]) -> return a new SHA-256 hash object.
+
+If string is present, the method call update(string) is made.""")
+
+W_SHA224.typedef = TypeDef(
+    '_sha256.sha224',
+    __new__   = interp2app(W_SHA224___new__),
+    update    = interp2app(W_SHA256.update_w),
+    digest    = interp2app(W_SHA256.digest_w),
+    hexdigest = interp2app(W_SHA256.hexdigest_w),
+    copy      = interp2app(W_SHA224.copy_w),
+    digest_size = 28,
+    digestsize = 28,
+    block_size = 64,
+    __doc__   = """sha224([string]) -> return a new SHA-224 hash object.
+
+If string is present, the method call update(string) is made.""")
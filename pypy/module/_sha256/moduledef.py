@@ -0,0 +1,21 @@
+"""
+Mixed-module definition for the _sha256 module.
+Note that there is also a pure Python implementation in lib_pypy/_sha256.py;
+the present mixed-module version takes precedence if it is enabled.
+"""
+
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """\
+This module implements the SHA-224 and SHA-256 secure hash algorithms of
+NIST's FIPS PUB 180-4.  It is normally used through the hashlib module."""
+
+    interpleveldefs = {
+        'sha256': 'interp_sha256.W_SHA256',
+        'sha224': 'interp_sha256.W_SHA224',
+        }
+
+    appleveldefs = {
+        }
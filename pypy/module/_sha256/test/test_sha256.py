@@ -0,0 +1,75 @@
+"""
+Tests for the _sha256 module implemented at interp-level.
+"""
+
+
+class AppTestSHA256(object):
+    spaceconfig = {
+        'usemodules': ['_sha256', 'array', 'binascii', 'time', 'struct'],
+    }
+
+    def setup_class(cls):
+        cls.w_sha = cls.space.appexec([], """():
+            import _sha256
+            return _sha256
+        """)
+
+    def test_sizes(self):
+        d = self.sha.sha256()
+        assert d.digest_size == d.digestsize == 32
+        assert d.block_size == 64
+        d = self.sha.sha224()
+        assert d.digest_size == d.digestsize == 28
+        assert d.block_size == 64
+
+    def test_shaobject(self):
+        cases = (
+          (self.sha.sha256, "",
+           "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"),
+          (self.sha.sha256, "abc",
+           "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"),
+          (self.sha.sha256, "just a test string" * 7,
+           "8113ebf33c97daa9998762aacafe750c7cefc2b2f173c90c59663a57fe626f21"),
+          (self.sha.sha224, "",
+           "d14a028c2a3a2bc9476102bb288234c415a2b01f828ea62ac5b3e42f"),
+          (self.sha.sha224, "abc",
+           "23097d223405d8228642a477bda255b32aadbce4bda0b3f7e36c9da7"),
+        )
+        for cls, input, expected in cases:
+            d = cls(input)
+            assert d.hexdigest() == expected
+            assert d.digest() == expected.decode('hex')
+
+    def test_copy(self):
+        for cls in [self.sha.sha256, self.sha.sha224]:
+            d1 = cls()
+            d1.update("abcde")
+            d2 = d1.copy()
+            assert type(d2) is cls
+            d2.update("fgh")
+            d1.update("jkl")
+            assert d1.digest() == cls("abcdejkl").digest()
+            assert d2.digest() == cls("abcdefgh").digest()
+
+    def test_buffer(self):
+        import array
+        data = "abcdefghij" * 30
+        expected = self.sha.sha256(data).hexdigest()
+        for buf in [buffer(data), bytearray(data), memoryview(data),
+                    array.array('c', data)]:
+            d = self.sha.sha256(buf)
+            assert d.hexdigest() == expected
+            d = self.sha.sha256(data[:7])
+            d.update(buffer(data, 7))
+            assert d.hexdigest() == expected
+        raises(TypeError, self.sha.sha256, 42)
+
+    def test_unicode(self):
+        d = self.sha.sha256(u"abcde")
+        assert d.hexdigest() == self.sha.sha256("abcde").hexdigest()
+        raises(UnicodeEncodeError, d.update, u'\xe9')
+
+    def test_hashlib(self):
+        import hashlib
+        assert hashlib.sha256("abc").hexdigest() == (
+            "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad")
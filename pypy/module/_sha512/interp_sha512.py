@@ -0,0 +1,102 @@
+from rpython.rlib import rsha2
+from rpython.rlib.objectmodel import import_from_mixin
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.typedef import TypeDef
+from pypy.interpreter.gateway import interp2app
+
+
+class W_SHA512(W_Root):
+    """
+    A subclass of RSHA512 that can be exposed to app-level.
+    """
+    import_from_mixin(rsha2.RSHA512)
+
+    def __init__(self, space):
+        self.space = space
+        self._init()
+
+    def update_w(self, w_string):
+        space = self.space
+        if (space.isinstance_w(w_string, space.w_bytes) or
+                space.isinstance_w(w_string, space.w_unicode)):
+            self.update(space.bufferstr_w(w_string))
+        else:
+            # hash the content of bytearrays, arrays, memoryviews...
+            # in place, without copying it into a string
+            self.update(space.readbuf_w(w_string))
+
+    def digest_w(self):
+        return self.space.newbytes(self.digest())
+
+    def hexdigest_w(self):
+        return self.space.newtext(self.hexdigest())
+
+    def copy_w(self):
+        clone = W_SHA512(self.space)
+        clone._copyfrom(self)
+        return clone
+
+
+class W_SHA384(W_SHA512):
+    """
+    SHA-384 is SHA-512 with other initial values and a shorter digest.
+    """
+    digest_size = rsha2.RSHA384.digest_size
+    _initial_state = rsha2.RSHA384._initial_state
+
+    def copy_w(self):
+        clone = W_SHA384(self.space)
+        clone._copyfrom(self)
+        return clone
+
+
+def W_SHA512___new__(space, w_subtype, w_string=None):
+    """
+    Create a new sha512 object and call its initializer.
+    """
+    w_sha = space.allocate_instance(W_SHA512, w_subtype)
+    sha = space.interp_w(W_SHA512, w_sha)
+    W_SHA512.__init__(sha, space)
+    if w_string is not None:
+        sha.update_w(w_string)
+    return w_sha
+
+def W_SHA384___new__(space, w_subtype, w_string=None):
+    """
+    Create a new sha384 object and call its initializer.
+    """
+    w_sha = space.allocate_instance(W_SHA384, w_subtype)
+    sha = space.interp_w(W_SHA384, w_sha)
+    W_SHA384.__init__(sha, space)
+    if w_string is not None:
+        sha.update_w(w_string)
+    return w_sha
+
+
+W_SHA512.typedef = TypeDef(
+    '_sha512.sha512',
+    __new__   = interp2app(W_SHA512___new__),
+    update    = interp2app(W_SHA512.update_w),
+    digest    = interp2app(W_SHA512.digest_w),
+    hexdigest = interp2app(W_SHA512.hexdigest_w),
+    copy      = interp2app(W_SHA512.copy_w),
+    digest_size = 64,
+    digestsize = 64,
+    block_size = 128,
+    __doc__   = """sha512([string]) -> return a new SHA-512 hash object.
+
+If string is present, the method call update(string) is made.""")
+
+W_SHA384.typedef = TypeDef(
+    '_sha512.sha384',
+    __new__   = interp2app(W_SHA384___new__),
+    update    = interp2app(W_SHA512.update_w),
+    digest    = interp2app(W_SHA512.digest_w),
+    hexdigest = interp2app(W_SHA512.hexdigest_w),
+    copy      = interp2app(W_SHA384.copy_w),
+    digest_size = 48,
+    digestsize = 48,
+    block_size = 128,
+    __doc__   = """sha384([string]) -> return a new SHA-384 hash object.
+
+If string is present, the method call update(string) is made.""")
@@ -0,0 +1,58 @@
+"""
+Tests for the _sha512 module implemented at interp-level.
+"""
+
+
+class AppTestSHA512(object):
+    spaceconfig = {
+        'usemodules': ['_sha512', 'array', 'binascii', 'time', 'struct'],
+    }
+
+    def setup_class(cls):
+        cls.w_sha = cls.space.appexec([], """():
+            import _sha512
+            return _sha512
+        """)
+
+    def test_sizes(self):
+        d = self.sha.sha512()
+        assert d.digest_size == d.digestsize == 64
+        assert d.block_size == 128
+        d = self.sha.sha384()
+        assert d.digest_size == d.digestsize == 48
+        assert d.block_size == 128
+
+    def test_shaobject(self):
+        cases = (
+          (self.sha.sha512, "",
+           "cf83e1357eefb8bdf1542850d66d8007d620e4050b5715dc83f4a921d36ce9ce"
+           "47d0d13c5d85f2b0ff8318d2877eec2f63b931bd47417a81a538327af927da3e"),
+          (self.sha.sha512, "abc",
+           "ddaf35a193617abacc417349ae20413112e6fa4e89a97ea20a9eeee64b55d39a"
+           "2192992a274fc1a836ba3c23a3feebbd454d4423643ce80e2a9ac94fa54ca49f"),
+          (self.sha.sha384, "abc",
+           "cb00753f45a35e8bb5a03d699ac65007272c32ab0eded1631a8b605a43ff5bed"
+           "8086072ba1e7cc2358baeca134c825a7"),
+        )
+        for cls, input, expected in cases:
+            d = cls(input)
+            assert d.hexdigest() == expected
+            assert d.digest() == expected.decode('hex')
+
+    def test_copy(self):
+        for cls in [self.sha.sha512, self.sha.sha384]:
+            d1 = cls()
+            d1.update("abcde" * 30)
+            d2 = d1.copy()
+            assert type(d2) is cls
+            d2.update("fgh")
+            d1.update("jkl")
+            assert d1.digest() == cls("abcde" * 30 + "jkl").digest()
+            assert d2.digest() == cls("abcde" * 30 + "fgh").digest()
+
+    def test_buffer(self):
+        data = "abcdefghij" * 30
+        expected = self.sha.sha512(data).hexdigest()
+        for buf in [buffer(data), bytearray(data), memoryview(data)]:
+            d = self.sha.sha512(buf)
+            assert d.hexdigest() == expected
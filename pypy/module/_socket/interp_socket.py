@@ -1,6 +1,7 @@
 import sys
 from rpython.rlib import rsocket, rweaklist
-from rpython.rlib.rarithmetic import intmask
+from rpython.rlib.objectmodel import keepalive_until_here
+from rpython.rlib.rarithmetic import intmask, INT_MAX
 from rpython.rlib.rsocket import (
     RSocket, AF_INET, SOCK_STREAM, SocketError, SocketErrorWithErrno,
     RSocketError
@@ -530,6 +531,161 @@ class W_Socket(W_Root):
         except SocketError as e:
             raise converted_error(space, e)
 
+    def _ancdata_as_object(self, space, ancdata):
+        ancdata_w = []
+        for level, type, data in ancdata:
+            ancdata_w.append(space.newtuple([space.newint(level),
+                                             space.newint(type),
+                                             space.newbytes(data)]))
+        return space.newlist(ancdata_w)
+
+    def _address_as_object(self, space, addr):
+        if addr is None:
+            return space.w_None
+        return addr_as_object(addr, self.sock.fd, space)
+
+    @unwrap_spec(bufsize=int, ancbufsize=int, flags=int)
+    def recvmsg_w(self, space, bufsize, ancbufsize=0, flags=0):
+        """recvmsg(bufsize[, ancbufsize[, flags]]) -> (data, ancdata, msg_flags, address)
+
+        Receive up to bufsize bytes of normal data and up to ancbufsize bytes
+        of ancillary data from the socket.  ancdata is a list of
+        (cmsg_level, cmsg_type, cmsg_data) tuples; msg_flags is the
+        bitwise OR of the flags set on the received message; address is
+        the address of the sending socket, if available, or None.
+        """
+        if bufsize < 0:
+            raise oefmt(space.w_ValueError,
+                        "negative buffer size in recvmsg()")
+        if ancbufsize < 0:
+            raise oefmt(space.w_ValueError,
+                        "negative ancillary buffer size in recvmsg()")
+        try:
+            data, ancdata, msg_flags, addr = self.sock.recvmsg(
+                bufsize, ancbufsize, flags)
+        except SocketError as e:
+            raise converted_error(space, e)
+        return space.newtuple([space.newbytes(data),
+                               self._ancdata_as_object(space, ancdata),
+                               space.newint(msg_flags),
+                               self._address_as_object(space, addr)])
+
+    @unwrap_spec(ancbufsize=int, flags=int)
+    def recvmsg_into_w(self, space, w_buffers, ancbufsize=0, flags=0):
+        """recvmsg_into(buffers[, ancbufsize[, flags]]) -> (nbytes, ancdata, msg_flags, address)
+
+        Like recvmsg(), but scatter the normal data received into the
+        sequence of writable buffers, filling each one before going to the
+        next, like readv().  nbytes is the total number of bytes received.
+        """
+        if ancbufsize < 0:
+            raise oefmt(space.w_ValueError,
+                        "negative ancillary buffer size in recvmsg_into()")
+        buffers = [space.getarg_w('w*', w_buffer)
+                   for w_buffer in space.unpackiterable(w_buffers)]
+        try:
+            nbytes, ancdata, msg_flags, addr = self.sock.recvmsg_into(
+                buffers, ancbufsize, flags)
+        except SocketError as e:
+            raise converted_error(space, e)
+        finally:
+            keepalive_until_here(buffers)
+        return space.newtuple([space.newint(nbytes),
+                               self._ancdata_as_object(space, ancdata),
+                               space.newint(msg_flags),
+                               self._address_as_object(space, addr)])
+
+    @unwrap_spec(flags=int)
+    def sendmsg_w(self, space, w_buffers, w_ancdata=None, flags=0,
+                  w_address=None):
+        """sendmsg(buffers[, ancdata[, flags[, address]]]) -> count
+
+        Send the data gathered from the sequence of buffers, like writev(),
+        together with the optional ancillary data, a sequence of
+        (cmsg_level, cmsg_type, cmsg_data) tuples.  The address is needed
+        for unconnected sockets.  Return the number of bytes sent.
+        """
+        # as_str() returns the data of bytes objects without copying it;
+        # rsocket.sendmsg() makes the raw copies
+        messages = [space.buffer_w(w_buffer, space.BUF_SIMPLE).as_str()
+                    for w_buffer in space.unpackiterable(w_buffers)]
+        ancillary = None
+        if not space.is_none(w_ancdata):
+            ancillary = []
+            for w_item in space.unpackiterable(w_ancdata):
+                w_level, w_type, w_data = space.fixedview(w_item, 3)
+                data = space.buffer_w(w_data, space.BUF_SIMPLE).as_str()
+                ancillary.append((space.int_w(w_level), space.int_w(w_type),
+                                  data))
+        try:
+            addr = None
+            if w_address is not None and not space.is_w(w_address,
+                                                        space.w_None):
+                addr = self.addr_from_object(space, w_address)
+            count = self.sock.sendmsg(messages, ancillary, flags, addr)
+        except SocketError as e:
+            raise converted_error(space, e)
+        if count == -1000:
+            raise explicit_socket_error(space,
+                    "sending multiple control messages is not supported")
+        if count < 0:
+            raise explicit_socket_error(space, "ancillary data item too large")
+        return space.newint(count)
+
+    @unwrap_spec(count=int, bufsize=int, flags=int)
+    def recvmmsg_w(self, space, count, bufsize, flags=0):
+        """recvmmsg(count, bufsize[, flags]) -> [(data, address), ...]
+
+        Receive up to count datagrams of at most bufsize bytes each with a
+        single system call.  Block until at least one datagram is available,
+        then return the ones already queued.  The address is None for
+        connected sockets.  Linux only.
+        """
+        if count <= 0:
+            raise oefmt(space.w_ValueError,
+                        "count must be positive in recvmmsg()")
+        if bufsize < 0:
+            raise oefmt(space.w_ValueError,
+                        "negative buffer size in recvmmsg()")
+        if count > INT_MAX or bufsize > INT_MAX:
+            raise oefmt(space.w_ValueError,
+                        "count or buffer size too large in recvmmsg()")
+        try:
+            messages = self.sock.recvmmsg(count, bufsize, flags)
+        except SocketError as e:
+            raise converted_error(space, e)
+        result_w = []
+        for data, addr in messages:
+            result_w.append(space.newtuple2(
+                space.newbytes(data), self._address_as_object(space, addr)))
+        return space.newlist(result_w)
+
+    @unwrap_spec(flags=int)
+    def sendmmsg_w(self, space, w_messages, flags=0):
+        """sendmmsg(messages[, flags]) -> count
+
+        Send each item of the sequence messages as a separate datagram with
+        a single system call.  The items are either data or (data, address)
+        tuples.  Return the number of datagrams sent, which may be less than
+        len(messages).  Linux only.
+        """
+        messages = []
+        addresses = []
+        try:
+            for w_item in space.unpackiterable(w_messages):
+                if space.isinstance_w(w_item, space.w_tuple):
+                    w_data, w_address = space.fixedview(w_item, 2)
+                    addresses.append(self.addr_from_object(space, w_address))
+                else:
+                    w_data = w_item
+                    addresses.append(None)
+                buf = space.buffer_w(w_data, space.BUF_SIMPLE)
+                messages.append(buf.as_str())
+            count = self.sock.sendmmsg(messages, addresses, flags)
+        except SocketError as e:
+            raise converted_error(space, e)
+        return space.newint(count)
+
     @unwrap_spec(cmd=int)
     def ioctl_w(self, space, cmd, w_option):
         from rpython.rtyper.lltypesystem import rffi, lltype
@@ -727,6 +883,10 @@ for name in ('dup',):
         socketmethodnames.remove(name)
 if hasattr(rsocket._c, 'WSAIoctl'):
     socketmethodnames.append('ioctl')
+if rsocket._c.HAVE_SENDMSG:
+    socketmethodnames += ['recvmsg', 'recvmsg_into', 'sendmsg']
+if rsocket._c.HAVE_SENDMMSG:
+    socketmethodnames += ['recvmmsg', 'sendmmsg']
 
 socketmethods = {}
 for methodname in socketmethodnames:
@@ -762,9 +922,14 @@ listen(n) -- start listening for incoming connections
 makefile([mode, [bufsize]]) -- return a file object for the socket [*]
 recv(buflen[, flags]) -- receive data
 recvfrom(buflen[, flags]) -- receive data and sender's address
+recvmsg(buflen[, ancbuflen[, flags]]) -- receive data and ancillary data [*]
+recvmsg_into(buffers[, ancbuflen[, flags]]) -- scatter data into buffers [*]
+recvmmsg(count, buflen[, flags]) -- receive many datagrams at once [*]
 sendall(data[, flags]) -- send all data
 send(data[, flags]) -- send data, may not send all of it
 sendto(data[, flags], addr) -- send data to a given address
+sendmsg(buffers[, ancdata[, flags[, addr]]]) -- gather and send data [*]
+sendmmsg(messages[, flags]) -- send many datagrams at once [*]
 setblocking(0 | 1) -- set or clear the blocking I/O flag
 setsockopt(level, optname, value) -- set socket options
 settimeout(None | float) -- set or clear the timeout
@@ -681,6 +681,89 @@ class AppTestSocket:
         finally:
             os.chdir(oldcwd)
 
+    def test_sendmsg_recvmsg(self):
+        import _socket
+        if not hasattr(_socket.socket, 'sendmsg'):
+            skip('sendmsg not supported')
+        a, b = _socket.socketpair(_socket.AF_UNIX, _socket.SOCK_DGRAM)
+        assert a.sendmsg([b'abc', buffer(b'de'), b'', memoryview(b'fgh')]) == 8
+        data, ancdata, flags, addr = b.recvmsg(100)
+        assert data == b'abcdefgh'
+        assert ancdata == []
+        assert addr is None
+        assert a.sendmsg([b'0123456789']) == 10
+        buf1 = bytearray(4)
+        buf2 = bytearray(10)
+        nbytes, ancdata, flags, addr = b.recvmsg_into([buf1, buf2])
+        assert nbytes == 10
+        assert buf1 == b'0123'
+        assert buf2[:6] == b'456789'
+        raises(ValueError, b.recvmsg, -1)
+        raises(ValueError, b.recvmsg, 10, -1)
+        raises(TypeError, a.sendmsg, [42])
+        a.close()
+        b.close()
+
+    def test_sendmsg_recvmsg_socket_module(self):
+        # socket.socket passes ancdata=None explicitly
+        import socket
+        if not hasattr(socket.socket, 'sendmsg'):
+            skip('sendmsg not supported')
+        a, b = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        assert a.sendmsg([b'x']) == 1
+        assert a.sendmsg([b'yz'], None, 0, None) == 2
+        data, ancdata, flags, addr = b.recvmsg(100)
+        assert (data, ancdata) == (b'x', [])
+        data, ancdata, flags, addr = b.recvmsg(100)
+        assert (data, ancdata) == (b'yz', [])
+        a.close()
+        b.close()
+
+    def test_sendmsg_rights(self):
+        import _socket, os, struct
+        if not hasattr(_socket.socket, 'sendmsg'):
+            skip('sendmsg not supported')
+        a, b = _socket.socketpair(_socket.AF_UNIX, _socket.SOCK_STREAM)
+        fd = os.open(self.udir + '/sendmsg_rights', os.O_CREAT | os.O_WRONLY)
+        a.sendmsg([b'x'], [(_socket.SOL_SOCKET, _socket.SCM_RIGHTS,
+                            struct.pack('i', fd))])
+        data, ancdata, flags, addr = b.recvmsg(
+            10, _socket.CMSG_SPACE(struct.calcsize('i')))
+        assert data == b'x'
+        [(level, type, fddata)] = ancdata
+        assert (level, type) == (_socket.SOL_SOCKET, _socket.SCM_RIGHTS)
+        newfd, = struct.unpack('i', fddata)
+        assert newfd != fd
+        assert os.fstat(newfd).st_ino == os.fstat(fd).st_ino
+        os.close(newfd)
+        os.close(fd)
+        a.close()
+        b.close()
+
+    def test_sendmmsg_recvmmsg(self):
+        import _socket
+        if not hasattr(_socket.socket, 'sendmmsg'):
+            skip('sendmmsg not supported')
+        s1 = _socket.socket(_socket.AF_INET, _socket.SOCK_DGRAM)
+        s1.bind(('127.0.0.1', 0))
+        addr1 = s1.getsockname()
+        s2 = _socket.socket(_socket.AF_INET, _socket.SOCK_DGRAM)
+        s2.bind(('127.0.0.1', 0))
+        addr2 = s2.getsockname()
+        assert s2.sendmmsg([(b'a', addr1), (buffer(b'bc'), addr1),
+                            (b'x' * 50, addr1)]) == 3
+        result = s1.recvmmsg(10, 20)
+        assert result == [(b'a', addr2), (b'bc', addr2), (b'x' * 20, addr2)]
+        s2.connect(addr1)
+        assert s2.sendmmsg([b'1', b'22']) == 2
+        assert s1.recvmmsg(1, 10) == [(b'1', addr2)]
+        assert s1.recvmmsg(5, 10) == [(b'22', addr2)]
+        assert s2.sendmmsg([]) == 0
+        raises(ValueError, s1.recvmmsg, 0, 10)
+        raises((ValueError, OverflowError), s1.recvmmsg, 2**31, 10)
+        s1.close()
+        s2.close()
+
     def test_automatic_shutdown(self):
         # doesn't really test anything, but at least should not explode
         # in close_all_sockets()
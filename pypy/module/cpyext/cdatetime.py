@@ -150,8 +150,8 @@ def type_attach(space, py_obj, w_obj, w_userdata=None):
         _PyDateTime_Import(space)
     if state.datetimeAPI[0].c_TimeType == py_obj.c_ob_type:
         py_datetime = rffi.cast(PyDateTime_Time, py_obj)
-        w_tzinfo = space.getattr(w_obj, space.newtext('tzinfo'))
-        if space.is_none(w_tzinfo):
+        w_tzinfo = _get_tzinfo(w_obj)
+        if w_tzinfo is None:
             py_datetime.c_hastzinfo = cts.cast('unsigned char', 0)
             py_datetime.c_tzinfo = lltype.nullptr(PyObject.TO)
         else:
@@ -160,8 +160,8 @@ def type_attach(space, py_obj, w_obj, w_userdata=None):
     elif state.datetimeAPI[0].c_DateTimeType == py_obj.c_ob_type:
         # For now this is exactly the same structure as PyDateTime_Time
         py_datetime = rffi.cast(PyDateTime_DateTime, py_obj)
-        w_tzinfo = space.getattr(w_obj, space.newtext('tzinfo'))
-        if space.is_none(w_tzinfo):
+        w_tzinfo = _get_tzinfo(w_obj)
+        if w_tzinfo is None:
             py_datetime.c_hastzinfo = cts.cast('unsigned char', 0)
             py_datetime.c_tzinfo = lltype.nullptr(PyObject.TO)
         else:
@@ -184,15 +184,18 @@ def type_dealloc(space, py_obj):
             decref(space, py_datetime.c_tzinfo)
     _dealloc(space, py_obj)
 
+def _get_tzinfo(w_obj):
+    if isinstance(w_obj, W_DateTime_Date) or isinstance(w_obj, W_DateTime_Time):
+        return w_obj.w_tzinfo
+    return None
+
 def timedeltatype_attach(space, py_obj, w_obj, w_userdata=None):
     "Fills a newly allocated py_obj from the w_obj"
+    assert isinstance(w_obj, W_DateTime_Delta)
     py_delta = rffi.cast(PyDateTime_Delta, py_obj)
-    days = space.int_w(space.getattr(w_obj, space.newtext('days')))
-    py_delta.c_days = cts.cast('int', days)
-    seconds = space.int_w(space.getattr(w_obj, space.newtext('seconds')))
-    py_delta.c_seconds = cts.cast('int', seconds)
-    microseconds = space.int_w(space.getattr(w_obj, space.newtext('microseconds')))
-    py_delta.c_microseconds = cts.cast('int', microseconds)
+    py_delta.c_days = cts.cast('int', w_obj.days)
+    py_delta.c_seconds = cts.cast('int', w_obj.seconds)
+    py_delta.c_microseconds = cts.cast('int', w_obj.microseconds)
 
 # Constructors. They are better used as macros.
 
@@ -300,18 +303,24 @@ def _PyDelta_FromDelta(space, days, seconds, useconds, normalize, w_type):
 def PyDateTime_GET_YEAR(space, w_obj):
     """Return the year, as a positive int.
     """
+    if isinstance(w_obj, W_DateTime_Date):
+        return w_obj.get_year()
     return space.int_w(space.getattr(w_obj, space.newtext("year")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_GET_MONTH(space, w_obj):
     """Return the month, as an int from 1 through 12.
     """
+    if isinstance(w_obj, W_DateTime_Date):
+        return w_obj.get_month()
     return space.int_w(space.getattr(w_obj, space.newtext("month")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_GET_DAY(space, w_obj):
     """Return the day, as an int from 1 through 31.
     """
+    if isinstance(w_obj, W_DateTime_Date):
+        return w_obj.get_day()
     return space.int_w(space.getattr(w_obj, space.newtext("day")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
@@ -322,6 +331,8 @@ def PyDateTime_DATE_GET_HOUR(space, w_obj):
     # call this macro with a datetime.date object.  I think it returns
     # nonsense in CPython, but it doesn't crash.  We'll just return zero
     # in case there is no field 'hour'.
+    if isinstance(w_obj, W_DateTime_Date):
+        return w_obj.get_hour()
     try:
         return space.int_w(space.getattr(w_obj, space.newtext("hour")))
     except OperationError:
@@ -331,6 +342,8 @@ def PyDateTime_DATE_GET_HOUR(space, w_obj):
 def PyDateTime_DATE_GET_MINUTE(space, w_obj):
     """Return the minute, as an int from 0 through 59.
     """
+    if isinstance(w_obj, W_DateTime_Date):
+        return w_obj.get_minute()
     try:
         return space.int_w(space.getattr(w_obj, space.newtext("minute")))
     except OperationError:
@@ -340,6 +353,8 @@ def PyDateTime_DATE_GET_MINUTE(space, w_obj):
 def PyDateTime_DATE_GET_SECOND(space, w_obj):
     """Return the second, as an int from 0 through 59.
     """
+    if isinstance(w_obj, W_DateTime_Date):
+        return w_obj.get_second()
     try:
         return space.int_w(space.getattr(w_obj, space.newtext("second")))
     except OperationError:
@@ -349,6 +364,8 @@ def PyDateTime_DATE_GET_SECOND(space, w_obj):
 def PyDateTime_DATE_GET_MICROSECOND(space, w_obj):
     """Return the microsecond, as an int from 0 through 999999.
     """
+    if isinstance(w_obj, W_DateTime_Date):
+        return w_obj.microsecond
     try:
         return space.int_w(space.getattr(w_obj, space.newtext("microsecond")))
     except OperationError:
@@ -358,24 +375,32 @@ def PyDateTime_DATE_GET_MICROSECOND(space, w_obj):
 def PyDateTime_TIME_GET_HOUR(space, w_obj):
     """Return the hour, as an int from 0 through 23.
     """
+    if isinstance(w_obj, W_DateTime_Time):
+        return w_obj.get_hour()
     return space.int_w(space.getattr(w_obj, space.newtext("hour")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_TIME_GET_MINUTE(space, w_obj):
     """Return the minute, as an int from 0 through 59.
     """
+    if isinstance(w_obj, W_DateTime_Time):
+        return w_obj.get_minute()
     return space.int_w(space.getattr(w_obj, space.newtext("minute")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_TIME_GET_SECOND(space, w_obj):
     """Return the second, as an int from 0 through 59.
     """
+    if isinstance(w_obj, W_DateTime_Time):
+        return w_obj.get_second()
     return space.int_w(space.getattr(w_obj, space.newtext("second")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_TIME_GET_MICROSECOND(space, w_obj):
     """Return the microsecond, as an int from 0 through 999999.
     """
+    if isinstance(w_obj, W_DateTime_Time):
+        return w_obj.microsecond
     return space.int_w(space.getattr(w_obj, space.newtext("microsecond")))
 
 # XXX these functions are not present in the Python API
@@ -384,12 +409,18 @@ def PyDateTime_TIME_GET_MICROSECOND(space, w_obj):
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_DELTA_GET_DAYS(space, w_obj):
+    if isinstance(w_obj, W_DateTime_Delta):
+        return w_obj.days
     return space.int_w(space.getattr(w_obj, space.newtext("days")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_DELTA_GET_SECONDS(space, w_obj):
+    if isinstance(w_obj, W_DateTime_Delta):
+        return w_obj.seconds
     return space.int_w(space.getattr(w_obj, space.newtext("seconds")))
 
 @cpython_api([rffi.VOIDP], rffi.INT_real, error=CANNOT_FAIL)
 def PyDateTime_DELTA_GET_MICROSECONDS(space, w_obj):
+    if isinstance(w_obj, W_DateTime_Delta):
+        return w_obj.microseconds
     return space.int_w(space.getattr(w_obj, space.newtext("microseconds")))
@@ -0,0 +1,91 @@
+from rpython.rlib import rgc
+from rpython.rlib.nonconst import NonConstant
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.executioncontext import AsyncAction
+from pypy.interpreter.gateway import unwrap_spec
+
+# sample the allocations in the nursery every 64KB by default
+DEFAULT_SAMPLE_INTERVAL = 65536
+
+
+class AllocSampleAction(AsyncAction):
+    """
+    Records the frames in which the GC samples allocations.
+
+    The GC calls LowLevelGcHooks.on_gc_alloc_sample(), which cannot do
+    anything that allocates; so it only fires this action, and the frame
+    is looked up just after, between two opcodes.
+    """
+
+    def __init__(self, space):
+        AsyncAction.__init__(self, space)
+        self.enabled = False
+        self.pending = 0
+        self.sites = {}      # {(pycode, lineno): number of samples}
+
+    def fix_annotation(self):
+        # see GcMinorHookAction.fix_annotation()
+        if NonConstant(False):
+            self.pending = NonConstant(-42)
+            self.fire()
+
+    def perform(self, ec, frame):
+        pending = self.pending
+        self.pending = 0
+        if not self.enabled or frame is None:
+            return
+        key = (frame.getcode(), frame.get_last_lineno())
+        self.sites[key] = self.sites.get(key, 0) + pending
+
+
+@unwrap_spec(interval=int)
+def start_alloc_profiling(space, interval=DEFAULT_SAMPLE_INTERVAL):
+    """Start the sampling allocation profiler: every 'interval' bytes
+    allocated in the nursery, the allocated object is sampled, together
+    with the Python frame that allocated it.  The GC also counts, for
+    each type, the objects that survive minor collections.  This resets
+    the previous results.
+    """
+    if interval <= 0:
+        raise oefmt(space.w_ValueError, "the interval must be positive")
+    action = space.fromcache(AllocSampleAction)
+    action.fix_annotation()
+    if not rgc.set_gc_param(rgc.GC_PARAM_ALLOC_SAMPLE_INTERVAL,
+                            float(interval)):
+        raise oefmt(space.w_RuntimeError,
+                    "allocation profiling is not supported by this GC")
+    action.sites.clear()
+    action.pending = 0
+    action.enabled = True
+
+def stop_alloc_profiling(space):
+    """Stop the allocation profiler.  The results are kept."""
+    action = space.fromcache(AllocSampleAction)
+    action.enabled = False
+    rgc.set_gc_param(rgc.GC_PARAM_ALLOC_SAMPLE_INTERVAL, 0.0)
+
+def get_alloc_sites(space):
+    """Return a list of tuples (code, lineno, samples): the number of
+    sampled allocations done at each line of code.
+    """
+    action = space.fromcache(AllocSampleAction)
+    list_w = []
+    for key, count in action.sites.items():
+        pycode, lineno = key
+        list_w.append(space.newtuple([pycode, space.newint(lineno),
+                                      space.newint(count)]))
+    return space.newlist(list_w)
+
+def get_alloc_types(space):
+    """Return a dict {type_index: (samples, survivors)}: the number of
+    sampled allocations and the number of objects that survived a minor
+    collection, for each RPython type.  Use get_typeids_z() to know the
+    name of a type index.
+    """
+    profile = rgc.get_alloc_profile()
+    w_result = space.newdict()
+    for i in range(0, len(profile), 3):
+        space.setitem(w_result, space.newint(profile[i]),
+                      space.newtuple([space.newint(profile[i + 1]),
+                                      space.newint(profile[i + 2])]))
+    return w_result
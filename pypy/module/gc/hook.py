@@ -7,6 +7,7 @@ from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.typedef import TypeDef, interp_attrproperty, GetSetProperty
 from pypy.interpreter.executioncontext import AsyncAction
+from pypy.module.gc.allocprofile import AllocSampleAction
 
 inf = float("inf")
 
@@ -24,6 +25,7 @@ class LowLevelGcHooks(GcHooks):
     def __init__(self, space):
         self.space = space
         self.w_hooks = space.fromcache(W_AppLevelHooks)
+        self.alloc_sample = space.fromcache(AllocSampleAction)
 
     def is_gc_minor_enabled(self):
         return self.w_hooks.gc_minor_enabled
@@ -34,6 +36,9 @@ class LowLevelGcHooks(GcHooks):
     def is_gc_collect_enabled(self):
         return self.w_hooks.gc_collect_enabled
 
+    def is_gc_alloc_sample_enabled(self):
+        return self.alloc_sample.enabled
+
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         action = self.w_hooks.gc_minor
         action.count += 1
@@ -69,6 +74,11 @@ class LowLevelGcHooks(GcHooks):
         action.pinned_objects = pinned_objects
         action.fire()
 
+    def on_gc_alloc_sample(self, size):
+        action = self.alloc_sample
+        action.pending += 1
+        action.fire()
+
 
 class W_AppLevelHooks(W_Root):
 
@@ -1,6 +1,9 @@
 from pypy.interpreter.gateway import unwrap_spec
 from pypy.interpreter.error import oefmt
+import sys
 from rpython.rlib import rgc
+from rpython.rlib.rbigint import rbigint
+from rpython.rlib.unroll import unrolling_iterable
 from pypy.module.gc.hook import W_GcCollectStepStats
 
 
@@ -137,6 +140,99 @@ def collect_step(space):
 
 # ____________________________________________________________
 
+# (name, parameter number, True if the value is a size in bytes or a count)
+GC_PARAMS = unrolling_iterable([
+    ('nursery', rgc.GC_PARAM_NURSERY_SIZE, True),
+    ('major_collect', rgc.GC_PARAM_MAJOR_COLLECT, False),
+    ('growth', rgc.GC_PARAM_GROWTH, False),
+    ('min', rgc.GC_PARAM_MIN_HEAP_SIZE, True),
+    ('max', rgc.GC_PARAM_MAX_HEAP_SIZE, True),
+    ('soft_max', rgc.GC_PARAM_SOFT_MAX_HEAP_SIZE, True),
+    ('max_delta', rgc.GC_PARAM_MAX_DELTA, True),
+    ('increment_step', rgc.GC_PARAM_INCREMENT_STEP, True),
+    ])
+
+def _wrap_param(space, value, is_size):
+    if not is_size:
+        return space.newfloat(value)
+    if value < float(sys.maxint):
+        return space.newint(int(value))
+    return space.newlong_from_rbigint(rbigint.fromfloat(value))
+
+def get_params(space):
+    """Return a dict with the current tuning parameters of the GC.  They
+    have the same meaning as the PYPY_GC_* environment variables; 'max'
+    and 'soft_max' are 0 if there is no limit.  Parameters that the GC
+    in use does not support are not in the dict.
+    """
+    w_result = space.newdict()
+    for name, param_no, is_size in GC_PARAMS:
+        value = rgc.get_gc_param(param_no)
+        if value >= 0.0:
+            space.setitem_str(w_result, name,
+                              _wrap_param(space, value, is_size))
+    return w_result
+
+def set_params(space, __args__):
+    """set_params(**params)
+
+    Change the tuning parameters of the GC while the program runs, using
+    the names returned by get_params():
+
+      nursery         the size of the nursery; it is replaced after a
+                      minor collection
+      major_collect   the major collection factor
+      growth          the maximal growth of the threshold between two
+                      major collections
+      min, max        the minimal and (hard) maximal heap size
+      soft_max        a soft limit on the heap size: major collections
+                      are done more often to stay below it, but it never
+                      raises MemoryError
+      max_delta       the maximal increase of the threshold in bytes
+      increment_step  the amount of work done by an incremental step
+
+    Raises ValueError if the GC rejects a value.
+    """
+    args_w, kwds_w = __args__.unpack()
+    if args_w:
+        raise oefmt(space.w_TypeError,
+                    "set_params() takes only keyword arguments")
+    # check all the values before changing anything
+    param_nos = []
+    names = []
+    values = []
+    for key, w_value in kwds_w.items():
+        found = False
+        for name, param_no, is_size in GC_PARAMS:
+            if key == name:
+                value = space.float_w(w_value)
+                if not rgc.check_gc_param(param_no, value):
+                    _raise_invalid_param(space, name)
+                # the nursery goes first, because resizing it can still
+                # fail if objects are pinned
+                if param_no == rgc.GC_PARAM_NURSERY_SIZE:
+                    param_nos.insert(0, param_no)
+                    names.insert(0, name)
+                    values.insert(0, value)
+                else:
+                    param_nos.append(param_no)
+                    names.append(name)
+                    values.append(value)
+                found = True
+        if not found:
+            raise oefmt(space.w_TypeError,
+                        "set_params() got an unexpected keyword argument "
+                        "'%s'", key)
+    for i in range(len(param_nos)):
+        if not rgc.set_gc_param(param_nos[i], values[i]):
+            _raise_invalid_param(space, names[i])
+
+def _raise_invalid_param(space, name):
+    raise oefmt(space.w_ValueError,
+                "invalid value for the GC parameter '%s'", name)
+
+# ____________________________________________________________
+
 @unwrap_spec(filename='fsencode')
 def dump_heap_stats(space, filename):
     tb = rgc._heap_stats()
@@ -23,6 +23,8 @@ class Module(MixedModule):
                 })
             self.interpleveldefs.update({
                 'collect_step': 'interp_gc.collect_step',
+                'get_params': 'interp_gc.get_params',
+                'set_params': 'interp_gc.set_params',
                 'get_rpy_roots': 'referents.get_rpy_roots',
                 'get_rpy_referents': 'referents.get_rpy_referents',
                 'get_rpy_memory_usage': 'referents.get_rpy_memory_usage',
@@ -36,6 +38,11 @@ class Module(MixedModule):
                 'get_typeids_list': 'referents.get_typeids_list',
                 'GcRef': 'referents.W_GcRef',
                 'hooks': 'space.fromcache(hook.W_AppLevelHooks)',
+                'start_alloc_profiling':
+                    'allocprofile.start_alloc_profiling',
+                'stop_alloc_profiling': 'allocprofile.stop_alloc_profiling',
+                'get_alloc_sites': 'allocprofile.get_alloc_sites',
+                'get_alloc_types': 'allocprofile.get_alloc_types',
                 'GcCollectStepStats': 'hook.W_GcCollectStepStats',
                 })
         MixedModule.__init__(self, space, w_name)
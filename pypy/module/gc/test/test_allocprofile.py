@@ -0,0 +1,54 @@
+import pytest
+from rpython.rlib import rgc
+from pypy.module.gc.hook import LowLevelGcHooks
+from pypy.interpreter.baseobjspace import ObjSpace
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+
+class AppTestAllocProfile(object):
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            pytest.skip("these tests cannot work with -A")
+        space = cls.space
+        gchooks = space.fromcache(LowLevelGcHooks)
+
+        @unwrap_spec(ObjSpace, int)
+        def fire_gc_alloc_sample(space, size):
+            gchooks.fire_gc_alloc_sample(size)
+
+        cls.w_fire_gc_alloc_sample = space.wrap(
+            interp2app(fire_gc_alloc_sample))
+
+    def teardown_method(self, meth):
+        rgc._gc_params.clear()
+
+    def test_sites(self):
+        import gc
+        def f():
+            self.fire_gc_alloc_sample(32)
+            self.fire_gc_alloc_sample(32)
+            return 42
+        gc.start_alloc_profiling(1024)
+        try:
+            f()
+            self.fire_gc_alloc_sample(16)
+        finally:
+            gc.stop_alloc_profiling()
+        f()     # not recorded
+        sites = sorted([(code.co_name, lineno - code.co_firstlineno, count)
+                        for code, lineno, count in gc.get_alloc_sites()])
+        assert sites == [('f', 1, 1), ('f', 2, 1), ('test_sites', 9, 1)]
+        #
+        gc.start_alloc_profiling()
+        gc.stop_alloc_profiling()
+        assert gc.get_alloc_sites() == []
+
+    def test_errors(self):
+        import gc
+        raises(ValueError, gc.start_alloc_profiling, 0)
+        raises(TypeError, gc.start_alloc_profiling, "big")
+
+    def test_types(self):
+        import gc
+        # untranslated, there is no real GC behind
+        assert gc.get_alloc_types() == {}
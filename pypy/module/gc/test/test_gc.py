@@ -119,6 +119,36 @@ class AppTestGC(object):
         assert n >= 2 # at least one step + 1 finalizing
         assert X.deleted == 3
 
+class AppTestGcParams(object):
+
+    def setup_method(self, meth):
+        rgc._gc_params.clear()
+
+    def teardown_method(self, meth):
+        rgc._gc_params.clear()
+
+    def test_set_get_params(self):
+        import gc
+        assert gc.get_params() == {}
+        gc.set_params(nursery=4*1024*1024, major_collect=1.5, soft_max=0)
+        params = gc.get_params()
+        assert params == {'nursery': 4*1024*1024, 'major_collect': 1.5,
+                          'soft_max': 0}
+        assert type(params['nursery']) is int
+        assert type(params['major_collect']) is float
+
+    def test_set_params_errors(self):
+        import gc
+        raises(TypeError, gc.set_params, 1.5)
+        raises(TypeError, gc.set_params, foo=42)
+        raises(TypeError, gc.set_params, nursery="big")
+        assert gc.get_params() == {}
+        # nothing is changed if any of the values is wrong
+        raises(TypeError, gc.set_params, major_collect=1.5, growth=1.2,
+               nursery="big", max_delta=10)
+        raises(TypeError, gc.set_params, major_collect=1.5, foo=42)
+        assert gc.get_params() == {}
+
 class AppTestGcDumpHeap(object):
     pytestmark = py.test.mark.xfail(run=False)
 
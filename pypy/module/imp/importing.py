@@ -2,7 +2,7 @@
 Implementation of the interpreter-level default import logic.
 """
 
-import sys, os, stat
+import sys, os, stat, time
 
 from pypy.interpreter.module import Module
 from pypy.interpreter.gateway import interp2app, unwrap_spec
@@ -12,7 +12,7 @@ from pypy.interpreter.baseobjspace import W_Root, CannotHaveLock
 from pypy.interpreter.eval import Code
 from pypy.interpreter.pycode import PyCode
 from pypy.interpreter.streamutil import wrap_streamerror
-from rpython.rlib import streamio, jit
+from rpython.rlib import streamio, jit, rpath
 from rpython.rlib.streamio import StreamErrors
 from rpython.rlib.objectmodel import we_are_translated, specialize
 from pypy.module.sys.version import PYPY_VERSION
@@ -72,29 +72,100 @@ def has_so_extension(space):
     return (space.config.objspace.usemodules.cpyext or
             space.config.objspace.usemodules._cffi_backend)
 
+
+class _DirListing(object):
+    def __init__(self, mtime, names):
+        self.mtime = mtime
+        self.names = {}
+        for name in names:
+            self.names[name] = None
+
+_NO_NAMES = {}
+
+# A file created in the same tick of the filesystem's timestamps as the
+# listing was read does not change the modification time of the
+# directory.  2 seconds is the granularity of FAT.
+MTIME_GRANULARITY = 2.0
+
+class DirectoryListings(object):
+    """Cache of the listings of the directories where modules are
+    searched, like the FileFinder of importlib.  Instead of one failing
+    stat() per candidate suffix, a lookup does one stat() of the
+    directory and checks the candidate names in its listing; only the
+    names that are there are checked with stat().  A listing is read
+    again when the modification time of the directory changes.  The
+    directories modified too recently are not cached: every name is
+    checked with stat() until their modification time is old enough.
+    """
+
+    def __init__(self, space):
+        self.listings = {}     # {dirname: _DirListing}
+
+    def get(self, dirname):
+        """Return a dict whose keys are the names in the directory
+        'dirname', or None if they are not known: then every name must be
+        checked with stat().  Relative paths are not cached, because their
+        meaning changes with os.chdir().
+        """
+        if not dirname or not rpath.risabs(dirname):
+            return None
+        try:
+            st = os.stat(dirname)
+        except OSError:
+            return _NO_NAMES
+        if not stat.S_ISDIR(st.st_mode):
+            return _NO_NAMES
+        listing = self.listings.get(dirname, None)
+        if listing is None or listing.mtime != st.st_mtime:
+            if listing is not None:
+                del self.listings[dirname]
+            # this is also true if the mtime is in the future
+            if time.time() - st.st_mtime < MTIME_GRANULARITY:
+                return None
+            try:
+                names = os.listdir(dirname)
+            except OSError:
+                return None
+            listing = _DirListing(st.st_mtime, names)
+            self.listings[dirname] = listing
+        return listing.names
+
+    def clear(self):
+        """Forget all the listings, e.g. after files were created while
+        keeping the modification time of their directory."""
+        self.listings.clear()
+
+def _may_exist(names, name):
+    # 'names' is the result of DirectoryListings.get()
+    return names is None or name in names
+
 def has_init_module(space, filepart):
     "Return True if the directory filepart qualifies as a package."
+    names = space.fromcache(DirectoryListings).get(filepart)
     init = os.path.join(filepart, "__init__")
-    if path_exists(init + ".py"):
+    if _may_exist(names, "__init__.py") and path_exists(init + ".py"):
         return True
-    if space.config.objspace.lonepycfiles and path_exists(init + ".pyc"):
+    if (space.config.objspace.lonepycfiles and
+            _may_exist(names, "__init__.pyc") and path_exists(init + ".pyc")):
         return True
     return False
 
-def find_modtype(space, filepart):
+def find_modtype(space, filepart, names=None, partname=""):
     """Check which kind of module to import for the given filepart,
     which is a path without extension.  Returns PY_SOURCE, PY_COMPILED or
-    SEARCH_ERROR.
+    SEARCH_ERROR.  If 'names' is the listing of the directory, as
+    returned by DirectoryListings.get(), and 'partname' the last part of
+    filepart, the files that are not in the listing are not checked.
     """
     # check the .py file
     pyfile = filepart + ".py"
-    if file_exists(pyfile):
+    if _may_exist(names, partname + ".py") and file_exists(pyfile):
         return PY_SOURCE, ".py", "U"
 
     # on Windows, also check for a .pyw file
     if _WIN32:
         pyfile = filepart + ".pyw"
-        if file_exists(pyfile):
+        if _may_exist(names, partname + ".pyw") and file_exists(pyfile):
             return PY_SOURCE, ".pyw", "U"
 
     # The .py file does not exist.  By default on PyPy, lonepycfiles
@@ -105,14 +176,15 @@ def find_modtype(space, filepart):
     # check the .pyc file
     if space.config.objspace.lonepycfiles:
         pycfile = filepart + ".pyc"
-        if file_exists(pycfile):
+        if _may_exist(names, partname + ".pyc") and file_exists(pycfile):
             # existing .pyc file
             return PY_COMPILED, ".pyc", "rb"
 
     if has_so_extension(space):
         so_extension = get_so_extension(space)
         pydfile = filepart + so_extension
-        if file_exists(pydfile):
+        if (_may_exist(names, partname + so_extension) and
+                file_exists(pydfile)):
             return C_EXTENSION, so_extension, "rb"
 
     return SEARCH_ERROR, None, None
@@ -578,14 +650,17 @@ def find_module(space, modulename, w_modulename, partname, w_path,
             path = space.fsencode_w(w_pathitem)
             filepart = os.path.join(path, partname)
             log_pyverbose(space, 2, "# trying %s\n" % (filepart,))
-            if os.path.isdir(filepart) and case_ok(filepart):
+            names = space.fromcache(DirectoryListings).get(path)
+            if (_may_exist(names, partname) and
+                    os.path.isdir(filepart) and case_ok(filepart)):
                 if has_init_module(space, filepart):
                     return FindInfo(PKG_DIRECTORY, filepart, None)
                 else:
                     msg = ("Not importing directory '%s' missing __init__.py" %
                            (filepart,))
                     space.warn(space.newtext(msg), space.w_ImportWarning)
-            modtype, suffix, filemode = find_modtype(space, filepart)
+            modtype, suffix, filemode = find_modtype(space, filepart, names,
+                                                     partname)
             try:
                 if modtype in (PY_SOURCE, PY_COMPILED, C_EXTENSION):
                     assert suffix is not None
@@ -964,14 +1039,7 @@ def update_code_filenames(space, code_w, pathname, oldname=None):
     assert isinstance(code_w, PyCode)
     if oldname is None:
         oldname = code_w.co_filename
-    elif code_w.co_filename != oldname:
-        return
-
-    code_w.co_filename = pathname
-    constants = code_w.co_consts_w
-    for const in constants:
-        if const is not None and isinstance(const, PyCode):
-            update_code_filenames(space, const, pathname, oldname)
+    code_w.update_filenames(oldname, pathname)
 
 def _get_long(s):
     a = ord(s[0])
@@ -1059,8 +1127,12 @@ def check_compiled_module(space, pycfilename, expected_mtime):
 def read_compiled_module(space, cpathname, strbuf):
     """ Read a code object from a file and check it for validity """
 
-    w_marshal = space.getbuiltinmodule('marshal')
-    w_code = space.call_method(w_marshal, 'loads', space.newbytes(strbuf))
+    if space.config.objspace.lazycodeobjects:
+        from pypy.module.marshal.interp_marshal import loads_lazy_code
+        w_code = loads_lazy_code(space, strbuf)
+    else:
+        w_marshal = space.getbuiltinmodule('marshal')
+        w_code = space.call_method(w_marshal, 'loads', space.newbytes(strbuf))
     if not isinstance(w_code, Code):
         raise oefmt(space.w_ImportError, "Non-code object in %s", cpathname)
     return w_code
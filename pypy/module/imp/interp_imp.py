@@ -48,6 +48,12 @@ def get_file(space, w_file, filename, filemode):
     else:
         return space.interp_w(W_File, w_file).stream
 
+def invalidate_caches(space):
+    """Forget the cached listings of the directories where modules are
+    searched.  Needed only if files are added to a directory without
+    changing its modification time."""
+    space.fromcache(importing.DirectoryListings).clear()
+
 def find_module(space, w_name, w_path=None):
     name = space.text0_w(w_name)
     if space.is_none(w_path):
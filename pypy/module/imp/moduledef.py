@@ -24,6 +24,7 @@ class Module(MixedModule):
         'load_dynamic':    'interp_imp.load_dynamic',
         '_run_compiled_module': 'interp_imp._run_compiled_module',   # pypy
         '_getimporter':    'importing._getimporter',                 # pypy
+        'invalidate_caches': 'interp_imp.invalidate_caches',         # pypy
         #'run_module':      'interp_imp.run_module',
         'new_module':      'interp_imp.new_module',
         'init_builtin':    'interp_imp.init_builtin',
@@ -744,6 +744,40 @@ class AppTestImport:
         assert module.__name__ == 'a'
         assert module.__file__ == 'invalid_path_name'
 
+    def test_import_new_module(self):
+        import sys, os
+        raises(ImportError, "import newly_created")
+        pathname = os.path.join(sys.path[0], 'newly_created.py')
+        with open(pathname, 'w') as f:
+            f.write('x = 42\n')
+        try:
+            import newly_created
+            assert newly_created.x == 42
+        finally:
+            os.unlink(pathname)
+            sys.modules.pop('newly_created', None)
+
+    def test_invalidate_caches(self):
+        import sys, os, imp
+        dirname = sys.path[0]
+        pathname = os.path.join(dirname, 'created_same_mtime.py')
+        st = os.stat(dirname)
+        os.utime(dirname, (1000, 1000))
+        try:
+            raises(ImportError, "import created_same_mtime")
+            with open(pathname, 'w') as f:
+                f.write('x = 43\n')
+            os.utime(dirname, (1000, 1000))
+            raises(ImportError, "import created_same_mtime")
+            imp.invalidate_caches()
+            import created_same_mtime
+            assert created_same_mtime.x == 43
+        finally:
+            if os.path.exists(pathname):
+                os.unlink(pathname)
+            sys.modules.pop('created_same_mtime', None)
+            os.utime(dirname, (st.st_atime, st.st_mtime))
+
     def test_crash_load_module(self):
         import imp
         raises(ValueError, imp.load_module, "", "", "", [1, 2, 3, 4])
@@ -864,6 +898,56 @@ class TestAbi:
             assert importing.get_so_extension(space1) == '.TESTi.so'
             assert importing.get_so_extension(space2) == '.so'
 
+class TestDirectoryListings:
+    def test_listing(self):
+        listings = importing.DirectoryListings(self.space)
+        p = udir.join('listings')
+        p.ensure(dir=1)
+        p.join('x.py').write('x = 1')
+        dirname = str(p)
+        os.utime(dirname, (1000, 1000))
+        names = listings.get(dirname)
+        assert 'x.py' in names
+        assert 'y.py' not in names
+        assert listings.get(dirname) is names
+        p.join('y.py').write('y = 2')
+        os.utime(dirname, (0, 0))
+        names = listings.get(dirname)
+        assert 'y.py' in names
+        # a file created without changing the mtime is only found after
+        # clear()
+        p.join('z.py').write('z = 3')
+        os.utime(dirname, (0, 0))
+        assert 'z.py' not in listings.get(dirname)
+        listings.clear()
+        assert 'z.py' in listings.get(dirname)
+
+    def test_recent_directory(self):
+        # a file can still be created in the same tick as the directory
+        # was modified: don't trust its listing yet
+        listings = importing.DirectoryListings(self.space)
+        p = udir.join('listings_recent')
+        p.ensure(dir=1)
+        dirname = str(p)
+        assert listings.get(dirname) is None
+        p.join('x.py').write('x = 1')
+        assert listings.get(dirname) is None
+        os.utime(dirname, (0, 0))
+        assert 'x.py' in listings.get(dirname)
+        p.join('y.py').write('y = 2')
+        assert listings.get(dirname) is None
+        assert dirname not in listings.listings
+
+    def test_no_listing(self):
+        listings = importing.DirectoryListings(self.space)
+        assert listings.get('') is None
+        assert listings.get('relative') is None
+        names = listings.get(str(udir.join('does_not_exist')))
+        assert names == {}
+        p = udir.join('listings_file')
+        p.write('')
+        assert listings.get(str(p)) == {}
+
 def _getlong(data):
     x = marshal.dumps(data)
     return x[-4:]
@@ -947,6 +1031,58 @@ class TestPycStuff:
         ret = space.int_w(w_ret)
         assert ret == 42
 
+    def test_read_compiled_module_lazily(self):
+        space = self.space
+        co = compile('def f(a, b=5):\n'
+                     '    "doc of f"\n'
+                     '    def g(c):\n'
+                     '        return a + b + c + 1.5\n'
+                     '    return g\n'
+                     'def h(*args):\n'
+                     '    return (args, "h", u"\\xe9", 10**30, {1: 2})\n'
+                     'x = f(1)(2)\n', '?', 'exec')
+        cpathname = _testfile(importing.get_pyc_magic(space), 12345, co)
+        stream = streamio.open_file_as_stream(cpathname, "rb")
+        try:
+            stream.seek(8, 0)
+            pycode = importing.read_compiled_module(
+                    space, cpathname, stream.readall())
+        finally:
+            stream.close()
+        assert pycode._lazy_body is None
+        codes = [w_const for w_const in pycode.co_consts_w
+                 if isinstance(w_const, pypy.interpreter.pycode.PyCode)]
+        code_f, code_h = codes
+        assert code_f._lazy_body is not None
+        assert code_f.co_name == 'f'
+        assert code_f.co_varnames == ['a', 'b', 'g']
+        assert code_h.co_flags & 0x04     # CO_VARARGS
+        code_h.remove_docstrings(space)
+        code_f.remove_docstrings(space)
+        assert code_f._lazy_body.remove_docstrings
+        importing.update_code_filenames(space, pycode, 'newname.py')
+        assert code_h.co_filename == 'newname.py'
+        code_f.ensure_loaded()
+        code_g, = [w_const for w_const in code_f.co_consts_w
+                   if isinstance(w_const, pypy.interpreter.pycode.PyCode)]
+        # the strings interned by h come after g in the .pyc file
+        lazy_body = code_g._lazy_body
+        assert lazy_body.stringtable_len < len(lazy_body.interned_strs)
+        w_dic = space.newdict()
+        pycode.exec_code(space, w_dic, w_dic)
+        assert space.float_w(space.getitem(w_dic, space.wrap('x'))) == 9.5
+        assert code_f._lazy_body is None
+        code_g, = [w_const for w_const in code_f.co_consts_w
+                   if isinstance(w_const, pypy.interpreter.pycode.PyCode)]
+        assert code_g._lazy_body is None
+        assert code_g.co_filename == 'newname.py'
+        # h was never called
+        assert code_h._lazy_body is not None
+        w_res = space.call_function(space.getitem(w_dic, space.wrap('h')))
+        assert space.eq_w(w_res, space.wrap(((), "h", u"\xe9", 10**30,
+                                             {1: 2})))
+        assert code_h._lazy_body is None
+
     def test_load_compiled_module(self):
         space = self.space
         mtime = 12345
@@ -53,6 +53,15 @@ ignored."""
     obj = u.load_w_obj()
     return obj
 
+def loads_lazy_code(space, s):
+    """Like loads(), for the content of a .pyc file: the code objects
+    nested in the loaded code object are only unmarshalled when they are
+    first run.  See marshal_impl.LazyCodeBody."""
+    u = StringUnmarshaller(space, space.newbytes(s))
+    u.lazy_codes = True
+    u.interned_strs = []
+    return u.load_w_obj()
+
 
 class AbstractReaderWriter(object):
     def __init__(self, space):
@@ -338,6 +347,9 @@ class Unmarshaller(_Base):
         self.space = space
         self.reader = reader
         self.stringtable_w = []
+        self.lazy_codes = False
+        self.interned_strs = None
+        self.code_depth = 0
 
     def get(self, n):
         assert n >= 0
@@ -347,6 +359,9 @@ class Unmarshaller(_Base):
         # the [0] is used to convince the annotator to return a char
         return self.get(1)[0]
 
+    def skip(self, n):
+        self.get(n)
+
     def atom_str(self, typecode):
         self.start(typecode)
         lng = self.get_lng()
@@ -468,6 +483,19 @@ class StringUnmarshaller(Unmarshaller):
         self.bufpos = pos + 1
         return self.bufstr[pos]
 
+    def peek1(self):
+        pos = self.bufpos
+        if pos >= self.limit:
+            self.raise_eof()
+        return self.bufstr[pos]
+
+    def skip(self, n):
+        assert n >= 0
+        newpos = self.bufpos + n
+        if newpos > self.limit:
+            self.raise_eof()
+        self.bufpos = newpos
+
     def get_int(self):
         pos = self.bufpos
         newpos = pos + 4
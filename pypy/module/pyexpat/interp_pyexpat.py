@@ -4,6 +4,7 @@ from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
 from pypy.interpreter.error import OperationError, oefmt
 from rpython.rlib import rgc, jit, rutf8
 from rpython.rlib.objectmodel import specialize
+from rpython.rlib.unroll import unrolling_iterable
 from rpython.rtyper.lltypesystem import rffi, lltype
 from rpython.rtyper.tool import rffi_platform
 from rpython.translator.tool.cbuild import ExternalCompilationInfo
@@ -317,6 +318,144 @@ for index, (name, params) in enumerate(HANDLERS.items()):
                           [XML_Parser, callback_type], lltype.Void)
     SETTERS[name] = (index, func, callback)
 
+# Interp-level receivers of the parser events.  A parser connected to a
+# TreeTarget with W_XMLParserType.set_tree_target() doesn't call any
+# app-level handler: the callbacks below pass the raw utf-8 strings straight
+# to the target, which builds whatever objects it wants out of them.  This is
+# how the _elementtree module builds its trees.
+
+class TreeTarget(object):
+    """Base class for the interp-level targets.  'attrs' is a flat list
+    [name0, value0, name1, value1, ...]; the prefix and uri of the namespace
+    events can be None."""
+
+    def start(self, space, name, attrs):
+        pass
+
+    def end(self, space, name):
+        pass
+
+    def data(self, space, data):
+        pass
+
+    def comment(self, space, data):
+        pass
+
+    def pi(self, space, target, data):
+        pass
+
+    def start_ns(self, space, prefix, uri):
+        pass
+
+    def end_ns(self, space, prefix):
+        pass
+
+    def default(self, space, data):
+        pass
+
+def _charp2str_or_none(data):
+    if not data:
+        return None
+    return rffi.constcharp2str(data)
+
+def _tree_target_error(parser, e):
+    if not parser._exc_info: # don't override an existing exception
+        parser._exc_info = e
+    XML_StopParser(parser.itself, XML_FALSE)
+
+@jit.jit_callback('XML:TreeTarget.start')
+def tree_start_callback(ll_userdata, name, attrs):
+    userdata = global_storage.get_object(rffi.cast(lltype.Signed, ll_userdata))
+    parser = userdata.parser()
+    try:
+        attrs_list = []
+        i = 0
+        while attrs[i]:
+            attrs_list.append(rffi.constcharp2str(attrs[i]))
+            i += 1
+        parser.tree_target.start(userdata.space, rffi.constcharp2str(name),
+                                 attrs_list)
+    except OperationError as e:
+        _tree_target_error(parser, e)
+
+@jit.jit_callback('XML:TreeTarget.end')
+def tree_end_callback(ll_userdata, name):
+    userdata = global_storage.get_object(rffi.cast(lltype.Signed, ll_userdata))
+    parser = userdata.parser()
+    try:
+        parser.tree_target.end(userdata.space, rffi.constcharp2str(name))
+    except OperationError as e:
+        _tree_target_error(parser, e)
+
+@jit.jit_callback('XML:TreeTarget.data')
+def tree_data_callback(ll_userdata, data, length):
+    userdata = global_storage.get_object(rffi.cast(lltype.Signed, ll_userdata))
+    parser = userdata.parser()
+    try:
+        parser.tree_target.data(userdata.space, rffi.constcharpsize2str(
+            data, rffi.cast(lltype.Signed, length)))
+    except OperationError as e:
+        _tree_target_error(parser, e)
+
+@jit.jit_callback('XML:TreeTarget.comment')
+def tree_comment_callback(ll_userdata, data):
+    userdata = global_storage.get_object(rffi.cast(lltype.Signed, ll_userdata))
+    parser = userdata.parser()
+    try:
+        parser.tree_target.comment(userdata.space, rffi.constcharp2str(data))
+    except OperationError as e:
+        _tree_target_error(parser, e)
+
+@jit.jit_callback('XML:TreeTarget.pi')
+def tree_pi_callback(ll_userdata, target, data):
+    userdata = global_storage.get_object(rffi.cast(lltype.Signed, ll_userdata))
+    parser = userdata.parser()
+    try:
+        parser.tree_target.pi(userdata.space, rffi.constcharp2str(target),
+                              rffi.constcharp2str(data))
+    except OperationError as e:
+        _tree_target_error(parser, e)
+
+@jit.jit_callback('XML:TreeTarget.start_ns')
+def tree_start_ns_callback(ll_userdata, prefix, uri):
+    userdata = global_storage.get_object(rffi.cast(lltype.Signed, ll_userdata))
+    parser = userdata.parser()
+    try:
+        parser.tree_target.start_ns(userdata.space, _charp2str_or_none(prefix),
+                                    _charp2str_or_none(uri))
+    except OperationError as e:
+        _tree_target_error(parser, e)
+
+@jit.jit_callback('XML:TreeTarget.end_ns')
+def tree_end_ns_callback(ll_userdata, prefix):
+    userdata = global_storage.get_object(rffi.cast(lltype.Signed, ll_userdata))
+    parser = userdata.parser()
+    try:
+        parser.tree_target.end_ns(userdata.space, _charp2str_or_none(prefix))
+    except OperationError as e:
+        _tree_target_error(parser, e)
+
+@jit.jit_callback('XML:TreeTarget.default')
+def tree_default_callback(ll_userdata, data, length):
+    userdata = global_storage.get_object(rffi.cast(lltype.Signed, ll_userdata))
+    parser = userdata.parser()
+    try:
+        parser.tree_target.default(userdata.space, rffi.constcharpsize2str(
+            data, rffi.cast(lltype.Signed, length)))
+    except OperationError as e:
+        _tree_target_error(parser, e)
+
+TREE_CALLBACKS = unrolling_iterable([
+    ('StartElementHandler', tree_start_callback),
+    ('EndElementHandler', tree_end_callback),
+    ('CharacterDataHandler', tree_data_callback),
+    ('CommentHandler', tree_comment_callback),
+    ('ProcessingInstructionHandler', tree_pi_callback),
+    ('StartNamespaceDeclHandler', tree_start_ns_callback),
+    ('EndNamespaceDeclHandler', tree_end_ns_callback),
+    ('DefaultHandlerExpand', tree_default_callback),
+    ])
+
 # special case for UnknownEncodingHandlerData:
 # XML_SetUnknownEncodingHandler() needs an additional argument,
 # and it's not modifiable via user code anyway
@@ -434,6 +573,7 @@ class W_XMLParserType(W_Root):
         self.w_character_data_handler = None
 
         self._exc_info = None
+        self.tree_target = None
 
         # Set user data for callback function
         self.id = global_storage.get_nonmoving_id(
@@ -592,6 +732,15 @@ getting the advantage of providing document type information to the parser.
         self.handlers[index] = w_handler
         setter(self.itself, handler)
 
+    def set_tree_target(self, target):
+        """Send all the events that a TreeTarget handles to 'target'
+        instead of to the app-level handlers."""
+        self.tree_target = target
+        for name, callback in TREE_CALLBACKS:
+            index, setter, handler = SETTERS[name]
+            self.handlers[index] = None
+            setter(self.itself, callback)
+
     all_chars = ''.join(chr(i) for i in range(256))
 
     def UnknownEncodingHandler(self, space, name, info):
@@ -5,6 +5,7 @@ from rpython.rlib.jit import JitHookInterface, Counters
 from pypy.interpreter.error import OperationError
 from pypy.module.pypyjit.interp_resop import (Cache, wrap_greenkey,
     WrappedOp, W_JitLoopInfo, wrap_oplist)
+from pypy.module.pypyjit.interp_warmup import WarmupProfile
 
 class PyPyJitIface(JitHookInterface):
     def are_hooks_enabled(self):
@@ -12,7 +13,8 @@ class PyPyJitIface(JitHookInterface):
         cache = space.fromcache(Cache)
         return (cache.w_compile_hook is not None or
                 cache.w_abort_hook is not None or
-                cache.w_trace_too_long_hook is not None)
+                cache.w_trace_too_long_hook is not None or
+                space.fromcache(WarmupProfile).recording)
 
 
     def on_abort(self, reason, jitdriver, greenkey, greenkey_repr, logops, operations):
@@ -67,6 +69,9 @@ class PyPyJitIface(JitHookInterface):
 
     def _compile_hook(self, debug_info, is_bridge):
         space = self.space
+        profile = space.fromcache(WarmupProfile)
+        if profile.recording:
+            profile.record_compiled(debug_info, is_bridge)
         cache = space.fromcache(Cache)
         if cache.in_recursion:
             return
@@ -390,12 +390,33 @@ def get_stats_snapshot(space):
     space.setitem_str(w_counter_times, 'BACKEND', space.newfloat(b_time))
     return W_JitInfoSnapshot(space, w_times, w_counters, w_counter_times)
 
-def get_stats_asmmemmgr(space):
+@unwrap_spec(detailed=bool)
+def get_stats_asmmemmgr(space, detailed=False):
     """Returns the raw memory currently used by the JIT backend,
-    as a pair (total_memory_allocated, memory_in_use)."""
+    as a pair (total_memory_allocated, memory_in_use).
+
+    With detailed=True, returns a dict with these two entries and also
+    'memory_freed', the number of bytes of machine code freed so far,
+    'loops_evicted', the number of loops freed because they were not
+    entered recently enough (see the JIT parameters 'loop_longevity' and
+    'max_code_size'), 'recompiled_after_eviction', the number of such
+    loops that were compiled again later, and 'max_code_size'."""
     m1 = jit_hooks.stats_asmmemmgr_allocated(None)
     m2 = jit_hooks.stats_asmmemmgr_used(None)
-    return space.newtuple2(space.newint(m1), space.newint(m2))
+    if not detailed:
+        return space.newtuple2(space.newint(m1), space.newint(m2))
+    w_stats = space.newdict()
+    space.setitem_str(w_stats, 'total_memory_allocated', space.newint(m1))
+    space.setitem_str(w_stats, 'memory_in_use', space.newint(m2))
+    space.setitem_str(w_stats, 'memory_freed',
+                      space.newint(jit_hooks.stats_asmmemmgr_freed(None)))
+    space.setitem_str(w_stats, 'loops_evicted',
+                      space.newint(jit_hooks.stats_memmgr_loops_evicted(None)))
+    space.setitem_str(w_stats, 'recompiled_after_eviction', space.newint(
+        jit_hooks.stats_memmgr_recompiled_after_eviction(None)))
+    space.setitem_str(w_stats, 'max_code_size',
+                      space.newint(jit_hooks.stats_memmgr_max_code_size(None)))
+    return w_stats
 
 def enable_debug(space):
     """ Set the jit debugging - completely necessary for some stats to work,
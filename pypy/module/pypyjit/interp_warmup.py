@@ -0,0 +1,226 @@
+"""
+A warm-up profile: the loop headers in the Python code where the JIT
+compiled loops.  It is written to a file when the process exits.  When a
+later process loads it, each of these loops is marked with
+trace_next_iteration() the first time a frame is created for the code
+object containing it, so that tracing starts the first time the loop runs
+instead of after 'threshold' iterations.
+
+The code objects are identified by (co_filename, co_firstlineno, co_name)
+and the loops by the bytecode offset of their header.  Each line of the
+file is:
+
+    offset firstlineno timestamp name filename
+
+where 'timestamp' is the last time a loop of this code object was
+compiled.  Code objects that have not been seen for MAX_AGE seconds are
+dropped when the file is written, and so are the least recently seen ones
+above MAX_CODES.
+"""
+
+import os
+import time
+
+from rpython.rlib import jit_hooks
+from rpython.rlib.jit import dont_look_inside
+from rpython.rlib.listsort import make_timsort_class
+from rpython.rlib.rarithmetic import r_uint
+from rpython.rtyper.annlowlevel import (cast_instance_to_gcref,
+                                        cast_base_ptr_to_instance)
+from rpython.rtyper.lltypesystem import lltype
+from rpython.rtyper.rclass import OBJECT
+
+from pypy.interpreter.error import oefmt, wrap_oserror
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.pycode import PyCode, CodeHookCache
+from pypy.module.pypyjit.interp_jit import pypyjitdriver
+
+HEADER = '# pypyjit warm-up profile v2\n'
+MAX_AGE = 30 * 24 * 3600
+MAX_CODES = 10000
+
+TimestampSort = make_timsort_class()
+
+
+@dont_look_inside
+def _trace_next_iteration(pycode, next_instr):
+    ll_pycode = cast_instance_to_gcref(pycode)
+    jit_hooks.trace_next_iteration('pypyjit', r_uint(next_instr), 0,
+                                   ll_pycode)
+
+def _pycode_from_box(box):
+    ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT), box.getref_base())
+    return cast_base_ptr_to_instance(PyCode, ll_code)
+
+def _code_key(pycode):
+    name = pycode.co_name
+    filename = pycode.co_filename
+    if pycode.hidden_applevel or not name or not filename:
+        return None
+    if ' ' in name or '\n' in name or '\n' in filename:
+        return None    # would not survive the file format
+    return (filename, pycode.co_firstlineno, name)
+
+
+class WarmupProfile(object):
+    def __init__(self, space):
+        self.space = space
+        self.filename = None
+        self.recording = False
+        # {(co_filename, co_firstlineno, co_name): [offsets]}
+        self.locations = {}
+        # {(co_filename, co_firstlineno, co_name): last time seen}
+        self.timestamps = {}
+
+    def add(self, key, next_instr, timestamp):
+        offsets = self.locations.get(key, None)
+        if offsets is None:
+            self.locations[key] = [next_instr]
+        elif next_instr not in offsets:
+            offsets.append(next_instr)
+        if timestamp > self.timestamps.get(key, 0):
+            self.timestamps[key] = timestamp
+
+    def new_code(self, pycode):
+        # called the first time a frame is created for a code object
+        # created after the profile is loaded
+        key = _code_key(pycode)
+        if key is None:
+            return
+        offsets = self.locations.get(key, None)
+        if offsets is not None:
+            for next_instr in offsets:
+                _trace_next_iteration(pycode, next_instr)
+
+    def record(self, pycode, next_instr):
+        key = _code_key(pycode)
+        if key is not None:
+            self.add(key, next_instr, int(time.time()))
+
+    def record_compiled(self, debug_info, is_bridge):
+        # called by the JIT hooks after a loop or a bridge is compiled.
+        # Bridges are not recorded: they usually start in the middle of a
+        # loop, where trace_next_iteration() has no effect.
+        if is_bridge or debug_info.get_jitdriver() is not pypyjitdriver:
+            return
+        greenkey = debug_info.greenkey
+        self.record(_pycode_from_box(greenkey[2]), greenkey[0].getint())
+
+    def load(self, filename):
+        try:
+            data = _read_file(filename)
+        except OSError:
+            return       # no profile yet, or unreadable: start from scratch
+        if not data.startswith(HEADER):
+            return
+        for line in data.split('\n'):
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split(' ', 4)
+            if len(parts) != 5:
+                continue
+            try:
+                next_instr = int(parts[0])
+                firstlineno = int(parts[1])
+                timestamp = int(parts[2])
+            except ValueError:
+                continue
+            if next_instr < 0:
+                continue
+            self.add((parts[4], firstlineno, parts[3]), next_instr, timestamp)
+
+    def prune(self, now):
+        # drop the code objects not seen for MAX_AGE seconds, and the
+        # least recently seen ones if there are more than MAX_CODES
+        cutoff = now - MAX_AGE
+        if len(self.timestamps) > MAX_CODES:
+            timestamps = self.timestamps.values()
+            TimestampSort(timestamps).sort()
+            cutoff = max(cutoff,
+                         timestamps[len(timestamps) - MAX_CODES])
+        for key, timestamp in self.timestamps.items():
+            if timestamp < cutoff:
+                del self.timestamps[key]
+                del self.locations[key]
+
+    def save(self):
+        filename = self.filename
+        assert filename is not None
+        # merge the entries written meanwhile by other processes
+        self.load(filename)
+        self.prune(int(time.time()))
+        lines = [HEADER]
+        for key, offsets in self.locations.items():
+            co_filename, firstlineno, name = key
+            timestamp = self.timestamps[key]
+            for next_instr in offsets:
+                lines.append('%d %d %d %s %s\n' % (next_instr, firstlineno,
+                                                   timestamp, name,
+                                                   co_filename))
+        tmpname = '%s.%d.tmp' % (filename, os.getpid())
+        _write_file(tmpname, ''.join(lines))
+        try:
+            os.rename(tmpname, filename)
+        except OSError:
+            try:
+                os.unlink(tmpname)
+            except OSError:
+                pass
+            raise
+
+
+def _read_file(filename):
+    fd = os.open(filename, os.O_RDONLY, 0)
+    try:
+        chunks = []
+        while True:
+            data = os.read(fd, 65536)
+            if not data:
+                break
+            chunks.append(data)
+    finally:
+        os.close(fd)
+    return ''.join(chunks)
+
+def _write_file(filename, data):
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0666)
+    try:
+        while data:
+            count = os.write(fd, data)
+            data = data[count:]
+    finally:
+        os.close(fd)
+
+
+@unwrap_spec(filename='fsencode')
+def enable_warmup_profile(space, filename):
+    """ enable_warmup_profile(filename)
+
+    Load the warm-up profile stored in 'filename', if any, and record the
+    loops that get compiled from now on.  The loops listed in the profile
+    start tracing the first time they run, instead of after 'threshold'
+    iterations; this only applies to code objects created after this call,
+    so it should be called as early as possible, e.g. by setting the
+    PYPY_WARMUP_PROFILE environment variable.  The profile is written back
+    to 'filename' when the process exits.
+    """
+    profile = space.fromcache(WarmupProfile)
+    profile.filename = filename
+    profile.recording = True
+    profile.load(filename)
+    space.fromcache(CodeHookCache)._warmup_profile = profile
+
+def save_warmup_profile(space):
+    """ save_warmup_profile()
+
+    Write the warm-up profile now.  This is done automatically at exit,
+    but not by processes that end with os._exit(), like the children of
+    fork() often do.
+    """
+    profile = space.fromcache(WarmupProfile)
+    if profile.filename is None:
+        raise oefmt(space.w_ValueError, "no warm-up profile enabled")
+    try:
+        profile.save()
+    except OSError as e:
+        raise wrap_oserror(space, e, profile.filename)
@@ -14,6 +14,8 @@ class Module(MixedModule):
         'trace_next_iteration': 'interp_jit.trace_next_iteration',
         'trace_next_iteration_hash': 'interp_jit.trace_next_iteration_hash',
         'releaseall': 'interp_jit.releaseall',
+        'enable_warmup_profile': 'interp_warmup.enable_warmup_profile',
+        'save_warmup_profile': 'interp_warmup.save_warmup_profile',
         'set_compile_hook': 'interp_resop.set_compile_hook',
         'set_abort_hook': 'interp_resop.set_abort_hook',
         'set_trace_too_long_hook': 'interp_resop.set_trace_too_long_hook',
@@ -43,3 +45,13 @@ class Module(MixedModule):
         w_obj = space.wrap(PARAMETERS)
         space.setattr(self, space.newtext('defaults'), w_obj)
         pypy_hooks.space = space
+
+    def shutdown(self, space):
+        from pypy.interpreter.error import OperationError
+        from pypy.module.pypyjit.interp_warmup import (WarmupProfile,
+            save_warmup_profile)
+        if space.fromcache(WarmupProfile).filename is not None:
+            try:
+                save_warmup_profile(space)
+            except OperationError as e:
+                e.write_unraisable(space, "pypyjit warm-up profile")
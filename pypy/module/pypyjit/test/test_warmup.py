@@ -0,0 +1,227 @@
+import py
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.pycode import CodeHookCache, PyCode
+from pypy.module.imp.importing import update_code_filenames
+from rpython.jit.metainterp.history import JitCellToken, ConstInt, ConstPtr,\
+     BasicFailDescr
+from rpython.jit.metainterp.logger import Logger
+from rpython.rtyper.annlowlevel import cast_instance_to_base_ptr
+from rpython.rtyper.lltypesystem import lltype, llmemory
+from pypy.module.pypyjit import interp_warmup
+from pypy.module.pypyjit.interp_warmup import WarmupProfile
+from pypy.module.pypyjit.hooks import pypy_hooks
+from pypy.module.pypyjit.test.test_jit_hook import MockJitDriverSD, MockSD
+from rpython.jit.tool.oparser import parse
+from rpython.rlib.jit import JitDebugInfo
+
+
+class AppTestWarmupProfile(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+        w_f = space.appexec([], """():
+        def function(n):
+            while n > 0:
+                n -= 1
+        return function
+        """)
+        ll_code = cast_instance_to_base_ptr(w_f.code)
+        code_gcref = lltype.cast_opaque_ptr(llmemory.GCREF, ll_code)
+        logger = Logger(MockSD())
+        oplist = parse("""
+        [i1, i2, p2]
+        debug_merge_point(0, 1, 0, 3, 0, ConstPtr(ptr0))
+        debug_merge_point(0, 0, 0, 9, 0, ConstPtr(ptr0))
+        i3 = int_add(i1, i2)
+        guard_true(i3) []
+        """, namespace={'ptr0': code_gcref}).operations
+        greenkey = [ConstInt(6), ConstInt(0), ConstPtr(code_gcref)]
+        di_loop = JitDebugInfo(MockJitDriverSD, logger, JitCellToken(),
+                               oplist, 'loop', greenkey)
+        di_bridge = JitDebugInfo(MockJitDriverSD, logger, JitCellToken(),
+                                 oplist, 'bridge',
+                                 fail_descr=BasicFailDescr())
+
+        def interp_on_compile():
+            if pypy_hooks.are_hooks_enabled():
+                pypy_hooks.after_compile(di_loop)
+
+        def interp_on_compile_bridge():
+            if pypy_hooks.are_hooks_enabled():
+                pypy_hooks.after_compile_bridge(di_bridge)
+
+        cls.marked = []
+        def fake_trace_next_iteration(pycode, next_instr):
+            cls.marked.append((pycode.co_name, next_instr))
+        cls.orig_trace_next_iteration = interp_warmup._trace_next_iteration
+        interp_warmup._trace_next_iteration = fake_trace_next_iteration
+
+        def interp_get_marked():
+            result = space.wrap(cls.marked)
+            del cls.marked[:]
+            return result
+
+        def interp_forget():
+            # like a new process that didn't load the profile yet
+            profile = space.fromcache(WarmupProfile)
+            profile.filename = None
+            profile.recording = False
+            profile.locations.clear()
+            profile.timestamps.clear()
+            space.fromcache(CodeHookCache)._warmup_profile = None
+
+        @unwrap_spec(newname='text')
+        def interp_rename(w_code, newname):
+            # like importing does for the code objects of a .pyc file
+            code = space.interp_w(PyCode, w_code)
+            update_code_filenames(space, code, newname)
+
+        cls.w_f = w_f
+        cls.w_rename = space.wrap(interp2app(interp_rename))
+        cls.w_on_compile = space.wrap(interp2app(interp_on_compile))
+        cls.w_on_compile_bridge = space.wrap(
+            interp2app(interp_on_compile_bridge))
+        cls.w_get_marked = space.wrap(interp2app(interp_get_marked))
+        cls.w_tmpdir = space.wrap(str(py.test.ensuretemp("warmup")))
+        cls.forget = staticmethod(interp_forget)
+
+    def teardown_class(cls):
+        if not cls.runappdirect:
+            interp_warmup._trace_next_iteration = cls.orig_trace_next_iteration
+
+    def teardown_method(self, meth):
+        self.forget()
+
+    def test_record_and_save(self):
+        import pypyjit, os, time
+        filename = os.path.join(self.tmpdir, 'record')
+        raises(ValueError, pypyjit.save_warmup_profile)
+        pypyjit.enable_warmup_profile(filename)
+        assert not os.path.exists(filename)
+        before = int(time.time())
+        self.on_compile()
+        self.on_compile_bridge()
+        self.on_compile()
+        pypyjit.save_warmup_profile()
+        with open(filename) as f:
+            lines = f.read().splitlines()
+        code = self.f.func_code
+        assert lines[0] == '# pypyjit warm-up profile v2'
+        # the bridge is not recorded: it does not start at a loop header
+        assert len(lines) == 2
+        offset, firstlineno, timestamp, rest = lines[1].split(' ', 3)
+        assert (int(offset), int(firstlineno)) == (6, code.co_firstlineno)
+        assert before <= int(timestamp) <= time.time()
+        assert rest == 'function %s' % (code.co_filename,)
+
+    def test_load_marks_new_code(self):
+        import pypyjit, os, time
+        filename = os.path.join(self.tmpdir, 'load')
+        now = int(time.time())
+        with open(filename, 'w') as f:
+            f.write('# pypyjit warm-up profile v2\n'
+                    '0 2 %d g <warmup test>\n'
+                    '7 2 %d g <warmup test>\n'
+                    '5 2 %d other <warmup test>\n'
+                    'garbage\n'
+                    '12 1 %d <module> <warmup test>\n' % ((now,) * 4))
+        pypyjit.enable_warmup_profile(filename)
+        assert self.get_marked() == []
+        co = compile("x = 1\n"
+                     "def g():\n"
+                     "    pass\n", '<warmup test>', 'exec')
+        # looked up the first time the code runs
+        assert self.get_marked() == []
+        d = {}
+        exec co in d
+        assert self.get_marked() == [('<module>', 12)]
+        d['g']()
+        d['g']()
+        assert sorted(self.get_marked()) == [('g', 0), ('g', 7)]
+        exec compile("x = 1\n"
+                     "def g():\n"
+                     "    pass\n", '<other file>', 'exec') in d
+        d['g']()
+        assert self.get_marked() == []
+        # the profile is merged with what is recorded afterwards
+        self.on_compile()
+        pypyjit.save_warmup_profile()
+        with open(filename) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 6
+        assert 'garbage' not in lines
+
+    def test_filename_fixed_up_after_creation(self):
+        import pypyjit, os, time
+        filename = os.path.join(self.tmpdir, 'rename')
+        with open(filename, 'w') as f:
+            f.write('# pypyjit warm-up profile v2\n'
+                    '3 1 %d <module> <real name>\n' % (time.time(),))
+        pypyjit.enable_warmup_profile(filename)
+        co = compile("x = 1\n", '<stale name>', 'exec')
+        self.rename(co, '<real name>')
+        exec co in {}
+        assert self.get_marked() == [('<module>', 3)]
+
+    def test_old_entries_dropped(self):
+        import pypyjit, os, time
+        filename = os.path.join(self.tmpdir, 'old')
+        now = int(time.time())
+        with open(filename, 'w') as f:
+            f.write('# pypyjit warm-up profile v2\n'
+                    '3 1 %d <module> <recent>\n'
+                    '3 1 %d <module> <old>\n' % (now, now - 100 * 86400))
+        pypyjit.enable_warmup_profile(filename)
+        pypyjit.save_warmup_profile()
+        with open(filename) as f:
+            lines = f.read().splitlines()
+        assert lines[1:] == ['3 1 %d <module> <recent>' % (now,)]
+
+    def test_old_format_ignored(self):
+        import pypyjit, os
+        filename = os.path.join(self.tmpdir, 'oldformat')
+        with open(filename, 'w') as f:
+            f.write('# pypyjit warm-up profile\n'
+                    '0 1 <module> <warmup test>\n')
+        pypyjit.enable_warmup_profile(filename)
+        exec compile("pass\n", '<warmup test>', 'exec') in {}
+        assert self.get_marked() == []
+
+    def test_missing_or_bad_file(self):
+        import pypyjit, os
+        filename = os.path.join(self.tmpdir, 'bad')
+        with open(filename, 'w') as f:
+            f.write('0 1 <module> <warmup test>\n')
+        pypyjit.enable_warmup_profile(filename)
+        exec compile("pass\n", '<warmup test>', 'exec') in {}
+        assert self.get_marked() == []
+        pypyjit.enable_warmup_profile(
+            os.path.join(self.tmpdir, 'nonexistent', 'profile'))
+        raises(OSError, pypyjit.save_warmup_profile)
+
+
+class TestPrune(object):
+    def test_max_codes(self, monkeypatch):
+        monkeypatch.setattr(interp_warmup, 'MAX_CODES', 3)
+        profile = WarmupProfile(None)
+        now = 10 ** 9
+        for i in range(5):
+            key = ('file%d' % i, 1, 'f')
+            profile.add(key, 0, now - i)
+            profile.add(key, 10, now - i)
+        profile.add(('old', 1, 'f'), 0, now - interp_warmup.MAX_AGE - 1)
+        profile.prune(now)
+        assert sorted(profile.locations) == [('file0', 1, 'f'),
+                                             ('file1', 1, 'f'),
+                                             ('file2', 1, 'f')]
+        assert sorted(profile.timestamps) == sorted(profile.locations)
+        assert profile.locations[('file0', 1, 'f')] == [0, 10]
+
+    def test_merge_keeps_latest_timestamp(self):
+        profile = WarmupProfile(None)
+        profile.add(('file', 1, 'f'), 0, 20)
+        profile.add(('file', 1, 'f'), 4, 10)
+        assert profile.timestamps[('file', 1, 'f')] == 20
@@ -1,6 +1,7 @@
 from __future__ import with_statement
 
 import errno
+import math
 
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.gateway import interp2app, unwrap_spec
@@ -9,6 +10,7 @@ from pypy.interpreter.error import exception_from_saved_errno
 from pypy.interpreter.typedef import TypeDef, GetSetProperty
 from rpython.rtyper.lltypesystem import lltype, rffi
 from rpython.rtyper.tool import rffi_platform
+from rpython.rlib import rtime
 from rpython.rlib._rsocket_rffi import socketclose, FD_SETSIZE
 from rpython.rlib.rposix import get_saved_errno
 from rpython.rlib.rarithmetic import intmask
@@ -217,3 +219,259 @@ W_Epoll.typedef = TypeDef("select.epoll",
     poll = interp2app(W_Epoll.descr_poll),
 )
 W_Epoll.typedef.acceptable_as_base_class = False
+
+
+def monotonic():
+    with lltype.scoped_alloc(rtime.TIMESPEC) as tp:
+        rtime.c_clock_gettime(rtime.CLOCK_MONOTONIC, tp)
+        return (float(rffi.getintfield(tp, 'c_tv_sec')) +
+                float(rffi.getintfield(tp, 'c_tv_nsec')) * 0.000000001)
+
+
+class W_ReactorTimer(W_Root):
+    def __init__(self, deadline, seq, w_callback):
+        self.deadline = deadline
+        self.seq = seq
+        self.w_callback = w_callback     # None if cancelled or done
+
+    def lt(self, other):
+        if self.deadline != other.deadline:
+            return self.deadline < other.deadline
+        return self.seq < other.seq
+
+    def descr_cancel(self, space):
+        self.w_callback = None
+
+    def descr_get_active(self, space):
+        return space.newbool(self.w_callback is not None)
+
+    def descr_get_deadline(self, space):
+        return space.newfloat(self.deadline)
+
+W_ReactorTimer.typedef = TypeDef("select.epollreactor_timer",
+    cancel = interp2app(W_ReactorTimer.descr_cancel),
+    active = GetSetProperty(W_ReactorTimer.descr_get_active),
+    deadline = GetSetProperty(W_ReactorTimer.descr_get_deadline),
+)
+W_ReactorTimer.typedef.acceptable_as_base_class = False
+
+
+def heappush(heap, timer):
+    heap.append(timer)
+    pos = len(heap) - 1
+    while pos > 0:
+        parentpos = (pos - 1) >> 1
+        parent = heap[parentpos]
+        if not timer.lt(parent):
+            break
+        heap[pos] = parent
+        pos = parentpos
+    heap[pos] = timer
+
+def heappop(heap):
+    result = heap[0]
+    last = heap.pop()
+    size = len(heap)
+    if size > 0:
+        pos = 0
+        while True:
+            childpos = 2 * pos + 1
+            if childpos >= size:
+                break
+            if childpos + 1 < size and heap[childpos + 1].lt(heap[childpos]):
+                childpos += 1
+            if not heap[childpos].lt(last):
+                break
+            heap[pos] = heap[childpos]
+            pos = childpos
+        heap[pos] = last
+    return result
+
+
+class W_EpollReactor(W_Epoll):
+    """An epoll object that owns a table of callbacks, called directly by
+    run_once() for the ready file descriptors, and a heap of timers.  This
+    avoids building the list of (fd, events) tuples of poll()."""
+
+    def __init__(self, space, epfd):
+        W_Epoll.__init__(self, space, epfd)
+        self.callbacks_w = {}
+        self.timers = []
+        self.timer_seq = 0
+        # events left over by a callback that raised, for the next run_once()
+        self.pending_fds = []
+        self.pending_events = []
+
+    @unwrap_spec(sizehint=int)
+    def descr__new__(space, w_subtype, sizehint=-1):
+        if sizehint == -1:
+            sizehint = FD_SETSIZE - 1
+        elif sizehint < 0:
+            raise oefmt(space.w_ValueError,
+                        "sizehint must be greater than zero, got %d", sizehint)
+        epfd = epoll_create(sizehint)
+        if epfd < 0:
+            raise exception_from_saved_errno(space, space.w_IOError)
+
+        return W_EpollReactor(space, epfd)
+
+    def close(self):
+        W_Epoll.close(self)
+        self.callbacks_w.clear()
+        self.timers = []
+        self.pending_fds = []
+        self.pending_events = []
+
+    @unwrap_spec(eventmask=int)
+    def descr_register(self, space, w_fd, eventmask, w_callback):
+        self.check_closed(space)
+        fd = space.c_filedescriptor_w(w_fd)
+        self.epoll_ctl(space, EPOLL_CTL_ADD, w_fd, eventmask)
+        self.callbacks_w[fd] = w_callback
+
+    def descr_unregister(self, space, w_fd):
+        self.check_closed(space)
+        fd = space.c_filedescriptor_w(w_fd)
+        self.epoll_ctl(space, EPOLL_CTL_DEL, w_fd, 0, ignore_ebadf=True)
+        if fd in self.callbacks_w:
+            del self.callbacks_w[fd]
+
+    @unwrap_spec(eventmask=int)
+    def descr_modify(self, space, w_fd, eventmask, w_callback=None):
+        self.check_closed(space)
+        fd = space.c_filedescriptor_w(w_fd)
+        self.epoll_ctl(space, EPOLL_CTL_MOD, w_fd, eventmask)
+        if w_callback is not None:
+            self.callbacks_w[fd] = w_callback
+
+    @unwrap_spec(delay=float)
+    def descr_call_later(self, space, delay, w_callback):
+        self.check_closed(space)
+        if delay < 0.0:
+            delay = 0.0
+        self.timer_seq += 1
+        timer = W_ReactorTimer(monotonic() + delay, self.timer_seq,
+                               w_callback)
+        heappush(self.timers, timer)
+        return timer
+
+    def _next_deadline(self):
+        # drop the cancelled timers from the top of the heap
+        while self.timers and self.timers[0].w_callback is None:
+            heappop(self.timers)
+        if self.timers:
+            return self.timers[0].deadline
+        return -1.0
+
+    def _dispatch(self, space, fd, events):
+        w_callback = self.callbacks_w.get(fd, None)
+        if w_callback is None:
+            return 0    # unregistered by a previous callback
+        space.call_function(w_callback, space.newint(fd),
+                            space.newint(events))
+        return 1
+
+    def _dispatch_pending(self, space):
+        count = 0
+        while self.pending_fds and not self.get_closed():
+            fd = self.pending_fds.pop(0)
+            events = self.pending_events.pop(0)
+            count += self._dispatch(space, fd, events)
+        return count
+
+    def _run_timers(self, space):
+        if not self.timers:
+            return 0
+        now = monotonic()
+        expired = []
+        while self.timers and self.timers[0].deadline <= now:
+            expired.append(heappop(self.timers))
+        # timers added by the callbacks below run at the earliest in the
+        # next run_once(), even with a zero delay
+        count = 0
+        for i in range(len(expired)):
+            timer = expired[i]
+            w_callback = timer.w_callback
+            if w_callback is None or self.get_closed():
+                continue
+            timer.w_callback = None
+            count += 1
+            try:
+                space.call_function(w_callback)
+            except OperationError:
+                for j in range(i + 1, len(expired)):
+                    heappush(self.timers, expired[j])
+                raise
+        return count
+
+    @unwrap_spec(timeout=float, maxevents=int)
+    def descr_run_once(self, space, timeout=-1.0, maxevents=-1):
+        """run_once([timeout[, maxevents]]) -> number of callbacks called
+
+        Wait for at most 'timeout' seconds (forever if negative) or until
+        the next timer is due, then call callback(fd, events) for every
+        ready file descriptor, and the callbacks of the expired timers.
+        """
+        self.check_closed(space)
+        if maxevents == -1:
+            maxevents = FD_SETSIZE - 1
+        elif maxevents < 1:
+            raise oefmt(space.w_ValueError,
+                        "maxevents must be greater than 0, not %d", maxevents)
+
+        if self.pending_fds:
+            return space.newint(self._dispatch_pending(space) +
+                                self._run_timers(space))
+
+        deadline = self._next_deadline()
+        if deadline >= 0.0:
+            delay = max(deadline - monotonic(), 0.0)
+            if timeout < 0.0 or delay < timeout:
+                timeout = delay
+        if timeout < 0.0:
+            msecs = -1
+        else:
+            # round up, to avoid waking up just before the timer is due
+            msecs = int(math.ceil(timeout * 1000.0))
+
+        count = 0
+        with lltype.scoped_alloc(rffi.CArray(rffi.UINT), maxevents) as fids:
+            with lltype.scoped_alloc(rffi.CArray(rffi.INT), maxevents) as events:
+                nfds = pypy_epoll_wait(self.epfd, fids, events, maxevents, msecs)
+                if nfds < 0:
+                    raise exception_from_saved_errno(space, space.w_IOError)
+
+                for i in xrange(nfds):
+                    if self.get_closed():
+                        break
+                    try:
+                        count += self._dispatch(space, intmask(fids[i]),
+                                                intmask(events[i]))
+                    except OperationError:
+                        for j in xrange(i + 1, nfds):
+                            self.pending_fds.append(intmask(fids[j]))
+                            self.pending_events.append(intmask(events[j]))
+                        raise
+        count += self._run_timers(space)
+        return space.newint(count)
+
+
+W_EpollReactor.typedef = TypeDef("select.epollreactor",
+    __doc__ = """epollreactor([sizehint=-1])
+
+An epoll object which calls callbacks directly: register(fd, eventmask,
+callback) arranges for callback(fd, events) to be called by run_once()
+when fd is ready, and call_later(delay, callback) for callback() to be
+called once the delay has elapsed.""",
+    __new__ = interp2app(W_EpollReactor.descr__new__.im_func),
+
+    closed = GetSetProperty(W_Epoll.descr_get_closed),
+    fileno = interp2app(W_Epoll.descr_fileno),
+    close = interp2app(W_Epoll.descr_close),
+    register = interp2app(W_EpollReactor.descr_register),
+    unregister = interp2app(W_EpollReactor.descr_unregister),
+    modify = interp2app(W_EpollReactor.descr_modify),
+    call_later = interp2app(W_EpollReactor.descr_call_later),
+    run_once = interp2app(W_EpollReactor.descr_run_once),
+)
+W_EpollReactor.typedef.acceptable_as_base_class = False
@@ -209,3 +209,74 @@ class AppTestEpoll(object):
         ep = select.epoll()
         ep.close()
         ep.close()
+
+    def test_reactor_callbacks(self):
+        import select
+
+        client, server = self.socket_pair()
+        r = select.epollreactor()
+        calls = []
+        def callback(fd, events):
+            calls.append((fd, events))
+        r.register(server.fileno(), select.EPOLLIN, callback)
+        r.register(client, select.EPOLLOUT, callback)
+        assert r.run_once(1) == 1
+        assert calls == [(client.fileno(), select.EPOLLOUT)]
+        del calls[:]
+        r.modify(client, select.EPOLLIN)
+        assert r.run_once(0) == 0
+        client.send("Hello!")
+        assert r.run_once(1) == 1
+        assert calls == [(server.fileno(), select.EPOLLIN)]
+        assert server.recv(100) == "Hello!"
+        del calls[:]
+        r.unregister(server)
+        server.send("x")
+        seen = []
+        r.modify(client, select.EPOLLIN, lambda fd, ev: seen.append(fd))
+        assert r.run_once(1) == 1
+        assert calls == []
+        assert seen == [client.fileno()]
+        raises(IOError, r.register, client, select.EPOLLIN, callback)
+        r.close()
+        assert r.closed
+        raises(ValueError, r.run_once, 0)
+
+    def test_reactor_timers(self):
+        import select, time
+
+        r = select.epollreactor()
+        calls = []
+        t1 = r.call_later(0.05, lambda: calls.append(1))
+        t2 = r.call_later(0.01, lambda: calls.append(2))
+        t3 = r.call_later(0.02, lambda: calls.append(3))
+        assert t1.active
+        t3.cancel()
+        assert not t3.active
+        start = time.time()
+        assert r.run_once() == 1
+        assert calls == [2]
+        assert not t2.active
+        assert r.run_once(10) == 1
+        assert calls == [2, 1]
+        assert time.time() - start >= 0.045
+        # with no timers and no fds, the timeout is respected
+        assert r.run_once(0.01) == 0
+
+    def test_reactor_callback_error(self):
+        import select
+
+        client, server = self.socket_pair()
+        r = select.epollreactor()
+        calls = []
+        def failing(fd, events):
+            calls.append(fd)
+            raise ZeroDivisionError
+        r.register(client, select.EPOLLOUT, failing)
+        r.register(server, select.EPOLLOUT, failing)
+        raises(ZeroDivisionError, r.run_once, 1)
+        assert len(calls) == 1
+        # the other ready fd is dispatched by the next call
+        raises(ZeroDivisionError, r.run_once, 1)
+        assert sorted(calls) == sorted([client.fileno(), server.fileno()])
+        r.close()
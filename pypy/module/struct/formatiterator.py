@@ -161,6 +161,10 @@ class UnpackFormatIterator(FormatIterator):
 
     @specialize.argtype(1)
     def appendobj(self, value):
+        self.result_w.append(self.wrapobj(value))
+
+    @specialize.argtype(1)
+    def wrapobj(self, value):
         # CPython tries hard to return int objects whenever it can, but
         # space.newint returns a long if we pass a r_uint, r_ulonglong or
         # r_longlong. So, we need special care in those cases.
@@ -188,7 +192,7 @@ class UnpackFormatIterator(FormatIterator):
             w_value = self.space.newutf8(value.decode('utf-8'), len(value))
         else:
             assert 0, "unreachable"
-        self.result_w.append(w_value)
+        return w_value
 
     def append_utf8(self, value):
         w_ch = self.space.newutf8(rutf8.unichr_as_utf8(r_uint(value)), 1)
@@ -202,3 +206,104 @@ class UnpackFormatIterator(FormatIterator):
 
     def skip(self, size):
         self.read(size) # XXX, could avoid taking the slice
+
+
+class Column(object):
+    """The values of one field of all the records, as a list of unboxed
+    ints or floats as long as possible."""
+
+    def __init__(self):
+        self.ints = None
+        self.floats = None
+        self.items_w = None
+
+    def append_int(self, space, value):
+        if self.ints is not None:
+            self.ints.append(value)
+        elif self.floats is None and self.items_w is None:
+            self.ints = [value]
+        else:
+            self.append_w(space, space.newint(value))
+
+    def append_float(self, space, value):
+        if self.floats is not None:
+            self.floats.append(value)
+        elif self.ints is None and self.items_w is None:
+            self.floats = [value]
+        else:
+            self.append_w(space, space.newfloat(value))
+
+    def append_w(self, space, w_value):
+        if self.items_w is None:
+            self.items_w = []
+            if self.ints is not None:
+                for value in self.ints:
+                    self.items_w.append(space.newint(value))
+                self.ints = None
+            if self.floats is not None:
+                for value in self.floats:
+                    self.items_w.append(space.newfloat(value))
+                self.floats = None
+        self.items_w.append(w_value)
+
+    def wrap(self, space):
+        if self.ints is not None:
+            return space.newlist_int(self.ints)
+        if self.floats is not None:
+            return space.newlist_float(self.floats)
+        if self.items_w is not None:
+            return space.newlist(self.items_w)
+        return space.newlist([])
+
+
+class ColumnsUnpackFormatIterator(UnpackFormatIterator):
+    """Unpacks consecutive records of the same format, collecting the
+    values into one Column per field."""
+
+    def __init__(self, space, buf):
+        UnpackFormatIterator.__init__(self, space, buf)
+        self.start = 0
+        self.column = 0
+        self.columns = []
+
+    def start_record(self, start, size):
+        self.start = self.pos = start
+        self.length = start + size
+        self.column = 0
+
+    def align(self, mask):
+        # align relatively to the start of the record
+        pos = self.pos - self.start
+        self.pos = self.start + ((pos + mask) & ~mask)
+
+    def next_column(self):
+        if self.column == len(self.columns):
+            self.columns.append(Column())
+        column = self.columns[self.column]
+        self.column += 1
+        return column
+
+    @specialize.argtype(1)
+    def appendobj(self, value):
+        column = self.next_column()
+        if isinstance(value, r_uint) or isinstance(value, r_ulonglong):
+            if value <= maxint:
+                column.append_int(self.space, intmask(value))
+                return
+        elif isinstance(value, r_longlong):
+            if value == r_longlong(intmask(value)):
+                column.append_int(self.space, intmask(value))
+                return
+        elif isinstance(value, bool):
+            pass
+        elif isinstance(value, int):
+            column.append_int(self.space, value)
+            return
+        elif isinstance(value, float):
+            column.append_float(self.space, value)
+            return
+        column.append_w(self.space, self.wrapobj(value))
+
+    def append_utf8(self, value):
+        w_ch = self.space.newutf8(rutf8.unichr_as_utf8(r_uint(value)), 1)
+        self.next_column().append_w(self.space, w_ch)
@@ -10,7 +10,7 @@ from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.typedef import TypeDef, interp_attrproperty
 from pypy.interpreter.typedef import make_weakref_descr
 from pypy.module.struct.formatiterator import (
-    PackFormatIterator, UnpackFormatIterator
+    PackFormatIterator, UnpackFormatIterator, ColumnsUnpackFormatIterator
 )
 
 
@@ -119,6 +119,77 @@ fmt, starting at offset. Requires len(buffer[offset:]) >= calcsize(fmt)."""
     return _unpack(space, format, buf)
 
 
+def _get_iter_buffer(space, size, w_buffer):
+    if size == 0:
+        raise oefmt(get_error(space),
+                    "cannot iteratively unpack with a struct of length 0")
+    buf = space.getarg_w('s*', w_buffer)
+    if buf.getlength() % size != 0:
+        raise oefmt(get_error(space),
+                    "iterative unpacking requires a buffer of a multiple "
+                    "of %d bytes", size)
+    return buf
+
+
+class W_UnpackIter(W_Root):
+    """Iterates over the records of a buffer without copying it."""
+
+    def __init__(self, format, size, buf):
+        self.format = format
+        self.size = size
+        self.buf = buf
+        self.index = 0
+
+    def descr_iter(self, space):
+        return self
+
+    def descr_next(self, space):
+        if self.buf is None:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        size = self.size
+        if self.index + size > self.buf.getlength():
+            self.buf = None
+            raise OperationError(space.w_StopIteration, space.w_None)
+        buf = SubBuffer(self.buf, self.index, size)
+        self.index += size
+        return _unpack(space, jit.promote_string(self.format), buf)
+
+    def descr_length_hint(self, space):
+        if self.buf is None:
+            return space.newint(0)
+        return space.newint((self.buf.getlength() - self.index) // self.size)
+
+W_UnpackIter.typedef = TypeDef("unpack_iterator",
+    __iter__=interp2app(W_UnpackIter.descr_iter),
+    next=interp2app(W_UnpackIter.descr_next),
+    __length_hint__=interp2app(W_UnpackIter.descr_length_hint),
+)
+W_UnpackIter.typedef.acceptable_as_base_class = False
+
+
+@unwrap_spec(format='text')
+def iter_unpack(space, format, w_buffer):
+    """Return an iterator which unpacks the buffer, containing a sequence
+of packed C structures, according to fmt.  Requires len(buffer) to be a
+multiple of calcsize(fmt)."""
+    size = _calcsize(space, format)
+    buf = _get_iter_buffer(space, size, w_buffer)
+    return W_UnpackIter(format, size, buf)
+
+
+def _unpack_all(space, format, size, buf):
+    fmtiter = ColumnsUnpackFormatIterator(space, buf)
+    try:
+        for start in range(0, buf.getlength(), size):
+            fmtiter.start_record(start, size)
+            fmtiter.interpret(format)
+    except StructOverflowError as e:
+        raise OperationError(space.w_OverflowError, space.newtext(e.msg))
+    except StructError as e:
+        raise OperationError(get_error(space), space.newtext(e.msg))
+    return space.newlist([column.wrap(space) for column in fmtiter.columns])
+
+
 class W_Struct(W_Root):
     _immutable_fields_ = ["format", "size"]
 
@@ -147,6 +218,20 @@ class W_Struct(W_Root):
     def descr_unpack_from(self, space, w_buffer, offset=0):
         return unpack_from(space, jit.promote_string(self.format), w_buffer, offset)
 
+    def descr_iter_unpack(self, space, w_buffer):
+        buf = _get_iter_buffer(space, self.size, w_buffer)
+        return W_UnpackIter(self.format, self.size, buf)
+
+    def descr_unpack_all(self, space, w_buffer):
+        """S.unpack_all(buffer) -> list of columns
+
+Unpack all the records of the buffer at once.  Returns one list per
+field of the format, holding the values of that field for every record;
+integer and float fields give lists of unboxed values."""
+        buf = _get_iter_buffer(space, self.size, w_buffer)
+        return _unpack_all(space, jit.promote_string(self.format),
+                           self.size, buf)
+
 W_Struct.typedef = TypeDef("Struct",
     __new__=interp2app(W_Struct.descr__new__.im_func),
     __init__=interp2app(W_Struct.descr__init__),
@@ -157,6 +242,8 @@ W_Struct.typedef = TypeDef("Struct",
     unpack=interp2app(W_Struct.descr_unpack),
     pack_into=interp2app(W_Struct.descr_pack_into),
     unpack_from=interp2app(W_Struct.descr_unpack_from),
+    iter_unpack=interp2app(W_Struct.descr_iter_unpack),
+    unpack_all=interp2app(W_Struct.descr_unpack_all),
     __weakref__=make_weakref_descr(W_Struct),
 )
 
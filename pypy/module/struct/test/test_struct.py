@@ -468,6 +468,50 @@ class AppTestStruct(object):
             exc = raises(self.struct.error, self.struct.calcsize, s)
             assert str(exc.value) == 'embedded null character'
 
+    def test_iter_unpack(self):
+        import array
+        struct = self.struct
+        data = struct.pack('<iH', 1, 2) + struct.pack('<iH', 3, 4)
+        it = struct.iter_unpack('<iH', data)
+        assert iter(it) is it
+        assert it.__length_hint__() == 2
+        assert next(it) == (1, 2)
+        assert it.__length_hint__() == 1
+        assert list(it) == [(3, 4)]
+        raises(StopIteration, next, it)
+        assert it.__length_hint__() == 0
+        s = struct.Struct('<iH')
+        assert list(s.iter_unpack(data)) == [(1, 2), (3, 4)]
+        assert list(s.iter_unpack(memoryview(data))) == [(1, 2), (3, 4)]
+        a = array.array('i', [5, 6, 7])
+        assert list(struct.iter_unpack('i', a)) == [(5,), (6,), (7,)]
+        assert list(struct.iter_unpack('i', '')) == []
+        exc = raises(struct.error, struct.iter_unpack, '<iH', data[:-1])
+        assert str(exc.value) == ('iterative unpacking requires a buffer '
+                                  'of a multiple of 6 bytes')
+        exc = raises(struct.error, struct.iter_unpack, '', data)
+        assert str(exc.value) == ('cannot iteratively unpack with a struct '
+                                  'of length 0')
+
+    def test_unpack_all(self):
+        struct = self.struct
+        s = struct.Struct('<Hd3sc?')
+        records = [(1, 0.5, 'abc', 'x', True), (65535, -2.0, 'def', 'y', False)]
+        data = ''.join([s.pack(*record) for record in records])
+        assert s.unpack_all(data) == [list(column)
+                                      for column in zip(*records)]
+        assert s.unpack_all(buffer(data)) == s.unpack_all(data)
+        assert s.unpack_all('') == []
+        raises(struct.error, s.unpack_all, data + 'x')
+        # native alignment is relative to the start of each record
+        s = struct.Struct('bi')
+        data = s.pack(1, 2) + s.pack(3, 4)
+        assert s.unpack_all(data) == [[1, 3], [2, 4]]
+        # unsigned longs that do not fit a signed long
+        s = struct.Struct('<Q')
+        data = s.pack(1) + s.pack(2**64-1)
+        assert s.unpack_all(data) == [[1, 2**64-1]]
+
 class AppTestStructBuffer(object):
     spaceconfig = dict(usemodules=['struct', '__pypy__'])
 
@@ -499,6 +543,22 @@ class AppTestStructBuffer(object):
         b[:sz] = self.struct.pack("ii", 18, 43)
         assert self.struct.unpack_from("ii", b) == (18, 43)
 
+    def test_unpack_all_strategy(self):
+        import __pypy__
+        s = self.struct.Struct("<id")
+        data = s.pack(1, 1.5) + s.pack(2, 2.5)
+        ints, floats = s.unpack_all(data)
+        assert ints == [1, 2]
+        assert floats == [1.5, 2.5]
+        assert __pypy__.strategy(ints) == "IntegerListStrategy"
+        assert __pypy__.strategy(floats) == "FloatListStrategy"
+        b = self.bytebuffer(len(data))
+        b[:] = data
+        assert s.unpack_all(b) == [ints, floats]
+        s = self.struct.Struct("<Q")
+        [column] = s.unpack_all(s.pack(1) + s.pack(2**64-1))
+        assert __pypy__.strategy(column) == "ObjectListStrategy"
+
 
 class AppTestFastPath(object):
     spaceconfig = dict(usemodules=['array', 'struct', '__pypy__'])
@@ -364,21 +364,34 @@ class W_ZipImporter(W_Root):
 @unwrap_spec(name='text0')
 def descr_new_zipimporter(space, w_type, name):
     ok = False
-    parts_ends = [i for i in range(0, len(name))
-                    if name[i] == os.path.sep or name[i] == ZIPSEP]
-    parts_ends.append(len(name))
     filename = "" # make annotator happy
-    for i in parts_ends:
-        filename = name[:i]
-        if not filename:
-            filename = os.path.sep
-        try:
-            s = os.stat(filename)
-        except OSError:
-            raise oefmt(get_error(space), "Cannot find name %s", filename)
-        if not stat.S_ISDIR(s.st_mode):
-            ok = True
-            break
+    # Common cases first: 'name' is the archive itself, or a directory of
+    # sys.path.  This is one stat() instead of one per part of the path.
+    try:
+        s = os.stat(name)
+    except OSError:
+        pass
+    else:
+        if stat.S_ISDIR(s.st_mode):
+            raise oefmt(get_error(space),
+                        "Did not find %s to be a valid zippath", name)
+        filename = name
+        ok = True
+    if not ok:
+        parts_ends = [i for i in range(0, len(name))
+                        if name[i] == os.path.sep or name[i] == ZIPSEP]
+        parts_ends.append(len(name))
+        for i in parts_ends:
+            filename = name[:i]
+            if not filename:
+                filename = os.path.sep
+            try:
+                s = os.stat(filename)
+            except OSError:
+                raise oefmt(get_error(space), "Cannot find name %s", filename)
+            if not stat.S_ISDIR(s.st_mode):
+                ok = True
+                break
     if not ok:
         raise oefmt(get_error(space), "Did not find %s to be a valid zippath",
                     name)
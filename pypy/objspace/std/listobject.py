@@ -15,10 +15,12 @@ from rpython.rlib import debug, jit, rerased, rutf8
 from rpython.rlib.listsort import make_timsort_class
 from rpython.rlib.objectmodel import (
     import_from_mixin, instantiate, newlist_hint, resizelist_hint, specialize)
-from rpython.rlib.rarithmetic import ovfcheck
+from rpython.rlib.rarithmetic import LONG_BIT, ovfcheck, widen
 from rpython.rlib import longlong2float
 from rpython.tool.sourcetools import func_with_new_name
 from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.unroll import unrolling_iterable
+from rpython.rtyper.lltypesystem import rffi
 
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.error import OperationError, oefmt
@@ -407,6 +409,14 @@ class W_ListObject(W_Root):
         use the list strategy, return None."""
         return self.strategy.getitems_int(self)
 
+    def unpackiterable_int(self, space):
+        lst = space.listview_int(self)
+        if not lst:
+            return None
+        if self.strategy.getitems_int_is_copy:
+            return lst
+        return lst[:]
+
     def getitems_float(self):
         """Return the items in the list as unwrapped floats. If the list does not
         use the list strategy, return None."""
@@ -811,25 +821,35 @@ class W_ListObject(W_Root):
             # core-dump factory, since the storage may change).
             self.__init__(space, [])
 
-            # wrap each item in a KeyContainer if needed
+            done = False
             if has_key:
-                # XXX inefficient for unwrapped strategies:
-                # we wrap the elements twice, once for the key, and once to get
-                # KeyContainers. Then unwrap carefully in the __init__ call below.
-                # Could type-specialize this.
-                _compute_keys_for_sorting(strategy, sorter.list, w_key)
-
-            # Reverse sort stability achieved by initially reversing the list,
-            # applying a stable forward sort, then reversing the final result.
-            if reverse:
-                sorter.list.reverse()
-
-            # perform the sort
-            sorter.sort()
-
-            # reverse again
-            if reverse:
-                sorter.list.reverse()
+                keys_w = _compute_keys_for_sorting(strategy, sorter.list,
+                                                   w_key)
+                if not has_cmp:
+                    # if all the keys are of the same simple type, sort
+                    # their unwrapped values along with the items
+                    done = _sort_by_unwrapped_keys(space, keys_w,
+                                                   sorter.list, reverse)
+                if not done:
+                    # wrap each item in a KeyContainer.  Then unwrap
+                    # carefully in the __init__ call below.
+                    for i in range(len(keys_w)):
+                        sorter.list[i] = KeyContainer(keys_w[i],
+                                                      sorter.list[i])
+
+            if not done:
+                # Reverse sort stability achieved by initially reversing the
+                # list, applying a stable forward sort, then reversing the
+                # final result.
+                if reverse:
+                    sorter.list.reverse()
+
+                # perform the sort
+                sorter.sort()
+
+                # reverse again
+                if reverse:
+                    sorter.list.reverse()
 
         finally:
             # unwrap each item if needed
@@ -859,6 +879,7 @@ sortkey_jmp = jit.JitDriver(
 
 def _compute_keys_for_sorting(strategy, list_w, w_callable):
     space = strategy.space
+    keys_w = [None] * len(list_w)
     i = 0
     # XXX would like a new API space.greenkey_for_callable here
     # (also in min/max and map/filter)
@@ -867,10 +888,9 @@ def _compute_keys_for_sorting(strategy, list_w, w_callable):
         # bit weird: we have a list_w at this point, but we still specialize on
         # the strategy to distinguish the cases better
         sortkey_jmp.jit_merge_point(tp=tp, strategy_type=type(strategy))
-        w_item = list_w[i]
-        w_keyitem = space.call_function(w_callable, w_item)
-        list_w[i] = KeyContainer(w_keyitem, w_item)
+        keys_w[i] = space.call_function(w_callable, list_w[i])
         i += 1
+    return keys_w
 
 def get_printable_location_find(count, strategy_type, tp):
     if count:
@@ -886,6 +906,8 @@ find_or_count_jmp = jit.JitDriver(
     get_printable_location=get_printable_location_find)
 
 class ListStrategy(object):
+    # True if getitems_int() builds a new list
+    getitems_int_is_copy = False
 
     def __init__(self, space):
         self.space = space
@@ -951,6 +973,11 @@ class ListStrategy(object):
     def getitems_float(self, w_list):
         return None
 
+    def store_converted(self, w_list, items):
+        """Switch w_list to this strategy and store in it the list of
+        integers 'items'.  Only for the strategies of integer lists."""
+        raise NotImplementedError
+
     def getstorage_copy(self, w_list):
         raise NotImplementedError
 
@@ -1187,6 +1214,7 @@ class EmptyListStrategy(ListStrategy):
         if intlist is not None:
             w_list.strategy = strategy = space.fromcache(IntegerListStrategy)
             w_list.lstorage = strategy.erase(intlist)
+            strategy._maybe_compact(w_list, 0)
             return
 
         floatlist = space.unpackiterable_float(w_iterable)
@@ -1243,6 +1271,8 @@ class SizeListStrategy(EmptyListStrategy):
 
 
 class BaseRangeListStrategy(ListStrategy):
+    getitems_int_is_copy = True
+
     def switch_to_integer_strategy(self, w_list):
         items = self._getitems_range(w_list, False)
         strategy = w_list.strategy = self.space.fromcache(IntegerListStrategy)
@@ -1937,11 +1967,68 @@ class IntegerListStrategy(ListStrategy):
     def getitems_int(self, w_list):
         return self.unerase(w_list.lstorage)
 
+    def store_converted(self, w_list, items):
+        w_list.strategy = self
+        w_list.lstorage = self.erase(items)
+
+    def _maybe_compact(self, w_list, oldsize):
+        """Called when w_list grew, with 'oldsize' the physical size of its
+        storage before: switch it to a narrower strategy if it is long
+        enough and all its items fit.  Only checked when the storage
+        grows past a power of two.  Removing a few items doesn't shrink
+        the storage, so a list whose length goes up and down around a
+        power of two is not scanned again every time, and growing a list
+        one item at a time stays O(1) amortized."""
+        minlength = self.space.config.objspace.std.compactintlistlength
+        if minlength <= 0:
+            return
+        newsize = self.physical_size(w_list)
+        if (self.length(w_list) >= minlength and
+                (oldsize ^ newsize) > oldsize):
+            self._compact(w_list)
+
+    @jit.dont_look_inside
+    def _compact(self, w_list):
+        l = self.unerase(w_list.lstorage)
+        lo, hi = _compute_int_range(l)
+        strategy = get_int_strategy_for_range(self.space, lo, hi)
+        if strategy is not self:
+            strategy.store_converted(w_list, l)
+
+    _base_append = append
+
+    def append(self, w_list, w_item):
+        oldsize = self.physical_size(w_list)
+        self._base_append(w_list, w_item)
+        if w_list.strategy is self:
+            self._maybe_compact(w_list, oldsize)
+
+    def extend(self, w_list, w_any):
+        oldsize = self.physical_size(w_list)
+        ListStrategy.extend(self, w_list, w_any)
+        if w_list.strategy is self:
+            self._maybe_compact(w_list, oldsize)
+
+    _base_mul = mul
+
+    def mul(self, w_list, times):
+        w_result = self._base_mul(w_list, times)
+        self._maybe_compact(w_result, 0)
+        return w_result
+
+    _base_inplace_mul = inplace_mul
+
+    def inplace_mul(self, w_list, times):
+        oldsize = self.physical_size(w_list)
+        self._base_inplace_mul(w_list, times)
+        self._maybe_compact(w_list, oldsize)
+
 
     _base_extend_from_list = _extend_from_list
 
     def _extend_from_list(self, w_list, w_other):
-        if isinstance(w_other.strategy, BaseRangeListStrategy):
+        if (isinstance(w_other.strategy, BaseRangeListStrategy) or
+                isinstance(w_other.strategy, BaseNarrowIntegerListStrategy)):
             l = self.unerase(w_list.lstorage)
             other = w_other.getitems_int()
             assert other is not None
@@ -1958,7 +2045,8 @@ class IntegerListStrategy(ListStrategy):
     _base_setslice = setslice
 
     def setslice(self, w_list, start, step, slicelength, w_other):
-        if w_other.strategy is self.space.fromcache(RangeListStrategy):
+        if (w_other.strategy is self.space.fromcache(RangeListStrategy) or
+                isinstance(w_other.strategy, BaseNarrowIntegerListStrategy)):
             storage = self.erase(w_other.getitems_int())
             w_other = W_ListObject.from_storage_and_strategy(
                     self.space, storage, self)
@@ -1972,7 +2060,8 @@ class IntegerListStrategy(ListStrategy):
 
     @staticmethod
     def int_2_float_or_int(w_list):
-        l = IntegerListStrategy.unerase(w_list.lstorage)
+        # also used for the lists of narrower integers
+        l = w_list.getitems_int()
         if not longlong2float.CAN_ALWAYS_ENCODE_INT32:
             for intval in l:
                 if not longlong2float.can_encode_int32(intval):
@@ -2007,6 +2096,197 @@ class IntegerListStrategy(ListStrategy):
         return space.newtext(res)
 
 
+class BaseNarrowIntegerListStrategy(ListStrategy):
+    """Base class of the strategies for big lists of small integers,
+    stored in 1, 2 or 4 bytes each instead of a full machine word.
+    IntegerListStrategy switches to them when a list grows past
+    'objspace.std.compactintlistlength' items (see _maybe_compact()).
+    A list switches to the next wider strategy when an item that does
+    not fit is added."""
+    MIN = MAX = 0
+    getitems_int_is_copy = True
+
+
+def _make_narrow_int_strategy(INTTYPE):
+    bits = rffi.sizeof(INTTYPE) * 8
+    MIN = -(1 << (bits - 1))
+    MAX = (1 << (bits - 1)) - 1
+    NarrowBaseTimSort = make_timsort_class()
+
+    class NarrowIntSort(NarrowBaseTimSort):
+        def lt(self, a, b):
+            # no arithmetic nor comparison on these small types
+            return widen(a) < widen(b)
+
+    class NarrowIntegerListStrategy(BaseNarrowIntegerListStrategy):
+        import_from_mixin(AbstractUnwrappedStrategy)
+
+        _none_value = rffi.cast(INTTYPE, 0)
+
+        def fits(self, intval):
+            return MIN <= intval <= MAX
+
+        def wrap(self, value):
+            return self.space.newint(widen(value))
+
+        def unwrap(self, w_int):
+            return rffi.cast(INTTYPE, self.space.int_w(w_int))
+
+        def _quick_cmp(self, a, b):
+            return widen(a) == widen(b)
+
+        erase, unerase = rerased.new_erasing_pair("int%d" % bits)
+        erase = staticmethod(erase)
+        unerase = staticmethod(unerase)
+
+        def is_correct_type(self, w_obj):
+            return (type(w_obj) is W_IntObject and
+                    self.fits(self.space.int_w(w_obj)))
+
+        def list_is_correct_type(self, w_list):
+            return w_list.strategy is self
+
+        def store_converted(self, w_list, items):
+            # all the integers in 'items' fit
+            w_list.strategy = self
+            w_list.lstorage = self.erase(
+                [rffi.cast(INTTYPE, item) for item in items])
+
+        def switch_to_next_strategy(self, w_list, w_sample_item):
+            space = self.space
+            if type(w_sample_item) is W_IntObject:
+                intval = space.int_w(w_sample_item)
+                strategy = get_int_strategy_for_range(
+                    space, min(intval, MIN), max(intval, MAX))
+            else:
+                # the IntegerListStrategy knows what to do next
+                strategy = space.fromcache(IntegerListStrategy)
+            strategy.store_converted(w_list, self.getitems_int(w_list))
+
+        def find_or_count(self, w_list, w_obj, start, stop, count):
+            if type(w_obj) is W_IntObject:
+                if self.fits(self.space.int_w(w_obj)):
+                    return self._safe_find_or_count(
+                        self.unerase(w_list.lstorage), self.unwrap(w_obj),
+                        start, stop, count)
+                if count:
+                    return 0
+                raise ValueError
+            return ListStrategy.find_or_count(
+                self, w_list, w_obj, start, stop, count)
+
+        def _safe_find_or_count(self, l, obj, start, stop, count):
+            obj = widen(obj)
+            result = 0
+            for i in range(start, min(stop, len(l))):
+                if widen(l[i]) == obj:
+                    if count:
+                        result += 1
+                    else:
+                        return i
+            if count:
+                return result
+            raise ValueError
+
+        def sort(self, w_list, reverse):
+            l = self.unerase(w_list.lstorage)
+            sorter = NarrowIntSort(l, len(l))
+            sorter.sort()
+            if reverse:
+                l.reverse()
+
+        def getitems_int(self, w_list):
+            # a copy, like for the range lists
+            return [widen(item) for item in self.unerase(w_list.lstorage)]
+
+        def _strategy_to_hold(self, w_other):
+            # the strategy that can store both our items and the ones of
+            # the non-empty w_other.  If w_other is not a list of integers,
+            # this is the IntegerListStrategy, which knows how to mix them
+            strategy = w_other.strategy
+            if isinstance(strategy, BaseNarrowIntegerListStrategy):
+                lo = strategy.MIN
+                hi = strategy.MAX
+            elif (strategy is self.space.fromcache(IntegerListStrategy) or
+                    isinstance(strategy, BaseRangeListStrategy)):
+                lo, hi = _compute_int_range(w_other.getitems_int())
+            else:
+                return self.space.fromcache(IntegerListStrategy)
+            return get_int_strategy_for_range(self.space, min(lo, MIN),
+                                              max(hi, MAX))
+
+        _base_extend_from_list = _extend_from_list
+
+        def _extend_from_list(self, w_list, w_other):
+            if self.list_is_correct_type(w_other) or w_other.length() == 0:
+                return self._base_extend_from_list(w_list, w_other)
+            strategy = self._strategy_to_hold(w_other)
+            if strategy is self:
+                l = self.unerase(w_list.lstorage)
+                for item in w_other.getitems_int():
+                    l.append(rffi.cast(INTTYPE, item))
+                return
+            strategy.store_converted(w_list, self.getitems_int(w_list))
+            w_list.extend(w_other)
+
+        _base_setslice = setslice
+
+        def setslice(self, w_list, start, step, slicelength, w_other):
+            if not self.list_is_correct_type(w_other) and w_other.length() != 0:
+                strategy = self._strategy_to_hold(w_other)
+                if strategy is not self:
+                    strategy.store_converted(w_list, self.getitems_int(w_list))
+                    w_list.setslice(start, step, slicelength, w_other)
+                    return
+                storage = self.erase([rffi.cast(INTTYPE, item)
+                                      for item in w_other.getitems_int()])
+                w_other = W_ListObject.from_storage_and_strategy(
+                    self.space, storage, self)
+            return self._base_setslice(w_list, start, step, slicelength,
+                                       w_other)
+
+        def repr(self, w_list):
+            l = self.unerase(w_list.lstorage)
+            b = StringBuilder()
+            b.append('[')
+            for i in range(len(l)):
+                if i > 0:
+                    b.append(', ')
+                b.append(str(widen(l[i])))
+            b.append(']')
+            return self.space.newtext(b.build())
+
+    NarrowIntegerListStrategy.__name__ = 'Int%dListStrategy' % bits
+    NarrowIntegerListStrategy.MIN = MIN
+    NarrowIntegerListStrategy.MAX = MAX
+    return NarrowIntegerListStrategy
+
+Int8ListStrategy = _make_narrow_int_strategy(rffi.SIGNEDCHAR)
+Int16ListStrategy = _make_narrow_int_strategy(rffi.SHORT)
+narrow_int_strategies = [Int8ListStrategy, Int16ListStrategy]
+if LONG_BIT > 32:
+    Int32ListStrategy = _make_narrow_int_strategy(rffi.INT)
+    narrow_int_strategies.append(Int32ListStrategy)
+unroll_narrow_int_strategies = unrolling_iterable(narrow_int_strategies)
+
+def get_int_strategy_for_range(space, lo, hi):
+    """Return the narrowest strategy that can store integers between
+    'lo' and 'hi'."""
+    for cls in unroll_narrow_int_strategies:
+        if cls.MIN <= lo and hi <= cls.MAX:
+            return space.fromcache(cls)
+    return space.fromcache(IntegerListStrategy)
+
+def _compute_int_range(items):
+    lo = hi = 0
+    for item in items:
+        if item < lo:
+            lo = item
+        elif item > hi:
+            hi = item
+    return (lo, hi)
+
+
 class FloatListStrategy(ListStrategy):
     import_from_mixin(AbstractUnwrappedStrategy)
 
@@ -2046,6 +2326,7 @@ class FloatListStrategy(ListStrategy):
 
     def _extend_from_list(self, w_list, w_other):
         if (w_other.strategy is self.space.fromcache(IntegerListStrategy) or
+            isinstance(w_other.strategy, BaseNarrowIntegerListStrategy) or
             w_other.strategy is self.space.fromcache(IntOrFloatListStrategy)):
             # xxx a case that we don't optimize: [3.4].extend([9999999999999])
             # will cause a switch to int-or-float, followed by another
@@ -2060,6 +2341,7 @@ class FloatListStrategy(ListStrategy):
 
     def setslice(self, w_list, start, step, slicelength, w_other):
         if (w_other.strategy is self.space.fromcache(IntegerListStrategy) or
+            isinstance(w_other.strategy, BaseNarrowIntegerListStrategy) or
             w_other.strategy is self.space.fromcache(IntOrFloatListStrategy)):
             if self.switch_to_int_or_float_strategy(w_list):
                 w_list.setslice(start, step, slicelength, w_other)
@@ -2198,7 +2480,8 @@ class IntOrFloatListStrategy(ListStrategy):
         l += longlong_list
 
     def _extend_from_list(self, w_list, w_other):
-        if w_other.strategy is self.space.fromcache(IntegerListStrategy):
+        if (w_other.strategy is self.space.fromcache(IntegerListStrategy) or
+                isinstance(w_other.strategy, BaseNarrowIntegerListStrategy)):
             try:
                 longlong_list = IntegerListStrategy.int_2_float_or_int(w_other)
             except ValueError:
@@ -2221,7 +2504,8 @@ class IntOrFloatListStrategy(ListStrategy):
         return W_ListObject.from_storage_and_strategy(self.space, storage, self)
 
     def setslice(self, w_list, start, step, slicelength, w_other):
-        if w_other.strategy is self.space.fromcache(IntegerListStrategy):
+        if (w_other.strategy is self.space.fromcache(IntegerListStrategy) or
+                isinstance(w_other.strategy, BaseNarrowIntegerListStrategy)):
             try:
                 longlong_list = IntegerListStrategy.int_2_float_or_int(w_other)
             except ValueError:
@@ -2432,6 +2716,85 @@ class CustomKeyCompareSort(CustomCompareSort):
         return CustomCompareSort.lt(self, a.w_key, b.w_key)
 
 
+def _make_unwrapped_key_sort(name, is_correct_type, unwrap):
+    """Make a function that sorts a list of items by their keys, if all
+    the keys are of the type checked by is_correct_type().  The unwrapped
+    keys are sorted in a typed list, and the items are moved along."""
+
+    class KeyedItems(object):
+        def __init__(self, keys, items_w):
+            self.keys = keys
+            self.items_w = items_w
+
+    def getitem(lst, index):
+        return (lst.keys[index], lst.items_w[index])
+
+    def setitem(lst, index, item):
+        key, w_item = item
+        lst.keys[index] = key
+        lst.items_w[index] = w_item
+
+    def length(lst):
+        return len(lst.keys)
+
+    def getitem_slice(lst, start, stop):
+        return KeyedItems(lst.keys[start:stop], lst.items_w[start:stop])
+
+    def lt(a, b):
+        return a[0] < b[0]
+
+    KeySort = make_timsort_class(getitem, setitem, length, getitem_slice, lt)
+    KeySort.__name__ = name
+
+    def sort_by_keys(space, keys_w, list_w, reverse):
+        for w_key in keys_w:
+            if not is_correct_type(w_key):
+                return False
+        keys = [unwrap(space, w_key) for w_key in keys_w]
+        # same trick as in descr_sort() for the stability of reverse sorts
+        if reverse:
+            keys.reverse()
+            list_w.reverse()
+        KeySort(KeyedItems(keys, list_w)).sort()
+        if reverse:
+            keys.reverse()
+            list_w.reverse()
+        return True
+    return sort_by_keys
+
+_sort_by_int_keys = _make_unwrapped_key_sort('IntKeySort',
+    lambda w_key: type(w_key) is W_IntObject,
+    lambda space, w_key: space.int_w(w_key))
+_sort_by_float_keys = _make_unwrapped_key_sort('FloatKeySort',
+    lambda w_key: type(w_key) is W_FloatObject,
+    lambda space, w_key: space.float_w(w_key))
+_sort_by_bytes_keys = _make_unwrapped_key_sort('BytesKeySort',
+    lambda w_key: type(w_key) is W_BytesObject,
+    lambda space, w_key: space.bytes_w(w_key))
+# the utf-8 encoded strings are in the same order as the unicodes, but
+# only ascii is common enough to bother
+_sort_by_ascii_keys = _make_unwrapped_key_sort('AsciiKeySort',
+    lambda w_key: type(w_key) is W_UnicodeObject and w_key.is_ascii(),
+    lambda space, w_key: space.utf8_w(w_key))
+
+def _sort_by_unwrapped_keys(space, keys_w, list_w, reverse):
+    """Sort list_w in place according to keys_w, if all the keys are ints,
+    floats, byte strings or ascii unicodes.  Return False, without changing
+    list_w, otherwise."""
+    if not keys_w:
+        return False
+    w_first = keys_w[0]
+    if type(w_first) is W_IntObject:
+        return _sort_by_int_keys(space, keys_w, list_w, reverse)
+    elif type(w_first) is W_FloatObject:
+        return _sort_by_float_keys(space, keys_w, list_w, reverse)
+    elif type(w_first) is W_BytesObject:
+        return _sort_by_bytes_keys(space, keys_w, list_w, reverse)
+    elif type(w_first) is W_UnicodeObject:
+        return _sort_by_ascii_keys(space, keys_w, list_w, reverse)
+    return False
+
+
 W_ListObject.typedef = TypeDef("list",
     __doc__ = """list() -> new empty list
 list(iterable) -> new list initialized from iterable's items""",
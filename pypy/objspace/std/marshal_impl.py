@@ -267,17 +267,26 @@ def unmarshal_bytes(space, u, tc):
 
 @unmarshaller(TYPE_INTERNED)
 def unmarshal_interned(space, u, tc):
-    w_ret = space.new_interned_str(u.get_str())
+    s = u.get_str()
+    w_ret = space.new_interned_str(s)
     u.stringtable_w.append(w_ret)
+    if u.lazy_codes and len(u.interned_strs) < len(u.stringtable_w):
+        # seen for the first time: record it for LazyCodeBody.load()
+        u.interned_strs.append(s)
     return w_ret
 
 @unmarshaller(TYPE_STRINGREF)
 def unmarshal_stringref(space, u, tc):
     idx = u.get_int()
     try:
-        return u.stringtable_w[idx]
+        w_ret = u.stringtable_w[idx]
     except IndexError:
         raise oefmt(space.w_ValueError, "bad marshal data")
+    if w_ret is None:
+        # see LazyCodeBody.load()
+        w_ret = space.new_interned_str(u.interned_strs[idx])
+        u.stringtable_w[idx] = w_ret
+    return w_ret
 
 
 @marshaller(W_AbstractTupleObject)
@@ -341,6 +350,7 @@ def marshal_pycode(space, w_pycode, m):
     m.start(TYPE_CODE)
     # see pypy.interpreter.pycode for the layout
     x = space.interp_w(PyCode, w_pycode)
+    x.ensure_loaded()
     m.put_int(x.co_argcount)
     m.put_int(x.co_nlocals)
     m.put_int(x.co_stacksize)
@@ -374,13 +384,19 @@ def unmarshal_strlist(u, tc):
 
 @unmarshaller(TYPE_CODE)
 def unmarshal_pycode(space, u, tc):
+    if u.lazy_codes and u.code_depth > 0:
+        return unmarshal_pycode_lazily(space, u)
     argcount    = u.get_int()
     nlocals     = u.get_int()
     stacksize   = u.get_int()
     flags       = u.get_int()
     code        = unmarshal_str(u)
     u.start(TYPE_TUPLE)
-    consts_w    = u.get_tuple_w()
+    u.code_depth += 1
+    try:
+        consts_w = u.get_tuple_w()
+    finally:
+        u.code_depth -= 1
     # copy in order not to merge it with anything else
     names       = unmarshal_strlist(u, TYPE_TUPLE)
     varnames    = unmarshal_strlist(u, TYPE_TUPLE)
@@ -395,6 +411,140 @@ def unmarshal_pycode(space, u, tc):
                   name, firstlineno, lnotab, freevars, cellvars)
 
 
+# Lazy unmarshalling of code objects, used when importing .pyc files.
+# The code objects nested in the module's code object are created
+# without co_code, co_consts_w, co_names_w and co_lnotab: the part of the
+# marshal data that contains them is only skipped over, which doesn't
+# allocate anything apart from the interned strings (they are needed
+# because of the TYPE_STRINGREF references that follow).  The skipped
+# part is unmarshalled by PyCode.ensure_loaded().  The interned strings
+# are kept as RPython strings, in order not to keep alive all the
+# W_Roots of the stringtable.
+
+class LazyCodeBody(object):
+    lnotab_pos = -1
+    lnotab = None
+    # set when PyCode.remove_docstrings() or update_filenames() is
+    # called before the body is loaded
+    remove_docstrings = False
+    old_filename = None
+
+    def __init__(self, bufstr, interned_strs, stringtable_len, pos):
+        self.bufstr = bufstr
+        # shared by all the LazyCodeBodies of the same .pyc file
+        self.interned_strs = interned_strs
+        # only the interned strings seen so far can be referenced; this
+        # is not len(interned_strs), which may already contain the strings
+        # that follow if the enclosing code object was loaded lazily too
+        self.stringtable_len = stringtable_len
+        self.pos = pos
+
+    def load(self, pycode):
+        from pypy.module.marshal.interp_marshal import StringUnmarshaller
+        space = pycode.space
+        u = StringUnmarshaller(space, space.newbytes(self.bufstr))
+        u.bufpos = self.pos
+        u.stringtable_w = [None] * self.stringtable_len
+        u.interned_strs = self.interned_strs
+        u.lazy_codes = True
+        code = unmarshal_str(u)
+        u.start(TYPE_TUPLE)
+        u.code_depth = 1
+        consts_w = u.get_tuple_w()
+        names = unmarshal_strlist(u, TYPE_TUPLE)
+        lnotab = self.lnotab
+        if lnotab is None:
+            u.bufpos = self.lnotab_pos
+            lnotab = unmarshal_str(u)
+        pycode.co_code = code
+        pycode.co_consts_w = consts_w[:]
+        pycode.co_names_w = [space.new_interned_str(aname)
+                             for aname in names]
+        pycode.co_lnotab = lnotab
+
+def unmarshal_pycode_lazily(space, u):
+    from pypy.module.marshal.interp_marshal import StringUnmarshaller
+    assert isinstance(u, StringUnmarshaller)
+    argcount    = u.get_int()
+    nlocals     = u.get_int()
+    stacksize   = u.get_int()
+    flags       = u.get_int()
+    lazy_body = LazyCodeBody(u.bufstr, u.interned_strs,
+                             len(u.stringtable_w), u.bufpos)
+    skip_w_obj(u)               # code
+    u.start(TYPE_TUPLE)
+    skip_tuple(u)               # consts
+    skip_w_obj(u)               # names
+    varnames    = unmarshal_strlist(u, TYPE_TUPLE)
+    freevars    = unmarshal_strlist(u, TYPE_TUPLE)
+    cellvars    = unmarshal_strlist(u, TYPE_TUPLE)
+    filename    = unmarshal_str(u)
+    name        = unmarshal_str(u)
+    firstlineno = u.get_int()
+    if u.peek1() == TYPE_STRING:
+        lazy_body.lnotab_pos = u.bufpos
+        skip_w_obj(u)
+    else:
+        lazy_body.lnotab = unmarshal_str(u)
+    return PyCode(space, argcount, nlocals, stacksize, flags,
+                  "", [], [], varnames, filename,
+                  name, firstlineno, "", freevars, cellvars,
+                  lazy_body=lazy_body)
+
+def skip_w_obj(u, allow_null=False):
+    """Skip over the marshal data of one object.  Returns False if it is
+    TYPE_NULL."""
+    tc = u.get1()
+    if tc == TYPE_NULL:
+        if not allow_null:
+            raise oefmt(u.space.w_TypeError, "NULL object in marshal data")
+        return False
+    elif (tc == TYPE_NONE or tc == TYPE_TRUE or tc == TYPE_FALSE or
+          tc == TYPE_STOPITER or tc == TYPE_ELLIPSIS):
+        pass
+    elif tc == TYPE_INT or tc == TYPE_STRINGREF:
+        u.skip(4)
+    elif tc == TYPE_INT64 or tc == TYPE_BINARY_FLOAT:
+        u.skip(8)
+    elif tc == TYPE_BINARY_COMPLEX:
+        u.skip(16)
+    elif tc == TYPE_FLOAT:
+        u.skip(ord(u.get1()))
+    elif tc == TYPE_COMPLEX:
+        u.skip(ord(u.get1()))
+        u.skip(ord(u.get1()))
+    elif tc == TYPE_LONG:
+        lng = u.get_int()
+        if lng < 0:
+            lng = -lng
+        for i in range(lng):
+            u.skip(2)
+    elif tc == TYPE_STRING or tc == TYPE_UNICODE:
+        u.skip(u.get_lng())
+    elif tc == TYPE_INTERNED:
+        unmarshal_interned(u.space, u, tc)
+    elif (tc == TYPE_TUPLE or tc == TYPE_LIST or tc == TYPE_SET or
+          tc == TYPE_FROZENSET):
+        skip_tuple(u)
+    elif tc == TYPE_DICT:
+        while skip_w_obj(u, allow_null=True):
+            skip_w_obj(u)
+    elif tc == TYPE_CODE:
+        u.skip(16)              # argcount, nlocals, stacksize, flags
+        for i in range(8):      # code, consts, ..., filename, name
+            skip_w_obj(u)
+        u.skip(4)               # firstlineno
+        skip_w_obj(u)           # lnotab
+    else:
+        u.raise_exc("bad marshal data (unknown type code)")
+    return True
+
+def skip_tuple(u):
+    lng = u.get_lng()
+    for i in range(lng):
+        skip_w_obj(u)
+
+
 @marshaller(W_UnicodeObject)
 def marshal_unicode(space, w_unicode, m):
     s = space.utf8_w(w_unicode)
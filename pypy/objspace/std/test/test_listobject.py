@@ -504,6 +504,28 @@ class TestW_ListObject(object):
         space.call_method(w_list, "extend", w_tup) # does not crash because of the shortcut
         assert space.unwrap(w_list) == [5, 6, 7]
 
+    def test_sort_by_unwrapped_keys(self, space):
+        from pypy.objspace.std.listobject import _sort_by_unwrapped_keys
+        w = space.wrap
+        items_w = [w(c) for c in 'abcd']
+        keys_w = [w(2), w(-5), w(2), w(0)]
+        assert _sort_by_unwrapped_keys(space, keys_w, items_w, False)
+        assert space.unwrap(space.newlist(items_w)) == list('bdac')
+        items_w = [w(c) for c in 'abcd']
+        assert _sort_by_unwrapped_keys(space, keys_w, items_w, True)
+        assert space.unwrap(space.newlist(items_w)) == list('acdb')
+        for keys_w in ([w(1.5), w(-2.0)], [space.newbytes('b'), w('a')],
+                       [space.newutf8('b', 1), space.newutf8('a', 1)]):
+            items_w = [w(1), w(2)]
+            assert _sort_by_unwrapped_keys(space, keys_w, items_w, False)
+            assert space.unwrap(space.newlist(items_w)) == [2, 1]
+        for keys_w in ([w(1), w(1.5)], [w(1), space.w_True],
+                       [space.newutf8('\xc3\xa9', 1), space.newutf8('a', 1)],
+                       [space.w_None, space.w_None]):
+            items_w = [w(1), w(2)]
+            assert not _sort_by_unwrapped_keys(space, keys_w, items_w, False)
+            assert space.unwrap(space.newlist(items_w)) == [1, 2]
+
 
 class AppTestListObject(object):
     #spaceconfig = {"objspace.std.withliststrategies": True}  # it's the default
@@ -755,6 +777,34 @@ class AppTestListObject(object):
         r.sort(key=lambda x: -x)
         assert r == range(9, -1, -1)
 
+    def test_sort_key_unwrapped(self):
+        # the keys are all ints, floats, bytes or ascii unicodes: the
+        # sort must still be stable, also when reversed
+        for keys in ([3, -1, 3, 2 ** 40, 0, -1, 3],
+                     [2.5, -1.0, 2.5, 1e100, 0.0, -1.0, 2.5],
+                     ['c', 'a', 'c', 'zz', 'b', 'a', 'c'],
+                     [u'c', u'a', u'c', u'zz', u'b', u'a', u'c']):
+            l = range(len(keys))
+            l.sort(key=keys.__getitem__)
+            assert l == [1, 5, 4, 0, 2, 6, 3]
+            l.sort(key=keys.__getitem__, reverse=True)
+            assert l == [3, 0, 2, 6, 4, 1, 5]
+            l = [(key, i) for i, key in enumerate(keys)]
+            assert sorted(l, key=lambda x: x[0]) == sorted(l)
+        # mixed or unusual keys: the generic path
+        l = [5, 2.5, 2 ** 100, True, u'\xe9', u'a']
+        assert sorted(range(6), key=l.__getitem__) == [3, 1, 0, 2, 5, 4]
+        class MyInt(int):
+            def __lt__(self, other):
+                return int(self) > int(other)
+        assert sorted([MyInt(1), MyInt(3), MyInt(2)], key=lambda x: x) == [
+            3, 2, 1]
+        l = [3, 1, 2]
+        def key(x):
+            l.append(x)
+            return x
+        raises(ValueError, l.sort, key=key)
+
     def test_sort_reversed(self):
         l = range(10)
         l.sort(reverse=True)
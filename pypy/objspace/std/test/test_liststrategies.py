@@ -4,7 +4,7 @@ from pypy.objspace.std.listobject import (
     W_ListObject, EmptyListStrategy, ObjectListStrategy, IntegerListStrategy,
     FloatListStrategy, BytesListStrategy, RangeListStrategy,
     SimpleRangeListStrategy, make_range_list, AsciiListStrategy,
-    IntOrFloatListStrategy)
+    IntOrFloatListStrategy, Int8ListStrategy, Int16ListStrategy)
 from pypy.objspace.std import listobject
 from pypy.objspace.std.test.test_listobject import TestW_ListObject
 
@@ -1059,3 +1059,135 @@ class TestW_ListStrategiesDisabled:
         assert isinstance(W_ListObject(self.space, [self.space.wrap(1),self.space.wrap('a')]).strategy, ObjectListStrategy)
         assert isinstance(W_ListObject(self.space, [self.space.wrap(1),self.space.wrap(2),self.space.wrap(3)]).strategy, ObjectListStrategy)
         assert isinstance(W_ListObject(self.space, [self.space.wrap('a'), self.space.wrap('b')]).strategy, ObjectListStrategy)
+
+
+class TestW_ListStrategiesCompactInt:
+    spaceconfig = {"objspace.std.compactintlistlength": 8}
+
+    def newlist(self, items):
+        # lists are only compacted when they grow
+        w_l = W_ListObject(self.space, [])
+        for i in items:
+            w_l.append(self.space.wrap(i))
+        return w_l
+
+    def test_compact_when_growing(self):
+        space = self.space
+        w_l = W_ListObject(space, [space.wrap(i) for i in range(9)])
+        assert isinstance(w_l.strategy, IntegerListStrategy)
+        for i in range(9, 15):
+            w_l.append(space.wrap(i))
+        assert isinstance(w_l.strategy, IntegerListStrategy)
+        w_l.append(space.wrap(15))
+        assert isinstance(w_l.strategy, Int8ListStrategy)
+        assert space.unwrap(w_l) == range(16)
+        w_l = self.newlist([1, 2])
+        w_l.extend(self.newlist([1000] * 10))
+        assert isinstance(w_l.strategy, Int16ListStrategy)
+        assert space.unwrap(w_l) == [1, 2] + [1000] * 10
+        w_l = self.newlist([1, -3])
+        w_l = w_l.mul(4)
+        assert isinstance(w_l.strategy, Int8ListStrategy)
+        assert space.unwrap(w_l) == [1, -3] * 4
+        w_l = W_ListObject(space, [])
+        w_l.extend(space.iter(W_ListObject(space, [space.wrap(i)
+                                                   for i in range(20)])))
+        assert isinstance(w_l.strategy, Int8ListStrategy)
+        w_l = self.newlist([sys.maxint] * 20)
+        w_l.append(space.wrap(5))
+        assert isinstance(w_l.strategy, IntegerListStrategy)
+
+    def test_widen(self):
+        space = self.space
+        w_l = self.newlist([0] * 9)
+        assert isinstance(w_l.strategy, Int8ListStrategy)
+        w_l.append(space.wrap(-128))
+        assert isinstance(w_l.strategy, Int8ListStrategy)
+        w_l.setitem(0, space.wrap(128))
+        assert isinstance(w_l.strategy, Int16ListStrategy)
+        w_l.insert(1, space.wrap(-2 ** 15))
+        assert isinstance(w_l.strategy, Int16ListStrategy)
+        w_l.append(space.wrap(2 ** 40))
+        assert isinstance(w_l.strategy, IntegerListStrategy)
+        assert space.unwrap(w_l) == [128, -2 ** 15] + [0] * 8 + [-128,
+                                                                2 ** 40]
+        w_l = self.newlist([1] * 9)
+        w_l.append(space.wrap(2.5))
+        assert isinstance(w_l.strategy, IntOrFloatListStrategy)
+        assert space.unwrap(w_l) == [1] * 9 + [2.5]
+        w_l = self.newlist([1] * 9)
+        w_l.append(space.wrap("x"))
+        assert isinstance(w_l.strategy, ObjectListStrategy)
+        assert space.unwrap(w_l) == [1] * 9 + ["x"]
+
+    def test_extend_and_setslice(self):
+        space = self.space
+        w_l = self.newlist([1] * 9)
+        w_l.extend(self.newlist([300, 2]))
+        assert isinstance(w_l.strategy, Int16ListStrategy)
+        w_l.extend(make_range_list(space, 0, 1, 3))
+        assert isinstance(w_l.strategy, Int16ListStrategy)
+        w_l.extend(self.newlist([5] * 9))
+        assert isinstance(w_l.strategy, Int16ListStrategy)
+        assert space.unwrap(w_l) == [1] * 9 + [300, 2, 0, 1, 2] + [5] * 9
+        w_l = self.newlist([1] * 9)
+        w_l.setslice(0, 1, 2, self.newlist([1000, 2000]))
+        assert isinstance(w_l.strategy, Int16ListStrategy)
+        w_l.setslice(0, 1, 2, W_ListObject(space, []))
+        assert isinstance(w_l.strategy, Int16ListStrategy)
+        assert space.unwrap(w_l) == [1] * 7
+        w_l.extend(self.newlist([1.5]))
+        assert isinstance(w_l.strategy, IntOrFloatListStrategy)
+        assert space.unwrap(w_l) == [1] * 7 + [1.5]
+        w_f = W_ListObject(space, [space.wrap(1.5)])
+        w_f.extend(self.newlist([7] * 9))
+        assert isinstance(w_f.strategy, IntOrFloatListStrategy)
+        assert space.unwrap(w_f) == [1.5] + [7] * 9
+        w_i = self.newlist([sys.maxint])
+        w_i.extend(self.newlist([7] * 9))
+        assert isinstance(w_i.strategy, IntegerListStrategy)
+        assert space.unwrap(w_i) == [sys.maxint] + [7] * 9
+
+    def test_no_rescan_around_power_of_two(self, monkeypatch):
+        space = self.space
+        w_l = self.newlist([sys.maxint] * 15)
+        assert isinstance(w_l.strategy, IntegerListStrategy)
+        scans = []
+        monkeypatch.setattr(IntegerListStrategy, '_compact',
+                            lambda self, w_list: scans.append(w_list.length()))
+        # untranslated, the physical size is the length
+        w_l.append(space.wrap(1))
+        assert scans == [16]
+        # the storage doesn't shrink when items are removed, so going
+        # back above 16 items doesn't scan the list again
+        monkeypatch.setattr(IntegerListStrategy, 'physical_size',
+                            lambda self, w_list: 20)
+        for i in range(5):
+            w_l.pop_end()
+            w_l.append(space.wrap(1))
+        assert scans == [16]
+
+    def test_operations(self):
+        space = self.space
+        w_l = self.newlist([5, -3, 100, 0, 5, 7, -128, 5, 1])
+        assert isinstance(w_l.strategy, Int8ListStrategy)
+        assert w_l.find_or_count(space.wrap(5), count=True) == 3
+        assert w_l.find_or_count(space.wrap(100)) == 2
+        assert w_l.find_or_count(space.wrap(1000), count=True) == 0
+        py.test.raises(ValueError, w_l.find_or_count, space.wrap(1000))
+        assert w_l.getitems_int() == [5, -3, 100, 0, 5, 7, -128, 5, 1]
+        intlist = space.unpackiterable_int(w_l)
+        assert intlist == [5, -3, 100, 0, 5, 7, -128, 5, 1]
+        intlist.append(42)
+        assert w_l.length() == 9
+        assert space.text_w(w_l.descr_repr(space)) == (
+            '[5, -3, 100, 0, 5, 7, -128, 5, 1]')
+        w_l.sort(False)
+        assert space.unwrap(w_l) == [-128, -3, 0, 1, 5, 5, 5, 7, 100]
+        w_l.sort(True)
+        assert space.unwrap(w_l) == [100, 7, 5, 5, 5, 1, 0, -3, -128]
+        assert isinstance(w_l.strategy, Int8ListStrategy)
+        assert space.unwrap(w_l.getslice(1, 3, 1, 2)) == [7, 5]
+        assert isinstance(w_l.getslice(1, 3, 1, 2).strategy,
+                          Int8ListStrategy)
+        assert space.unwrap(w_l.pop(0)) == 100
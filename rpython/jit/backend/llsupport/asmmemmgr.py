@@ -18,6 +18,7 @@ class AsmMemoryManager(object):
                        num_indices      = NUM_INDICES):
         self.total_memory_allocated = r_uint(0)
         self.total_mallocs = r_uint(0)
+        self.total_freed = r_uint(0)
         self.large_alloc_size = large_alloc_size
         self.min_fragment = min_fragment
         self.num_indices = num_indices
@@ -27,7 +28,8 @@ class AsmMemoryManager(object):
 
     def get_stats(self):
         """Returns stats for rlib.jit.jit_hooks.stats_asmmemmgr_*()."""
-        return (self.total_memory_allocated, self.total_mallocs)
+        return (self.total_memory_allocated, self.total_mallocs,
+                self.total_freed)
 
     def malloc(self, minsize, maxsize):
         """Allocate executable memory, between minsize and maxsize bytes,
@@ -48,6 +50,7 @@ class AsmMemoryManager(object):
         """Free a block (start, stop) returned by a previous malloc()."""
         if r_uint is not None:
             self.total_mallocs -= r_uint(stop - start)
+            self.total_freed += r_uint(stop - start)
         self._add_free_block(start, stop)
 
     def open_malloc(self, minsize):
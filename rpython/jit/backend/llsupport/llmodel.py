@@ -8,6 +8,7 @@ from rpython.rtyper.annlowlevel import llhelper, MixLevelHelperAnnotator
 from rpython.rtyper.annlowlevel import hlstr, hlunicode
 from rpython.rtyper.llannotation import lltype_to_annotation
 from rpython.rlib.objectmodel import we_are_translated, specialize, compute_hash
+from rpython.rlib.rarithmetic import intmask
 from rpython.rlib.rmmap import enter_assembler_writing, leave_assembler_writing
 from rpython.jit.metainterp import history, compile
 from rpython.jit.metainterp.optimize import SpeculativeError
@@ -267,6 +268,18 @@ class AbstractLLCPU(AbstractCPU):
                 if self.HAS_CODEMAP:
                     self.codemap.free_asm_block(rawstart, rawstop)
 
+    def get_code_size_in_use(self):
+        return intmask(self.asmmemmgr.total_mallocs)
+
+    def get_loop_code_size(self, looptoken):
+        clt = looptoken.compiled_loop_token
+        if clt is None or clt.asmmemmgr_blocks is None:
+            return 0
+        size = 0
+        for rawstart, rawstop in clt.asmmemmgr_blocks:
+            size += rawstop - rawstart
+        return size
+
     def force(self, addr_of_force_token):
         frame = rffi.cast(jitframe.JITFRAMEPTR, addr_of_force_token)
         frame = frame.resolve()
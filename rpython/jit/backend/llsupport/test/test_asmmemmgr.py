@@ -101,6 +101,18 @@ def test_malloc_with_fragment():
             assert memmgr.free_blocks_end == {}
             assert memmgr.blocks_by_size == [[], [], [], [], []]
 
+def test_get_stats():
+    memmgr = AsmMemoryManager(min_fragment=8,
+                              num_indices=5)
+    memmgr._add_free_block(10, 50)
+    (start, stop) = memmgr.malloc(12, 12)
+    (start2, stop2) = memmgr.malloc(20, 20)
+    assert memmgr.get_stats() == (0, 32, 0)
+    memmgr.free(start, stop)
+    assert memmgr.get_stats() == (0, 20, 12)
+    memmgr.free(start2, stop2)
+    assert memmgr.get_stats() == (0, 0, 32)
+
 
 class TestAsmMemoryManager:
     AMMClass = AsmMemoryManager
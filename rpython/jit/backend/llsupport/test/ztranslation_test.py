@@ -270,6 +270,27 @@ class TranslationTestJITStats(CCompiledMixin):
         res = self.meta_interp(main, [])
         assert res == 0
 
+    def test_max_code_size(self):
+        driver = JitDriver(greens = ['k'], reds = ['i'])
+
+        def f(k):
+            i = 0
+            while i < 10000:
+                driver.jit_merge_point(i=i, k=k)
+                i += 1
+
+        def main():
+            set_param(driver, 'max_code_size', 1)
+            for k in range(20):
+                f(k)
+            assert jit_hooks.stats_memmgr_max_code_size(None) == 1
+            rgc.collect()
+            assert jit_hooks.stats_asmmemmgr_freed(None) > 0
+            return jit_hooks.stats_memmgr_loops_evicted(None)
+
+        res = self.meta_interp(main, [])
+        assert res >= 10
+
 class TranslationRemoveTypePtrTest(CCompiledMixin):
     CPUClass = getcpuclass()
 
@@ -162,6 +162,16 @@ class AbstractCPU(object):
         """
         pass
 
+    def get_code_size_in_use(self):
+        """Return the number of bytes of machine code and data currently
+        allocated, including the loops that are not freed yet."""
+        return 0
+
+    def get_loop_code_size(self, looptoken):
+        """Return the number of bytes allocated for the machine code and
+        data of 'looptoken' and of all the bridges attached to it."""
+        return 0
+
     def sizeof(self, S):
         raise NotImplementedError
 
@@ -438,6 +438,10 @@ class JitCellToken(AbstractDescr):
     # and more data specified by the backend when the loop is compiled
     number = -1
     generation = r_int64(0)
+    # for the MemoryManager: the JitCell that this loop is attached to,
+    # and the size of its machine code when it was last kept alive
+    jitcell = None
+    code_size = 0
     # one purpose of LoopToken is to keep alive the CompiledLoopToken
     # returned by the backend.  When the LoopToken goes away, the
     # CompiledLoopToken has its __del__ called, which frees the assembler
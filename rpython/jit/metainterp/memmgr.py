@@ -1,7 +1,9 @@
 import math
+from rpython.rlib import listsort
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.jit.metainterp.warmstate import JC_EVICTED
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,6 +21,22 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Additionally, if 'max_code_size' is set, the total size of the machine
+# code of the loops in 'alive_loops' (including their bridges) is kept
+# below it by removing the loops with the smallest 'generation' first,
+# i.e. the ones that were least recently entered or compiled.
+#
+
+# when over 'max_code_size', free loops until we're down to 3/4 of it,
+# so that we don't need to do it again after every compilation
+CODE_SIZE_SLACK = 4
+
+# remember at most this number of evicted loops, waiting for them to be
+# compiled again
+MAX_EVICTED_HASHES = 4096
+
+GenerationSort = listsort.make_timsort_class(
+    lt=lambda a, b: a.generation < b.generation)
 
 class MemoryManager(object):
 
@@ -38,6 +56,17 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.cpu = None           # set by warmspot, for the code sizes
+        self.max_code_size = 0
+        # the sum of the 'code_size' of the loops in 'alive_loops', only
+        # maintained if 'max_code_size' is set
+        self.alive_code_size = 0
+        # statistics
+        self.loops_evicted = 0
+        self.recompiled_after_eviction = 0
+        # {jitcounter hash: None} of the evicted loops that were reached
+        # again by the interpreter
+        self.evicted_hashes = {}
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,15 +78,51 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_max_code_size(self, max_code_size):
+        if max_code_size < 0:
+            max_code_size = 0
+        if max_code_size > 0 and self.max_code_size == 0:
+            # start counting
+            self.alive_code_size = 0
+            for looptoken in self.alive_loops:
+                self._update_code_size(looptoken)
+        self.max_code_size = max_code_size
+
+    def _update_code_size(self, looptoken):
+        size = self.cpu.get_loop_code_size(looptoken)
+        self.alive_code_size += size - looptoken.code_size
+        looptoken.code_size = size
+
+    def _remove_loop(self, looptoken):
+        del self.alive_loops[looptoken]
+        self.alive_code_size -= looptoken.code_size
+        looptoken.code_size = 0
+
+    def _loop_evicted(self, looptoken):
+        # mark the cell, so that evicted_loop_reached() is only called for
+        # the loops freed by us, and not e.g. for the invalidated ones
+        self.loops_evicted += 1
+        cell = looptoken.jitcell
+        if cell is not None:
+            cell.flags |= JC_EVICTED
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        # cheap test first: the memory in use includes the loops that
+        # were already removed from 'alive_loops' but not freed yet
+        if (self.max_code_size > 0 and
+                self.cpu.get_code_size_in_use() > self.max_code_size):
+            self._evict_loops_now()
 
     def keep_loop_alive(self, looptoken):
         if looptoken.generation != self.current_generation:
             looptoken.generation = self.current_generation
+            if self.max_code_size > 0:
+                # also called after a bridge is attached to the loop
+                self._update_code_size(looptoken)
             self.alive_loops[looptoken] = None
 
     def _kill_old_loops_now(self):
@@ -70,7 +135,9 @@ class MemoryManager(object):
         for looptoken in self.alive_loops.keys():
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
-                del self.alive_loops[looptoken]
+                self._remove_loop(looptoken)
+                if not looptoken.invalidated:
+                    self._loop_evicted(looptoken)
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
@@ -82,8 +149,47 @@ class MemoryManager(object):
             rgc.collect(); rgc.collect(); rgc.collect()
         debug_stop("jit-mem-collect")
 
+    def _evict_loops_now(self):
+        total = self.alive_code_size
+        if total <= self.max_code_size:
+            return     # the rest will be freed by the next GC collection
+        debug_start("jit-mem-evict")
+        debug_print("Code size of loops before:", total)
+        target = self.max_code_size - self.max_code_size // CODE_SIZE_SLACK
+        tokens = self.alive_loops.keys()
+        GenerationSort(tokens).sort()
+        evicted = 0
+        for looptoken in tokens:
+            if self.alive_code_size <= target:
+                break
+            if looptoken.generation >= self.current_generation - 1:
+                break    # just compiled or entered: keep it
+            self._remove_loop(looptoken)
+            self._loop_evicted(looptoken)
+            evicted += 1
+        debug_print("Loop tokens evicted:", evicted)
+        debug_print("Code size of loops after: ", self.alive_code_size)
+        debug_stop("jit-mem-evict")
+
+    def evicted_loop_reached(self, hash):
+        """Called when the interpreter reaches the place of a loop whose
+        machine code was freed by _kill_old_loops_now() or
+        _evict_loops_now()."""
+        if len(self.evicted_hashes) >= MAX_EVICTED_HASHES:
+            self.evicted_hashes.clear()
+        self.evicted_hashes[hash] = None
+
+    def loop_attached(self, hash):
+        """Called when a new loop is compiled at some place."""
+        if hash in self.evicted_hashes:
+            del self.evicted_hashes[hash]
+            self.recompiled_after_eviction += 1
+
     def release_all_loops(self):
         debug_start("jit-mem-releaseall")
         debug_print("Loop tokens cleared:", len(self.alive_loops))
+        for looptoken in self.alive_loops:
+            looptoken.code_size = 0
         self.alive_loops.clear()
+        self.alive_code_size = 0
         debug_stop("jit-mem-releaseall")
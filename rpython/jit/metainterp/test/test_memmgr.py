@@ -15,12 +15,29 @@ from rpython.jit.metainterp.memmgr import MemoryManager
 from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.rlib.jit import JitDriver, dont_look_inside
 from rpython.jit.metainterp.warmspot import get_stats
-from rpython.jit.metainterp.warmstate import BaseJitCell
+from rpython.jit.metainterp.warmstate import BaseJitCell, JC_EVICTED
 from rpython.rlib import rgc
 
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    jitcell = None
+    code_size = 0
+
+    def __init__(self, size=0):
+        self.size = size
+
+class FakeCPU:
+    def __init__(self, memmgr):
+        self.memmgr = memmgr
+        self.freed = []     # like loops that the GC didn't collect yet
+
+    def get_code_size_in_use(self):
+        return (sum([token.size for token in self.memmgr.alive_loops]) +
+                sum([token.size for token in self.freed]))
+
+    def get_loop_code_size(self, looptoken):
+        return looptoken.size
 
 
 class _TestMemoryManager:
@@ -77,6 +94,88 @@ class _TestMemoryManager:
                 assert tokens[i] not in memmgr.alive_loops
             else:
                 assert tokens[i] in memmgr.alive_loops
+        assert memmgr.loops_evicted == 3
+
+    def test_max_code_size(self):
+        memmgr = MemoryManager()
+        memmgr.cpu = FakeCPU(memmgr)
+        memmgr.set_max_age(0)
+        memmgr.set_max_code_size(1000)
+        tokens = [FakeLoopToken(300) for i in range(10)]
+        for i in range(len(tokens)):
+            memmgr.keep_loop_alive(tokens[i])
+            if i >= 2:
+                memmgr.keep_loop_alive(tokens[0])   # entered often
+            memmgr.next_generation()
+            live = [token for token in tokens if token in memmgr.alive_loops]
+            assert sum([token.size for token in live]) <= 1000
+        # the least recently entered loops were freed until the code size
+        # went down to 750, i.e. two loops are left
+        assert memmgr.alive_loops == {tokens[0]: None, tokens[9]: None}
+        assert memmgr.loops_evicted == 8
+
+    def test_max_code_size_not_freed_yet(self):
+        memmgr = MemoryManager()
+        memmgr.cpu = FakeCPU(memmgr)
+        memmgr.set_max_age(0)
+        memmgr.set_max_code_size(1000)
+        memmgr.cpu.freed.append(FakeLoopToken(900))
+        tokens = [FakeLoopToken(300) for i in range(3)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        # the memory in use is over the limit, but only because of a
+        # loop that was already removed
+        assert memmgr.alive_loops == dict.fromkeys(tokens)
+        assert memmgr.loops_evicted == 0
+
+    def test_max_code_size_bridges(self):
+        memmgr = MemoryManager()
+        memmgr.cpu = FakeCPU(memmgr)
+        memmgr.set_max_age(0)
+        memmgr.set_max_code_size(1000)
+        tokens = [FakeLoopToken(300) for i in range(3)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert memmgr.alive_code_size == 900
+        # a bridge is attached to the first loop
+        tokens[0].size = 500
+        memmgr.keep_loop_alive(tokens[0])
+        assert memmgr.alive_code_size == 1100
+        memmgr.next_generation()
+        assert memmgr.alive_loops == {tokens[0]: None}
+        assert memmgr.alive_code_size == 500
+        memmgr.release_all_loops()
+        assert memmgr.alive_code_size == 0
+
+    def test_evicted_cells_marked(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(4, 1)
+        tokens = [FakeLoopToken() for i in range(3)]
+        for token in tokens:
+            token.jitcell = BaseJitCell()
+        tokens[1].invalidated = True
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+        for i in range(5):
+            memmgr.next_generation()
+        assert memmgr.alive_loops == {}
+        assert memmgr.loops_evicted == 2
+        assert tokens[0].jitcell.flags & JC_EVICTED
+        assert not tokens[1].jitcell.flags & JC_EVICTED
+        assert tokens[2].jitcell.flags & JC_EVICTED
+
+    def test_recompiled_after_eviction(self):
+        memmgr = MemoryManager()
+        memmgr.loop_attached(42)
+        assert memmgr.recompiled_after_eviction == 0
+        memmgr.evicted_loop_reached(42)
+        memmgr.evicted_loop_reached(43)
+        memmgr.loop_attached(42)
+        memmgr.loop_attached(42)
+        assert memmgr.recompiled_after_eviction == 1
+        assert memmgr.evicted_hashes == {43: None}
 
 
 class _TestIntegration(LLJitMixin):
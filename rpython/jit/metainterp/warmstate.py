@@ -133,6 +133,7 @@ JC_DONT_TRACE_HERE = 0x02
 JC_TEMPORARY       = 0x04
 JC_TRACING_OCCURRED= 0x08
 JC_FORCE_FINISH    = 0x10
+JC_EVICTED         = 0x20
 
 class BaseJitCell(object):
     """Subclasses of BaseJitCell are used in tandem with the single
@@ -183,6 +184,9 @@ class BaseJitCell(object):
         JC_FORCE_FINISH: when from a cell with that flag set, if the trace
         becomes too long, "segment" it, ie finish it with a guard_always_fails.
         this prevents re-tracing and failing this again and again.
+
+        JC_EVICTED: the MemoryManager freed the loop of this cell because
+        it was not used recently, or to keep the machine code small.
     """
     flags = 0     # JC_xxx flags
     wref_procedure_token = None
@@ -296,6 +300,12 @@ class WarmEnterState(object):
             self.warmrunnerdesc.memory_manager is not None):   # all for tests
             self.warmrunnerdesc.memory_manager.set_max_age(value)
 
+    def set_param_max_code_size(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_max_code_size(value)
+
     def set_param_retrace_limit(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -340,6 +350,13 @@ class WarmEnterState(object):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         old_token = cell.get_procedure_token()
         cell.set_procedure_token(procedure_token)
+        cell.flags &= ~JC_EVICTED
+        procedure_token.jitcell = cell
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            memmgr = self.warmrunnerdesc.memory_manager
+            if memmgr.evicted_hashes:
+                memmgr.loop_attached(self.JitCell.get_uhash_at_key(greenkey))
         if old_token is not None:
             self.cpu.redirect_call_assembler(old_token, procedure_token)
             # procedure_token is also kept alive by any loop that used
@@ -496,6 +513,10 @@ class WarmEnterState(object):
                         return
                 # it was an aborted compilation, or maybe a weakref that
                 # has been freed
+                if (cell.flags & JC_EVICTED and
+                        cell.wref_procedure_token() is None):
+                    cell.flags &= ~JC_EVICTED
+                    warmrunnerdesc.memory_manager.evicted_loop_reached(hash)
                 jitcounter.cleanup_chain(hash)
                 return
             if not confirm_enter_jit(*args):
@@ -603,6 +624,11 @@ class WarmEnterState(object):
                     cell = cell.next
                 return None
 
+            @staticmethod
+            def get_uhash_at_key(greenkey):
+                greenargs = unwrap_greenkey(greenkey)
+                return JitCell.get_uhash(*greenargs)
+
             @staticmethod
             def get_jit_cell_at_key(greenkey):
                 greenargs = unwrap_greenkey(greenkey)
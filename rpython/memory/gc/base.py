@@ -225,6 +225,18 @@ class GCBase(object):
     def set_max_heap_size(self, size):
         raise NotImplementedError
 
+    def get_gc_param(self, param_no):
+        return -1.0
+
+    def check_gc_param(self, param_no, value):
+        return False
+
+    def set_gc_param(self, param_no, value):
+        return False
+
+    def get_alloc_profile(self):
+        return []
+
     @staticmethod
     @specialize.memo()
     def assert_callback_is_a_function(callback):
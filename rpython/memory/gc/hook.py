@@ -21,6 +21,9 @@ class GcHooks(object):
     def is_gc_collect_enabled(self):
         return False
 
+    def is_gc_alloc_sample_enabled(self):
+        return False
+
     def on_gc_minor(self, duration, total_memory_used, pinned_objects):
         """
         Called after a minor collection
@@ -45,6 +48,13 @@ class GcHooks(object):
         Called after a major collection is fully done
         """
 
+    def on_gc_alloc_sample(self, size):
+        """
+        Called when the allocation profiler samples an allocation in the
+        nursery, i.e. every ``GC_PARAM_ALLOC_SAMPLE_INTERVAL`` bytes.
+        ``size`` is the size of the sampled object, including the GC header.
+        """
+
     # the fire_* methods are meant to be called from the GC and should NOT be
     # overridden
 
@@ -68,3 +78,8 @@ class GcHooks(object):
                                arenas_count_before, arenas_count_after,
                                arenas_bytes, rawmalloc_bytes_before,
                                rawmalloc_bytes_after, pinned_objects)
+
+    @rgc.no_collect
+    def fire_gc_alloc_sample(self, size):
+        if self.is_gc_alloc_sample_enabled():
+            self.on_gc_alloc_sample(size)
@@ -52,6 +52,12 @@ Environment variables can be used to fine-tune the following parameters:
                          in time.  Defaults to a conservative value depending
                          on nursery size and maximum object size inside the
                          nursery.  Useful for debugging by setting it to 0.
+
+The nursery size, major collection factor, growth, min and max heap size,
+max delta and increment step can also be changed while the program runs,
+with rgc.set_gc_param().  It also supports a soft limit on the heap size,
+which only makes the major collections more frequent, and enabling the
+allocation profiler (see set_alloc_sample_interval()).
 """
 # XXX Should find a way to bound the major collection threshold by the
 # XXX total addressable size.  Maybe by keeping some minimarkpage arenas
@@ -191,6 +197,15 @@ STATE_FINALIZING = 3
 
 GC_STATES = ['SCANNING', 'MARKING', 'SWEEPING', 'FINALIZING']
 
+# With a soft limit on the heap size, the next major collection still
+# starts no earlier than when the heap grows by this factor.
+SOFT_MAX_MIN_GROWTH = 1.2
+
+# Allocation profiling: the per-type counters are indexed by the member
+# index of the type ids, which fits in 16 bits (see T_MEMBER_INDEX).
+ALLOC_PROFILE_TYPES = 0x10000
+ALLOC_PROFILE_ARRAY = lltype.Array(lltype.Signed, hints={'nolength': True})
+
 
 FORWARDSTUB = lltype.GcStruct('forwarding_stub',
                               ('forw', llmemory.Address))
@@ -307,8 +322,20 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.min_heap_size = 0.0
         self.max_heap_size = 0.0
         self.max_heap_size_already_raised = False
+        self.soft_max_heap_size = 0.0
+        #
+        # Allocation profiling, disabled if 'alloc_sample_interval' is 0.
+        # See _arm_alloc_sample().
+        self.alloc_sample_interval = 0
+        self.alloc_sample_countdown = 0
+        self.alloc_sample_area_top = llmemory.NULL
+        self.alloc_sample_armed = False
+        self.alloc_samples = None
+        self.alloc_sample_counts = lltype.nullptr(ALLOC_PROFILE_ARRAY)
+        self.alloc_survivor_counts = lltype.nullptr(ALLOC_PROFILE_ARRAY)
         self.max_delta = float(r_uint(-1))
         self.max_number_of_pinned_objects = 0      # computed later
+        self.max_pinned_from_env = False
         #
         self.card_page_indices = card_page_indices
         if self.card_page_indices > 0:
@@ -522,10 +549,14 @@ class IncrementalMiniMarkGC(MovingGCBase):
             #
             if env_max_number_of_pinned_objects >= 0: # 0 allows to disable pinning completely
                 self.max_number_of_pinned_objects = env_max_number_of_pinned_objects
+                self.max_pinned_from_env = True
         else:
-            # Estimate this number conservatively
-            bigobj = self.nonlarge_max + 1
-            self.max_number_of_pinned_objects = self.nursery_size / (bigobj * 2)
+            self._estimate_max_number_of_pinned_objects()
+
+    def _estimate_max_number_of_pinned_objects(self):
+        # Estimate this number conservatively
+        bigobj = self.nonlarge_max + 1
+        self.max_number_of_pinned_objects = self.nursery_size / (bigobj * 2)
 
     def enable(self):
         self.enabled = True
@@ -677,7 +708,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             ll_assert(result != llmemory.NULL, "uninitialized nursery")
             self.nursery_free = new_free = self._bump_pointer(result, totalsize)
             if new_free > self.nursery_top:
-                result = self.collect_and_reserve(totalsize)
+                result = self.collect_and_reserve(result, totalsize)
             #
             # Build the object.
             llarena.arena_reserve(result, totalsize)
@@ -737,7 +768,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             new_free = self._bump_pointer(result, totalsize)
             self.nursery_free = new_free
             if new_free > self.nursery_top:
-                result = self.collect_and_reserve(totalsize)
+                result = self.collect_and_reserve(result, totalsize)
             #
             # Build the object.
             llarena.arena_reserve(result, totalsize)
@@ -862,13 +893,24 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.rrc_invoke_callback()
 
 
-    def collect_and_reserve(self, totalsize):
+    def collect_and_reserve(self, prev_result, totalsize):
         """To call when nursery_free overflows nursery_top.
-        First check if pinned objects are in front of nursery_top. If so,
+        If nursery_top is only a sampling point of the allocation profiler,
+        take the sample and reserve totalsize at prev_result.
+        Else check if pinned objects are in front of nursery_top. If so,
         jump over the pinned object and try again to reserve totalsize.
         Otherwise do a minor collection, and possibly some steps of a
         major collection, and finally reserve totalsize bytes.
         """
+        if self.alloc_sample_interval > 0:
+            sampling_point = bool(self.alloc_sample_area_top)
+            self._disarm_alloc_sample()
+            if sampling_point:
+                new_free = self._bump_pointer(prev_result, totalsize)
+                if new_free <= self.nursery_top:
+                    self.nursery_free = new_free
+                    self._take_alloc_sample(prev_result, totalsize)
+                    return prev_result
 
         minor_collection_count = 0
         while True:
@@ -941,15 +983,129 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 self.nursery_free = new_free
                 ll_assert(self.nursery_free <= self.nursery_top, "nursery overflow")
                 break
+            if self.alloc_sample_area_top:
+                # the minor collection put a sampling point just before
+                # 'new_free': this allocation is the sample
+                self._disarm_alloc_sample()
+                if new_free <= self.nursery_top:
+                    self.nursery_free = new_free
+                    self._take_alloc_sample(result, totalsize)
+                    break
             #
         #
         if self.debug_tiny_nursery >= 0:   # for debugging
             if self.nursery_top - self.nursery_free > self.debug_tiny_nursery:
                 self.nursery_free = self.nursery_top - self.debug_tiny_nursery
         #
+        if self.alloc_sample_interval > 0:
+            self._arm_alloc_sample()
         return result
     collect_and_reserve._dont_inline_ = True
 
+    def _arm_alloc_sample(self):
+        """Lower nursery_top to the next sampling point of the allocation
+        profiler, if it is in the current area of the nursery.  The
+        allocation that crosses it then goes to collect_and_reserve(),
+        which takes the sample; the inlined fast paths stay unchanged.
+        Does nothing if the current area was already armed.
+        """
+        if self.alloc_sample_armed:
+            return
+        self.alloc_sample_armed = True
+        remaining = self.nursery_top - self.nursery_free
+        if self.alloc_sample_countdown < remaining:
+            self.alloc_sample_area_top = self.nursery_top
+            self.nursery_top = self.nursery_free + self.alloc_sample_countdown
+        else:
+            # the sampling point is further away: count the rest of the
+            # area as allocated
+            self.alloc_sample_countdown -= remaining
+
+    def _disarm_alloc_sample(self):
+        if self.alloc_sample_area_top:
+            self.nursery_top = self.alloc_sample_area_top
+            self.alloc_sample_area_top = llmemory.NULL
+        self.alloc_sample_armed = False
+
+    def _take_alloc_sample(self, result, totalsize):
+        # 'result' is the object being allocated; its type id is read
+        # at the start of the next minor collection
+        self.alloc_samples.append(result)
+        self.alloc_sample_countdown = self.alloc_sample_interval
+        self.alloc_sample_armed = False
+        self._arm_alloc_sample()
+        self.hooks.fire_gc_alloc_sample(raw_malloc_usage(totalsize))
+
+    def _record_alloc_samples(self):
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        while self.alloc_samples.non_empty():
+            obj = self.alloc_samples.pop() + size_gc_header
+            index = self.get_member_index(self.get_type_id(obj))
+            self.alloc_sample_counts[index] += 1
+
+    def _count_alloc_survivor(self, obj):
+        index = self.get_member_index(self.get_type_id(obj))
+        self.alloc_survivor_counts[index] += 1
+
+    def set_alloc_sample_interval(self, interval):
+        """Enable the allocation profiler, or disable it if 'interval' is 0.
+        Every 'interval' bytes allocated in the nursery, the allocated
+        object is sampled.  Enabling it also counts, for each type, the
+        objects that survive minor collections.  The counters are reset
+        when the profiler is enabled, and kept when it is disabled.
+        """
+        self._disarm_alloc_sample()
+        if interval > 0 and self.alloc_sample_interval == 0:
+            self._free_alloc_profile()
+            self.alloc_sample_counts = lltype.malloc(ALLOC_PROFILE_ARRAY,
+                    ALLOC_PROFILE_TYPES, flavor='raw', zero=True,
+                    track_allocation=False)
+            self.alloc_survivor_counts = lltype.malloc(ALLOC_PROFILE_ARRAY,
+                    ALLOC_PROFILE_TYPES, flavor='raw', zero=True,
+                    track_allocation=False)
+            self.alloc_samples = self.AddressStack()
+        elif interval == 0 and self.alloc_sample_interval > 0:
+            # the pending samples are still valid objects of the nursery
+            self._record_alloc_samples()
+            self.alloc_samples.delete()
+            self.alloc_samples = None
+        self.alloc_sample_interval = interval
+        if interval > 0:
+            self.alloc_sample_countdown = interval
+            self._arm_alloc_sample()
+
+    def _free_alloc_profile(self):
+        if self.alloc_sample_counts:
+            lltype.free(self.alloc_sample_counts, flavor='raw',
+                        track_allocation=False)
+            lltype.free(self.alloc_survivor_counts, flavor='raw',
+                        track_allocation=False)
+            self.alloc_sample_counts = lltype.nullptr(ALLOC_PROFILE_ARRAY)
+            self.alloc_survivor_counts = lltype.nullptr(ALLOC_PROFILE_ARRAY)
+
+    def get_alloc_profile(self):
+        if not self.alloc_sample_counts:
+            return []
+        if self.alloc_samples is not None:
+            self._record_alloc_samples()
+        count = 0
+        i = 0
+        while i < ALLOC_PROFILE_TYPES:
+            if self.alloc_sample_counts[i] or self.alloc_survivor_counts[i]:
+                count += 1
+            i += 1
+        result = [0] * (3 * count)
+        j = 0
+        i = 0
+        while i < ALLOC_PROFILE_TYPES:
+            if self.alloc_sample_counts[i] or self.alloc_survivor_counts[i]:
+                result[j] = i
+                result[j + 1] = self.alloc_sample_counts[i]
+                result[j + 2] = self.alloc_survivor_counts[i]
+                j += 3
+            i += 1
+        return result
+
 
     # XXX kill alloc_young and make it always True
     def external_malloc(self, typeid, length, alloc_young):
@@ -1093,11 +1249,113 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
     def set_max_heap_size(self, size):
         self.max_heap_size = float(size)
-        if self.max_heap_size > 0.0:
-            if self.max_heap_size < self.next_major_collection_initial:
-                self.next_major_collection_initial = self.max_heap_size
-            if self.max_heap_size < self.next_major_collection_threshold:
-                self.next_major_collection_threshold = self.max_heap_size
+        self._lower_major_threshold(self.max_heap_size)
+
+    def _lower_major_threshold(self, limit):
+        if limit > 0.0:
+            if limit < self.next_major_collection_initial:
+                self.next_major_collection_initial = limit
+            if limit < self.next_major_collection_threshold:
+                self.next_major_collection_threshold = limit
+
+    def get_gc_param(self, param_no):
+        if param_no == rgc.GC_PARAM_NURSERY_SIZE:
+            return float(self.nursery_size)
+        elif param_no == rgc.GC_PARAM_MAJOR_COLLECT:
+            return self.major_collection_threshold
+        elif param_no == rgc.GC_PARAM_GROWTH:
+            return self.growth_rate_max
+        elif param_no == rgc.GC_PARAM_MIN_HEAP_SIZE:
+            return self.min_heap_size
+        elif param_no == rgc.GC_PARAM_MAX_HEAP_SIZE:
+            return self.max_heap_size
+        elif param_no == rgc.GC_PARAM_SOFT_MAX_HEAP_SIZE:
+            return self.soft_max_heap_size
+        elif param_no == rgc.GC_PARAM_MAX_DELTA:
+            return self.max_delta
+        elif param_no == rgc.GC_PARAM_INCREMENT_STEP:
+            return float(self.gc_increment_step)
+        elif param_no == rgc.GC_PARAM_ALLOC_SAMPLE_INTERVAL:
+            return float(self.alloc_sample_interval)
+        return -1.0
+
+    def check_gc_param(self, param_no, value):
+        # Same meaning and limits as the PYPY_GC_* environment variables
+        # read in setup().
+        if param_no == rgc.GC_PARAM_NURSERY_SIZE:
+            if not 0.0 <= value < float(sys.maxint):
+                return False
+            return (int(value) >= 2 * (self.nonlarge_max + 1) and
+                    not self.debug_rotating_nurseries)
+        elif (param_no == rgc.GC_PARAM_MAJOR_COLLECT or
+              param_no == rgc.GC_PARAM_GROWTH):
+            return value > 1.0
+        elif (param_no == rgc.GC_PARAM_MIN_HEAP_SIZE or
+              param_no == rgc.GC_PARAM_MAX_HEAP_SIZE or
+              param_no == rgc.GC_PARAM_SOFT_MAX_HEAP_SIZE):
+            return value >= 0.0
+        elif param_no == rgc.GC_PARAM_MAX_DELTA:
+            return value > 0.0
+        elif param_no == rgc.GC_PARAM_INCREMENT_STEP:
+            return 1.0 <= value < float(sys.maxint)
+        elif param_no == rgc.GC_PARAM_ALLOC_SAMPLE_INTERVAL:
+            return 0.0 <= value < float(sys.maxint)
+        return False
+
+    def set_gc_param(self, param_no, value):
+        # A new limit on the heap size is applied to the current threshold
+        # immediately; the other parameters are used when the threshold
+        # is computed again, at the end of the next major collection.
+        if not self.check_gc_param(param_no, value):
+            return False
+        if param_no == rgc.GC_PARAM_NURSERY_SIZE:
+            return self.resize_nursery(int(value))
+        elif param_no == rgc.GC_PARAM_MAJOR_COLLECT:
+            self.major_collection_threshold = value
+        elif param_no == rgc.GC_PARAM_GROWTH:
+            self.growth_rate_max = value
+        elif param_no == rgc.GC_PARAM_MIN_HEAP_SIZE:
+            self.min_heap_size = value
+        elif param_no == rgc.GC_PARAM_MAX_HEAP_SIZE:
+            self.max_heap_size = value
+            self.max_heap_size_already_raised = False
+            self._lower_major_threshold(value)
+        elif param_no == rgc.GC_PARAM_SOFT_MAX_HEAP_SIZE:
+            self.soft_max_heap_size = value
+            self._lower_major_threshold(value)
+        elif param_no == rgc.GC_PARAM_MAX_DELTA:
+            self.max_delta = value
+        elif param_no == rgc.GC_PARAM_INCREMENT_STEP:
+            self.gc_increment_step = r_uint(int(value))
+        elif param_no == rgc.GC_PARAM_ALLOC_SAMPLE_INTERVAL:
+            self.set_alloc_sample_interval(int(value))
+        return True
+
+    def resize_nursery(self, newsize):
+        """Replace the nursery with a new one of the given size, checked
+        by check_gc_param().  This does a minor collection first, and fails
+        if some objects are pinned in the nursery."""
+        if self.pinned_objects_in_nursery > 0:
+            return False
+        assert newsize >= 0
+        newsize &= ~(WORD-1)
+        self._minor_collection()
+        debug_start("gc-set-nursery-size")
+        debug_print("nursery size:", newsize)
+        self._disarm_alloc_sample()
+        llarena.arena_free(self.nursery)
+        self.nursery_size = newsize
+        self.nursery = self._alloc_nursery()
+        self.nursery_free = self.nursery
+        self.nursery_top = self.nursery + self.nursery_size
+        # an explicit size replaces the one of PYPY_GC_NURSERY
+        self.debug_tiny_nursery = -1
+        if not self.max_pinned_from_env:
+            self._estimate_max_number_of_pinned_objects()
+        if self.alloc_sample_interval > 0:
+            self._arm_alloc_sample()
+        debug_stop("gc-set-nursery-size")
+        return True
 
     def raw_malloc_memory_pressure(self, sizehint, adr):
         # Decrement by 'sizehint' plus a very little bit extra.  This
@@ -1106,7 +1364,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.next_major_collection_threshold -= (sizehint + 2 * WORD)
         if self.next_major_collection_threshold < 0:
             # cannot trigger a full collection now, but we can ensure
-            # that one will occur very soon
+            # that one will occur very soon.  Remove the sampling point
+            # first, or the next allocation would only take a sample.
+            self._disarm_alloc_sample()
             self.nursery_free = self.nursery_top
 
     def can_optimize_clean_setarrayitems(self):
@@ -1769,6 +2029,12 @@ class IncrementalMiniMarkGC(MovingGCBase):
         start = time.time()
         debug_start("gc-minor")
         #
+        # The nursery_top is reset below.  The sampled objects must be
+        # looked at before they move or die.
+        if self.alloc_sample_interval > 0:
+            self._disarm_alloc_sample()
+            self._record_alloc_samples()
+        #
         # All nursery barriers are invalid from this point on.  They
         # are evaluated anew as part of the minor collection.
         self.nursery_barriers.delete()
@@ -1945,6 +2211,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #
         self.nursery_free = self.nursery
         self.nursery_top = self.nursery_barriers.popleft()
+        if self.alloc_sample_interval > 0:
+            self._arm_alloc_sample()
         #
         # clear GCFLAG_PINNED_OBJECT_PARENT_KNOWN from all parents in the list.
         self.old_objects_pointing_to_pinned.foreach(
@@ -2235,6 +2503,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         # nursery are kept unchanged in this step.
         if copy:
             llmemory.raw_memcopy(obj - size_gc_header, newhdr, totalsize)
+        if self.alloc_sample_interval > 0:
+            self._count_alloc_survivor(obj)
         #
         # Set the old object's tid to -42 (containing all flags) and
         # replace the old object's content with the target address.
@@ -2281,6 +2551,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         size_gc_header = self.gcheaderbuilder.size_gc_header
         size = size_gc_header + self.get_size(obj)
         self.size_objects_made_old += r_uint(raw_malloc_usage(size))
+        if self.alloc_sample_interval > 0:
+            self._count_alloc_survivor(obj)
         #
         # we just made 'obj' old, so we need to add it to the correct lists
         added_somewhere = False
@@ -2571,10 +2843,18 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 total_memory_used -= float(self.kept_alive_by_finalizer)
                 if total_memory_used < 0:
                     total_memory_used = 0
-                bounded = self.set_major_threshold_from(
-                    min(total_memory_used * self.major_collection_threshold,
-                        total_memory_used + self.max_delta),
-                    reserving_size)
+                threshold = min(
+                    total_memory_used * self.major_collection_threshold,
+                    total_memory_used + self.max_delta)
+                # The soft limit makes the next major collection start
+                # earlier, but not so early that a program whose live data
+                # is above the limit would collect all the time.
+                if (self.soft_max_heap_size > 0.0 and
+                        threshold > self.soft_max_heap_size):
+                    threshold = max(self.soft_max_heap_size,
+                                    total_memory_used * SOFT_MAX_MIN_GROWTH)
+                bounded = self.set_major_threshold_from(threshold,
+                                                        reserving_size)
                 #
                 # Print statistics
                 debug_start("gc-collect-done")
@@ -701,6 +701,130 @@ class TestIncrementalMiniMarkGCSimple(TestMiniMarkGCSimple):
         assert adr4 == adr3
         assert obj3.x == 456     # it is populated now
 
+    def test_set_gc_param(self):
+        from rpython.rlib import rgc
+        gc = self.gc
+        assert not gc.set_gc_param(rgc.GC_PARAM_MAJOR_COLLECT, 1.0)
+        assert gc.set_gc_param(rgc.GC_PARAM_MAJOR_COLLECT, 1.5)
+        assert gc.get_gc_param(rgc.GC_PARAM_MAJOR_COLLECT) == 1.5
+        assert not gc.set_gc_param(rgc.GC_PARAM_INCREMENT_STEP, 0.0)
+        assert not gc.set_gc_param(12345, 1.0)
+        assert gc.get_gc_param(12345) == -1.0
+        #
+        gc.next_major_collection_threshold = 1e9
+        assert gc.set_gc_param(rgc.GC_PARAM_SOFT_MAX_HEAP_SIZE, 1e6)
+        assert gc.get_gc_param(rgc.GC_PARAM_SOFT_MAX_HEAP_SIZE) == 1e6
+        assert gc.next_major_collection_threshold == 1e6
+        assert gc.max_heap_size == 0.0     # not a hard limit
+
+    def test_resize_nursery(self):
+        from rpython.rlib import rgc
+        gc = self.gc
+        obj0 = self.malloc(S)
+        obj0.x = 42
+        self.stackroots.append(obj0)
+        newsize = gc.nursery_size * 2
+        assert not gc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, 16.0)
+        assert gc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, float(newsize))
+        assert gc.get_gc_param(rgc.GC_PARAM_NURSERY_SIZE) == newsize
+        assert gc.nursery_top - gc.nursery == newsize
+        assert gc.nursery_free == gc.nursery
+        # obj0 was moved out of the old nursery
+        assert self.stackroots[0].x == 42
+        obj1 = self.malloc(S)
+        assert gc.is_in_nursery(llmemory.cast_ptr_to_adr(obj1))
+
+    def test_check_gc_param(self):
+        from rpython.rlib import rgc
+        gc = self.gc
+        assert gc.check_gc_param(rgc.GC_PARAM_MAJOR_COLLECT, 1.5)
+        assert not gc.check_gc_param(rgc.GC_PARAM_MAJOR_COLLECT, 1.0)
+        assert not gc.check_gc_param(rgc.GC_PARAM_NURSERY_SIZE, 16.0)
+        assert not gc.check_gc_param(12345, 1.0)
+        assert gc.get_gc_param(rgc.GC_PARAM_MAJOR_COLLECT) != 1.5
+
+    def test_resize_nursery_pinned(self):
+        from rpython.rlib import rgc
+        gc = self.gc
+        s = self.malloc(STR, 1)
+        self.stackroots.append(s)
+        assert gc.pin(llmemory.cast_ptr_to_adr(s))
+        oldsize = gc.nursery_size
+        collections = []
+        gc._minor_collection = lambda: collections.append(1)
+        assert not gc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, oldsize * 2.0)
+        assert collections == []     # refused before collecting
+        del gc._minor_collection
+        gc.unpin(llmemory.cast_ptr_to_adr(s))
+        gc.debug_tiny_nursery = 16
+        assert gc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, oldsize * 2.0)
+        assert gc.debug_tiny_nursery == -1
+        if not gc.max_pinned_from_env:
+            bigobj = gc.nonlarge_max + 1
+            assert gc.max_number_of_pinned_objects == (
+                oldsize * 2 // (bigobj * 2))
+
+    def test_alloc_profile(self):
+        from rpython.memory.gc.hook import GcHooks
+        class MyHooks(GcHooks):
+            samples = 0
+            def is_gc_alloc_sample_enabled(self):
+                return True
+            def on_gc_alloc_sample(self, size):
+                self.samples += 1
+        gc = self.gc
+        gc.hooks = hooks = MyHooks()
+        assert gc.get_alloc_profile() == []
+        size = llmemory.raw_malloc_usage(
+            gc.gcheaderbuilder.size_gc_header + llmemory.sizeof(S))
+        interval = size * 10
+        assert gc.set_gc_param(rgc.GC_PARAM_ALLOC_SAMPLE_INTERVAL,
+                               float(interval))
+        assert gc.get_gc_param(rgc.GC_PARAM_ALLOC_SAMPLE_INTERVAL) == interval
+        for i in range(100):
+            p = self.malloc(S)
+            p.x = i
+            if i % 4 == 0:
+                self.stackroots.append(p)
+        gc._minor_collection()
+        # the objects number 10, 20, ... 90 cross a sampling point
+        assert hooks.samples == 9
+        index = gc.get_member_index(self.get_type_id(S))
+        assert gc.get_alloc_profile() == [index, 9, 25]
+        for i in range(25):
+            assert self.stackroots[i].x == i * 4
+        #
+        # disabling keeps the counters, enabling again resets them
+        assert gc.set_gc_param(rgc.GC_PARAM_ALLOC_SAMPLE_INTERVAL, 0.0)
+        self.malloc(S)
+        gc._minor_collection()
+        assert gc.get_alloc_profile() == [index, 9, 25]
+        assert hooks.samples == 9
+        assert gc.set_gc_param(rgc.GC_PARAM_ALLOC_SAMPLE_INTERVAL,
+                               float(interval))
+        assert gc.get_alloc_profile() == []
+
+    def test_alloc_profile_memory_pressure(self):
+        gc = self.gc
+        size = llmemory.raw_malloc_usage(
+            gc.gcheaderbuilder.size_gc_header + llmemory.sizeof(S))
+        gc._minor_collection()
+        assert gc.set_gc_param(rgc.GC_PARAM_ALLOC_SAMPLE_INTERVAL,
+                               float(size * 4))
+        self.malloc(S)
+        assert gc.alloc_sample_area_top
+        collections = []
+        orig_collect = gc.minor_collection_with_major_progress
+        def collect(*args):
+            collections.append(1)
+            return orig_collect(*args)
+        gc.minor_collection_with_major_progress = collect
+        gc.raw_malloc_memory_pressure(
+            int(gc.next_major_collection_threshold) + 1, llmemory.NULL)
+        # the next allocation collects, instead of only taking a sample
+        self.malloc(S)
+        assert collections == [1]
+
 
 class TestIncrementalMiniMarkGCFull(DirectGCTest):
     from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
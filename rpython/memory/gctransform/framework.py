@@ -487,6 +487,20 @@ class BaseFrameworkGCTransformer(GCTransformer):
                                            [s_gc,
                                             annmodel.SomeInteger(nonneg=True)],
                                            annmodel.s_None)
+        self.get_gc_param_ptr = getfn(GCClass.get_gc_param.im_func,
+                                      [s_gc, annmodel.SomeInteger()],
+                                      annmodel.SomeFloat())
+        self.check_gc_param_ptr = getfn(GCClass.check_gc_param.im_func,
+                                        [s_gc, annmodel.SomeInteger(),
+                                         annmodel.SomeFloat()],
+                                        annmodel.s_Bool)
+        self.set_gc_param_ptr = getfn(GCClass.set_gc_param.im_func,
+                                      [s_gc, annmodel.SomeInteger(),
+                                       annmodel.SomeFloat()],
+                                      annmodel.s_Bool)
+        self.get_alloc_profile_ptr = getfn(GCClass.get_alloc_profile.im_func,
+                                           [s_gc], rgc.s_list_of_ints(),
+                                           minimal_transform=False)
 
         if hasattr(GCClass, 'rawrefcount_init'):
             self.rawrefcount_init_ptr = getfn(
@@ -1207,6 +1221,34 @@ class BaseFrameworkGCTransformer(GCTransformer):
                                   self.c_const_gc,
                                   v_size])
 
+    def gct_gc_get_param(self, hop):
+        [v_param_no] = hop.spaceop.args
+        hop.genop("direct_call", [self.get_gc_param_ptr, self.c_const_gc,
+                                  v_param_no],
+                  resultvar=hop.spaceop.result)
+
+    def gct_gc_check_param(self, hop):
+        op = hop.spaceop
+        hop.genop("direct_call", [self.check_gc_param_ptr, self.c_const_gc] +
+                                 op.args,
+                  resultvar=op.result)
+
+    def gct_gc_set_param(self, hop):
+        # changing the nursery size does a minor collection
+        op = hop.spaceop
+        livevars = self.push_roots(hop)
+        hop.genop("direct_call", [self.set_gc_param_ptr, self.c_const_gc] +
+                                 op.args,
+                  resultvar=op.result)
+        self.pop_roots(hop, livevars)
+
+    def gct_gc_get_alloc_profile(self, hop):
+        livevars = self.push_roots(hop)
+        hop.genop("direct_call",
+                  [self.get_alloc_profile_ptr, self.c_const_gc],
+                  resultvar=hop.spaceop.result)
+        self.pop_roots(hop, livevars)
+
     def gct_gc_pin(self, hop):
         if not hasattr(self, 'pin_ptr'):
             c_false = rmodel.inputconst(lltype.Bool, False)
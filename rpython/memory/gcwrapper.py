@@ -135,6 +135,15 @@ class GCManagedHeap(object):
     def collect(self, *gen):
         self.gc.collect(*gen)
 
+    def get_gc_param(self, param_no):
+        return self.gc.get_gc_param(param_no)
+
+    def check_gc_param(self, param_no, value):
+        return self.gc.check_gc_param(param_no, value)
+
+    def set_gc_param(self, param_no, value):
+        return self.gc.set_gc_param(param_no, value)
+
     def can_move(self, addr):
         return self.gc.can_move(addr)
 
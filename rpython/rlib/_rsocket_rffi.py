@@ -982,6 +982,95 @@ if HAVE_SENDMSG:
                          "int free_ptr_to_charp(char** ptrtofree);\n"
                          ]
 
+# batch versions of sendmsg / recvmsg, to send or receive many datagrams
+# with a single system call
+HAVE_SENDMMSG = HAVE_SENDMSG and sys.platform.startswith('linux')
+if HAVE_SENDMMSG:
+    separate_module_sources += ['''
+        /*
+            Receive up to 'count' messages, message i into buf[i*bufsize]
+            and its source address into addrs[i*addrsize].  The lengths of
+            the messages and of their addresses are stored into 'lengths'
+            and 'addrlens'.  Returns the number of messages, or -1.
+        */
+        RPY_EXTERN
+        int pypy_recvmmsg(int fd, int count, char *buf, int bufsize,
+                          char *addrs, int addrsize, int flags,
+                          int *lengths, int *addrlens)
+        {
+            struct mmsghdr *msgs;
+            struct iovec *iovs;
+            int i, result;
+
+            msgs = (struct mmsghdr *)calloc(count, sizeof(struct mmsghdr));
+            iovs = (struct iovec *)calloc(count, sizeof(struct iovec));
+            if (msgs == NULL || iovs == NULL) {
+                free(msgs);
+                free(iovs);
+                errno = ENOMEM;
+                return -1;
+            }
+            for (i = 0; i < count; i++) {
+                iovs[i].iov_base = buf + (size_t)i * bufsize;
+                iovs[i].iov_len = bufsize;
+                msgs[i].msg_hdr.msg_iov = &iovs[i];
+                msgs[i].msg_hdr.msg_iovlen = 1;
+                msgs[i].msg_hdr.msg_name = addrs + (size_t)i * addrsize;
+                msgs[i].msg_hdr.msg_namelen = addrsize;
+            }
+            /* return what is already queued after the first message,
+               instead of waiting for 'count' of them */
+            result = recvmmsg(fd, msgs, count, flags | MSG_WAITFORONE, NULL);
+            for (i = 0; i < result; i++) {
+                lengths[i] = msgs[i].msg_len;
+                addrlens[i] = msgs[i].msg_hdr.msg_namelen;
+            }
+            free(msgs);
+            free(iovs);
+            return result;
+        }
+
+        /*
+            Send the 'count' messages bufs[i] of lengths[i] bytes each, to
+            addrs[i] if it is not NULL.  Returns the number of messages
+            sent, or -1.
+        */
+        RPY_EXTERN
+        int pypy_sendmmsg(int fd, int count, char **bufs, long *lengths,
+                          char **addrs, int *addrlens, int flags)
+        {
+            struct mmsghdr *msgs;
+            struct iovec *iovs;
+            int i, result;
+
+            msgs = (struct mmsghdr *)calloc(count, sizeof(struct mmsghdr));
+            iovs = (struct iovec *)calloc(count, sizeof(struct iovec));
+            if (msgs == NULL || iovs == NULL) {
+                free(msgs);
+                free(iovs);
+                errno = ENOMEM;
+                return -1;
+            }
+            for (i = 0; i < count; i++) {
+                iovs[i].iov_base = bufs[i];
+                iovs[i].iov_len = lengths[i];
+                msgs[i].msg_hdr.msg_iov = &iovs[i];
+                msgs[i].msg_hdr.msg_iovlen = 1;
+                msgs[i].msg_hdr.msg_name = (void *)addrs[i];
+                msgs[i].msg_hdr.msg_namelen = addrlens[i];
+            }
+            result = sendmmsg(fd, msgs, count, flags);
+            free(msgs);
+            free(iovs);
+            return result;
+        }
+    ''']
+    post_include_bits += ["RPY_EXTERN "
+                          "int pypy_recvmmsg(int fd, int count, char *buf, int bufsize, char *addrs, int addrsize, int flags, int *lengths, int *addrlens);\n"
+                          "RPY_EXTERN "
+                          "int pypy_sendmmsg(int fd, int count, char **bufs, long *lengths, char **addrs, int *addrlens, int flags);\n"
+                          ]
+
 if _WIN32:
     CConfig.WSAEVENT = platform.SimpleType('WSAEVENT', rffi.VOIDP)
     CConfig.WSANETWORKEVENTS = platform.Struct(
@@ -1353,6 +1442,18 @@ sendmsg = jit.dont_look_inside(rffi.llexternal("sendmsg_implementation",
                                 rffi.SIGNEDP, rffi.SIGNEDP, rffi.CCHARPP, rffi.SIGNEDP, rffi.INT, rffi.INT],
                                rffi.INT, save_err=SAVE_ERR,
                                compilation_info=compilation_info))
+if HAVE_SENDMMSG:
+    recvmmsg = jit.dont_look_inside(rffi.llexternal("pypy_recvmmsg",
+                                [rffi.INT, rffi.INT, rffi.CCHARP, rffi.INT,
+                                 rffi.CCHARP, rffi.INT, rffi.INT,
+                                 rffi.INTP, rffi.INTP], rffi.INT,
+                                save_err=SAVE_ERR,
+                                compilation_info=compilation_info))
+    sendmmsg = jit.dont_look_inside(rffi.llexternal("pypy_sendmmsg",
+                                [rffi.INT, rffi.INT, rffi.CCHARPP, rffi.SIGNEDP,
+                                 rffi.CCHARPP, rffi.INTP, rffi.INT], rffi.INT,
+                                save_err=SAVE_ERR,
+                                compilation_info=compilation_info))
 CMSG_SPACE = jit.dont_look_inside(rffi.llexternal("CMSG_SPACE_wrapper",[size_t], size_t, save_err=SAVE_ERR,compilation_info=compilation_info))
 CMSG_LEN = jit.dont_look_inside(rffi.llexternal("CMSG_LEN_wrapper",[size_t], size_t, save_err=SAVE_ERR,compilation_info=compilation_info))
 
@@ -570,6 +570,7 @@ PARAMETER_DOCS = {
     'trace_limit': 'number of recorded operations before we abort tracing with ABORT_TOO_LONG',
     'inlining': 'inline python functions or not (1/0)',
     'loop_longevity': 'a parameter controlling how long loops will be kept before being freed, an estimate',
+    'max_code_size': 'maximum number of bytes of machine code kept for the loops and their bridges; above it, the least recently entered loops are freed (0=no limit)',
     'retrace_limit': 'how many times we can try retracing before giving up',
     'pureop_historylength': 'how many pure operations the optimizer should remember for CSE (internal)',
     'max_retrace_guards': 'number of extra guards a retrace can cause',
@@ -592,6 +593,7 @@ PARAMETERS = {'threshold': 1039, # just above 1024, prime
               'trace_limit': 6000,
               'inlining': 1,
               'loop_longevity': 1000,
+              'max_code_size': 0,
               'retrace_limit': 0,
               'pureop_historylength': 16,
               'max_retrace_guards': 15,
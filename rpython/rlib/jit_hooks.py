@@ -128,6 +128,22 @@ def stats_asmmemmgr_allocated(warmrunnerdesc):
 def stats_asmmemmgr_used(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[1]
 
+@register_helper(annmodel.SomeInteger(unsigned=True))
+def stats_asmmemmgr_freed(warmrunnerdesc):
+    return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[2]
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_loops_evicted(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.loops_evicted
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_recompiled_after_eviction(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.recompiled_after_eviction
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_max_code_size(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.max_code_size
+
 @register_helper(None)
 def stats_memmgr_release_all(warmrunnerdesc):
     warmrunnerdesc.memory_manager.release_all_loops()
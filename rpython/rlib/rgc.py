@@ -63,6 +63,47 @@ def set_max_heap_size(nbytes):
     """
     pass
 
+# Parameters of the GC that can be changed at runtime with set_gc_param().
+# The values are floats; sizes are given in bytes.
+(GC_PARAM_NURSERY_SIZE, GC_PARAM_MAJOR_COLLECT, GC_PARAM_GROWTH,
+ GC_PARAM_MIN_HEAP_SIZE, GC_PARAM_MAX_HEAP_SIZE, GC_PARAM_SOFT_MAX_HEAP_SIZE,
+ GC_PARAM_MAX_DELTA, GC_PARAM_INCREMENT_STEP,
+ GC_PARAM_ALLOC_SAMPLE_INTERVAL) = range(9)
+
+# for test purposes, the untranslated versions just store the values here
+_gc_params = {}
+
+def get_gc_param(param_no):
+    """Return the current value of a GC parameter, or -1.0 if the GC
+    doesn't have this parameter.
+    """
+    return _gc_params.get(param_no, -1.0)
+
+def check_gc_param(param_no, value):
+    """Return True if set_gc_param() would accept this value, without
+    changing anything.  set_gc_param() can still fail afterwards if the
+    state of the GC doesn't allow the change, e.g. if objects are pinned
+    when the nursery is resized.
+    """
+    return True
+
+def set_gc_param(param_no, value):
+    """Change a GC parameter while the program is running.  Return False
+    if the GC doesn't have this parameter or doesn't accept this value.
+    """
+    _gc_params[param_no] = value
+    return True
+
+def get_alloc_profile():
+    """Return the counters of the allocation profiler, which is enabled by
+    setting GC_PARAM_ALLOC_SAMPLE_INTERVAL to a non-zero number of bytes.
+    The result is a flat list of triples (type index, number of sampled
+    allocations, number of objects that survived a minor collection),
+    for the types with non-zero counters.  The type indexes are the ones
+    of get_rpy_type_index().
+    """
+    return []
+
 def must_split_gc_address_space():
     """Returns True if we have a "split GC address space", i.e. if
     we are translating with an option that doesn't support taking raw
@@ -226,6 +267,53 @@ class SetMaxHeapSizeEntry(ExtRegistryEntry):
         return hop.genop('gc_set_max_heap_size', [v_nbytes],
                          resulttype=lltype.Void)
 
+class GetGcParamEntry(ExtRegistryEntry):
+    _about_ = get_gc_param
+
+    def compute_result_annotation(self, s_param_no):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeFloat()
+
+    def specialize_call(self, hop):
+        [v_param_no] = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_get_param', [v_param_no],
+                         resulttype=lltype.Float)
+
+class GetAllocProfileEntry(ExtRegistryEntry):
+    _about_ = get_alloc_profile
+
+    def compute_result_annotation(self):
+        return s_list_of_ints()
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        return hop.genop('gc_get_alloc_profile', [], resulttype=hop.r_result)
+
+class CheckGcParamEntry(ExtRegistryEntry):
+    _about_ = check_gc_param
+
+    def compute_result_annotation(self, s_param_no, s_value):
+        from rpython.annotator import model as annmodel
+        return annmodel.s_Bool
+
+    def specialize_call(self, hop):
+        vlist = hop.inputargs(lltype.Signed, lltype.Float)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_check_param', vlist, resulttype=lltype.Bool)
+
+class SetGcParamEntry(ExtRegistryEntry):
+    _about_ = set_gc_param
+
+    def compute_result_annotation(self, s_param_no, s_value):
+        from rpython.annotator import model as annmodel
+        return annmodel.s_Bool
+
+    def specialize_call(self, hop):
+        vlist = hop.inputargs(lltype.Signed, lltype.Float)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_set_param', vlist, resulttype=lltype.Bool)
+
 def can_move(p):
     """Check if the GC object 'p' is at an address that can move.
     Must not be called with None.  With non-moving GCs, it is always False.
@@ -1008,6 +1096,18 @@ def s_list_of_gcrefs():
             ListDef(None, s_gcref, mutated=True, resized=False))
     return _cache_s_list_of_gcrefs
 
+_cache_s_list_of_ints = None
+
+def s_list_of_ints():
+    global _cache_s_list_of_ints
+    if _cache_s_list_of_ints is None:
+        from rpython.annotator import model as annmodel
+        from rpython.annotator.listdef import ListDef
+        _cache_s_list_of_ints = annmodel.SomeList(
+            ListDef(None, annmodel.SomeInteger(), mutated=True,
+                    resized=False))
+    return _cache_s_list_of_ints
+
 class Entry(ExtRegistryEntry):
     _about_ = get_rpy_roots
     def compute_result_annotation(self):
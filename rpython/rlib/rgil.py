@@ -5,7 +5,12 @@ from rpython.translator import cdir
 from rpython.translator.tool.cbuild import ExternalCompilationInfo
 from rpython.rtyper.lltypesystem import lltype, llmemory, rffi
 from rpython.rtyper.extregistry import ExtRegistryEntry
-from rpython.rlib.objectmodel import not_rpython, we_are_translated
+from rpython.rlib.objectmodel import (not_rpython, we_are_translated,
+                                      specialize)
+from rpython.rlib.jit import dont_look_inside
+from rpython.rlib.debug import (debug_start, debug_stop, debug_print,
+                                have_debug_prints_for)
+from rpython.rtyper.lltypesystem.lloperation import llop
 
 # these functions manipulate directly the GIL, whose definition does not
 # escape the C code itself
@@ -45,6 +50,106 @@ _gil_get_holder = llexternal('RPyGilGetHolder', [], lltype.Signed,
                              compilation_info=eci)
 
 # ____________________________________________________________
+#
+# Per-thread statistics about the GIL.  They are updated by the C code
+# in thread_gil.c and threadlocal.h, and live in the thread-local
+# structure, so that updating them costs next to nothing.  The releases
+# and acquisitions done inline by the machine code that the JIT emits
+# around external calls are not counted, apart from the ones that have
+# to wait for the GIL.
+
+class GilStats(object):
+    """The GIL statistics of one thread.  The times are in seconds."""
+    def __init__(self, thread_ident=0):
+        self.thread_ident = thread_ident
+        self.acquisitions = 0   # number of times the GIL was acquired
+        self.waits = 0          # ...of which had to wait for another thread
+        self.wait_time = 0.0    # total time spent waiting
+        self.max_wait = 0.0     # longest single wait
+        self.last_wait = 0.0    # for the event log
+        self.releases = 0       # voluntary releases, e.g. around I/O
+        self.yields = 0         # periodic releases that switched threads
+
+    @not_rpython
+    def copy(self):
+        result = GilStats(self.thread_ident)
+        result.__dict__.update(self.__dict__)
+        return result
+
+def _declare_stats_fields():
+    # makes sure the thread-local fields exist, which enables the code
+    # that updates them in C (see RPY_TLOFS_gil_acquisitions)
+    from rpython.rlib import rthread
+    for _, _, tlfield in rthread.unroll_tlfields_gil_stats:
+        tlfield.getoffset()
+
+def _read_stats(stats, p):
+    # 'p' is the address of the thread-local structure of some thread
+    from rpython.rlib import rthread
+    p_ident = p + rthread.tlfield_thread_ident.getoffset()
+    stats.thread_ident = p_ident.signed[0]
+    for name, FIELDTYPE, tlfield in rthread.unroll_tlfields_gil_stats:
+        p_field = p + tlfield.getoffset()
+        if FIELDTYPE is lltype.Float:
+            setattr(stats, name, p_field.float[0])
+        else:
+            setattr(stats, name, p_field.signed[0])
+
+@dont_look_inside
+def get_thread_stats():
+    """Return a list of GilStats, one for every thread that is still
+    alive.  Must be called with the GIL held."""
+    if not we_are_translated():
+        return [stats.copy() for stats in _emulated_stats.values()]
+    _declare_stats_fields()
+    # no allocation is allowed while the thread-locals are locked: count
+    # the threads and retry if we did not preallocate enough GilStats
+    result = []
+    while True:
+        llop.threadlocalref_acquire(lltype.Void)
+        p = llmemory.NULL
+        n = 0
+        while True:
+            p = llop.threadlocalref_enum(llmemory.Address, p)
+            if not p:
+                break
+            if n < len(result):
+                _read_stats(result[n], p)
+            n += 1
+        llop.threadlocalref_release(lltype.Void)
+        if n <= len(result):
+            del result[n:]
+            return result
+        while len(result) < n:
+            result.append(GilStats())
+
+
+class EventLog(object):
+    """The optional log of the GIL waits and thread switches, written in
+    the PYPYLOG sections 'gil-wait' and 'gil-yield'."""
+    def __init__(self):
+        self.enabled = False
+
+event_log = EventLog()
+
+@specialize.arg(0)
+def _log_last_wait(category):
+    # called with the GIL held, after RPyGilAcquireSlowPath() maybe
+    # recorded a wait
+    from rpython.rlib import rthread
+    if we_are_translated():
+        wait = rthread.tlfield_gil_last_wait.getraw()
+        rthread.tlfield_gil_last_wait.setraw(0.0)
+    else:
+        stats = _emulated_gil_holder._get_stats()
+        wait = stats.last_wait
+        stats.last_wait = 0.0
+    if category == "gil-yield" or wait > 0.0:
+        debug_start(category)
+        debug_print("thread", rthread.get_ident(), "waited", wait)
+        debug_stop(category)
+
+# ____________________________________________________________
 
 
 def invoke_after_thread_switch(callback):
@@ -127,22 +232,48 @@ class EmulatedGilHolder:
         assert tid != 0
         return tid
 
-    def release(self):
+    def _get_stats(self):
+        tid = self._get_ident()
+        try:
+            return _emulated_stats[tid]
+        except KeyError:
+            stats = _emulated_stats[tid] = GilStats(tid)
+            return stats
+
+    def release(self, voluntary=True):
         assert self._tid == self._get_ident()
+        if voluntary:
+            self._get_stats().releases += 1
         self._tid = 0
         self._lock.release()
 
     def acquire(self):
         assert self._tid != self._get_ident()
-        self._lock.acquire()
+        if not self._lock.acquire(False):
+            import time
+            start = time.time()
+            self._lock.acquire()
+            wait = time.time() - start
+            stats = self._get_stats()
+            stats.waits += 1
+            stats.wait_time += wait
+            stats.max_wait = max(stats.max_wait, wait)
+            stats.last_wait = wait
         assert self._tid == 0
         self._tid = self._get_ident()
+        self._get_stats().acquisitions += 1
+
+    def yield_thread(self):
+        self.release(voluntary=False)
+        self.acquire()
+        self._get_stats().yields += 1
 
     def get_holder(self):
         return self._tid
 
 
 _emulated_gil_holder = None
+_emulated_stats = {}     # {thread_ident: GilStats}
 
 def _reset_emulated_gil_holder():
     # called from rpython/conftest.py
@@ -154,6 +285,8 @@ def allocate():
     global _emulated_gil_holder
     if we_are_translated():
         _gil_allocate()
+        _declare_stats_fields()
+        event_log.enabled = have_debug_prints_for("gil-")
     elif _emulated_gil_holder is None:
         _emulated_gil_holder = EmulatedGilHolder()
 
@@ -176,6 +309,8 @@ def acquire():
     else:
         allocate()
         _emulated_gil_holder.acquire()
+    if event_log.enabled:
+        _log_last_wait("gil-wait")
     _after_thread_switch()
 acquire._gctransformer_hint_cannot_collect_ = True
 acquire._dont_reach_me_in_del_ = True
@@ -187,6 +322,8 @@ def acquire_maybe_in_new_thread():
     rthread.get_or_make_ident() #make sure that the threadlocals are initialized
     _gil_acquire()
     rthread.gc_thread_run()
+    if event_log.enabled:
+        _log_last_wait("gil-wait")
     _after_thread_switch()
 acquire_maybe_in_new_thread._gctransformer_hint_cannot_collect_ = True
 acquire_maybe_in_new_thread._dont_reach_me_in_del_ = True
@@ -206,10 +343,15 @@ def yield_thread():
         if _gil_yield_thread():
             from rpython.rlib import rthread
             rthread.gc_thread_run()
+            if event_log.enabled:
+                _log_last_wait("gil-yield")
             _after_thread_switch()
     else:
-        release()
-        acquire()
+        allocate()
+        _emulated_gil_holder.yield_thread()
+        if event_log.enabled:
+            _log_last_wait("gil-yield")
+        _after_thread_switch()
 yield_thread._gctransformer_hint_close_stack_ = True
 yield_thread._dont_reach_me_in_del_ = True
 yield_thread._dont_inline_ = True
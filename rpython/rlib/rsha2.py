@@ -0,0 +1,388 @@
+"""RPython implementation of the SHA-2 family of hash functions:
+SHA-224, SHA-256, SHA-384 and SHA-512, as specified by FIPS PUB 180-4.
+
+The API follows the one of rsha.py.  In addition, update() accepts either
+a string or an rpython.rlib.buffer.Buffer, which is read in place instead
+of being copied into a string first.
+"""
+
+from rpython.rlib.rarithmetic import r_uint, r_ulonglong, intmask
+from rpython.rlib.objectmodel import specialize, import_from_mixin
+
+
+@specialize.argtype(0)
+def _getlength(data):
+    if isinstance(data, str):
+        return len(data)
+    return data.getlength()
+
+@specialize.argtype(0)
+def _getbyte(data, index):
+    if isinstance(data, str):
+        return ord(data[index])
+    return ord(data.getitem(index))
+
+@specialize.argtype(0)
+def _getslice(data, start, stop):
+    if isinstance(data, str):
+        return data[start:stop]
+    return data.getslice(start, 1, stop - start)
+
+def _bytes2hex(s):
+    hx = '0123456789abcdef'
+    result = []
+    for c in s:
+        result.append(hx[ord(c) >> 4])
+        result.append(hx[ord(c) & 0xF])
+    return ''.join(result)
+
+
+class _SHA2(object):
+    """Logic common to RSHA256 and RSHA512, imported with
+    import_from_mixin() because the two classes use different types
+    for their words.  A class importing it must define block_size,
+    digest_size, _rounds, _initial_state, _zero, _process() and
+    _words2string()."""
+
+    def __init__(self, initialdata=''):
+        self._init()
+        self.update(initialdata)
+
+    def _init(self):
+        "Initialisation."
+        self.count = r_ulonglong(0)   # total number of bytes
+        self.input = ""   # pending unprocessed data, < block_size bytes
+        self.H = self._initial_state[:]
+        self.W = [self._zero] * self._rounds
+
+    @specialize.argtype(1)
+    def update(self, inBuf):
+        """Add to the current message.  'inBuf' is a string or a Buffer.
+
+        The hash is immediately calculated for all full blocks, which are
+        read directly from 'inBuf'.  Only the last incomplete block is
+        copied and kept until the next call to update() or digest().
+        """
+        block_size = self.block_size
+        leninBuf = _getlength(inBuf)
+        self.count += leninBuf
+        index = len(self.input)
+        partLen = block_size - index
+        assert partLen > 0
+
+        if leninBuf >= partLen:
+            if index > 0:
+                self.input = self.input + _getslice(inBuf, 0, partLen)
+                self._process(self.input, 0)
+                i = partLen
+            else:
+                i = 0
+            while i + block_size <= leninBuf:
+                self._process(inBuf, i)
+                i += block_size
+            self.input = _getslice(inBuf, i, leninBuf)
+        else:
+            self.input = self.input + _getslice(inBuf, 0, leninBuf)
+
+    def _finalize(self):
+        """Logic to add the final padding and extract the digest.
+        """
+        # Save the state before adding the padding
+        count = self.count
+        input = self.input
+        H = self.H[:]
+
+        # a '\x80' byte, zeroes, and the length in bits as a big-endian
+        # number that fills the last 8 or 16 bytes of the last block
+        lenfield = self.block_size // 8
+        index = len(input) + 1 + lenfield
+        padLen = (self.block_size - index % self.block_size) % self.block_size
+        hi = count >> 61
+        lo = count << 3
+        length = []
+        for i in range(lenfield - 1, -1, -1):
+            if i >= 8:
+                part = hi >> (8 * (i - 8))
+            else:
+                part = lo >> (8 * i)
+            length.append(chr(intmask(part & 0xFF)))
+        self.update('\x80' + '\x00' * padLen + ''.join(length))
+        assert len(self.input) == 0
+        digest = self._words2string(self.H)
+
+        # Restore the saved state in case this instance is still used
+        self.count = count
+        self.input = input
+        self.H = H
+        return digest[:self.digest_size]
+
+    def digest(self):
+        """Terminate the message-digest computation and return digest.
+        """
+        return self._finalize()
+
+    def hexdigest(self):
+        """Terminate and return digest in HEX form.
+        """
+        return _bytes2hex(self._finalize())
+
+    def _copyfrom(self, other):
+        """Copy all state from 'other' into 'self'.
+        """
+        self.count = other.count
+        self.input = other.input
+        self.H = other.H[:]
+
+
+# ______________________________________________________________________
+# SHA-224 and SHA-256
+
+MASK32 = r_uint(0xFFFFFFFF)
+
+def _ror32(x, n):
+    return ((x >> n) | (x << (32 - n))) & MASK32
+
+K256 = [r_uint(x) for x in [
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1,
+    0x923f82a4, 0xab1c5ed5, 0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3,
+    0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174, 0xe49b69c1, 0xefbe4786,
+    0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147,
+    0x06ca6351, 0x14292967, 0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13,
+    0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85, 0xa2bfe8a1, 0xa81a664b,
+    0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a,
+    0x5b9cca4f, 0x682e6ff3, 0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208,
+    0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2]]
+
+SHA256_INIT = [r_uint(x) for x in [
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a,
+    0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19]]
+
+SHA224_INIT = [r_uint(x) for x in [
+    0xc1059ed8, 0x367cd507, 0x3070dd17, 0xf70e5939,
+    0xffc00b31, 0x68581511, 0x64f98fa7, 0xbefa4fa4]]
+
+
+class RSHA256(object):
+    """RPython-level SHA-256 object.
+    """
+    import_from_mixin(_SHA2)
+
+    block_size = 64
+    digest_size = 32
+    _rounds = 64
+    _initial_state = SHA256_INIT
+    _zero = r_uint(0)
+
+    @specialize.argtype(1)
+    def _process(self, data, start):
+        W = self.W
+        for i in range(16):
+            p = start + i * 4
+            W[i] = ((r_uint(_getbyte(data, p)) << 24) |
+                    (r_uint(_getbyte(data, p + 1)) << 16) |
+                    (r_uint(_getbyte(data, p + 2)) << 8) |
+                    r_uint(_getbyte(data, p + 3)))
+        self._transform(W)
+
+    def _transform(self, W):
+        for t in range(16, 64):
+            w15 = W[t - 15]
+            w2 = W[t - 2]
+            s0 = _ror32(w15, 7) ^ _ror32(w15, 18) ^ (w15 >> 3)
+            s1 = _ror32(w2, 17) ^ _ror32(w2, 19) ^ (w2 >> 10)
+            W[t] = (W[t - 16] + s0 + W[t - 7] + s1) & MASK32
+
+        H = self.H
+        a = H[0]; b = H[1]; c = H[2]; d = H[3]
+        e = H[4]; f = H[5]; g = H[6]; h = H[7]
+        for t in range(64):
+            S1 = _ror32(e, 6) ^ _ror32(e, 11) ^ _ror32(e, 25)
+            ch = (e & f) ^ (~e & g)
+            temp1 = h + S1 + ch + K256[t] + W[t]
+            S0 = _ror32(a, 2) ^ _ror32(a, 13) ^ _ror32(a, 22)
+            maj = (a & b) ^ (a & c) ^ (b & c)
+            temp2 = S0 + maj
+            h = g
+            g = f
+            f = e
+            e = (d + temp1) & MASK32
+            d = c
+            c = b
+            b = a
+            a = (temp1 + temp2) & MASK32
+        H[0] = (H[0] + a) & MASK32
+        H[1] = (H[1] + b) & MASK32
+        H[2] = (H[2] + c) & MASK32
+        H[3] = (H[3] + d) & MASK32
+        H[4] = (H[4] + e) & MASK32
+        H[5] = (H[5] + f) & MASK32
+        H[6] = (H[6] + g) & MASK32
+        H[7] = (H[7] + h) & MASK32
+
+    def _words2string(self, H):
+        result = []
+        for x in H:
+            result.append(chr(intmask((x >> 24) & 0xFF)))
+            result.append(chr(intmask((x >> 16) & 0xFF)))
+            result.append(chr(intmask((x >> 8) & 0xFF)))
+            result.append(chr(intmask(x & 0xFF)))
+        return ''.join(result)
+
+    def copy(self):
+        """Return a clone object.
+        """
+        clone = RSHA256()
+        clone._copyfrom(self)
+        return clone
+
+
+class RSHA224(RSHA256):
+    """RPython-level SHA-224 object: SHA-256 with other initial values,
+    truncated to 28 bytes.
+    """
+    digest_size = 28
+    _initial_state = SHA224_INIT
+
+    def copy(self):
+        clone = RSHA224()
+        clone._copyfrom(self)
+        return clone
+
+
+# ______________________________________________________________________
+# SHA-384 and SHA-512
+
+def _ror64(x, n):
+    return (x >> n) | (x << (64 - n))
+
+K512 = [r_ulonglong(x) for x in [
+    0x428a2f98d728ae22, 0x7137449123ef65cd, 0xb5c0fbcfec4d3b2f,
+    0xe9b5dba58189dbbc, 0x3956c25bf348b538, 0x59f111f1b605d019,
+    0x923f82a4af194f9b, 0xab1c5ed5da6d8118, 0xd807aa98a3030242,
+    0x12835b0145706fbe, 0x243185be4ee4b28c, 0x550c7dc3d5ffb4e2,
+    0x72be5d74f27b896f, 0x80deb1fe3b1696b1, 0x9bdc06a725c71235,
+    0xc19bf174cf692694, 0xe49b69c19ef14ad2, 0xefbe4786384f25e3,
+    0x0fc19dc68b8cd5b5, 0x240ca1cc77ac9c65, 0x2de92c6f592b0275,
+    0x4a7484aa6ea6e483, 0x5cb0a9dcbd41fbd4, 0x76f988da831153b5,
+    0x983e5152ee66dfab, 0xa831c66d2db43210, 0xb00327c898fb213f,
+    0xbf597fc7beef0ee4, 0xc6e00bf33da88fc2, 0xd5a79147930aa725,
+    0x06ca6351e003826f, 0x142929670a0e6e70, 0x27b70a8546d22ffc,
+    0x2e1b21385c26c926, 0x4d2c6dfc5ac42aed, 0x53380d139d95b3df,
+    0x650a73548baf63de, 0x766a0abb3c77b2a8, 0x81c2c92e47edaee6,
+    0x92722c851482353b, 0xa2bfe8a14cf10364, 0xa81a664bbc423001,
+    0xc24b8b70d0f89791, 0xc76c51a30654be30, 0xd192e819d6ef5218,
+    0xd69906245565a910, 0xf40e35855771202a, 0x106aa07032bbd1b8,
+    0x19a4c116b8d2d0c8, 0x1e376c085141ab53, 0x2748774cdf8eeb99,
+    0x34b0bcb5e19b48a8, 0x391c0cb3c5c95a63, 0x4ed8aa4ae3418acb,
+    0x5b9cca4f7763e373, 0x682e6ff3d6b2b8a3, 0x748f82ee5defb2fc,
+    0x78a5636f43172f60, 0x84c87814a1f0ab72, 0x8cc702081a6439ec,
+    0x90befffa23631e28, 0xa4506cebde82bde9, 0xbef9a3f7b2c67915,
+    0xc67178f2e372532b, 0xca273eceea26619c, 0xd186b8c721c0c207,
+    0xeada7dd6cde0eb1e, 0xf57d4f7fee6ed178, 0x06f067aa72176fba,
+    0x0a637dc5a2c898a6, 0x113f9804bef90dae, 0x1b710b35131c471b,
+    0x28db77f523047d84, 0x32caab7b40c72493, 0x3c9ebe0a15c9bebc,
+    0x431d67c49c100d4c, 0x4cc5d4becb3e42b6, 0x597f299cfc657e2a,
+    0x5fcb6fab3ad6faec, 0x6c44198c4a475817]]
+
+SHA512_INIT = [r_ulonglong(x) for x in [
+    0x6a09e667f3bcc908, 0xbb67ae8584caa73b, 0x3c6ef372fe94f82b,
+    0xa54ff53a5f1d36f1, 0x510e527fade682d1, 0x9b05688c2b3e6c1f,
+    0x1f83d9abfb41bd6b, 0x5be0cd19137e2179]]
+
+SHA384_INIT = [r_ulonglong(x) for x in [
+    0xcbbb9d5dc1059ed8, 0x629a292a367cd507, 0x9159015a3070dd17,
+    0x152fecd8f70e5939, 0x67332667ffc00b31, 0x8eb44a8768581511,
+    0xdb0c2e0d64f98fa7, 0x47b5481dbefa4fa4]]
+
+
+class RSHA512(object):
+    """RPython-level SHA-512 object.
+    """
+    import_from_mixin(_SHA2)
+
+    block_size = 128
+    digest_size = 64
+    _rounds = 80
+    _initial_state = SHA512_INIT
+    _zero = r_ulonglong(0)
+
+    @specialize.argtype(1)
+    def _process(self, data, start):
+        W = self.W
+        for i in range(16):
+            p = start + i * 8
+            x = r_ulonglong(0)
+            for j in range(8):
+                x = (x << 8) | r_ulonglong(_getbyte(data, p + j))
+            W[i] = x
+        self._transform(W)
+
+    def _transform(self, W):
+        for t in range(16, 80):
+            w15 = W[t - 15]
+            w2 = W[t - 2]
+            s0 = _ror64(w15, 1) ^ _ror64(w15, 8) ^ (w15 >> 7)
+            s1 = _ror64(w2, 19) ^ _ror64(w2, 61) ^ (w2 >> 6)
+            W[t] = W[t - 16] + s0 + W[t - 7] + s1
+
+        H = self.H
+        a = H[0]; b = H[1]; c = H[2]; d = H[3]
+        e = H[4]; f = H[5]; g = H[6]; h = H[7]
+        for t in range(80):
+            S1 = _ror64(e, 14) ^ _ror64(e, 18) ^ _ror64(e, 41)
+            ch = (e & f) ^ (~e & g)
+            temp1 = h + S1 + ch + K512[t] + W[t]
+            S0 = _ror64(a, 28) ^ _ror64(a, 34) ^ _ror64(a, 39)
+            maj = (a & b) ^ (a & c) ^ (b & c)
+            temp2 = S0 + maj
+            h = g
+            g = f
+            f = e
+            e = d + temp1
+            d = c
+            c = b
+            b = a
+            a = temp1 + temp2
+        H[0] += a
+        H[1] += b
+        H[2] += c
+        H[3] += d
+        H[4] += e
+        H[5] += f
+        H[6] += g
+        H[7] += h
+
+    def _words2string(self, H):
+        result = []
+        for x in H:
+            for i in range(56, -8, -8):
+                result.append(chr(intmask((x >> i) & 0xFF)))
+        return ''.join(result)
+
+    def copy(self):
+        """Return a clone object.
+        """
+        clone = RSHA512()
+        clone._copyfrom(self)
+        return clone
+
+
+class RSHA384(RSHA512):
+    """RPython-level SHA-384 object: SHA-512 with other initial values,
+    truncated to 48 bytes.
+    """
+    digest_size = 48
+    _initial_state = SHA384_INIT
+
+    def copy(self):
+        clone = RSHA384()
+        clone._copyfrom(self)
+        return clone
+
+
+sha224 = RSHA224
+sha256 = RSHA256
+sha384 = RSHA384
+sha512 = RSHA512
@@ -13,7 +13,7 @@ from rpython.rlib.buffer import LLBuffer
 from rpython.rlib.unroll import unrolling_iterable
 from rpython.rlib.objectmodel import (
     specialize, instantiate, keepalive_until_here)
-from rpython.rlib.rarithmetic import intmask, r_uint, widen
+from rpython.rlib.rarithmetic import intmask, r_uint, widen, ovfcheck, INT_MAX
 from rpython.rlib import rthread, rposix
 from rpython.rtyper.lltypesystem import lltype, rffi
 from rpython.rtyper.lltypesystem.rffi import sizeof, offsetof
@@ -1086,6 +1086,118 @@ class RSocket(object):
                     "ancillary data")
             raise last_error()
 
+    if _c.HAVE_SENDMMSG:
+        @jit.dont_look_inside
+        def recvmmsg(self, count, buffersize, flags=0):
+            """Receive up to 'count' datagrams of at most 'buffersize' bytes
+            each with a single system call.  Blocks until at least one is
+            available.  Returns a list of (data, address) tuples, where
+            address is None if the socket is connected.  Linux only."""
+            if count <= 0 or buffersize < 0:
+                raise RSocketError("invalid count or buffer size")
+            if count > INT_MAX or buffersize > INT_MAX:
+                raise ValueError("count or buffer size too large")
+            addrsize = instantiate_family(self.family).maxlen
+            try:
+                total_bufsize = ovfcheck(count * buffersize)
+                total_addrsize = ovfcheck(count * addrsize)
+            except OverflowError:
+                raise MemoryError
+            self.wait_for_data(False)
+            buf = lltype.malloc(rffi.CCHARP.TO, total_bufsize, flavor='raw')
+            addrs = lltype.nullptr(rffi.CCHARP.TO)
+            lengths = lltype.nullptr(rffi.INTP.TO)
+            addrlens = lltype.nullptr(rffi.INTP.TO)
+            try:
+                addrs = lltype.malloc(rffi.CCHARP.TO, total_addrsize,
+                                      flavor='raw')
+                lengths = lltype.malloc(rffi.INTP.TO, count, flavor='raw')
+                addrlens = lltype.malloc(rffi.INTP.TO, count, flavor='raw')
+                res = _c.recvmmsg(self.fd, count, buf, buffersize,
+                                  addrs, addrsize, flags, lengths, addrlens)
+                res = rffi.cast(lltype.Signed, res)
+                if res < 0:
+                    raise self.error_handler()
+                result = []
+                for i in range(res):
+                    length = min(rffi.cast(lltype.Signed, lengths[i]),
+                                 buffersize)
+                    data = rffi.charpsize2str(
+                        rffi.ptradd(buf, i * buffersize), length)
+                    addrlen = rffi.cast(lltype.Signed, addrlens[i])
+                    if addrlen:
+                        addrptr = rffi.cast(_c.sockaddr_ptr,
+                                            rffi.ptradd(addrs, i * addrsize))
+                        address = make_address(addrptr, addrlen)
+                    else:
+                        address = None
+                    result.append((data, address))
+                return result
+            finally:
+                if addrlens:
+                    lltype.free(addrlens, flavor='raw')
+                if lengths:
+                    lltype.free(lengths, flavor='raw')
+                if addrs:
+                    lltype.free(addrs, flavor='raw')
+                lltype.free(buf, flavor='raw')
+
+        @jit.dont_look_inside
+        def sendmmsg(self, messages, addresses=None, flags=0):
+            """Send each string of the list 'messages' as a separate
+            datagram with a single system call.  If given, 'addresses' is
+            a list of the same length of destination Addresses or None.
+            Returns the number of datagrams sent.  Linux only."""
+            count = len(messages)
+            if addresses is not None and len(addresses) != count:
+                raise RSocketError("messages and addresses differ in length")
+            if count == 0:
+                return 0
+            self.wait_for_data(True)
+            bufs = lltype.malloc(rffi.CCHARPP.TO, count, flavor='raw',
+                                 zero=True)
+            lengths = lltype.nullptr(rffi.SIGNEDP.TO)
+            addrs = lltype.nullptr(rffi.CCHARPP.TO)
+            addrlens = lltype.nullptr(rffi.INTP.TO)
+            locked = 0
+            try:
+                lengths = lltype.malloc(rffi.SIGNEDP.TO, count, flavor='raw')
+                addrs = lltype.malloc(rffi.CCHARPP.TO, count, flavor='raw')
+                addrlens = lltype.malloc(rffi.INTP.TO, count, flavor='raw')
+                for i in range(count):
+                    bufs[i] = rffi.str2charp(messages[i])
+                    lengths[i] = len(messages[i])
+                    address = None
+                    if addresses is not None:
+                        address = addresses[i]
+                    if address is None:
+                        addrs[i] = lltype.nullptr(rffi.CCHARP.TO)
+                        addrlens[i] = rffi.cast(rffi.INT, 0)
+                    else:
+                        addrs[i] = rffi.cast(rffi.CCHARP, address.lock())
+                        addrlens[i] = rffi.cast(rffi.INT, address.addrlen)
+                    locked = i + 1
+                res = _c.sendmmsg(self.fd, count, bufs, lengths, addrs,
+                                  addrlens, flags)
+                res = rffi.cast(lltype.Signed, res)
+            finally:
+                for i in range(count):
+                    if bufs[i]:
+                        lltype.free(bufs[i], flavor='raw')
+                for i in range(locked):
+                    if addresses is not None and addresses[i] is not None:
+                        addresses[i].unlock()
+                if addrlens:
+                    lltype.free(addrlens, flavor='raw')
+                if addrs:
+                    lltype.free(addrs, flavor='raw')
+                if lengths:
+                    lltype.free(lengths, flavor='raw')
+                lltype.free(bufs, flavor='raw')
+            if res < 0:
+                raise self.error_handler()
+            return res
+
     def send_raw(self, dataptr, length, flags=0):
         """Send data from a CCHARP buffer."""
         self.wait_for_data(True)
@@ -2,6 +2,7 @@ import sys
 from rpython.rlib.debug import check_nonneg
 from rpython.rlib.unroll import unrolling_iterable
 from rpython.rlib.rsre import rsre_char, rsre_constants as consts
+from rpython.rlib.rsre.rsre_prefilter import compute_prefilter
 from rpython.tool.sourcetools import func_with_new_name
 from rpython.rlib.objectmodel import we_are_translated, not_rpython
 from rpython.rlib import jit
@@ -51,10 +52,11 @@ class EndOfString(Exception):
     pass
 
 class CompiledPattern(object):
-    _immutable_fields_ = ['pattern[*]', 'flags']
+    _immutable_fields_ = ['pattern[*]', 'flags', 'prefilter']
 
     def __init__(self, pattern, flags):
         self.pattern = pattern
+        self.prefilter = compute_prefilter(pattern)
         if not consts.V37:      # 'flags' is ignored in >=3.7 mode
             self.flags = flags
         # check we don't get the old value of MAXREPEAT
@@ -1301,6 +1303,8 @@ def search_context(ctx, pattern):
         else:
             charset = (flags & consts.SRE_INFO_CHARSET)
         base += 1 + pattern.pat(1)
+    if pattern.prefilter is not None:
+        return prefilter_search(ctx, pattern, base)
     if pattern.pat(base) == consts.OPCODE_LITERAL:
         return literal_search(ctx, pattern, base)
     if charset:
@@ -1365,6 +1369,104 @@ def charset_search(ctx, pattern, base):
         start = ctx.next(start)
     return False
 
+install_jitdriver_spec("PrefilterSearch",
+                       greens=['base', 'pattern'],
+                       reds=['first', 'last', 'cache', 'ctx'],
+                       debugprint=(1, 0))
+@specializectx
+def prefilter_search(ctx, pattern, base):
+    # the pattern requires one of a few literals at a bounded offset from
+    # the start of the match: look for them with a fast substring search,
+    # and only try to match at the start positions compatible with them
+    cache = []
+    try:
+        first, last = prefilter_candidates(ctx, pattern, ctx.match_start,
+                                           cache)
+    except EndOfString:
+        return False
+    while True:
+        ctx.jitdriver_PrefilterSearch.jit_merge_point(ctx=ctx, first=first,
+                last=last, cache=cache, base=base, pattern=pattern)
+        if sre_match(ctx, pattern, base, first, None) is not None:
+            ctx.match_start = first
+            return True
+        if first >= last:
+            try:
+                first, last = prefilter_candidates(ctx, pattern,
+                                                   ctx.next(last), cache)
+            except EndOfString:
+                return False
+        else:
+            first = ctx.next(first)
+
+@specializectx
+def prefilter_candidates(ctx, pattern, start, cache):
+    # return the range of start positions, from 'start' onwards, where a
+    # match can begin given the next occurrence of the literals.  A match
+    # starting outside this range would need another occurrence of a
+    # literal before the found one.
+    prefilter = pattern.prefilter
+    found = find_literals(ctx, prefilter,
+                          ctx.next_n(start, prefilter.min_offset, ctx.end),
+                          cache)
+    last = ctx.prev_n(found, prefilter.min_offset, start)
+    first = start
+    if prefilter.max_offset >= 0:
+        try:
+            first = ctx.prev_n(found, prefilter.max_offset, start)
+        except EndOfString:
+            pass
+    return first, last
+
+@jit.dont_look_inside
+@specializectx
+def find_literals(ctx, prefilter, start, cache):
+    # return the position of the first occurrence of any of the literals
+    # at or after 'start'.  'cache' holds the previous results, so that
+    # we don't search again and again for a literal that is far away
+    found = ctx.end
+    for i in range(len(prefilter.literals)):
+        if i == len(cache):
+            pos = find_literal(ctx, prefilter.literals[i],
+                               prefilter.shifts[i], start)
+            cache.append(pos)
+        else:
+            pos = cache[i]
+            if pos < start:
+                pos = find_literal(ctx, prefilter.literals[i],
+                                   prefilter.shifts[i], start)
+                cache[i] = pos
+        if pos < found:
+            found = pos
+    if found >= ctx.end:
+        raise EndOfString
+    return found
+
+@specializectx
+def find_literal(ctx, literal, shifts, start):
+    # Boyer-Moore-Horspool: compare the last character of the window
+    # first, and skip according to it.  Returns ctx.end if not found.
+    m = len(literal)
+    last = literal[m - 1]
+    try:
+        ptr = ctx.prev(ctx.next_n(start, m, ctx.end))
+        while ptr < ctx.end:
+            char_ord = ctx.str(ptr)
+            if char_ord == last:
+                p = ptr
+                j = m - 2
+                while j >= 0:
+                    p = ctx.prev(p)
+                    if ctx.str(p) != literal[j]:
+                        break
+                    j -= 1
+                if j < 0:
+                    return p
+            ptr = ctx.next_n(ptr, ord(shifts[char_ord & 0xff]), ctx.end)
+    except EndOfString:
+        pass
+    return ctx.end
+
 install_jitdriver_spec('FastSearch',
                        greens=['i', 'prefix_len', 'pattern'],
                        reds=['string_position', 'ctx'],
@@ -0,0 +1,225 @@
+"""
+Analysis of compiled patterns to find literal strings that every match
+must contain.  search_context() uses them to skip quickly over the parts
+of the string where no match can start, instead of trying to match at
+every position.
+"""
+
+from rpython.rlib.rsre import rsre_constants as consts
+from rpython.rlib.rsre.rsre_char import MAXREPEAT
+
+# widths above this are considered unbounded
+MAX_WIDTH = 1 << 28
+
+# don't bother with alternations of more literals than this
+MAX_LITERALS = 8
+
+# a required literal must be at least that long to be worth searching for
+MIN_LITERAL_LENGTH = 2
+
+
+class Prefilter(object):
+    """A set of literals, one of which must appear in every match, at an
+    offset between 'min_offset' and 'max_offset' characters from the start
+    of the match.  'max_offset' is -1 if there is no upper bound."""
+    _immutable_fields_ = ['literals[*]', 'shifts[*]',
+                          'min_offset', 'max_offset']
+
+    def __init__(self, literals, min_offset, max_offset):
+        assert min_offset >= 0
+        self.literals = literals[:]
+        self.shifts = [make_shift_table(literal) for literal in literals]
+        self.min_offset = min_offset
+        self.max_offset = max_offset
+
+
+def make_shift_table(literal):
+    """Boyer-Moore-Horspool table of the distance from the last occurrence
+    of each character to the end of the literal.  The characters are
+    hashed to 256 entries and the distances capped to 255, both of which
+    only make the shifts more conservative."""
+    m = len(literal)
+    shifts = [min(m, 255)] * 256
+    for i in range(m - 1):
+        shifts[literal[i] & 0xff] = min(m - 1 - i, 255)
+    return ''.join([chr(shift) for shift in shifts])
+
+
+def compute_prefilter(code):
+    """Return the best Prefilter for the compiled pattern 'code', or None."""
+    pos = 0
+    if _get(code, 0) == consts.OPCODE_INFO:
+        pos = 1 + _get(code, 1)
+    requirements = []
+    _scan(code, pos, len(code), requirements)
+    best = None
+    best_length = MIN_LITERAL_LENGTH - 1
+    for literals, min_offset, max_offset in requirements:
+        if len(literals) > MAX_LITERALS:
+            continue
+        length = MAX_WIDTH
+        for literal in literals:
+            length = min(length, len(literal))
+        if length > best_length or (length == best_length and
+                                    best is not None and
+                                    len(literals) < len(best.literals)):
+            best = Prefilter(literals, min_offset, max_offset)
+            best_length = length
+    return best
+
+
+def _get(code, index):
+    # also protects against reading past the end of malformed code
+    if 0 <= index < len(code):
+        return code[index]
+    return consts.OPCODE_FAILURE
+
+def _add_min(a, b):
+    return min(a + b, MAX_WIDTH)
+
+def _add_max(a, b):
+    if a < 0 or b < 0 or a + b > MAX_WIDTH:
+        return -1
+    return a + b
+
+def _mul_min(count, width):
+    if width != 0 and count > MAX_WIDTH // width:
+        return MAX_WIDTH
+    return count * width
+
+def _mul_max(count, width):
+    if width < 0 or count >= MAXREPEAT:
+        return -1
+    if width != 0 and count > MAX_WIDTH // width:
+        return -1
+    return count * width
+
+def _is_single_char(op):
+    return (op == consts.OPCODE_NOT_LITERAL or
+            op == consts.OPCODE_LITERAL_IGNORE or
+            op == consts.OPCODE_NOT_LITERAL_IGNORE or
+            op == consts.OPCODE_CATEGORY or
+            consts.eq(op, consts.OPCODE37_LITERAL_LOC_IGNORE) or
+            consts.eq(op, consts.OPCODE37_NOT_LITERAL_LOC_IGNORE) or
+            consts.eq(op, consts.OPCODE37_LITERAL_UNI_IGNORE) or
+            consts.eq(op, consts.OPCODE37_NOT_LITERAL_UNI_IGNORE))
+
+def _is_in(op):
+    return (op == consts.OPCODE_IN or
+            op == consts.OPCODE_IN_IGNORE or
+            consts.eq(op, consts.OPCODE37_IN_LOC_IGNORE) or
+            consts.eq(op, consts.OPCODE37_IN_UNI_IGNORE))
+
+
+def _scan(code, pos, end, requirements):
+    """Return the minimum and maximum width (or -1) of the sequence of
+    opcodes code[pos:end].  If 'requirements' is not None, append to it
+    the runs of literals found in the sequence, as tuples
+    (literals, min_offset, max_offset)."""
+    lo = hi = 0
+    run = []
+    run_lo = run_hi = 0
+    while pos < end:
+        op = _get(code, pos)
+        if op == consts.OPCODE_LITERAL:
+            if not run:
+                run_lo = lo
+                run_hi = hi
+            run.append(_get(code, pos + 1))
+            lo = _add_min(lo, 1)
+            hi = _add_max(hi, 1)
+            pos += 2
+            continue
+        if op == consts.OPCODE_MARK or op == consts.OPCODE_AT:
+            # zero-width: doesn't interrupt the run of literals
+            pos += 2
+            continue
+        if run:
+            if requirements is not None:
+                requirements.append(([run], run_lo, run_hi))
+            run = []
+        #
+        if op == consts.OPCODE_SUCCESS or op == consts.OPCODE_FAILURE:
+            break
+        elif op == consts.OPCODE_ANY or op == consts.OPCODE_ANY_ALL:
+            lo = _add_min(lo, 1)
+            hi = _add_max(hi, 1)
+            newpos = pos + 1
+        elif _is_single_char(op):
+            lo = _add_min(lo, 1)
+            hi = _add_max(hi, 1)
+            newpos = pos + 2
+        elif _is_in(op):
+            # <IN> <skip> set
+            lo = _add_min(lo, 1)
+            hi = _add_max(hi, 1)
+            newpos = pos + 1 + _get(code, pos + 1)
+        elif op == consts.OPCODE_BRANCH:
+            # <BRANCH> <skip> alt1 <JUMP> <skip> <skip> alt2 ... <0>
+            literals = []
+            blo = -1
+            bhi = 0
+            ppos = pos + 1
+            while True:
+                skip = _get(code, ppos)
+                if skip <= 0:
+                    break
+                alo, ahi = _scan(code, ppos + 1, ppos + skip - 2, None)
+                if blo < 0 or alo < blo:
+                    blo = alo
+                if bhi >= 0 and (ahi < 0 or ahi > bhi):
+                    bhi = ahi
+                if literals is not None:
+                    literal = _leading_literal(code, ppos + 1, ppos + skip - 2)
+                    if literal:
+                        literals.append(literal)
+                    else:
+                        literals = None
+                ppos += skip
+            if requirements is not None and literals:
+                requirements.append((literals, lo, hi))
+            lo = _add_min(lo, max(blo, 0))
+            hi = _add_max(hi, bhi)
+            newpos = ppos + 1
+        elif (op == consts.OPCODE_REPEAT_ONE or
+              op == consts.OPCODE_MIN_REPEAT_ONE or
+              op == consts.OPCODE_REPEAT):
+            # <REPEAT_ONE> <skip> <min> <max> item <SUCCESS> tail
+            # <REPEAT> <skip> <min> <max> item <UNTIL> tail
+            skip = _get(code, pos + 1)
+            if op == consts.OPCODE_REPEAT:
+                itemend = pos + 1 + skip
+                newpos = itemend + 1
+            else:
+                itemend = pos + skip
+                newpos = pos + 1 + skip
+            ilo, ihi = _scan(code, pos + 4, itemend, None)
+            lo = _add_min(lo, _mul_min(_get(code, pos + 2), ilo))
+            hi = _add_max(hi, _mul_max(_get(code, pos + 3), ihi))
+        elif op == consts.OPCODE_ASSERT or op == consts.OPCODE_ASSERT_NOT:
+            # <ASSERT> <skip> <back> pattern: zero-width
+            newpos = pos + 1 + _get(code, pos + 1)
+        elif op == consts.OPCODE_GROUPREF:
+            hi = -1
+            newpos = pos + 2
+        else:
+            # GROUPREF_EXISTS or anything unexpected: give up here
+            return lo, -1
+        if newpos <= pos:
+            return lo, -1     # malformed code
+        pos = newpos
+    if run and requirements is not None:
+        requirements.append(([run], run_lo, run_hi))
+    return lo, hi
+
+
+def _leading_literal(code, pos, end):
+    literal = []
+    while pos < end:
+        op = _get(code, pos)
+        if op == consts.OPCODE_LITERAL:
+            literal.append(_get(code, pos + 1))
+        elif op != consts.OPCODE_MARK and op != consts.OPCODE_AT:
+            break
+        pos += 2
+    return literal
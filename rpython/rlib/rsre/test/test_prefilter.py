@@ -0,0 +1,43 @@
+from rpython.rlib.rsre.test.test_match import get_code
+from rpython.rlib.rsre.rsre_prefilter import compute_prefilter
+
+
+def prefilter(regexp):
+    p = compute_prefilter(get_code(regexp).pattern)
+    if p is None:
+        return None
+    literals = [''.join([chr(c) for c in literal]) for literal in p.literals]
+    return sorted(literals), p.min_offset, p.max_offset
+
+def test_no_prefilter():
+    assert prefilter(r'\d+') is None
+    assert prefilter(r'a\d+') is None          # too short
+    assert prefilter(r'(?i)foobar') is None
+    assert prefilter(r'(a+)\1') is None
+
+def test_single_literal():
+    assert prefilter(r'\d+ bytes') == ([' bytes'], 1, -1)
+    assert prefilter(r'\d{2,4}-abc') == (['-abc'], 2, 4)
+    assert prefilter(r'(?:x|yy)ab(c)de') == (['abcde'], 1, 2)
+    assert prefilter(r'\w\w\bfoo') == (['foo'], 2, 2)
+
+def test_longest_literal():
+    assert prefilter(r'ab\d+cdef\w+gh') == (['cdef'], 3, -1)
+
+def test_alternation():
+    assert prefilter(r'x(GET|POST|PUT)\d') == (['GET', 'POST', 'PUT'], 1, 1)
+    assert prefilter(r'(?:foo\d|ba)[xy]') == (['ba', 'foo'], 0, 0)
+    assert prefilter(r'(?:foo|\d)z') is None
+
+def test_stops_at_groupref_exists():
+    assert prefilter(r'(a)?(?(1)b|c)defg') is None
+    assert prefilter(r'abcd(a)?(?(1)b|c)') == (['abcd'], 0, 0)
+
+def test_shift_table():
+    p = compute_prefilter(get_code(r'\d+abcb').pattern)
+    shifts = p.shifts[0]
+    assert len(shifts) == 256
+    assert ord(shifts[ord('a')]) == 3
+    assert ord(shifts[ord('b')]) == 2
+    assert ord(shifts[ord('c')]) == 1
+    assert ord(shifts[ord('z')]) == 4
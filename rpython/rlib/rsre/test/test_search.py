@@ -230,6 +230,42 @@ class BaseTestSearch:
                     #assert match is None # this is only true on cpy2 (but not on pypy2/3 and cpy3)
                     assert res is None
 
+    def test_prefilter_required_literal(self):
+        r_code, r = get_code_and_re(r'\d+ bytes? from (\w+)')
+        assert r_code.prefilter is not None
+        for s in ['received 1024 bytes from host, 1 byte from x',
+                  'no match: 123 byte fro x, bytes from y',
+                  'bytes from 12 byte from 34 bytes from z',
+                  '',
+                  ' bytes from ']:
+            for start in range(len(s) + 1):
+                match = r.search(s, start)
+                res = self.search(r_code, s, start)
+                if match is None:
+                    assert res is None
+                else:
+                    assert res is not None
+                    assert res.span() == (self.P(match.start()),
+                                          self.P(match.end()))
+
+    def test_prefilter_alternation(self):
+        r_code, r = get_code_and_re(r'(GET|POST|PUT) /api/(\w+)')
+        assert r_code.prefilter is not None
+        s = 'GET /index POST /apx PUT /api/users GET /api/items'
+        for start in range(len(s) + 1):
+            match = r.search(s, start)
+            res = self.search(r_code, s, start)
+            if match is None:
+                assert res is None
+            else:
+                assert res.span() == (self.P(match.start()),
+                                      self.P(match.end()))
+        r_code, r = get_code_and_re(r'x*(?:foo|barbaz)')
+        assert r_code.prefilter is not None
+        res = self.search(r_code, 'bar fo xxbarbaz foo')
+        assert res.span() == (self.P(7), self.P(15))
+        assert self.search(r_code, 'bar fo xxbarba') is None
+
 
 class TestSearchCustom(BaseTestSearch):
     search = staticmethod(support.search)
@@ -108,6 +108,10 @@ class TestJitRSre(support.LLJitMixin):
         res = self.meta_interp_search(r"<\w+>", "EIOFWEOXDIWHDOH<FOOBAR>UA")
         assert res == 15
 
+    def test_prefilter_search(self):
+        res = self.meta_interp_search(r"\w+ /api/", "GET /apx GET /api/x")
+        assert res == 9
+
     def test_max_until_1(self):
         res = self.meta_interp_match(r"(ab)*abababababc",
                                      "ababababababababababc")
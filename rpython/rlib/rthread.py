@@ -6,6 +6,7 @@ from rpython.rlib import jit, rgc
 from rpython.rlib.debug import ll_assert
 from rpython.rlib.objectmodel import we_are_translated, specialize
 from rpython.rlib.objectmodel import CDefinedIntSymbolic, not_rpython
+from rpython.rlib.unroll import unrolling_iterable
 from rpython.rtyper.lltypesystem.lloperation import llop
 from rpython.rtyper.tool import rffi_platform
 from rpython.rtyper.extregistry import ExtRegistryEntry
@@ -461,6 +462,21 @@ tlfield_p_errno = ThreadLocalField(rffi.CArrayPtr(rffi.INT), "p_errno",
                                    loop_invariant=True)
 tlfield_rpy_errno = ThreadLocalField(rffi.INT, "rpy_errno")
 tlfield_alt_errno = ThreadLocalField(rffi.INT, "alt_errno")
+# the GIL statistics, updated by the C code; see rgil.GilStats
+tlfields_gil_stats = []
+for _name, _FIELDTYPE in [('acquisitions', lltype.Signed),
+                          ('waits', lltype.Signed),
+                          ('wait_time', lltype.Float),
+                          ('max_wait', lltype.Float),
+                          ('last_wait', lltype.Float),
+                          ('releases', lltype.Signed),
+                          ('yields', lltype.Signed)]:
+    tlfields_gil_stats.append(
+        (_name, _FIELDTYPE, ThreadLocalField(_FIELDTYPE, "gil_" + _name)))
+del _name, _FIELDTYPE
+unroll_tlfields_gil_stats = unrolling_iterable(tlfields_gil_stats)
+tlfield_gil_last_wait = tlfields_gil_stats[4][2]
+assert tlfield_gil_last_wait.fieldname == "gil_last_wait"
 _win32 = (sys.platform == "win32")
 if _win32:
     from rpython.rlib import rwin32
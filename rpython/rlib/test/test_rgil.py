@@ -160,6 +160,58 @@ class BaseTestGIL(StandaloneTests):
         data = cbuilder.cmdexec('')
         assert data == "OK\n"
 
+    def test_thread_stats(self):
+        import time
+        from rpython.rlib import rthread
+        from rpython.tool.udir import udir
+
+        class State:
+            pass
+        state = State()
+
+        def find_my_stats():
+            for stats in rgil.get_thread_stats():
+                if stats.thread_ident == rthread.get_ident():
+                    return stats
+            raise AssertionError
+
+        def bootstrap():
+            rthread.gc_thread_start()
+            for i in range(100):
+                for j in range(100000):
+                    pass
+                rgil.yield_thread()
+            state.yields += find_my_stats().yields
+            state.count += 1
+            rthread.gc_thread_die()
+
+        def main(argv):
+            state.count = 0
+            state.yields = 0
+            rthread.start_new_thread(bootstrap, ())
+            rthread.start_new_thread(bootstrap, ())
+            while state.count < 2:
+                time.sleep(0.01)      # releases the GIL
+            stats = find_my_stats()
+            assert stats.releases >= 1
+            assert stats.acquisitions >= stats.releases
+            assert stats.waits >= 1
+            assert stats.wait_time >= stats.max_wait > 0.0
+            assert state.yields >= 1
+            print "OK"
+            return 0
+
+        self.config = get_combined_translation_config(
+            overrides={"translation.thread": True})
+        t, cbuilder = self.compile(main)
+        path = udir.join('test_rgil_thread_stats.log')
+        data = cbuilder.cmdexec('', env={'PYPYLOG': 'gil-:%s' % path})
+        assert data == "OK\n"
+        log = path.read()
+        assert '{gil-wait' in log
+        assert '{gil-yield' in log
+        assert ' waited ' in log
+
 
 class TestGILShadowStack(BaseTestGIL):
     gc = 'minimark'
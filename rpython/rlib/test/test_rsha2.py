@@ -0,0 +1,81 @@
+import hashlib, random
+from rpython.rlib import rsha2
+from rpython.rlib.buffer import StringBuffer, SubBuffer
+
+
+ALGORITHMS = [('sha224', rsha2.RSHA224), ('sha256', rsha2.RSHA256),
+              ('sha384', rsha2.RSHA384), ('sha512', rsha2.RSHA512)]
+
+class TestSHA2:
+    def check(self, data):
+        for name, cls in ALGORITHMS:
+            expected = hashlib.new(name, data)
+            d = cls(data)
+            assert d.hexdigest() == expected.hexdigest()
+            assert d.digest() == expected.digest()
+            assert len(d.digest()) == cls.digest_size
+
+    def test_vectors(self):
+        assert rsha2.sha256("abc").hexdigest() == (
+            "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad")
+        assert rsha2.sha512("abc").hexdigest() == (
+            "ddaf35a193617abacc417349ae20413112e6fa4e89a97ea20a9eeee64b55d39a"
+            "2192992a274fc1a836ba3c23a3feebbd454d4423643ce80e2a9ac94fa54ca49f")
+
+    def test_lengths(self):
+        # around the block boundaries, where the padding spills over
+        for length in [0, 1, 55, 56, 63, 64, 65, 111, 112, 119, 127, 128,
+                       129, 200, 256]:
+            self.check("x" * length)
+
+    def test_update(self):
+        for name, cls in ALGORITHMS:
+            for repeat in [1, 10, 100]:
+                d = cls()
+                expected = hashlib.new(name)
+                for i in range(repeat):
+                    d.update("abc" * i)
+                    expected.update("abc" * i)
+                    assert d.hexdigest() == expected.hexdigest()
+
+    def test_copy(self):
+        for name, cls in ALGORITHMS:
+            for repeat in [1, 10, 100]:
+                d1 = cls("abc" * repeat)
+                d2 = d1.copy()
+                assert type(d2) is cls
+                d1.update("def" * repeat)
+                d2.update("gh" * repeat)
+                assert d1.digest() == hashlib.new(
+                    name, "abc" * repeat + "def" * repeat).digest()
+                assert d2.digest() == hashlib.new(
+                    name, "abc" * repeat + "gh" * repeat).digest()
+
+    def test_buffer(self):
+        data = ''.join([chr(random.randrange(256)) for i in range(1000)])
+        for name, cls in ALGORITHMS:
+            d = cls("abc")
+            d.update(StringBuffer(data))
+            d.update(SubBuffer(StringBuffer(data), 10, 500))
+            expected = hashlib.new(name, "abc" + data + data[10:510])
+            assert d.hexdigest() == expected.hexdigest()
+
+    def test_random(self):
+        for i in range(10):
+            input = ''.join([chr(random.randrange(256))
+                             for i in range(random.randrange(1000))])
+            self.check(input)
+
+def test_rtyped():
+    from rpython.rtyper.test.test_llinterp import interpret
+    def f(n):
+        data = "abc" * n
+        d1 = rsha2.RSHA224(data)
+        d1.update(StringBuffer(data))
+        d2 = rsha2.RSHA384(data)
+        d2.update(StringBuffer(data))
+        return d1.hexdigest() + d2.copy().hexdigest()
+    res = interpret(f, [50])
+    data = "abc" * 100
+    assert ''.join(res.chars) == (hashlib.sha224(data).hexdigest() +
+                                  hashlib.sha384(data).hexdigest())
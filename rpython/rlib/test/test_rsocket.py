@@ -786,6 +786,33 @@ def test_msg_trunc_weirdness_linux():
     result = b.recv(2, socket.MSG_TRUNC)
     assert result == b'ab'
 
+@pytest.mark.skipif(not rsocket._c.HAVE_SENDMMSG,
+        reason='recvmmsg/sendmmsg are linux specific')
+def test_sendmmsg_recvmmsg():
+    s1 = RSocket(AF_INET, SOCK_DGRAM)
+    s1.bind(INETAddress('127.0.0.1', INADDR_ANY))
+    addr1 = s1.getsockname()
+    s2 = RSocket(AF_INET, SOCK_DGRAM)
+    s2.bind(INETAddress('127.0.0.1', INADDR_ANY))
+    addr2 = s2.getsockname()
+    messages = ['a', 'bcd', '', 'x' * 50]
+    assert s2.sendmmsg(messages, [addr1] * 4) == 4
+    result = s1.recvmmsg(10, 20)
+    assert [data for data, addr in result] == ['a', 'bcd', '', 'x' * 20]
+    for data, addr in result:
+        assert addr.get_port() == addr2.get_port()
+    # connected socket, no addresses
+    s2.connect(addr1)
+    assert s2.sendmmsg(['1', '22']) == 2
+    result = s1.recvmmsg(1, 10)
+    assert [data for data, addr in result] == ['1']
+    assert s1.recvmmsg(5, 10)[0][0] == '22'
+    if sys.maxint > INT_MAX:
+        py.test.raises(ValueError, s1.recvmmsg, INT_MAX + 1, 10)
+        py.test.raises(ValueError, s1.recvmmsg, 10, INT_MAX + 1)
+    s1.close()
+    s2.close()
+
 def test_if_nameindex():
     nameindex = rsocket.if_nameindex()
     assert len(nameindex) > 0
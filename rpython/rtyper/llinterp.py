@@ -930,6 +930,18 @@ class LLFrame(object):
     def op_gc_set_max_heap_size(self, maxsize):
         raise NotImplementedError("gc_set_max_heap_size")
 
+    def op_gc_get_param(self, param_no):
+        return self.heap.get_gc_param(param_no)
+
+    def op_gc_check_param(self, param_no, value):
+        return self.heap.check_gc_param(param_no, value)
+
+    def op_gc_set_param(self, param_no, value):
+        return self.heap.set_gc_param(param_no, value)
+
+    def op_gc_get_alloc_profile(self):
+        raise NotImplementedError("gc_get_alloc_profile")
+
     def op_gc_stack_bottom(self):
         # Marker when we enter RPython code from C code.  It used to be
         # essential for trackgcroot.py.  Nowaways it is mostly unused,
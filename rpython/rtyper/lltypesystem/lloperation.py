@@ -493,6 +493,10 @@ LL_OPERATIONS = {
     'gc_id':                LLOp(sideeffects=False, canmallocgc=True),
     'gc_obtain_free_space': LLOp(revdb_protect=True),
     'gc_set_max_heap_size': LLOp(revdb_protect=True),
+    'gc_get_param':         LLOp(),
+    'gc_check_param':       LLOp(),
+    'gc_set_param':         LLOp(canmallocgc=True, revdb_protect=True),
+    'gc_get_alloc_profile': LLOp(canmallocgc=True),
     'gc_can_move'         : LLOp(sideeffects=False),
     'gc_thread_run'       : LLOp(),
     'gc_thread_start'     : LLOp(),
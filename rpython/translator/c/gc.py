@@ -52,6 +52,15 @@ class BasicGcPolicy(object):
     def OP_GC_SET_MAX_HEAP_SIZE(self, funcgen, op):
         return ''
 
+    def OP_GC_GET_PARAM(self, funcgen, op):
+        return '%s = -1.0;' % (funcgen.expr(op.result),)
+
+    def OP_GC_CHECK_PARAM(self, funcgen, op):
+        return '%s = 0;' % (funcgen.expr(op.result),)
+
+    def OP_GC_SET_PARAM(self, funcgen, op):
+        return '%s = 0;' % (funcgen.expr(op.result),)
+
     def OP_GC_THREAD_PREPARE(self, funcgen, op):
         return ''
 
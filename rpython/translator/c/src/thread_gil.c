@@ -120,6 +120,9 @@ void RPyGilAcquireSlowPath(void)
     if (1) {      /* preserve commit history */
         int n;
         Signed old_waiting_threads;
+#ifdef RPY_TLOFS_gil_acquisitions
+        double wait_start = rpy_gil_clock();
+#endif
 
         if (rpy_waiting_threads < 0) {
             /* <arigo> I tried to have RPyGilAllocate() called from
@@ -228,6 +231,22 @@ void RPyGilAcquireSlowPath(void)
         atomic_decrement(&rpy_waiting_threads);
         mutex2_loop_stop(&mutex_gil);
         mutex1_unlock(&mutex_gil_stealer);
+
+#ifdef RPY_TLOFS_gil_acquisitions
+        {
+            /* we hold the GIL again: record how long we waited.  Without
+               __thread, 'p' is NULL in a thread without thread-locals */
+            struct pypy_threadlocal_s *p = RPY_GIL_STATS();
+            if (p != NULL) {
+                double wait = rpy_gil_clock() - wait_start;
+                p->gil_waits++;
+                p->gil_wait_time += wait;
+                p->gil_last_wait = wait;
+                if (wait > p->gil_max_wait)
+                    p->gil_max_wait = wait;
+            }
+        }
+#endif
     }
     assert(RPY_FASTGIL_LOCKED(rpy_fastgil));
 }
@@ -252,6 +271,7 @@ Signed RPyGilYieldThread(void)
        unlikely, because we tested above that 'rpy_waiting_threads > 0'.
      */
     RPyGilAcquire();
+    RPY_GIL_COUNT(gil_yields);
     return 1;
 }
 
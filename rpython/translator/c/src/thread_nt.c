@@ -303,4 +303,18 @@ static INLINE void mutex1_unlock(mutex1_t *mutex) {
 #endif
 #define RPy_CompilerMemoryBarrier()    _ReadWriteBarrier()
 
+static double rpy_gil_clock(void)
+{
+    /* monotonic clock in seconds, used only for the GIL statistics */
+    static double ticks_per_second = 0.0;
+    LARGE_INTEGER t;
+    if (ticks_per_second == 0.0) {
+        LARGE_INTEGER freq;
+        QueryPerformanceFrequency(&freq);
+        ticks_per_second = (double)freq.QuadPart;
+    }
+    QueryPerformanceCounter(&t);
+    return (double)t.QuadPart / ticks_per_second;
+}
+
 #include "src/thread_gil.c"
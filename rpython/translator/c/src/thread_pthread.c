@@ -606,4 +606,18 @@ static inline int mutex2_lock_timeout(mutex2_t *mutex, double delay) {
 #  define RPy_YieldProcessor()   /* nothing */
 #endif
 
+static inline double rpy_gil_clock(void)
+{
+    /* monotonic clock in seconds, used only for the GIL statistics */
+#ifdef CLOCK_MONOTONIC
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return t.tv_sec + t.tv_nsec * 1e-9;
+#else
+    struct timeval tv;
+    RPY_GETTIMEOFDAY(&tv);
+    return tv.tv_sec + tv.tv_usec * 1e-6;
+#endif
+}
+
 #include "src/thread_gil.c"
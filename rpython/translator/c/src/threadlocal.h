@@ -150,6 +150,23 @@ static INLINE Signed _rpygil_get_my_ident(void)
 #endif
 }
 
+/* The per-thread GIL statistics are only maintained if the RPython
+   program reads them, which declares the thread-local fields; see
+   rgil.get_thread_stats().  Note that a thread releases the GIL for the
+   last time after RPython_ThreadLocals_ThreadDie(). */
+#ifdef RPY_TLOFS_gil_acquisitions
+#  define RPY_GIL_STATS()                                               \
+    ((struct pypy_threadlocal_s *)_RPy_ThreadLocals_Get())
+#  define RPY_GIL_COUNT(field)                                          \
+    do {                                                                \
+        struct pypy_threadlocal_s *_tl = RPY_GIL_STATS();               \
+        if (_tl != NULL)                                                \
+            _tl->field++;                                               \
+    } while (0)
+#else
+#  define RPY_GIL_COUNT(field)   /* nothing */
+#endif
+
 static INLINE Signed _rpygil_acquire_fast_path(void)
 {
     return pypy_compare_and_swap(&rpy_fastgil, 0, _rpygil_get_my_ident());
@@ -159,9 +176,11 @@ static INLINE void _RPyGilAcquire(void) {
     /* see thread_gil.c point (5) */
     if (!_rpygil_acquire_fast_path())
         RPyGilAcquireSlowPath();
+    RPY_GIL_COUNT(gil_acquisitions);
 }
 static INLINE void _RPyGilRelease(void) {
     assert(RPY_FASTGIL_LOCKED(rpy_fastgil));
+    RPY_GIL_COUNT(gil_releases);
     pypy_lock_release(&rpy_fastgil);
 }
 static INLINE Signed *_RPyFetchFastGil(void) {